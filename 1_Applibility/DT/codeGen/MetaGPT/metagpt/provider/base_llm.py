@@ -24,7 +24,7 @@ from tenacity import (
 
 from metagpt.configs.llm_config import LLMConfig
 from metagpt.const import LLM_API_TIMEOUT, USE_CONFIG_TIMEOUT
-from metagpt.logs import logger
+from metagpt.logs import log_llm_stream, logger
 from metagpt.schema import Message
 from metagpt.utils.common import log_and_reraise
 from metagpt.utils.cost_manager import CostManager, Costs
@@ -250,7 +250,6 @@ class BaseLLM(ABC):
         model = getattr(self.config, "model", None) or getattr(self, "model", "Qwen/Qwen2.5-Coder-32B-Instruct")
         base_url = (getattr(self.config, "base_url", None) or "http://127.0.0.1:8000/v1").rstrip("/")
         api_key = getattr(self.config, "api_key", None) or "EMPTY"
-        # 你如果未来要支持流式，可在此根据 stream 加 payload["stream"]=True 并按 SSE 解析
         url = f"{base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -269,14 +268,25 @@ class BaseLLM(ABC):
         cfg_xargs = getattr(self.config, "xargs", None)
         if isinstance(cfg_xargs, dict):
             _deep_merge(payload, cfg_xargs)
-        
+        if stream:
+            payload["stream"] = True
+
         # 使用 MetaGPT 原有的超时获取逻辑
         client_timeout = self.get_timeout(timeout)
 
         async with httpx.AsyncClient(timeout=client_timeout) as client:
-            resp = await client.post(url, json=payload, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
+            if payload.get("stream"):
+                async with client.stream("POST", url, json=payload, headers=headers) as resp:
+                    resp.raise_for_status()
+                    if resp.headers.get("content-type", "").startswith("text/event-stream"):
+                        data = await self._collect_sse_choices(resp)
+                    else:
+                        # 服务端不支持流式时直接返回完整 JSON
+                        data = json.loads(await resp.aread())
+            else:
+                resp = await client.post(url, json=payload, headers=headers)
+                resp.raise_for_status()
+                data = resp.json()
 
         # 维持原行为：把“原始响应对象”传给解析函数
         if payload["parallel"]:
@@ -284,6 +294,32 @@ class BaseLLM(ABC):
         else:
             return self.get_choice_text_local(data, 0), self.get_choice_text_local(data, 0)
 
+    async def _collect_sse_choices(self, resp) -> dict:
+        """把 SSE 增量块按 choice index 拼回与非流式一致的响应结构（含末块的 wm_detection）"""
+        choices: dict[int, dict] = {}
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            body = line[len("data:") :].strip()
+            if body == "[DONE]":
+                break
+            chunk = json.loads(body)
+            if "error" in chunk:
+                raise ConnectionError(f"stream error: {chunk['error']}")
+            for c in chunk.get("choices", []):
+                choice = choices.setdefault(
+                    c["index"], {"index": c["index"], "message": {"role": "assistant", "content": ""}}
+                )
+                content = c.get("delta", {}).get("content")
+                if content:
+                    choice["message"]["content"] += content
+                    log_llm_stream(content)
+                for k, v in c.items():
+                    if k not in ("index", "delta") and v is not None:
+                        choice[k] = v
+        log_llm_stream("\n")
+        return {"choices": [choices[i] for i in sorted(choices)]}
+
     def get_choice_text(self, rsp: dict) -> str:
         """Required to provide the first text of choice"""
         return rsp.get("choices")[0]["message"]["content"]
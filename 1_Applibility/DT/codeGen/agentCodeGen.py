@@ -181,129 +181,163 @@ async def _run_actions_manually(company: Team, eng: Engineer, actions: List[Writ
         except Exception as e:
             print(">> error: save src failed:", e)
 
-async def codeGen(project_name: str, xargs:dict[str, Any]):
-    PROJECT_PATH = Path(f"/home/zhaorz/project/CodeWM/MetaGPT/workspace/{project_name}").resolve()
-    RECOVER_ROOT = Path("/home/zhaorz/project/CodeWM/MetaGPT/workspace/storage/team").resolve()
-    PROJECT_HINT = project_name  # 你的项目前缀（按你的目录命名习惯调整）
-    
-    # 1) 用与你原先创建快照一致的配置载入上下文
-    local_vllm = Config.default() 
-    local_vllm.update_via_cli(str(PROJECT_PATH), project_name=PROJECT_HINT, inc=False, reqa_file="", max_auto_summarize_code=0)
-    ctx = Context(config=local_vllm)
-    ctx.config.inc = False
-
-    # 2) 精确指向“某一次运行”的快照目录（不是根目录）
-    RECOVER = RECOVER_ROOT
-    print(">> recovering from:", RECOVER)
-
-    # 不再依赖 Team.deserialize 的 Engineer；只用 team.json 取 code_todos
-    print(">> team.json exists:", (RECOVER / "team.json").exists(), "path:", RECOVER / "team.json")
+WORKSPACE_ROOT = Path("/home/zhaorz/project/CodeWM/MetaGPT/workspace")
 
-    # --- 新建最小可用的 Context.repo/git_repo/src_workspace ---
-    PROJECT_PATH.mkdir(parents=True, exist_ok=True)
-    # 约定 src_workspace：与 MetaGPT 一致，workdir/name 结构
-    src_workspace = PROJECT_PATH / PROJECT_PATH.name
-    src_workspace.mkdir(parents=True, exist_ok=True)
-    docs_sd = PROJECT_PATH / "docs/system_design"; docs_sd.mkdir(parents=True, exist_ok=True)
-    docs_task = PROJECT_PATH / "docs/task"; docs_task.mkdir(parents=True, exist_ok=True)
-    resources_dir = PROJECT_PATH / "resources"; resources_dir.mkdir(parents=True, exist_ok=True)
+class CodeGenWorker:
+    """
+    常驻代码生成 worker：配置（Config.default）、team.json 快照中的 code_todos、Engineer 及其 WriteCode 动作
+    只构造一次（按项目缓存），之后每个 (project_name, xargs) 任务只重建轻量的 Context/仓库句柄，
+    并替换水印参数（xargs）与动作的 i_context。
+    - team.json 的 (size, mtime_ns) 变化时自动重新读取并重建动作
+    - 同一 worker 内任务串行；多个 worker（各自的 workspace_root）可以并发生成
+    """
 
-    try:
-        git_repo = GitRepository(str(PROJECT_PATH))
-    except TypeError:
-        git_repo = GitRepository(workdir=str(PROJECT_PATH))
-    ctx.git_repo = git_repo
-    ctx.repo = ProjectRepo(git_repo)
-    ctx.src_workspace = src_workspace
-    print(">> ctx.git_repo.workdir =", getattr(ctx.git_repo, "workdir", None))
+    def __init__(self, workspace_root: Path = WORKSPACE_ROOT, recover_root: Path = None):
+        self.workspace_root = Path(workspace_root).resolve()
+        # 精确指向“某一次运行”的快照目录（不是根目录）
+        self.recover_root = Path(recover_root or self.workspace_root / "storage/team").resolve()
+        self._base_config = Config.default()
+        self._team_stat = None
+        self._code_todos: List[dict] = []
+        self._projects: dict = {}
+        self._lock = asyncio.Lock()
 
-    # --- 读取 team.json 中的 code_todos（直接作为权威来源）---
-    team_json = RECOVER / "team.json"
-    with team_json.open("r", encoding="utf-8") as f:
-        team_obj = json.load(f)
-    roles_obj = ((team_obj or {}).get("env") or {}).get("roles") or {}
-    eng_obj = roles_obj.get("Engineer") or roles_obj.get("engineer") or {}
-    code_todos_raw = list(eng_obj.get("code_todos") or [])
-    if not code_todos_raw:
-        raise RuntimeError("team.json 中 Engineer.code_todos 为空，无法继续。")
+    def _load_team(self):
+        """读取 team.json 中的 code_todos（直接作为权威来源）；文件未变化时复用上次结果"""
+        team_json = self.recover_root / "team.json"
+        st = team_json.stat()
+        if self._team_stat == (st.st_size, st.st_mtime_ns):
+            return
+        print(">> recovering from:", self.recover_root)
+        with team_json.open("r", encoding="utf-8") as f:
+            team_obj = json.load(f)
+        roles_obj = ((team_obj or {}).get("env") or {}).get("roles") or {}
+        eng_obj = roles_obj.get("Engineer") or roles_obj.get("engineer") or {}
+        code_todos = [td for td in (eng_obj.get("code_todos") or []) if isinstance(td, dict)]
+        if not code_todos:
+            raise RuntimeError("team.json 中 Engineer.code_todos 为空，无法继续。")
+        self._code_todos = code_todos
+        self._team_stat = (st.st_size, st.st_mtime_ns)
+        # 动作由 code_todos 实例化，快照变化后需要重建
+        self._projects.clear()
 
-    # --- 仅为兼容 _run_actions_manually 的签名，构造一个简易 company stub ---
-    company_stub = SimpleNamespace(context=ctx, env=None)
-    
-    # 3) 新建一个“干净”的 Engineer，绑定 LLM/Context（不反序列化）
-    eng = Engineer(config=local_vllm)
-    eng.config = ctx.config
-    eng.context = ctx
-    eng.llm.config.__dict__["xargs"] = xargs
-    # 进一步确保角色层也关闭增量模式
-    # try: eng.config.inc = False
-    # except Exception: pass
+    def _project(self, project_name: str):
+        """按项目缓存 (config, Engineer, [(WriteCode, Document)])"""
+        if project_name in self._projects:
+            return self._projects[project_name]
+        PROJECT_PATH = (self.workspace_root / project_name).resolve()
 
-    # 4) 定位 Engineer，切换到 BY_ORDER，并用 set_actions 设置待执行动作
-    # 若反序列化后 code_todos 为空：先从 RECOVER/team.json 回填；若仍为空再尝试 docs/* 重建
-    code_todos = code_todos_raw  # 直接使用快照里的待办列表
-    
-    try:
-        from metagpt.const import ReActMode
-        eng._set_react_mode(ReActMode.BY_ORDER)
-    except Exception:
-        eng._set_react_mode(react_mode="by_order")
+        # 1) 用与你原先创建快照一致的配置载入上下文（每个项目一份独立副本，xargs 挂在其 llm 配置上）
+        try:
+            config = self._base_config.model_copy(deep=True)
+        except Exception:
+            config = Config.default()
+        config.update_via_cli(str(PROJECT_PATH), project_name=project_name, inc=False, reqa_file="", max_auto_summarize_code=0)
+        config.inc = False
+        ctx = Context(config=config)
 
-    # 将 code_todos 显式实例化为 WriteCode() 动作并注入（带上 i_context/prefix/desc）
-    actions = []
-    for td in code_todos:
-        if td is None:
-            continue
-        if not isinstance(td, dict):
-            continue
-        # 用 schema.Document 还原 i_context（更稳，不用裸 dict）
-        i_ctx_dict = td.get("i_context") or {}
-        doc = Document(**i_ctx_dict)
-        act = WriteCode(i_context=doc, context=ctx, llm=eng.llm)
-        # 同步 prefix/desc（可选）
-        if "prefix" in td: setattr(act, "prefix", td.get("prefix", ""))
-        if "desc" in td:   setattr(act, "desc", td.get("desc", ""))
-        actions.append(act)
-    if not actions:
-        raise RuntimeError("Engineer.code_todos 为空或格式异常，无法生成 WriteCode 动作。")
-    # 可选：仅用于日志显示，不依赖 Team 调度
-    try:
-        eng.set_actions(actions)
-        setattr(eng, "enabled", True)
-    except Exception:
-        pass
+        # 2) 新建一个“干净”的 Engineer，绑定 LLM/Context（不反序列化）
+        eng = Engineer(config=config)
+        eng.config = ctx.config
+        eng.context = ctx
+        try:
+            from metagpt.const import ReActMode
+            eng._set_react_mode(ReActMode.BY_ORDER)
+        except Exception:
+            eng._set_react_mode(react_mode="by_order")
 
-    # 显式复位运行指针到动作起点（不同版本字段名略有出入，能设就设）
-    if hasattr(eng, "rc"):
+        # 3) 将 code_todos 显式实例化为 WriteCode() 动作（带上 i_context/prefix/desc）
+        actions = []
+        for td in self._code_todos:
+            # 用 schema.Document 还原 i_context（更稳，不用裸 dict）
+            doc = Document(**(td.get("i_context") or {}))
+            act = WriteCode(i_context=doc.model_copy(), context=ctx, llm=eng.llm)
+            # 同步 prefix/desc（可选）
+            if "prefix" in td: setattr(act, "prefix", td.get("prefix", ""))
+            if "desc" in td:   setattr(act, "desc", td.get("desc", ""))
+            actions.append((act, doc))
+        if not actions:
+            raise RuntimeError("Engineer.code_todos 为空或格式异常，无法生成 WriteCode 动作。")
+        # 可选：仅用于日志显示，不依赖 Team 调度
         try:
-            # 尽量多复位几个常见字段名
-            for k, v in [
-                ("cur_action_idx", 0),
-                ("state", 0),                # -1(未入场) -> 0(准备执行)
-                ("reacted_cnt", 0),
-                ("cur_action", None),
-            ]:
-                if hasattr(eng.rc, k):
-                    setattr(eng.rc, k, v)
+            eng.set_actions([act for act, _ in actions])
+            setattr(eng, "enabled", True)
         except Exception:
             pass
+        self._projects[project_name] = (config, eng, actions)
+        return self._projects[project_name]
 
-    # 5) 观察当前断点
-    code_todos = code_todos or []
-    print("eng.code_todos:", [
-        (td.get("i_context", {}) if isinstance(td, dict) else {}).get("filename")
-        for td in code_todos
-    ])
-    print(">> ready, ctx.git_repo.workdir =", getattr(getattr(ctx, "git_repo", None), "workdir", None))
-    
-    # 6) 不依赖 Team 调度，直接手动逐个执行动作（最稳妥）
-    await _run_actions_manually(
-        # 传入我们构造的最小 company_stub（只需要 .context / .env）
-        company_stub,
-        eng,
-        actions
-    )
-    print(">> [manual] all WriteCode actions finished.")
+    async def run(self, project_name: str, xargs: dict[str, Any]):
+        async with self._lock:
+            self._load_team()
+            config, eng, actions = self._project(project_name)
+            PROJECT_PATH = (self.workspace_root / project_name).resolve()
+
+            # --- 每次重建最小可用的 Context.repo/git_repo/src_workspace（工作区在两次任务之间会被重置）---
+            PROJECT_PATH.mkdir(parents=True, exist_ok=True)
+            # 约定 src_workspace：与 MetaGPT 一致，workdir/name 结构
+            src_workspace = PROJECT_PATH / PROJECT_PATH.name
+            src_workspace.mkdir(parents=True, exist_ok=True)
+            docs_sd = PROJECT_PATH / "docs/system_design"; docs_sd.mkdir(parents=True, exist_ok=True)
+            docs_task = PROJECT_PATH / "docs/task"; docs_task.mkdir(parents=True, exist_ok=True)
+            resources_dir = PROJECT_PATH / "resources"; resources_dir.mkdir(parents=True, exist_ok=True)
+
+            ctx = Context(config=config)
+            try:
+                git_repo = GitRepository(str(PROJECT_PATH))
+            except TypeError:
+                git_repo = GitRepository(workdir=str(PROJECT_PATH))
+            ctx.git_repo = git_repo
+            ctx.repo = ProjectRepo(git_repo)
+            ctx.src_workspace = src_workspace
+            print(">> ctx.git_repo.workdir =", getattr(ctx.git_repo, "workdir", None))
+
+            # --- 只替换每次任务可变的状态：Context、水印参数、动作的 i_context ---
+            eng.context = ctx
+            eng.llm.config.__dict__["xargs"] = xargs
+            for act, doc in actions:
+                act.i_context = doc.model_copy()
+                act.context = ctx
+
+            # 显式复位运行指针到动作起点（不同版本字段名略有出入，能设就设）
+            if hasattr(eng, "rc"):
+                try:
+                    # 尽量多复位几个常见字段名
+                    for k, v in [
+                        ("cur_action_idx", 0),
+                        ("state", 0),                # -1(未入场) -> 0(准备执行)
+                        ("reacted_cnt", 0),
+                        ("cur_action", None),
+                    ]:
+                        if hasattr(eng.rc, k):
+                            setattr(eng.rc, k, v)
+                except Exception:
+                    pass
+
+            # 观察当前断点
+            print("eng.code_todos:", [doc.filename for _, doc in actions])
+            print(">> ready, ctx.git_repo.workdir =", getattr(getattr(ctx, "git_repo", None), "workdir", None))
+
+            # 不依赖 Team 调度，直接手动逐个执行动作（最稳妥）
+            await _run_actions_manually(
+                # 传入我们构造的最小 company_stub（只需要 .context / .env）
+                SimpleNamespace(context=ctx, env=None),
+                eng,
+                [act for act, _ in actions]
+            )
+            print(">> [manual] all WriteCode actions finished.")
+
+# 进程内默认 worker：批量脚本反复调用 codeGen 时复用；CODEGEN_WORKER=0 则每次新建（等同旧行为）
+_WORKER = None
+
+async def codeGen(project_name: str, xargs:dict[str, Any]):
+    global _WORKER
+    if os.environ.get("CODEGEN_WORKER", "1") == "0":
+        await CodeGenWorker().run(project_name, xargs)
+        return
+    if _WORKER is None:
+        _WORKER = CodeGenWorker()
+    await _WORKER.run(project_name, xargs)
 
 if __name__ == "__main__":
     project_name = "tiny_calculator"
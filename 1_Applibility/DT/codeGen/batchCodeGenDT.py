@@ -20,11 +20,17 @@ os.environ["no_proxy"] = os.environ["NO_PROXY"]  # 兼容小写
 #=====================================基础环境配置=====================================#
 
 import shutil
+import hashlib
 import subprocess
 from pathlib import Path
 from agentCodeGen import codeGen, make_seed
 from decimal import Decimal
 import asyncio
+from concurrent.futures import CancelledError, Future, FIRST_COMPLETED, wait
+from dtPool import DTPool
+from depStore import ensure_dep_set
+from workspace import Workspace
+from detection_eval import find_detres_files, extract_metric_from_detres
 # 自动化批量生成脚本
 def read_file(path: Union[str, Path], encoding: str = "utf-8", errors: str = "strict") -> str:
     """读取文本文件内容并返回字符串。"""
@@ -276,6 +282,101 @@ def get_postfix(LANG: str) -> str:
     else:
         raise ValueError(f"不支持的编程语言：{LANG}")
 
+# docker test 结果缓存：同一份代码（跨 wmS、跨 seed、非相邻重复）只在容器里构建/运行一次
+# - 键：规范化源码 + 同目录 pom.xml + 语言 + 测试脚本内容及其可调环境变量 的 sha256
+# - 值：test 脚本返回码 + 本次产生的 DTResults/ 目录；命中时原样恢复，不进容器
+# - 只缓存确定性的结果：成功（返回码 0），或日志中出现 COMPILATION ERROR 的失败；
+#   容器未启动、依赖下载失败、编译服务中途断开（返回码 DT_RC_DAEMON_LOST）等环境问题不缓存
+# - DT_CACHE=0 关闭；DT_CACHE_DIR 指定缓存目录（默认 ~/.cache/codewm_dt）
+DT_CACHE = os.environ.get("DT_CACHE", "1") != "0"
+DT_CACHE_DIR = Path(os.environ.get("DT_CACHE_DIR", "~/.cache/codewm_dt")).expanduser()
+# test_podman.sh 中编译服务未返回结果时的退出码（DAEMON_LOST_RC）
+DT_RC_DAEMON_LOST = 75
+DT_CACHE_ENV_KEYS = ("CTR_NAME", "EXTRA_MVN_ARGS", "EXTRA_JAVA_ARGS", "TIME_LIMIT", "KILL_AFTER", "DT_DEP_STORE",
+                     "EARLY_EXIT", "QUIET_PERIOD", "REQUIRE_WINDOW")
+
+# 离线依赖：DT_DEP_STORE=1 时按 pom.xml 的依赖集取预置 classpath（见 depStore.py），
+# 测试脚本收到 DEP_SET 后在容器内离线编译运行；依赖集解析失败则不传 DEP_SET，照常走 Maven
+DT_DEP_STORE = os.environ.get("DT_DEP_STORE", "0") == "1"
+
+
+def dt_test_env(pomPath: Path) -> dict:
+    env = dict(os.environ)
+    if DT_DEP_STORE:
+        key = ensure_dep_set(pomPath)
+        if key:
+            env["DEP_SET"] = key
+    return env
+
+
+def normalize_source(code: str) -> str:
+    """统一换行、去掉行尾空白与首尾空行，避免无意义差异导致缓存未命中。"""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def dt_cache_key(code: str, pomPath: Path, LANG: str, testFilePath: Path) -> str:
+    h = hashlib.sha256()
+    for part in (
+        normalize_source(code),
+        pomPath.read_text(encoding="utf-8", errors="replace") if pomPath.is_file() else "",
+        LANG.lower(),
+        Path(testFilePath).read_text(encoding="utf-8", errors="replace"),
+        # 容器内运行器（提前结束判定）与测试脚本同目录
+        (Path(testFilePath).parent / "run_app.sh").read_text(encoding="utf-8", errors="replace")
+        if (Path(testFilePath).parent / "run_app.sh").is_file() else "",
+        json.dumps({k: os.environ.get(k) for k in DT_CACHE_ENV_KEYS}, sort_keys=True),
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def dt_cache_load(key: str, DTResPath: Path) -> Optional[int]:
+    """命中则把缓存的 DTResults 恢复到 DTResPath 并返回缓存的返回码；未命中返回 None。"""
+    entry = DT_CACHE_DIR / key
+    try:
+        meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if DTResPath.exists():
+        shutil.rmtree(DTResPath)
+    if (entry / "DTResults").is_dir():
+        shutil.copytree(entry / "DTResults", DTResPath)
+    return int(meta["retCode"])
+
+
+def dt_cache_store(key: str, retCode: int, DTResPath: Path, desc: str) -> None:
+    """只缓存确定性结果；先写临时目录再 rename，避免并发/中断留下半个条目。"""
+    if retCode == DT_RC_DAEMON_LOST:
+        return
+    logs = list(DTResPath.rglob("full_*.log")) if DTResPath.is_dir() else []
+    if not logs:
+        return
+    if retCode != 0:
+        deterministic = any(
+            "COMPILATION ERROR" in log.read_text(encoding="utf-8", errors="ignore") for log in logs
+        )
+        if not deterministic:
+            return
+    entry = DT_CACHE_DIR / key
+    if entry.exists():
+        return
+    tmp = DT_CACHE_DIR / f".{key}.{os.getpid()}.tmp"
+    try:
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        shutil.copytree(DTResPath, tmp / "DTResults")
+        (tmp / "meta.json").write_text(
+            json.dumps({"retCode": retCode, "desc": desc, "created": time.strftime("%Y-%m-%d %H:%M:%S")}),
+            encoding="utf-8",
+        )
+        os.rename(tmp, entry)
+    except OSError as e:
+        print(f"[WARN] docker test 结果缓存写入失败：{e}", file=sys.stderr)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
 def docker_exec(
     prev_wmCode: Optional[str], 
     codeFilePath: Path, 
@@ -294,9 +395,18 @@ def docker_exec(
         oriFilePath = Path(curr_wmCodePath).with_name(f"{prefix}.{postfix}")
         oriCode = read_file(oriFilePath).strip()
         curr_wmCode = read_file(curr_wmCodePath).strip()
+        DTResPath = oriFilePath.parent / "DTResults"
+        key = None
+        if DT_CACHE and curr_wmCode != (prev_wmCode if prev_wmCode else oriCode):
+            key = dt_cache_key(curr_wmCode, oriFilePath.parent / "pom.xml", LANG, testFilePath)
+        cached = dt_cache_load(key, DTResPath) if key else None
         if curr_wmCode == (prev_wmCode if prev_wmCode else oriCode):
             print(f"{desc} 代码无变化，跳过测试")
             retCode = 0
+        elif cached is not None:
+            print(f"{desc} 命中 docker test 缓存（{key[:12]}），返回码 {cached}，跳过测试")
+            oriFilePath.write_text(curr_wmCode, encoding="utf-8")
+            retCode = cached
         else:
             # 运行docker test脚本
             oriFilePath.write_text(curr_wmCode, encoding="utf-8")
@@ -305,16 +415,109 @@ def docker_exec(
                 check=False,
                 text=True,
                 capture_output=True,              # 抓取 stdout / stderr
+                env=dt_test_env(oriFilePath.parent / "pom.xml"),
             )
             if res.stdout:
                 print(res.stdout)
             if res.stderr:
                 print(res.stderr, file=sys.stderr)
             retCode = res.returncode
+            if key:
+                dt_cache_store(key, retCode, DTResPath, desc)
     except Exception as e:
         print(e)
     return curr_wmCode, retCode
 
+# 正在测试中的缓存键 -> Future；同一代码再次提交时等它结束后从缓存恢复，不重复排队
+_DT_INFLIGHT: dict = {}
+
+def _done_future(value: int) -> "Future[int]":
+    fut: "Future[int]" = Future()
+    fut.set_result(value)
+    return fut
+
+def dt_result(fut: "Future[int]", desc: str) -> int:
+    """取 docker test 的返回码；测试抛异常或被取消都记为失败（-1），不向调用方抛出。"""
+    try:
+        return fut.result()
+    except CancelledError:
+        print(f"[WARN] {desc} docker test 已取消", file=sys.stderr)
+    except Exception as e:
+        print(f"[WARN] {desc} docker test 异常：{e}", file=sys.stderr)
+    return -1
+
+def docker_submit(
+    pool: DTPool,
+    prev_wmCode: Optional[str],
+    codeFilePath: Path,
+    testFilePath: Path,
+    LANG: str,
+    desc: str,
+    destPath: Optional[Path] = None,
+) -> tuple[str, "Future[int]"]:
+    """
+    docker_exec 的并行版本：判重与缓存同步完成，需要测试时把项目快照交给 pool 排队，立即返回 Future(返回码)。
+    测试结束后 DTResults 写入缓存并拷到 destPath（为 None 则丢弃），工作区可立即用于下一次生成。
+    testFilePath 仅用于缓存键，实际执行的是 pool 的测试脚本。
+    """
+    remove_leading_h2_line(codeFilePath)
+    postfix = get_postfix(LANG)
+    curr_wmCodePath = find_file(codeFilePath, f"_wm.{postfix}")
+    if curr_wmCodePath is None:
+        raise FileNotFoundError(f"未找到 *_wm.{postfix} 文件")
+    wmFilename = Path(curr_wmCodePath).name
+    prefix = wmFilename.removesuffix(f"_wm.{postfix}")
+    oriFilePath = Path(curr_wmCodePath).with_name(f"{prefix}.{postfix}")
+    oriCode = read_file(oriFilePath).strip()
+    curr_wmCode = read_file(curr_wmCodePath).strip()
+
+    if curr_wmCode == (prev_wmCode if prev_wmCode else oriCode):
+        print(f"{desc} 代码无变化，跳过测试")
+        return curr_wmCode, _done_future(0)
+
+    key = dt_cache_key(curr_wmCode, oriFilePath.parent / "pom.xml", LANG, testFilePath) if DT_CACHE else None
+    if key and destPath is not None:
+        cached = dt_cache_load(key, destPath / "DTResults")
+        if cached is not None:
+            print(f"{desc} 命中 docker test 缓存（{key[:12]}），返回码 {cached}，跳过测试")
+            return curr_wmCode, _done_future(cached)
+        running = _DT_INFLIGHT.get(key)
+        if running is not None:
+            print(f"{desc} 与测试中的代码相同（{key[:12]}），等待其结果")
+            out: "Future[int]" = Future()
+
+            def restore(f: "Future[int]") -> None:
+                # 被等待的测试失败 / 被取消：本次同样记为失败
+                retCode = dt_result(f, desc)
+                try:
+                    # 不可缓存的结果（环境问题）只转发返回码，不恢复 DTResults
+                    cached = dt_cache_load(key, destPath / "DTResults")
+                except Exception as e:
+                    print(f"[WARN] {desc} docker test 缓存恢复失败：{e}", file=sys.stderr)
+                    cached = None
+                out.set_result(retCode if cached is None else cached)
+
+            running.add_done_callback(restore)
+            return curr_wmCode, out
+
+    def on_done(retCode: int, DTResPath: Path) -> None:
+        if key:
+            dt_cache_store(key, retCode, DTResPath, desc)
+        if destPath is None:
+            return
+        if DTResPath.exists():
+            shellPaste([DTResPath], destPath)
+        else:
+            print(f"[WARN] {desc} 未产生 DTResults，跳过回收。", file=sys.stderr)
+
+    oriFilePath.write_text(curr_wmCode, encoding="utf-8")
+    fut = pool.submit(oriFilePath.parent, oriFilePath.name, desc, on_done,
+                      env=dt_test_env(oriFilePath.parent / "pom.xml"))
+    if key:
+        _DT_INFLIGHT[key] = fut
+        fut.add_done_callback(lambda f: _DT_INFLIGHT.pop(key, None))
+    return curr_wmCode, fut
+
 async def selectRngSeed(
     project_name: str, 
     srcPath: str, 
@@ -322,6 +525,7 @@ async def selectRngSeed(
     testFilePath: Path, 
     args: dict[str, Any],
     lang: Optional[str] = None,
+    pool: Optional[DTPool] = None,
 ) -> Optional[int]:
 
     repoPath = Path(f"{srcPath}/{project_name}").resolve()
@@ -337,7 +541,10 @@ async def selectRngSeed(
     
     ckptPath = Path(f"{srcPath}/storage").resolve()
     codeFilePath = Path(f"{workspacePath}/{project_name}/{project_name}").resolve()
+    workspace = Workspace(workspacePath, [repoPath, ckptPath])
     
+    # 有 pool 时测试与下一次生成重叠：最多 len(pool.containers) 个 seed 在测，先通过者胜出
+    inflight: dict = {}
     while(1):
         seed = make_seed(32)
         seed = 4138137938
@@ -350,19 +557,261 @@ async def selectRngSeed(
             "external_processor_names": [],
         }
         
-        # 1) 清空工作区
-        shellDelete(workspacePath, dry_run=False)
-        # 2) 复制项目代码到工作区
-        shellPaste([repoPath, ckptPath], workspacePath)
+        # 1-2) 工作区恢复为 项目代码 + 检查点（增量：只处理上一轮改动过的文件）
+        workspace.reset()
         # 3) 调用代码生成
         await codeGen(project_name, xargs)
         
-        curr_wmCode, retCode = docker_exec("select rng_seed", codeFilePath, testFilePath, LANG, f"rngS={seed}")
-        
-        # time.sleep(20)
-        
-        if retCode == 0:
-            return seed
+        if pool is None:
+            curr_wmCode, retCode = docker_exec("select rng_seed", codeFilePath, testFilePath, LANG, f"rngS={seed}")
+            
+            # time.sleep(20)
+            
+            if retCode == 0:
+                return seed
+            continue
+
+        _, fut = docker_submit(pool, "select rng_seed", codeFilePath, testFilePath, LANG, f"rngS={seed}")
+        inflight[fut] = seed
+        done = {f for f in inflight if f.done()}
+        if len(inflight) >= len(pool.containers):
+            done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+        for f in done:
+            s = inflight.pop(f)
+            if dt_result(f, f"rngS={s}") == 0:
+                for other in inflight:
+                    other.cancel()
+                return s
+
+def build_xargs(args: dict[str, Any], rng_seed: int, wmS: Decimal, LANG: str) -> dict[str, Any]:
+    """某一水印强度下 codeGen 的参数。"""
+    xargs = {
+        "temperature": args["temperature"],
+        "max_tokens": args["max_tokens"],
+        "parallel": args["parallel"],
+        "rng_seed": rng_seed,
+        "internal_processor_names": [],
+        "external_processor_names": [args["processor_names_ext"]],
+        "external_processor_params": {
+            "sweet": {
+                "gamma": args["gamma"], 
+                "delta": float(wmS), 
+                "entropy_threshold": args["ET"],
+                "z_threshold": args["z_threshold"],
+            },
+            "wllm": {
+                "gamma": args["gamma"], 
+                "delta": float(wmS),
+                "z_threshold": args["z_threshold"],
+            },
+            "waterfall": {
+                "id_mu": args["id_mu"], 
+                "k_p": args["k_p"], 
+                "kappa": float(wmS),
+                "n_gram": args["n_gram"], 
+                "wm_fn": args["wm_fn"],
+                "auto_reset": args["auto_reset"],
+                "detect_mode": args["detect_mode"],
+            },
+            "ewd": {
+                "gamma": args["gamma"],
+                "delta": float(wmS),
+                "hash_key": args["hash_key"],
+                "z_threshold": args["z_threshold"],
+                "prefix_length": args["prefix_length"],
+            },
+            "stone": {
+                "gamma": args["gamma"],
+                "delta": float(wmS),
+                "hash_key": args["hash_key"],
+                "z_threshold": args["z_threshold"],
+                "prefix_length": args["prefix_length"],
+                "language": LANG,
+                "watermark_on_pl": args["watermark_on_pl"],
+                "skipping_rule": args["skipping_rule"],
+            },
+            "codeip": {
+                "mode": args["mode"],
+                "delta": float(wmS),
+                "gamma": args["gamma"],
+                "message_code_len": args["message_code_len"],
+                "encode_ratio": args["encode_ratio"],
+                "top_k": args["top_k"],
+                "message": args["message"],
+                "pda_model": None,
+            }
+        },
+    }
+    return xargs
+
+def result_dir_name(project_name: str, args: dict[str, Any], rng_seed: int, LANG: str) -> str:
+    """结果目录名（各强度的结果放在其下的 {project_name}_{wmS}）。"""
+    if args["processor_names_ext"] == "wllm":
+        result_dir = (
+            f"{project_name}_"
+            f"{args['processor_names_ext']}_"
+            f"T={args['temperature']}_"
+            f"rngS={rng_seed}_"
+            f"gamma={args['gamma']}"
+        )
+    elif args["processor_names_ext"] == "sweet":
+        result_dir = (
+            f"{project_name}_"
+            f"{args['processor_names_ext']}_"
+            f"T={args['temperature']}_"
+            f"rngS={rng_seed}_"
+            f"gamma={args['gamma']}_"
+            f"ET={args['ET']}"
+        )
+    elif args["processor_names_ext"] == "waterfall":
+        result_dir = (
+            f"{project_name}_"
+            f"{args['processor_names_ext']}_"
+            f"T={args['temperature']}_"
+            f"rngS={rng_seed}_"
+            f"idMu={args['id_mu']}_"
+            f"kP={args['k_p']}_"
+            f"nGram={args['n_gram']}_"
+            f"wmFn={args['wm_fn']}"
+        )
+    elif args["processor_names_ext"] == "ewd":
+        result_dir = (
+            f"{project_name}_"
+            f"{args['processor_names_ext']}_"
+            f"T={args['temperature']}_"
+            f"rngS={rng_seed}_"
+            f"gamma={args['gamma']}_"
+            f"hashKey={args['hash_key']}_"
+            f"prefixLen={args['prefix_length']}"
+        )
+    elif args["processor_names_ext"] == "stone":
+        result_dir = (
+            f"{project_name}_"
+            f"{args['processor_names_ext']}_"
+            f"T={args['temperature']}_"
+            f"rngS={rng_seed}_"
+            f"gamma={args['gamma']}_"
+            f"hashKey={args['hash_key']}_"
+            f"prefixLen={args['prefix_length']}_"
+            f"lang={LANG}"
+        )
+    elif args["processor_names_ext"] == "codeip":
+        result_dir = (
+            f"{project_name}_"
+            f"{args['processor_names_ext']}_"
+            f"T={args['temperature']}_"
+            f"rngS={rng_seed}_"
+            f"gamma={args['gamma']}_"
+            f"mode={args['mode']}_"
+            f"messageLen={args['message_code_len']}_"
+            f"encodeRatio={args['encode_ratio']}_"
+            f"topK={args['top_k']}"
+        )
+    return result_dir
+
+# 自适应临界点搜索：把“构建失败”与“检出成功”都视为随强度单调（带噪声）的判定，
+# 在 [start, end] 上以 resolution 为网格二分，定位两个临界强度，而不是逐个跑完所有强度
+# - 每个强度生成 repeats 次：构建以多数票判定失败，检出以 z 分数中位数 >= 阈值判定成功
+# - 第 0 次结果写入与逐点扫描相同的 {result_dir}/{project_name}_{wmS}，其余写入其下 repeat_{k}/
+# - 检出阈值取 args["detect_threshold"]，缺省为 args["z_threshold"]；分数字段取 args["score_field"]（默认 z_score）
+# - 两个判定共享已评估的强度点；结果汇总写入 {result_dir}/search_summary.json
+async def searchBreakpoints(
+    rng_seed: int,
+    project_name: str,
+    repoPath: Path,
+    ckptPath: Path,
+    codeFilePath: Path,
+    workspacePath: str,
+    resPath: str,
+    testFilePath: Path,
+    args: dict[str, Any],
+    LANG: str,
+    pool: Optional[DTPool] = None,
+    start: Decimal = Decimal("0.0"),
+    end: Decimal = Decimal("15.0"),
+    resolution: Decimal = Decimal("0.1"),
+    repeats: int = 1,
+) -> dict[str, Any]:
+    result_dir = result_dir_name(project_name, args, rng_seed, LANG)
+    threshold = args.get("detect_threshold", args.get("z_threshold"))
+    score_field = args.get("score_field", "z_score")
+    n_grid = int((end - start) / resolution)
+    workspace = Workspace(workspacePath, [repoPath, ckptPath])
+    points: dict = {}
+
+    async def evaluate(i: int) -> dict[str, Any]:
+        if i in points:
+            return points[i]
+        wmS = start + resolution * i
+        xargs = build_xargs(args, rng_seed, wmS, LANG)
+        destPath = Path(f"{resPath}/{result_dir}/{project_name}_{wmS}").resolve()
+        retCodes, scores, futs = [], [], []
+        for k in range(repeats):
+            repPath = destPath if k == 0 else destPath / f"repeat_{k}"
+            workspace.reset()
+            await codeGen(project_name, xargs)
+            os.makedirs(repPath, exist_ok=True)
+            shellPaste([codeFilePath], repPath)
+            for detres in find_detres_files(repPath):
+                if detres.relative_to(repPath).parts[0].startswith("repeat_"):
+                    continue
+                score = extract_metric_from_detres(detres, field=score_field, wait_sec=5.0)
+                if score is not None:
+                    scores.append(score)
+            desc = f"wmS={wmS}" + (f" #{k}" if k else "")
+            if pool is not None:
+                _, fut = docker_submit(pool, None, codeFilePath, testFilePath, LANG, desc, repPath)
+                futs.append(fut)
+                continue
+            _, retCode = docker_exec(None, codeFilePath, testFilePath, LANG, desc)
+            DTResPath = (codeFilePath / "DTResults").resolve()
+            if DTResPath.exists():
+                shellPaste([DTResPath], repPath)
+            retCodes.append(retCode)
+        for fut in futs:
+            retCodes.append(dt_result(fut, f"wmS={wmS}"))
+        n_fail = sum(1 for rc in retCodes if rc != 0)
+        median = sorted(scores)[len(scores) // 2] if scores else None
+        points[i] = {
+            "wmS": str(wmS),
+            "retCodes": retCodes,
+            "scores": scores,
+            "build_fail": n_fail * 2 > len(retCodes),
+            "detected": median is not None and threshold is not None and median >= threshold,
+        }
+        print(f"[search] wmS={wmS}: 构建失败 {n_fail}/{len(retCodes)}，{score_field} 中位数 {median}")
+        return points[i]
+
+    async def bisect(key: str) -> Optional[str]:
+        """最小的 key 为真的网格强度；端点不满足单调假设时返回端点或 None。"""
+        lo, hi = 0, n_grid
+        if (await evaluate(lo))[key]:
+            return points[lo]["wmS"]
+        if not (await evaluate(hi))[key]:
+            return None
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if (await evaluate(mid))[key]:
+                hi = mid
+            else:
+                lo = mid
+        return points[hi]["wmS"]
+
+    summary = {
+        "mode": "search",
+        "start": str(start), "end": str(end), "resolution": str(resolution), "repeats": repeats,
+        "score_field": score_field, "detect_threshold": threshold,
+        "detect_breakpoint": await bisect("detected") if threshold is not None else None,
+        "build_breakpoint": await bisect("build_fail"),
+    }
+    summary["generations"] = len(points) * repeats
+    summary["points"] = [points[i] for i in sorted(points)]
+    out = Path(f"{resPath}/{result_dir}/search_summary.json").resolve()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[search] 检出临界强度 {summary['detect_breakpoint']}，构建失败临界强度 {summary['build_breakpoint']}，"
+          f"共生成 {summary['generations']} 次；汇总：{out}")
+    return summary
 
 async def codeGenBatch(
     rng_seed: int,
@@ -373,7 +822,15 @@ async def codeGenBatch(
     testFilePath: Path, 
     args: dict[str, Any],
     lang: Optional[str] = None,
+    pool: Optional[DTPool] = None,
+    mode: str = "sweep",
+    resolution: Decimal = Decimal("0.1"),
+    repeats: int = 1,
 ):
+    """
+    mode="sweep"：0.0~15.0 每 0.1 生成并测试一次；
+    mode="search"：以 resolution 为精度二分定位检出/构建失败的临界强度（见 searchBreakpoints）
+    """
 
     repoPath = Path(f"{srcPath}/{project_name}").resolve()
     
@@ -389,144 +846,42 @@ async def codeGenBatch(
     ckptPath = Path(f"{srcPath}/storage").resolve()
     codeFilePath = Path(f"{workspacePath}/{project_name}/{project_name}").resolve()
     
+    if mode == "search":
+        return await searchBreakpoints(
+            rng_seed, project_name, repoPath, ckptPath, codeFilePath, workspacePath, resPath, testFilePath,
+            args, LANG, pool, resolution=resolution, repeats=repeats,
+        )
+    
     wmS = Decimal("0.0")
     step = Decimal("0.1")
     end = Decimal("15.0")
     
+    workspace = Workspace(workspacePath, [repoPath, ckptPath])
     prev_wmCode = None
+    futures: list = []
     while wmS <= end:
-        xargs = {
-            "temperature": args["temperature"],
-            "max_tokens": args["max_tokens"],
-            "parallel": args["parallel"],
-            "rng_seed": rng_seed,
-            "internal_processor_names": [],
-            "external_processor_names": [args["processor_names_ext"]],
-            "external_processor_params": {
-                "sweet": {
-                    "gamma": args["gamma"], 
-                    "delta": float(wmS), 
-                    "entropy_threshold": args["ET"],
-                    "z_threshold": args["z_threshold"],
-                },
-                "wllm": {
-                    "gamma": args["gamma"], 
-                    "delta": float(wmS),
-                    "z_threshold": args["z_threshold"],
-                },
-                "waterfall": {
-                    "id_mu": args["id_mu"], 
-                    "k_p": args["k_p"], 
-                    "kappa": float(wmS),
-                    "n_gram": args["n_gram"], 
-                    "wm_fn": args["wm_fn"],
-                    "auto_reset": args["auto_reset"],
-                    "detect_mode": args["detect_mode"],
-                },
-                "ewd": {
-                    "gamma": args["gamma"],
-                    "delta": float(wmS),
-                    "hash_key": args["hash_key"],
-                    "z_threshold": args["z_threshold"],
-                    "prefix_length": args["prefix_length"],
-                },
-                "stone": {
-                    "gamma": args["gamma"],
-                    "delta": float(wmS),
-                    "hash_key": args["hash_key"],
-                    "z_threshold": args["z_threshold"],
-                    "prefix_length": args["prefix_length"],
-                    "language": LANG,
-                    "watermark_on_pl": args["watermark_on_pl"],
-                    "skipping_rule": args["skipping_rule"],
-                },
-                "codeip": {
-                    "mode": args["mode"],
-                    "delta": float(wmS),
-                    "gamma": args["gamma"],
-                    "message_code_len": args["message_code_len"],
-                    "encode_ratio": args["encode_ratio"],
-                    "top_k": args["top_k"],
-                    "message": args["message"],
-                    "pda_model": None,
-                }
-            },
-        }
+        xargs = build_xargs(args, rng_seed, wmS, LANG)
         
-        # 1) 清空工作区
-        shellDelete(workspacePath, dry_run=False)
-        # 2) 复制项目代码到工作区
-        shellPaste([repoPath, ckptPath], workspacePath)
+        # 1-2) 工作区恢复为 项目代码 + 检查点（增量：只处理上一轮改动过的文件）
+        workspace.reset()
         # 3) 调用代码生成
         await codeGen(project_name, xargs)
         # 4) 先保存生成结果
-        if args["processor_names_ext"] == "wllm":
-            result_dir = (
-                f"{project_name}_"
-                f"{args['processor_names_ext']}_"
-                f"T={args['temperature']}_"
-                f"rngS={rng_seed}_"
-                f"gamma={args['gamma']}"
-            )
-        elif args["processor_names_ext"] == "sweet":
-            result_dir = (
-                f"{project_name}_"
-                f"{args['processor_names_ext']}_"
-                f"T={args['temperature']}_"
-                f"rngS={rng_seed}_"
-                f"gamma={args['gamma']}_"
-                f"ET={args['ET']}"
-            )
-        elif args["processor_names_ext"] == "waterfall":
-            result_dir = (
-                f"{project_name}_"
-                f"{args['processor_names_ext']}_"
-                f"T={args['temperature']}_"
-                f"rngS={rng_seed}_"
-                f"idMu={args['id_mu']}_"
-                f"kP={args['k_p']}_"
-                f"nGram={args['n_gram']}_"
-                f"wmFn={args['wm_fn']}"
-            )
-        elif args["processor_names_ext"] == "ewd":
-            result_dir = (
-                f"{project_name}_"
-                f"{args['processor_names_ext']}_"
-                f"T={args['temperature']}_"
-                f"rngS={rng_seed}_"
-                f"gamma={args['gamma']}_"
-                f"hashKey={args['hash_key']}_"
-                f"prefixLen={args['prefix_length']}"
-            )
-        elif args["processor_names_ext"] == "stone":
-            result_dir = (
-                f"{project_name}_"
-                f"{args['processor_names_ext']}_"
-                f"T={args['temperature']}_"
-                f"rngS={rng_seed}_"
-                f"gamma={args['gamma']}_"
-                f"hashKey={args['hash_key']}_"
-                f"prefixLen={args['prefix_length']}_"
-                f"lang={LANG}"
-            )
-        elif args["processor_names_ext"] == "codeip":
-            result_dir = (
-                f"{project_name}_"
-                f"{args['processor_names_ext']}_"
-                f"T={args['temperature']}_"
-                f"rngS={rng_seed}_"
-                f"gamma={args['gamma']}_"
-                f"mode={args['mode']}_"
-                f"messageLen={args['message_code_len']}_"
-                f"encodeRatio={args['encode_ratio']}_"
-                f"topK={args['top_k']}"
-            )
+        result_dir = result_dir_name(project_name, args, rng_seed, LANG)
         destPath = Path(f"{resPath}/{result_dir}/{project_name}_{wmS}").resolve()
         os.makedirs(destPath, exist_ok=True)
         shellPaste([codeFilePath], destPath)
         
         # 5) 然后判断水印是否嵌入并进行docker test测试
         curr_wmCode = None
+        if pool is not None:
+            # 并行：测试在 pool 中排队，DTResults 测完后直接回收到 destPath
+            curr_wmCode, fut = docker_submit(pool, prev_wmCode, codeFilePath, testFilePath, LANG, f"wmS={wmS}", destPath)
+            futures.append((wmS, fut))
+            prev_wmCode = curr_wmCode
+            print(f"wmS={wmS} 结果已保存到 {destPath}（docker test 已提交）")
+            wmS += step
+            continue
         curr_wmCode, retCode = docker_exec(prev_wmCode, codeFilePath, testFilePath, LANG, f"wmS={wmS}")
         
         DTResPath = (codeFilePath / "DTResults").resolve()
@@ -539,6 +894,14 @@ async def codeGenBatch(
         
         wmS += step
     
+    # 等待所有已提交的 docker test 结束
+    failed = []
+    for s, fut in futures:
+        if dt_result(fut, f"wmS={s}") != 0:
+            failed.append(s)
+    if futures:
+        print(f"docker test 完成 {len(futures)} 个，失败 {len(failed)} 个：{[str(s) for s in failed]}")
+    
 if __name__ == "__main__":
 
     project_name = "tiny_calculator"
@@ -547,12 +910,15 @@ if __name__ == "__main__":
     workspacePath = "/home/zhaorz/project/CodeWM/MetaGPT/workspace"
     resPath = "/home/zhaorz/project/CodeWM/results"
     testFilePath = Path("/home/zhaorz/project/CodeWM/sweet-watermark/DT/dockerTest/test_podman.sh").resolve()
+    # DT_WORKERS>1：用 N 个常驻容器并行测试（容器 CodeWM-DT-0..N-1，见 dtPool.py）；默认串行单容器
+    DT_WORKERS = int(os.environ.get("DT_WORKERS", "1"))
+    pool = DTPool(DT_WORKERS, testFilePath) if DT_WORKERS > 1 else None
     
     args = {
         "temperature": 0.7,
         "max_tokens": 4096,
     }
-    rng_seed = asyncio.run(selectRngSeed(project_name, srcPath, workspacePath, testFilePath, args))
+    rng_seed = asyncio.run(selectRngSeed(project_name, srcPath, workspacePath, testFilePath, args, pool=pool))
 
     # args = {
     #     "temperature": 0.7,
@@ -1080,4 +1446,6 @@ if __name__ == "__main__":
         "top_k": 1000,
         "message": [1,0,1,1,0,1,0,1,1,0,1,0,0,1,1,0,1,0,1,1],
     }
-    asyncio.run(codeGenBatch(rng_seed, project_name, srcPath, workspacePath, resPath, testFilePath, args))
\ No newline at end of file
+    asyncio.run(codeGenBatch(rng_seed, project_name, srcPath, workspacePath, resPath, testFilePath, args, pool=pool))
+    if pool is not None:
+        pool.shutdown()
\ No newline at end of file
@@ -0,0 +1,221 @@
+# depStore.py
+# 依赖集离线仓库：同一组依赖只解析一次，之后的构建在容器内离线编译运行
+# - 键：pom.xml 中依赖列表（groupId:artifactId:version:classifier:scope，排序）+ JDK 版本 + EXTRA_MVN_ARGS 的 sha256
+# - 布局（DEP_STORE，默认 ~/.cache/codewm_deps）：
+#     repo/                    共享的 Maven 本地仓库（解析用；可由本地文件仓库一次性播种）
+#     blobs/<sha256>.jar       按内容寻址的 jar
+#     sets/<key>/lib/*.jar     该依赖集的完整运行时 classpath（硬链接到 blobs）
+#     sets/<key>/deps.json     规范化依赖列表；.complete 标记物化完成
+# - 解析在镜像里一次性完成（podman run --rm，挂载 repo 与临时目录，mvn dependency:copy-dependencies）；
+#   DEP_OFFLINE=1 时加 -o，只用 repo/ 中已有的构件（先用 seed 子命令从本地文件仓库播种）
+# - 构建容器把 DEP_STORE 只读挂到 /deps；test_podman.sh 收到 DEP_SET=<key> 时跳过 Maven，
+#   直接 javac/java 使用 /deps/sets/<key>/lib
+#
+# 用法：
+#   python3 depStore.py seed /path/to/local/maven/repo     # 一次性播种
+#   python3 depStore.py ensure /path/to/pom.xml            # 解析并物化，打印 key
+import os
+import sys
+import json
+import shutil
+import fcntl
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEP_STORE = Path(os.environ.get("DEP_STORE", "~/.cache/codewm_deps")).expanduser()
+DT_IMAGE = os.environ.get("DT_IMAGE", "codewm_dt_docker:11")
+# 与 test_podman.sh 的默认值一致
+EXTRA_MVN_ARGS = os.environ.get("EXTRA_MVN_ARGS", "-Djavafx.platform=linux")
+
+_POM_NS = "{http://maven.apache.org/POM/4.0.0}"
+
+
+def _text(el: Optional[ET.Element], tag: str, default: str = "") -> str:
+    if el is None:
+        return default
+    child = el.find(_POM_NS + tag)
+    if child is None:
+        child = el.find(tag)
+    return (child.text or "").strip() if child is not None and child.text else default
+
+
+def parse_pom(pomPath: Path) -> Tuple[List[Dict[str, str]], str]:
+    """读出 pom.xml 的依赖列表（规范化、排序、去重）与 JDK 版本。"""
+    root = ET.parse(pomPath).getroot()
+    deps_el = root.find(_POM_NS + "dependencies")
+    if deps_el is None:
+        deps_el = root.find("dependencies")
+    deps = []
+    for d in (list(deps_el) if deps_el is not None else []):
+        dep = {
+            "group": _text(d, "groupId"),
+            "artifact": _text(d, "artifactId"),
+            "version": _text(d, "version"),
+            "classifier": _text(d, "classifier"),
+            "scope": _text(d, "scope", "compile"),
+        }
+        if dep["scope"] == "test" or not dep["group"] or not dep["artifact"]:
+            continue
+        deps.append(dep)
+    props = root.find(_POM_NS + "properties")
+    if props is None:
+        props = root.find("properties")
+    jdk = _text(props, "maven.compiler.source", "11")
+    uniq = {json.dumps(d, sort_keys=True): d for d in deps}
+    return [uniq[k] for k in sorted(uniq)], jdk
+
+
+def dep_set_key(pomPath: Path) -> Tuple[str, List[Dict[str, str]], str]:
+    deps, jdk = parse_pom(pomPath)
+    payload = json.dumps({"deps": deps, "jdk": jdk, "mvn_args": EXTRA_MVN_ARGS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32], deps, jdk
+
+
+def _resolve_pom(deps: List[Dict[str, str]]) -> str:
+    """只含依赖的最小 pom，供 copy-dependencies 解析完整运行时闭包。"""
+    items = []
+    for d in deps:
+        classifier = f"\n            <classifier>{d['classifier']}</classifier>" if d["classifier"] else ""
+        items.append(f'''        <dependency>
+            <groupId>{d['group']}</groupId>
+            <artifactId>{d['artifact']}</artifactId>
+            <version>{d['version']}</version>{classifier}
+            <scope>{d['scope']}</scope>
+        </dependency>''')
+    body = "\n".join(items)
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+    <modelVersion>4.0.0</modelVersion>
+    <groupId>codewm.depstore</groupId>
+    <artifactId>depset</artifactId>
+    <version>1</version>
+    <packaging>pom</packaging>
+    <dependencies>
+{body}
+    </dependencies>
+</project>
+'''
+
+
+def resolve_cmd(workDir: Path) -> List[str]:
+    """在镜像里解析依赖，把运行时 jar 拷到 workDir/lib。"""
+    offline = ["-o"] if os.environ.get("DEP_OFFLINE", "0") == "1" else []
+    return [
+        "podman", "run", "--rm", "--network=host",
+        "-v", f"{DEP_STORE / 'repo'}:/repo",
+        "-v", f"{workDir}:/work",
+        DT_IMAGE,
+        "mvn", "-B", "-q", *offline, "-f", "/work/pom.xml", "-Dmaven.repo.local=/repo",
+        "dependency:copy-dependencies", "-DoutputDirectory=/work/lib", "-DincludeScope=runtime",
+        *EXTRA_MVN_ARGS.split(),
+    ]
+
+
+def _link_blob(jar: Path, dest: Path) -> None:
+    h = hashlib.sha256(jar.read_bytes()).hexdigest()
+    blob = DEP_STORE / "blobs" / f"{h}.jar"
+    if not blob.exists():
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(jar, tmp)
+        os.replace(tmp, blob)
+    try:
+        os.link(blob, dest)
+    except OSError:
+        shutil.copyfile(blob, dest)
+
+
+def ensure_dep_set(pomPath: Path) -> Optional[str]:
+    """
+    返回 pomPath 对应依赖集的 key，必要时先解析并物化；解析失败返回 None（调用方回退到 Maven 构建）。
+    多进程/多线程安全：同一 key 用文件锁串行化，物化在临时目录完成后整体 rename。
+    """
+    pomPath = Path(pomPath)
+    if not pomPath.is_file():
+        return None
+    try:
+        key, deps, jdk = dep_set_key(pomPath)
+    except ET.ParseError as e:
+        print(f"[WARN] 无法解析 {pomPath}：{e}", file=sys.stderr)
+        return None
+    setDir = DEP_STORE / "sets" / key
+    if (setDir / ".complete").exists():
+        return key
+
+    (DEP_STORE / "locks").mkdir(parents=True, exist_ok=True)
+    (DEP_STORE / "repo").mkdir(parents=True, exist_ok=True)
+    with open(DEP_STORE / "locks" / f"{key}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if (setDir / ".complete").exists():
+            return key
+        work = Path(tempfile.mkdtemp(prefix=f"depset_{key[:8]}_", dir=DEP_STORE))
+        try:
+            (work / "pom.xml").write_text(_resolve_pom(deps), encoding="utf-8")
+            (work / "lib").mkdir()
+            if deps:
+                res = subprocess.run(resolve_cmd(work), check=False, text=True, capture_output=True)
+                if res.returncode != 0:
+                    print(f"[WARN] 依赖集 {key[:12]} 解析失败（返回码 {res.returncode}）：\n{res.stdout}{res.stderr}",
+                          file=sys.stderr)
+                    return None
+            staged = work / "set"
+            (staged / "lib").mkdir(parents=True)
+            jars = sorted(p for p in (work / "lib").iterdir() if p.suffix == ".jar")
+            for jar in jars:
+                _link_blob(jar, staged / "lib" / jar.name)
+            (staged / "deps.json").write_text(
+                json.dumps({"deps": deps, "jdk": jdk, "jars": [j.name for j in jars]}, indent=2), encoding="utf-8")
+            (staged / ".complete").touch()
+            if setDir.exists():
+                shutil.rmtree(setDir)
+            setDir.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(staged, setDir)
+            print(f"[INFO] 依赖集 {key[:12]} 已物化：{len(jars)} 个 jar")
+            return key
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def seed_repo(localRepo: Path) -> int:
+    """把本地文件仓库（Maven 仓库目录布局）合并进 repo/，已有文件不覆盖；返回新增文件数。"""
+    localRepo = Path(localRepo).resolve()
+    dest = DEP_STORE / "repo"
+    n = 0
+    for src in localRepo.rglob("*"):
+        if not src.is_file():
+            continue
+        target = dest / src.relative_to(localRepo)
+        if target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src, target)
+        n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline dependency store for docker tests.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_seed = sub.add_parser("seed", help="Seed the store's Maven repo from a local file repository")
+    p_seed.add_argument("local_repo", type=str)
+    p_ensure = sub.add_parser("ensure", help="Resolve and materialize the dependency set of a pom.xml")
+    p_ensure.add_argument("pom", type=str)
+    args = parser.parse_args()
+
+    if args.cmd == "seed":
+        n = seed_repo(Path(args.local_repo))
+        print(f"Seeded {n} files into {DEP_STORE / 'repo'}")
+    else:
+        key = ensure_dep_set(Path(args.pom))
+        if key is None:
+            sys.exit(1)
+        print(key)
+
+
+if __name__ == "__main__":
+    main()
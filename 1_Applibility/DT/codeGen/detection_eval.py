@@ -15,6 +15,7 @@ End-to-end detection evaluation for watermark logits processor, aligned with you
 (4) Compute:
     - TPR@FPR targets (default: 0.1%, 1%, 5%, 10%)
     - AUROC (overall pooled + per-strength)
+    - percentile bootstrap CIs for both (--bootstrap resamples, default 1000; 0 disables)
 
 Usage example:
 python3 detection_eval.py \
@@ -30,6 +31,18 @@ python3 detection_eval.py \
   --method_args_json '{"gamma":0.5,"z_threshold":4.0}' \
   --save_csv
 
+Detection-only early stopping:
+  --online_stop_threshold 4.0 makes the server stop each generation as soon as the
+  processor's online score (z for wllm/sweet/stone, q_score for waterfall) reaches
+  the threshold. detRes then scores the truncated output; the number of tokens
+  needed per sample (online.num_tokens_scored) is reported as well.
+  Nested detRes fields can be selected with a dotted --score_field, e.g. online.z_score.
+
+Results index:
+  --results_index keeps resPath in the incremental index of eval/results_index.py and reads
+  detRes from it. Adding --reuse_results scores samples already present in resPath
+  (e.g. re-detected with redetect.py) and only generates the missing ones.
+
 Notes:
 - This script depends on your existing `agentCodeGen.py` providing `codeGen(...)`.
 - It DOES NOT run docker test (as you requested).
@@ -51,6 +64,8 @@ from pathlib import Path
 from typing import List, Any, Optional, Union, Dict, Tuple
 from statistics import mean
 
+import numpy as np
+
 # 1) 让官方 OpenAI 走代理（按你的梯子改端口）
 os.environ["HTTPS_PROXY"] = os.environ.get("HTTPS_PROXY", "http://127.0.0.1:7890")
 os.environ["HTTP_PROXY"] = os.environ.get("HTTP_PROXY", "http://127.0.0.1:7890")
@@ -321,11 +336,16 @@ def find_detres_files(
     *,
     detres_suffix: str = "_wm_detRes.txt",
     exclude_name: str = "pom_wm_detRes.txt",
+    index: Any = None,
 ) -> List[Path]:
     """
     Find all *_wm_detRes.txt under project_dir, excluding pom_wm_detRes.txt.
+    With a results index (eval/results_index.py), query it instead of walking project_dir.
     """
-    all_detres = sorted(project_dir.rglob(f"*{detres_suffix}"))
+    if index is not None:
+        all_detres = index.rglob(project_dir, f"*{detres_suffix}")
+    else:
+        all_detres = sorted(project_dir.rglob(f"*{detres_suffix}"))
     kept = [p for p in all_detres if p.name != exclude_name]
     return kept
 
@@ -367,6 +387,15 @@ def ensure_detres_ready(
         time.sleep(0.5)
 
 
+def _lookup_field(obj: Any, field: str) -> Any:
+    """Resolve a (possibly dotted) field, e.g. "z_score" or "online.z_score"."""
+    for part in field.split("."):
+        if not isinstance(obj, dict) or part not in obj:
+            return None
+        obj = obj[part]
+    return obj
+
+
 def extract_metric_from_detres(
     detres_path: Path,
     field: str = "z_score",
@@ -386,29 +415,64 @@ def extract_metric_from_detres(
         print(f"[WARN] detRes empty/unready: {detres_path} ({e})", file=sys.stderr)
         return None
 
-    obj = safe_load_mapping(line)
+    return metric_from_mapping(safe_load_mapping(line), field=field, strategy_key=strategy_key)
+
+
+def metric_from_mapping(
+    obj: Dict[str, Any],
+    field: str = "z_score",
+    strategy_key: Optional[str] = None,
+) -> Optional[float]:
+    """
+    Same lookup as extract_metric_from_detres, on an already parsed detRes mapping.
+    """
     if not obj:
         return None
 
     # strategy_key path
     if strategy_key is not None:
         if strategy_key in obj and isinstance(obj[strategy_key], dict):
-            v = obj[strategy_key].get(field, None)
+            v = _lookup_field(obj[strategy_key], field)
             return None if v is None else float(v)
         # if key not exists, fallthrough
 
     # direct field
-    if field in obj:
-        return float(obj[field])
+    v = _lookup_field(obj, field)
+    if v is not None:
+        return float(v)
 
     # nested search
     for _, vv in obj.items():
-        if isinstance(vv, dict) and field in vv:
-            return float(vv[field])
+        v = _lookup_field(vv, field)
+        if v is not None:
+            return float(v)
 
     return None
 
 
+def read_detres_from_index(
+    index: Any,
+    path: Path,
+    *,
+    max_wait_sec: float = 30.0,
+    poll_interval_sec: float = 0.25,
+) -> Dict[str, Any]:
+    """
+    index.detres(path) with wait-retry, like read_first_non_empty_line.
+    The index may have been refreshed while the detRes was still empty or half written;
+    re-stat its folder until the entry parses or max_wait_sec expires.
+    """
+    deadline = time.time() + max_wait_sec
+    while True:
+        try:
+            return index.detres(path)
+        except ValueError:
+            if time.time() >= deadline:
+                raise
+        time.sleep(poll_interval_sec)
+        index.refresh(path.parent)
+
+
 def aggregate_detres_scores(
     detres_files: List[Path],
     *,
@@ -416,6 +480,7 @@ def aggregate_detres_scores(
     strategy_key: Optional[str],
     mode: str = "mean",
     wait_sec: float = 30.0,
+    index: Any = None,
 ) -> float:
     """
     Aggregate scores across detRes files (multiple generated code files).
@@ -427,7 +492,15 @@ def aggregate_detres_scores(
     vals: List[float] = []
     for p in detres_files:
         try:
-            v = extract_metric_from_detres(p, field=field, strategy_key=strategy_key, wait_sec=wait_sec)
+            if index is not None:
+                try:
+                    obj = read_detres_from_index(index, p, max_wait_sec=wait_sec)
+                except ValueError as e:
+                    print(f"[WARN] detRes empty/unready: {p} ({e})", file=sys.stderr)
+                    continue
+                v = metric_from_mapping(obj, field=field, strategy_key=strategy_key)
+            else:
+                v = extract_metric_from_detres(p, field=field, strategy_key=strategy_key, wait_sec=wait_sec)
             if v is None:
                 continue
             if not (math.isnan(float(v)) or math.isinf(float(v))):
@@ -468,42 +541,56 @@ def warn_fpr_resolution(n_neg: int, fpr_targets: List[float]) -> None:
             )
 
 
-def compute_tpr_at_fpr(neg_scores: List[float], pos_scores: List[float], fpr_target: float) -> Tuple[float, float]:
+def _fp_budget(n_neg: int, fpr_target: float) -> int:
+    """Largest false-positive count k with k / n_neg <= fpr_target (same float comparison as the sweep)."""
+    ks = np.arange(n_neg + 1)
+    return int(ks[ks / n_neg <= fpr_target].max(initial=-1))
+
+
+def tpr_at_fprs(
+    neg_scores: List[float],
+    pos_scores: List[float],
+    fpr_targets: List[float],
+) -> List[Tuple[float, float]]:
     """
-    Compute TPR@fixed FPR.
-    We pick threshold maximizing TPR subject to FPR <= target.
+    TPR@fixed FPR for several targets from one threshold sweep.
+    Candidate thresholds = unique scores + one above the max (FPR=0); for each target we
+    pick the threshold maximizing TPR subject to FPR <= target (the smallest such threshold).
 
-    Returns: (tpr, threshold)
+    Returns: [(tpr, threshold)] aligned with fpr_targets
     """
     if not neg_scores or not pos_scores:
-        return float("nan"), float("nan")
+        return [(float("nan"), float("nan"))] * len(fpr_targets)
+
+    neg = np.sort(np.asarray(neg_scores, dtype=float))
+    pos = np.sort(np.asarray(pos_scores, dtype=float))
+    thr = np.unique(np.concatenate([neg, pos]))
+    thr = np.append(thr, thr[-1] + 1e-12)
 
-    # Higher score => more likely watermarked
-    # Candidate thresholds = unique scores + extremes
-    all_scores = sorted(set(neg_scores + pos_scores))
-    # Add a threshold above max => FPR=0
-    all_scores.append(max(all_scores) + 1e-12)
+    # counts of scores >= thr, for every candidate at once
+    fpr = (neg.size - np.searchsorted(neg, thr, side="left")) / neg.size
+    tpr = (pos.size - np.searchsorted(pos, thr, side="left")) / pos.size
 
-    best_tpr = -1.0
-    best_thr = all_scores[-1]
+    out = []
+    for target in fpr_targets:
+        ok = np.flatnonzero(fpr <= target)
+        if ok.size == 0:
+            out.append((0.0, float(thr[-1])))
+            continue
+        # TPR is non-increasing in thr: the first admissible threshold maximizes it
+        i = ok[0]
+        out.append((float(tpr[i]), float(thr[i])))
+    return out
 
-    n_neg = len(neg_scores)
-    n_pos = len(pos_scores)
 
-    for thr in all_scores:
-        fp = sum(1 for x in neg_scores if x >= thr)
-        tp = sum(1 for x in pos_scores if x >= thr)
-        fpr = fp / n_neg
-        tpr = tp / n_pos
-        if fpr <= fpr_target:
-            if tpr > best_tpr:
-                best_tpr = tpr
-                best_thr = thr
+def compute_tpr_at_fpr(neg_scores: List[float], pos_scores: List[float], fpr_target: float) -> Tuple[float, float]:
+    """
+    Compute TPR@fixed FPR.
+    We pick threshold maximizing TPR subject to FPR <= target.
 
-    if best_tpr < 0:
-        # impossible unless numeric weirdness
-        return 0.0, best_thr
-    return best_tpr, best_thr
+    Returns: (tpr, threshold)
+    """
+    return tpr_at_fprs(neg_scores, pos_scores, [fpr_target])[0]
 
 
 def auc_mann_whitney(pos_scores: List[float], neg_scores: List[float]) -> float:
@@ -516,34 +603,67 @@ def auc_mann_whitney(pos_scores: List[float], neg_scores: List[float]) -> float:
     if not pos_scores or not neg_scores:
         return float("nan")
 
-    scores = [(s, 1) for s in pos_scores] + [(s, 0) for s in neg_scores]
-    scores.sort(key=lambda x: x[0])
-
-    # Assign average ranks for ties
-    ranks = [0.0] * len(scores)
-    i = 0
-    r = 1
-    while i < len(scores):
-        j = i
-        while j < len(scores) and scores[j][0] == scores[i][0]:
-            j += 1
-        avg_rank = (r + (r + (j - i) - 1)) / 2.0
-        for k in range(i, j):
-            ranks[k] = avg_rank
-        r += (j - i)
-        i = j
-
-    n_pos = len(pos_scores)
-    n_neg = len(neg_scores)
+    pos = np.asarray(pos_scores, dtype=float)
+    neg = np.asarray(neg_scores, dtype=float)
+    _, inv, counts = np.unique(np.concatenate([pos, neg]), return_inverse=True, return_counts=True)
+    # average rank of each tie group: (first rank + last rank) / 2, ranks starting at 1
+    avg_rank = np.cumsum(counts) - (counts - 1) / 2.0
+    rank_sum_pos = avg_rank[inv[: pos.size]].sum()
+
+    u = rank_sum_pos - pos.size * (pos.size + 1) / 2.0
+    return float(u / (pos.size * neg.size))
+
+
+def bootstrap_metrics(
+    neg_scores: List[float],
+    pos_scores: List[float],
+    fpr_targets: List[float],
+    n_boot: int = 1000,
+    ci: float = 0.95,
+    seed: int = 0,
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Percentile bootstrap CIs for AUROC and TPR@FPR (neg and pos resampled independently).
+    All resamples are evaluated together: each one is a row of multinomial counts over
+    the original samples, so
+      AUROC_b = (Cpos_b @ W @ Cneg_b) / (Npos * Nneg), W[i, j] = 1[pos_i > neg_j] + 0.5 * 1[pos_i == neg_j]
+      TPR_b   = share of resampled pos above the (k+1)-th largest resampled neg, k = FP budget
 
-    rank_sum_pos = 0.0
-    for (rk, (_, label)) in zip(ranks, scores):
-        if label == 1:
-            rank_sum_pos += rk
+    Returns: {"auroc": (lo, hi), "tpr@fpr=<t>": (lo, hi), ...}
+    """
+    if not neg_scores or not pos_scores or n_boot <= 0:
+        return {}
 
-    u = rank_sum_pos - (n_pos * (n_pos + 1) / 2.0)
-    auc = u / (n_pos * n_neg)
-    return float(auc)
+    rng = np.random.default_rng(seed)
+    neg = np.sort(np.asarray(neg_scores, dtype=float))
+    pos = np.asarray(pos_scores, dtype=float)
+    n_neg, n_pos = neg.size, pos.size
+
+    c_neg = rng.multinomial(n_neg, np.full(n_neg, 1.0 / n_neg), size=n_boot).astype(float)
+    c_pos = rng.multinomial(n_pos, np.full(n_pos, 1.0 / n_pos), size=n_boot).astype(float)
+
+    w = (pos[:, None] > neg[None, :]) + 0.5 * (pos[:, None] == neg[None, :])
+    auroc = ((c_pos @ w) * c_neg).sum(axis=1) / (n_pos * n_neg)
+
+    # resampled negatives in ascending order: neg is sorted, so the value at sorted rank r
+    # is neg[first index whose cumulative count exceeds r]
+    cum_neg = np.cumsum(c_neg, axis=1)
+
+    lo_q, hi_q = (1.0 - ci) / 2.0, 1.0 - (1.0 - ci) / 2.0
+    out = {"auroc": (float(np.quantile(auroc, lo_q)), float(np.quantile(auroc, hi_q)))}
+    for target in fpr_targets:
+        k = _fp_budget(n_neg, target)
+        if k >= n_neg:
+            tpr = np.ones(n_boot)
+        elif k < 0:
+            tpr = np.zeros(n_boot)
+        else:
+            r = n_neg - 1 - k
+            idx = (cum_neg <= r).sum(axis=1)
+            v = neg[idx]
+            tpr = (c_pos * (pos[None, :] > v[:, None])).sum(axis=1) / n_pos
+        out[f"tpr@fpr={target}"] = (float(np.quantile(tpr, lo_q)), float(np.quantile(tpr, hi_q)))
+    return out
 
 
 # =======================
@@ -729,10 +849,40 @@ def parse_floats(spec: str) -> List[float]:
     return out
 
 
+def online_tokens_used(out_dir: Path, cfg: Dict[str, Any]) -> float:
+    """Tokens scored before the online early stop (mean over detRes files)."""
+    detres_files = find_detres_files(
+        out_dir,
+        detres_suffix=cfg.get("detres_suffix", "_wm_detRes.txt"),
+        exclude_name=cfg.get("exclude_detres_name", "pom_wm_detRes.txt"),
+        index=cfg.get("results_index"),
+    )
+    return aggregate_detres_scores(
+        detres_files,
+        field="online.num_tokens_scored",
+        strategy_key=cfg["strategy_key"],
+        mode="mean",
+        wait_sec=min(30.0, cfg["detres_wait_sec"]),
+        index=cfg.get("results_index"),
+    )
+
+
+def open_results_index(resPath: Path, db_path: str):
+    """eval/results_index.py lives next to codeGen/; import it on demand."""
+    eval_dir = str(Path(__file__).resolve().parents[1] / "eval")
+    if eval_dir not in sys.path:
+        sys.path.insert(0, eval_dir)
+    from results_index import open_index
+    return open_index(resPath, db_path or None, refresh=False)
+
+
 # =======================
 # (F) core pipeline (generate -> copy -> read -> score)
 # =======================
 
+_WORKSPACES: Dict[Tuple[str, str, str], Any] = {}
+
+
 async def run_codegen_once(
     project_name: str,
     repoPath: Path,
@@ -743,13 +893,18 @@ async def run_codegen_once(
     """
     Exactly like your script:
       shellDelete(workspacePath) -> shellPaste([repoPath, storagePath]) -> codeGen()
+    The delete+paste is done incrementally by workspace.Workspace (only files touched by the
+    previous run are removed/re-copied).
     Returns workspace project_dir: workspace/<project>/<project>/
     """
     # import lazily
     from agentCodeGen import codeGen
+    from workspace import Workspace
 
-    shellDelete(str(workspacePath), dry_run=False)
-    shellPaste([repoPath, storagePath], workspacePath)
+    key = (str(workspacePath), str(repoPath), str(storagePath))
+    if key not in _WORKSPACES:
+        _WORKSPACES[key] = Workspace(workspacePath, [repoPath, storagePath])
+    _WORKSPACES[key].reset()
 
     await codeGen(project_name, xargs)
 
@@ -789,6 +944,35 @@ async def generate_score(seed: int, strength: float, cfg: Dict[str, Any]) -> Tup
         "external_processor_names": [] if method == "none" else [method],
         "external_processor_params": build_external_params(method, method_args, strength, lang),
     }
+    if cfg.get("online_stop_threshold") is not None:
+        for params in xargs["external_processor_params"].values():
+            params["online_stop_threshold"] = cfg["online_stop_threshold"]
+
+    res_root: Path = cfg["resPath"]
+    result_dir_name = make_result_dir_name(
+        project_name=project_name,
+        method=method,
+        temperature=temperature,
+        seed=seed,
+        method_args=method_args,
+        lang=lang,
+    )
+    st_dir = fmt_strength_for_dir(strength)
+    destPath = (res_root / result_dir_name / f"{project_name}_{st_dir}").resolve()
+    index = cfg.get("results_index")
+    find_kw = {
+        "detres_suffix": cfg.get("detres_suffix", "_wm_detRes.txt"),
+        "exclude_name": cfg.get("exclude_detres_name", "pom_wm_detRes.txt"),
+    }
+
+    # (0) Reuse an existing sample (e.g. after redetect.py) instead of regenerating
+    if cfg.get("reuse_results") and index is not None:
+        detres_files = find_detres_files(destPath, index=index, **find_kw)
+        if detres_files:
+            score = aggregate_detres_scores(
+                detres_files, field=score_field, strategy_key=strategy_key, mode=detres_agg, index=index,
+            )
+            return score, destPath
 
     # (1) Generate in workspace
     ws_project_dir = await run_codegen_once(
@@ -808,17 +992,6 @@ async def generate_score(seed: int, strength: float, cfg: Dict[str, Any]) -> Tup
     )
 
     # (3) Copy to results (mirror your codeGenBatch)
-    res_root: Path = cfg["resPath"]
-    result_dir_name = make_result_dir_name(
-        project_name=project_name,
-        method=method,
-        temperature=temperature,
-        seed=seed,
-        method_args=method_args,
-        lang=lang,
-    )
-    st_dir = fmt_strength_for_dir(strength)
-    destPath = (res_root / result_dir_name / f"{project_name}_{st_dir}").resolve()
     destPath.mkdir(parents=True, exist_ok=True)
 
     # copy code folder
@@ -830,18 +1003,13 @@ async def generate_score(seed: int, strength: float, cfg: Dict[str, Any]) -> Tup
         shellPaste([dt_results], destPath)
 
     # (4) Parse detRes from results tree
-    detres_files = find_detres_files(
-        destPath,
-        detres_suffix=cfg.get("detres_suffix", "_wm_detRes.txt"),
-        exclude_name=cfg.get("exclude_detres_name", "pom_wm_detRes.txt"),
-    )
+    if index is not None:
+        index.refresh(destPath)
+    detres_files = find_detres_files(destPath, index=index, **find_kw)
     if not detres_files:
-        # fallback to workspace (should not happen)
-        detres_files = find_detres_files(
-            ws_project_dir,
-            detres_suffix=cfg.get("detres_suffix", "_wm_detRes.txt"),
-            exclude_name=cfg.get("exclude_detres_name", "pom_wm_detRes.txt"),
-        )
+        # fallback to workspace (should not happen; not covered by the index)
+        index = None
+        detres_files = find_detres_files(ws_project_dir, **find_kw)
 
     score = aggregate_detres_scores(
         detres_files,
@@ -849,6 +1017,7 @@ async def generate_score(seed: int, strength: float, cfg: Dict[str, Any]) -> Tup
         strategy_key=strategy_key,
         mode=detres_agg,
         wait_sec=min(30.0, detres_wait_sec),
+        index=index,
     )
 
     return score, destPath
@@ -869,6 +1038,7 @@ async def evaluate_detection(cfg: Dict[str, Any]) -> None:
 
     fpr_targets = cfg["fpr_targets"]
     warn_fpr_resolution(len(seeds), fpr_targets)
+    early_stop = cfg.get("online_stop_threshold") is not None
 
     # ---- NEG
     neg_rows = []
@@ -887,6 +1057,8 @@ async def evaluate_detection(cfg: Dict[str, Any]) -> None:
             "score": float(sc),
             "path": str(out_dir),
         })
+        if early_stop:
+            neg_rows[-1]["online_tokens"] = online_tokens_used(out_dir, cfg)
 
     if not neg_scores:
         raise RuntimeError("All NEG samples invalid (NaN). Your detRes generation is broken.")
@@ -912,19 +1084,33 @@ async def evaluate_detection(cfg: Dict[str, Any]) -> None:
                 "score": float(sc),
                 "path": str(out_dir),
             })
+            if early_stop:
+                pos_rows[-1]["online_tokens"] = online_tokens_used(out_dir, cfg)
 
     # ---- overall pooled across all strengths (pos pooled)
     pooled_pos = []
     for st, lst in pos_scores_by_strength.items():
         pooled_pos.extend(lst)
 
+    n_boot = cfg.get("bootstrap", 0)
+    boot_kw = {"n_boot": n_boot, "ci": cfg.get("ci", 0.95), "seed": cfg.get("bootstrap_seed", 0)}
+
+    def fmt_ci(cis: Dict[str, Tuple[float, float]], key: str) -> str:
+        if key not in cis:
+            return ""
+        lo, hi = cis[key]
+        return f"  [{boot_kw['ci']*100:.0f}% CI {lo:.6f}, {hi:.6f}]"
+
     print("\n==================== OVERALL METRICS (pos pooled across strengths) ====================")
+    if n_boot > 0:
+        print(f"(bootstrap CIs: {n_boot} resamples, percentile)")
     auc_all = auc_mann_whitney(pooled_pos, neg_scores)
-    print(f"[AUROC] overall pooled = {auc_all:.6f} (Npos={len(pooled_pos)}, Nneg={len(neg_scores)})")
+    cis_all = bootstrap_metrics(neg_scores, pooled_pos, fpr_targets, **boot_kw)
+    print(f"[AUROC] overall pooled = {auc_all:.6f}{fmt_ci(cis_all, 'auroc')} "
+          f"(Npos={len(pooled_pos)}, Nneg={len(neg_scores)})")
 
-    for fpr in fpr_targets:
-        tpr, thr = compute_tpr_at_fpr(neg_scores, pooled_pos, fpr)
-        print(f"[TPR@FPR={fpr*100:.3f}%] TPR={tpr:.6f}  thr={thr:.6f}")
+    for fpr, (tpr, thr) in zip(fpr_targets, tpr_at_fprs(neg_scores, pooled_pos, fpr_targets)):
+        print(f"[TPR@FPR={fpr*100:.3f}%] TPR={tpr:.6f}  thr={thr:.6f}{fmt_ci(cis_all, f'tpr@fpr={fpr}')}")
 
     # ---- per-strength metrics
     print("\n==================== PER-STRENGTH METRICS ====================")
@@ -933,14 +1119,24 @@ async def evaluate_detection(cfg: Dict[str, Any]) -> None:
         if not pos_scores:
             continue
         auc_st = auc_mann_whitney(pos_scores, neg_scores)
-        print(f"\n[Strength={st}] AUROC={auc_st:.6f}  (Npos={len(pos_scores)}, Nneg={len(neg_scores)})")
+        cis = bootstrap_metrics(neg_scores, pos_scores, fpr_targets, **boot_kw)
+        print(f"\n[Strength={st}] AUROC={auc_st:.6f}{fmt_ci(cis, 'auroc')}  "
+              f"(Npos={len(pos_scores)}, Nneg={len(neg_scores)})")
 
         row = {"strength": st, "auroc": auc_st}
-        for fpr in fpr_targets:
-            tpr, thr = compute_tpr_at_fpr(neg_scores, pos_scores, fpr)
-            print(f"  TPR@FPR={fpr*100:.3f}% : TPR={tpr:.6f}  thr={thr:.6f}")
+        if "auroc" in cis:
+            row["auroc_ci"] = list(cis["auroc"])
+        for fpr, (tpr, thr) in zip(fpr_targets, tpr_at_fprs(neg_scores, pos_scores, fpr_targets)):
+            print(f"  TPR@FPR={fpr*100:.3f}% : TPR={tpr:.6f}  thr={thr:.6f}{fmt_ci(cis, f'tpr@fpr={fpr}')}")
             row[f"tpr@fpr={fpr}"] = tpr
             row[f"thr@fpr={fpr}"] = thr
+            if f"tpr@fpr={fpr}" in cis:
+                row[f"tpr@fpr={fpr}_ci"] = list(cis[f"tpr@fpr={fpr}"])
+        if early_stop:
+            toks = [r["online_tokens"] for r in pos_rows
+                    if r["strength"] == st and not math.isnan(r["online_tokens"])]
+            row["mean_online_tokens"] = float(mean(toks)) if toks else float("nan")
+            print(f"  tokens until online stop (mean) = {row['mean_online_tokens']:.1f}")
         per_strength_summary.append(row)
 
     # ---- save CSV
@@ -951,6 +1147,8 @@ async def evaluate_detection(cfg: Dict[str, Any]) -> None:
 
         all_rows = neg_rows + pos_rows
         fieldnames = ["seed", "strength", "label", "score", "path"]
+        if early_stop:
+            fieldnames.append("online_tokens")
         with out_csv.open("w", newline="", encoding="utf-8") as f:
             w = csv.DictWriter(f, fieldnames=fieldnames)
             w.writeheader()
@@ -968,11 +1166,14 @@ async def evaluate_detection(cfg: Dict[str, Any]) -> None:
             "score_field": cfg["score_field"],
             "strategy_key": cfg["strategy_key"],
             "detres_agg": cfg["detres_agg"],
+            "online_stop_threshold": cfg.get("online_stop_threshold"),
             "overall": {
                 "auroc": auc_all,
                 "n_pos": len(pooled_pos),
                 "n_neg": len(neg_scores),
+                "ci": {k: list(v) for k, v in cis_all.items()},
             },
+            "bootstrap": {"n_boot": n_boot, "ci": boot_kw["ci"], "seed": boot_kw["seed"]},
             "per_strength": per_strength_summary,
             "fpr_targets": cfg["fpr_targets"],
         }
@@ -1028,13 +1229,27 @@ def parse_args():
 
     ap.add_argument("--fpr_targets", type=str, default="0.001,0.01,0.05,0.10",
                     help="comma-separated FPR targets, default 0.1%,1%,5%,10%")
+    ap.add_argument("--bootstrap", type=int, default=1000,
+                    help="bootstrap resamples for AUROC / TPR@FPR confidence intervals (0 disables)")
+    ap.add_argument("--ci", type=float, default=0.95, help="confidence level of the bootstrap intervals")
+    ap.add_argument("--bootstrap_seed", type=int, default=0)
 
     ap.add_argument("--detres_wait_sec", type=float, default=500.0,
                     help="Max seconds to wait for detRes non-empty.")
 
+    ap.add_argument("--online_stop_threshold", type=float, default=None,
+                    help="detection-only mode: stop generation once the online score "
+                         "(z, or q_score for waterfall) reaches this value")
+
     ap.add_argument("--method_args_json", type=str, required=True,
                     help="JSON string for method args. Must match method requirements.")
 
+    ap.add_argument("--results_index", type=str, nargs="?", const="", default=None,
+                    help="keep resPath in the results index (eval/results_index.py) and read detRes from it; "
+                         "optional index file path (default: <resPath>/.results_index.sqlite)")
+    ap.add_argument("--reuse_results", action="store_true",
+                    help="with --results_index: score samples already in resPath instead of regenerating them")
+
     ap.add_argument("--save_csv", action="store_true")
     return ap.parse_args()
 
@@ -1089,13 +1304,20 @@ def main():
         "detres_agg": args.detres_agg,
 
         "fpr_targets": parse_floats(args.fpr_targets),
+        "bootstrap": int(args.bootstrap),
+        "ci": float(args.ci),
+        "bootstrap_seed": int(args.bootstrap_seed),
 
         "detres_wait_sec": float(args.detres_wait_sec),
         "save_csv": bool(args.save_csv),
+        "online_stop_threshold": args.online_stop_threshold,
 
         "lang": lang,
         "detres_suffix": "_wm_detRes.txt",
         "exclude_detres_name": "pom_wm_detRes.txt",
+
+        "reuse_results": bool(args.reuse_results),
+        "results_index": None,
     }
 
     # sanity
@@ -1103,8 +1325,20 @@ def main():
         raise RuntimeError("Failed to detect Programming Language from repo docs/prd. STONE needs language.")
     if cfg["method"] not in {"wllm", "sweet", "ewd", "stone", "waterfall", "codeip"}:
         raise ValueError(f"Unsupported method: {cfg['method']}")
+    if args.reuse_results and args.results_index is None:
+        raise ValueError("--reuse_results needs --results_index")
+
+    if args.results_index is not None:
+        cfg["results_index"] = open_results_index(resPath, args.results_index)
+        if args.reuse_results:
+            st = cfg["results_index"].refresh()
+            print(f"[INFO] results index: {st['entries']} entries, {st['parsed']} detRes parsed, {st['seconds']}s")
 
-    asyncio.run(evaluate_detection(cfg))
+    try:
+        asyncio.run(evaluate_detection(cfg))
+    finally:
+        if cfg["results_index"] is not None:
+            cfg["results_index"].close()
 
 
 if __name__ == "__main__":
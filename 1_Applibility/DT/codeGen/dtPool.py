@@ -0,0 +1,176 @@
+# dtPool.py
+# docker test 并行执行器：维护 N 个常驻容器，从队列分发构建/运行任务，结果以 Future 返回
+# - 每个任务先把项目快照到独立的任务目录再测试，工作区可以立即用于下一次生成
+# - 每个容器同一时刻只跑一个任务；容器各自有 Xvfb（镜像入口脚本启动）与 /workspace
+# - 容器共用 host 网络：Xvfb 的抽象套接字 @/tmp/.X11-unix/X<n> 属于网络命名空间，各容器必须用不同的显示号，
+#   第 i 个容器为 :{DISPLAY_BASE+i}（创建时以 -e DISPLAY 传入，显示号不符的旧容器会被重建）
+# - PodmanBackend：容器名 {CTR_PREFIX}-{i}，不存在则按镜像创建，已停止则启动；
+#   任务即以 CTR_NAME={容器名} 运行 test_podman.sh；DT_DEP_STORE=1 时新建的容器把 DEP_STORE 只读挂到 /deps
+# - LocalBackend：不依赖 podman 的桩实现，每个“容器”是一个临时目录，任务在其中执行测试脚本，
+#   用于本地验证调度与结果回收
+import os
+import sys
+import uuid
+import queue
+import shutil
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class PodmanBackend:
+    def __init__(self, image: str = "codewm_dt_docker:11", prefix: str = "CodeWM-DT",
+                 run_args: Optional[List[str]] = None, display_base: int = 99):
+        self.image = image
+        self.prefix = prefix
+        self.run_args = ["--network=host"] if run_args is None else run_args
+        self.display_base = int(display_base)
+
+    def display(self, i: int) -> str:
+        return f":{self.display_base + i}"
+
+    def _display_of(self, name: str) -> Optional[str]:
+        res = subprocess.run(["podman", "inspect", "--format", "{{range .Config.Env}}{{println .}}{{end}}", name],
+                             check=False, text=True, capture_output=True)
+        for line in res.stdout.splitlines():
+            if line.startswith("DISPLAY="):
+                return line[len("DISPLAY="):]
+        return None
+
+    def start(self, n: int) -> List[str]:
+        names = [f"{self.prefix}-{i}" for i in range(n)]
+        res = subprocess.run(["podman", "ps", "-a", "--format", "{{.Names}} {{.State}}"],
+                             check=True, text=True, capture_output=True)
+        state = dict(line.split(maxsplit=1) for line in res.stdout.splitlines() if " " in line)
+        for i, name in enumerate(names):
+            if name in state and self._display_of(name) != self.display(i):
+                # 旧容器沿用镜像默认的 :99，与其它容器共用一个显示：删掉按本池的显示号重建
+                print(f"[dtPool] {name} 的 DISPLAY 不是 {self.display(i)}，重建容器", file=sys.stderr)
+                subprocess.run(["podman", "rm", "-f", name], check=True, capture_output=True)
+                del state[name]
+            if name not in state:
+                subprocess.run(["podman", "run", "-d", *self.run_args, "-e", f"DISPLAY={self.display(i)}",
+                                "--name", name, self.image, "sleep", "infinity"], check=True, capture_output=True)
+            elif state[name].lower() != "running":
+                subprocess.run(["podman", "start", name], check=True, capture_output=True)
+        return names
+
+    def run(self, ctr: str, codeFile: Path, testFilePath: Path, env: Dict[str, str]) -> subprocess.CompletedProcess:
+        return subprocess.run(["bash", str(testFilePath), str(codeFile)], check=False, text=True,
+                              capture_output=True, env={**env, "CTR_NAME": ctr})
+
+    def stop(self, names: List[str]) -> None:
+        # 常驻容器，保留给下一批任务复用
+        pass
+
+
+class LocalBackend:
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root) if root else Path(tempfile.mkdtemp(prefix="dtpool_"))
+
+    def start(self, n: int) -> List[str]:
+        names = []
+        for i in range(n):
+            d = self.root / f"ctr-{i}"
+            d.mkdir(parents=True, exist_ok=True)
+            names.append(str(d))
+        return names
+
+    def run(self, ctr: str, codeFile: Path, testFilePath: Path, env: Dict[str, str]) -> subprocess.CompletedProcess:
+        # 把项目拷进“容器”工作区执行，再把 DTResults 拷回，模拟 podman cp 进出
+        work = Path(ctr) / f"proj_{uuid.uuid4().hex[:8]}"
+        shutil.copytree(codeFile.parent, work)
+        try:
+            res = subprocess.run(["bash", str(testFilePath), str(work / codeFile.name)], check=False, text=True,
+                                 capture_output=True, env={**env, "CTR_NAME": ctr}, cwd=work)
+            if (work / "DTResults").is_dir():
+                shutil.copytree(work / "DTResults", codeFile.parent / "DTResults", dirs_exist_ok=True)
+            return res
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    def stop(self, names: List[str]) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class DTPool:
+    """
+    pool = DTPool(4, testFilePath)                    # 或 DTPool(4, testFilePath, backend=LocalBackend())
+    fut = pool.submit(projectDir, "Main.java", "wmS=1.0", on_done=...)
+    fut.result() -> 返回码
+    """
+
+    def __init__(self, n: int, testFilePath: Path, backend=None, jobRoot: Optional[str] = None):
+        self.testFilePath = Path(testFilePath).resolve()
+        if backend is None:
+            run_args = ["--network=host"]
+            if os.environ.get("DT_DEP_STORE", "0") == "1":
+                from depStore import DEP_STORE
+                DEP_STORE.mkdir(parents=True, exist_ok=True)
+                run_args += ["-v", f"{DEP_STORE}:/deps:ro"]
+            backend = PodmanBackend(
+                image=os.environ.get("DT_IMAGE", "codewm_dt_docker:11"),
+                prefix=os.environ.get("CTR_PREFIX", "CodeWM-DT"),
+                run_args=run_args,
+                display_base=int(os.environ.get("DISPLAY_BASE", "99")),
+            )
+        self.backend = backend
+        self.jobRoot = Path(jobRoot) if jobRoot else Path(tempfile.mkdtemp(prefix="dtjobs_"))
+        self.jobRoot.mkdir(parents=True, exist_ok=True)
+        self.containers = self.backend.start(n)
+        self._free: "queue.Queue[str]" = queue.Queue()
+        for c in self.containers:
+            self._free.put(c)
+        self._executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="dtpool")
+        self._print_lock = threading.Lock()
+
+    def snapshot(self, projectDir: Path) -> Path:
+        """把项目目录复制到独立的任务目录（不含旧的 DTResults）"""
+        jobDir = self.jobRoot / uuid.uuid4().hex
+        shutil.copytree(projectDir, jobDir, ignore=shutil.ignore_patterns("DTResults"))
+        return jobDir
+
+    def _run(self, jobDir: Path, fileName: str, desc: str,
+             on_done: Optional[Callable[[int, Path], None]], env: Optional[Dict[str, str]]) -> int:
+        ctr = self._free.get()
+        try:
+            res = self.backend.run(ctr, jobDir / fileName, self.testFilePath, {**os.environ, **(env or {})})
+        finally:
+            self._free.put(ctr)
+        with self._print_lock:
+            print(f"===== [{desc}] docker test @ {ctr}: 返回码 {res.returncode} =====")
+            if res.stdout:
+                print(res.stdout)
+            if res.stderr:
+                print(res.stderr, file=sys.stderr)
+        try:
+            if on_done is not None:
+                on_done(res.returncode, jobDir / "DTResults")
+        finally:
+            shutil.rmtree(jobDir, ignore_errors=True)
+        return res.returncode
+
+    def submit(self, projectDir: Path, fileName: str, desc: str,
+               on_done: Optional[Callable[[int, Path], None]] = None,
+               env: Optional[Dict[str, str]] = None) -> "Future[int]":
+        """
+        立即快照 projectDir，排队测试其中的 fileName；on_done(返回码, DTResults 目录) 在任务目录删除前调用，
+        用于回收产物（如拷到结果目录、写缓存）。env 覆盖测试脚本的环境变量（如 DEP_SET）。
+        """
+        jobDir = self.snapshot(projectDir)
+        return self._executor.submit(self._run, jobDir, fileName, desc, on_done, env)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        self.backend.stop(self.containers)
+        if wait:
+            shutil.rmtree(self.jobRoot, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,2 @@
+from .batchedLP import BatchedWatermarkLogitsProcessor
+__all__ = ["BatchedWatermarkLogitsProcessor"]
\ No newline at end of file
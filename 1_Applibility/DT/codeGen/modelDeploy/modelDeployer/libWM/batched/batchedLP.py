@@ -0,0 +1,246 @@
+# batchedLP.py
+# 逐行参数的批处理水印 logits processor：同一个 batch 内各行可以是不同的水印方法 / 强度 / 密钥。
+# - 每行对应一个由 builder 构造好的单行处理器（wllm / sweet / ewd / stone / waterfall），或 None（该行不加水印）；
+#   gamma / delta / hash_key / 阈值等参数都取自各行自己的处理器，不做任何复刻
+# - wllm / sweet：greenlist 取自 greenlist.py 的共享 LRU（按 hash_key * 前一 token 记忆，跨行 / 跨步 / 跨请求复用），
+#   各行掩码拼成 [k, V] 后乘上逐行 delta，一次写进 bias；每个种子各自一条 randperm 流，
+#   未命中缓存时仍逐种子求一次（批量 RNG 会改变 greenlist，与单行检出不兼容）
+# - ewd / stone：逐行求 greenlist，汇总后一次 index_put_；waterfall 直接写 bias 的对应行
+# - 最后一次加法把 [B, V] 的 bias 作用到 scores 上；sweet 的熵门限对整批一次 softmax 求出
+# - 检出：把各行轨迹（去掉左侧 pad、截断到首个 EOS）注入对应单行处理器的运行时缓存，
+#   再调用其 detect_last()，与逐条生成时的检出口径保持一致
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from torch import Tensor
+import time as _time
+from transformers.generation.logits_process import LogitsProcessor
+
+from ..wllm import WLLMLogitsProcessor
+from ..sweet import SWEETLogitsProcessor
+from ..ewd import EWDWMLogitsProcessor
+from ..stone import STONEWMLogitsProcessor
+from ..waterfall import WaterfallLogitsProcessor
+from . import greenlist as _greenlist
+
+
+SUPPORTED_TYPES = (
+    WLLMLogitsProcessor,
+    SWEETLogitsProcessor,
+    EWDWMLogitsProcessor,
+    STONEWMLogitsProcessor,
+    WaterfallLogitsProcessor,
+)
+
+
+class BatchedWatermarkLogitsProcessor(LogitsProcessor):
+    """
+    rows[i] 为第 i 行的单行水印处理器（或 None）。生成结束后调用 detect_last() 得到逐行检出结果列表。
+    - 只接受 supports() 为真的处理器：开启 online_detection 的处理器依赖逐步的 batch=1 状态，不参与合批
+    - 一个实例只服务一次 generate（与单行处理器“每请求克隆”的用法一致）
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Optional[LogitsProcessor]],
+        *,
+        eos_token_ids: Optional[Sequence[int]] = None,
+        pad_token_id: Optional[int] = None,
+    ):
+        for i, proc in enumerate(rows):
+            if proc is not None and not self.supports(proc):
+                raise TypeError(f"row {i}: {proc.__class__.__name__} 不支持逐行批处理")
+        self.rows: List[Optional[LogitsProcessor]] = list(rows)
+        self._eos_ids: List[int] = [int(x) for x in (eos_token_ids or [])]
+        self._pad_id: Optional[int] = None if pad_token_id is None else int(pad_token_id)
+        self._need_entropy = any(isinstance(p, SWEETLogitsProcessor) for p in self.rows)
+        # stone：逐行的语法 token 集合（只随 language / skipping_rule 变化）
+        self._syntax: Dict[int, set] = {
+            i: set(p.utils.get_syntax_tokens())
+            for i, p in enumerate(self.rows)
+            if isinstance(p, STONEWMLogitsProcessor)
+        }
+
+        # 运行时缓存（检出用）
+        self._prefix_len: Optional[int] = None
+        self._last_ids: Optional[Tensor] = None
+        self._entropy_steps: List[Tensor] = []
+
+        self._lp_time_s: float = 0.0
+        self._lp_calls: int = 0
+
+    @staticmethod
+    def supports(proc: Any) -> bool:
+        return isinstance(proc, SUPPORTED_TYPES) and not getattr(proc, "online_detection", False)
+
+    # -------------------- 嵌入 -------------------- #
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        t0 = _time.perf_counter()
+        try:
+            bsz = int(input_ids.shape[0])
+            if bsz != len(self.rows):
+                raise ValueError(f"batch size {bsz} != rows {len(self.rows)}")
+            if self._prefix_len is None:
+                self._prefix_len = int(input_ids.shape[1])
+                for proc in self.rows:
+                    if isinstance(proc, WaterfallLogitsProcessor):
+                        proc._proc.reset(proc._n_gram)
+
+            ent = None
+            if self._need_entropy:
+                raw_probs = torch.softmax(scores, dim=-1)
+                ent = -torch.where(raw_probs > 0, raw_probs * raw_probs.log(), raw_probs.new([0.0])).sum(dim=-1)
+                self._entropy_steps.append(ent.detach().to("cpu"))
+
+            bias = torch.zeros_like(scores)
+            idx_rows: List[Tensor] = []
+            idx_cols: List[Tensor] = []
+            vals: List[Tensor] = []
+            mask_rows: List[int] = []
+            masks: List[Tensor] = []
+            mask_deltas: List[float] = []
+            for b, proc in enumerate(self.rows):
+                if proc is None:
+                    continue
+                if isinstance(proc, WaterfallLogitsProcessor):
+                    # 官方扰动直接写进 bias 的第 b 行（bias[b:b+1] 是视图，原地 +=）
+                    proc._proc(input_ids[b : b + 1], bias[b : b + 1])
+                    continue
+                if isinstance(proc, (WLLMLogitsProcessor, SWEETLogitsProcessor)) and _greenlist.supports(proc):
+                    # sweet：低熵时刻不加偏置（先判门限，免得白查 greenlist）
+                    if isinstance(proc, SWEETLogitsProcessor) and not bool(ent[b] > proc.entropy_threshold):
+                        continue
+                    mask_rows.append(b)
+                    masks.append(_greenlist.green_mask(proc, int(input_ids[b, -1])))
+                    mask_deltas.append(float(proc.delta))
+                    continue
+                green, delta = self._row_greenlist(b, proc, input_ids[b], scores[b], ent)
+                if green is None:
+                    continue
+                green = green.to(device=scores.device, dtype=torch.long)
+                idx_rows.append(torch.full_like(green, b))
+                idx_cols.append(green)
+                vals.append(torch.full(green.shape, delta, dtype=scores.dtype, device=scores.device))
+
+            if masks:
+                # 掩码长度为处理器词表大小，模型 logits 维度可能更大（对齐填充），多出的列不加偏置
+                width = min(int(scores.shape[-1]), max(int(m.numel()) for m in masks))
+                stacked = torch.stack([m[:width] for m in masks]).to(device=scores.device)
+                deltas = torch.tensor(mask_deltas, dtype=scores.dtype, device=scores.device).unsqueeze(-1)
+                rows_idx = torch.tensor(mask_rows, device=scores.device)
+                bias[rows_idx, :width] += stacked.to(scores.dtype) * deltas
+            if idx_cols:
+                bias.index_put_((torch.cat(idx_rows), torch.cat(idx_cols)), torch.cat(vals), accumulate=True)
+            scores = scores + bias
+
+            self._last_ids = input_ids.detach().to("cpu")
+            return scores
+        finally:
+            try:
+                self._lp_time_s += float(_time.perf_counter() - t0)
+                self._lp_calls += 1
+            except Exception:
+                pass
+
+    def _row_greenlist(
+        self, b: int, proc: Any, ids_row: Tensor, scores_row: Tensor, ent: Optional[Tensor]
+    ) -> Tuple[Optional[Tensor], float]:
+        """
+        返回第 b 行本步要加偏置的 greenlist 及 delta；本步不加偏置时 greenlist 为 None。
+        wllm / sweet 的 simple_1 播种在 __call__ 中走共享掩码缓存，这里只处理其余播种方式（逐行 randperm）。
+        """
+        if isinstance(proc, (WLLMLogitsProcessor, SWEETLogitsProcessor)):
+            # sweet：低熵时刻不加偏置（先判门限，免得白算 randperm）
+            if isinstance(proc, SWEETLogitsProcessor) and not bool(ent[b] > proc.entropy_threshold):
+                return None, 0.0
+            if proc.rng is None:
+                proc.rng = torch.Generator()
+            return proc._get_greenlist_ids(ids_row), float(proc.delta)
+
+        # ewd / stone：前缀不足 prefix_length 时原实现不加偏置
+        if ids_row.shape[-1] < proc.config.prefix_length:
+            return None, 0.0
+        if isinstance(proc, STONEWMLogitsProcessor):
+            # 与 STONELogitsProcessor 一致：按本步 argmax token 是否为语法 token 决定是否加偏置
+            next_token = proc.config.generation_tokenizer.decode(torch.argmax(scores_row), skip_special_tokens=True)
+            syntax = self._syntax[b]
+            is_syntax = next_token in syntax or next_token.strip() in syntax
+            if is_syntax != (proc.watermark_on_pl == "True"):
+                return None, 0.0
+        return proc.utils.get_greenlist_ids(ids_row), float(proc.config.delta)
+
+    # -------------------- 检出 -------------------- #
+    def _row_trajectory(self, b: int) -> Tuple[Tensor, Tensor]:
+        """第 b 行的 (提示词 ids, 续写 ids)：去掉左侧 pad，续写截断到首个 EOS（不含）。"""
+        ids = self._last_ids[b]
+        prompt, cont = ids[: self._prefix_len], ids[self._prefix_len :]
+        if self._pad_id is not None:
+            keep = (prompt != self._pad_id).nonzero()
+            prompt = prompt[int(keep[0]) :] if keep.numel() else prompt[:0]
+        if self._eos_ids:
+            hit = torch.isin(cont, torch.tensor(self._eos_ids, dtype=cont.dtype)).nonzero()
+            if hit.numel():
+                cont = cont[: int(hit[0])]
+        return prompt, cont
+
+    def _load_row(self, b: int, proc: Any) -> None:
+        """把第 b 行轨迹注入对应单行处理器的运行时缓存，与逐条生成后的缓存状态一致。"""
+        prompt, cont = self._row_trajectory(b)
+        full = torch.cat([prompt, cont]).clone()
+        if isinstance(proc, (WLLMLogitsProcessor, SWEETLogitsProcessor)):
+            proc._cache_full_ids = full
+            proc._cache_prefix_len = int(prompt.numel())
+            proc._cache_prev_len = int(full.numel())
+            if isinstance(proc, SWEETLogitsProcessor):
+                proc._cache_entropy = [float(step[b]) for step in self._entropy_steps[: cont.numel() + 1]]
+        elif isinstance(proc, WaterfallLogitsProcessor):
+            proc._cache_rows_ids = [[int(t) for t in cont.tolist()]]
+        else:
+            proc._cache_full_ids_rows = [full]
+
+    def _detect_row(self, b: int, proc: Any) -> Dict[str, Any]:
+        self._load_row(b, proc)
+        return proc.detect_last()
+
+    def load_last(self) -> None:
+        """
+        只注入、不检出：之后可直接调用各行单行处理器的 detect_last()（投机解码路径用它沿用逐条生成的检出流程）。
+        清空本实例的运行时缓存。
+        """
+        if self._last_ids is not None:
+            for b, proc in enumerate(self.rows):
+                if proc is not None:
+                    self._load_row(b, proc)
+        self._prefix_len = None
+        self._last_ids = None
+        self._entropy_steps = []
+
+    def detect_last(self) -> List[Optional[Dict[str, Any]]]:
+        """逐行检出；不加水印的行返回 None。检出后清空运行时缓存。"""
+        out: List[Optional[Dict[str, Any]]] = []
+        for b, proc in enumerate(self.rows):
+            if proc is None:
+                out.append(None)
+            elif self._last_ids is None:
+                out.append({"error": "no_cached_tokens"})
+            else:
+                try:
+                    out.append(self._detect_row(b, proc))
+                except Exception as e:
+                    out.append({"error": f"detection_failed: {e.__class__.__name__}: {e}"})
+        self._prefix_len = None
+        self._last_ids = None
+        self._entropy_steps = []
+        return out
+
+    def timing(self) -> Dict[str, Any]:
+        calls = int(self._lp_calls)
+        total_s = float(self._lp_time_s)
+        avg_us = (total_s / calls * 1e6) if calls > 0 else 0.0
+        return {
+            "lp_total_time_s": total_s,
+            "lp_calls": calls,
+            "lp_avg_per_call_us": float(avg_us),
+            "rows": len(self.rows),
+        }
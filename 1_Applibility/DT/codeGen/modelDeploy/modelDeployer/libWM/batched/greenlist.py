@@ -0,0 +1,87 @@
+# greenlist.py
+# wllm / sweet（simple_1 播种）greenlist 的共享缓存与批量查询：batchedLP 嵌入、textDetect 检出共用
+# - simple_1 下 greenlist 只取决于 (vocab_size, gamma, select_green_tokens, hash_key * 前一 token)，
+#   按此键做 LRU：同一前一 token 在不同行 / 不同步 / 不同文本间只求一次，结果与单行处理器逐次求出的完全相同
+# - 每个种子对应一条独立的 randperm 生成器流，无法合成一次批量 RNG 调用（换成批量 RNG 会改变 greenlist，
+#   与单行处理器的检出不再兼容）；向量化的是其余部分：按前一 token 去重、整批拼 [N, V] 掩码、一次 gather 判定命中
+# - 缓存存 [vocab_size] 的 bool 掩码（每条约 vocab_size 字节），容量见 GREENLIST_CACHE_SIZE
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple
+
+import torch
+from torch import Tensor
+
+from ..wllm.watermark import WatermarkBase
+
+# LRU 容量（条）；152k 词表时每条约 150KB
+GREENLIST_CACHE_SIZE = 512
+
+_cache: "OrderedDict[Tuple, Tensor]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def supports(proc: Any) -> bool:
+    """wllm / sweet 的 simple_1 播种（greenlist 只依赖前一个 token）。"""
+    return getattr(proc, "seeding_scheme", None) == "simple_1"
+
+
+def _key(proc: Any, prev_token: int) -> Tuple:
+    return (
+        int(proc.vocab_size),
+        float(proc.gamma),
+        bool(proc.select_green_tokens),
+        int(proc.hash_key) * int(prev_token),
+    )
+
+
+def green_mask(proc: Any, prev_token: int) -> Tensor:
+    """前一 token 为 prev_token 时的 greenlist 掩码 [vocab_size]（bool，CPU，只读共享）。"""
+    key = _key(proc, prev_token)
+    with _lock:
+        mask = _cache.get(key)
+        if mask is not None:
+            _cache.move_to_end(key)
+            return mask
+    # 复用上游 WatermarkBase._get_greenlist_ids（只看最后一个 token），不另写 randperm；
+    # 绕过 wllm 子类的覆写，免得改动其在线检出状态。临时换上独立的生成器，处理器自身的 rng 不受影响
+    rng, proc.rng = proc.rng, torch.Generator()
+    try:
+        ids = WatermarkBase._get_greenlist_ids(proc, torch.tensor([int(prev_token)]))
+    finally:
+        proc.rng = rng
+    mask = torch.zeros(int(proc.vocab_size), dtype=torch.bool)
+    mask[ids.to("cpu")] = True
+    with _lock:
+        _cache[key] = mask
+        _cache.move_to_end(key)
+        while len(_cache) > GREENLIST_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return mask
+
+
+def green_masks(proc: Any, prev_tokens: Tensor) -> Tensor:
+    """prev_tokens: [N] → [N, vocab_size] bool；相同前一 token 只查一次缓存。"""
+    uniq, inverse = torch.unique(prev_tokens.to("cpu"), return_inverse=True)
+    stacked = torch.stack([green_mask(proc, int(t)) for t in uniq.tolist()])
+    return stacked[inverse]
+
+
+def green_hits(proc: Any, prev_tokens: Tensor, tokens: Tensor) -> Tensor:
+    """逐位置判定 tokens[i] 是否在以 prev_tokens[i] 播种的 greenlist 中：[N] bool。"""
+    prev_tokens, tokens = prev_tokens.to("cpu"), tokens.to("cpu")
+    if tokens.numel() == 0:
+        return torch.zeros(0, dtype=torch.bool)
+    uniq, inverse = torch.unique(prev_tokens, return_inverse=True)
+    stacked = torch.stack([green_mask(proc, int(t)) for t in uniq.tolist()])
+    # 越界 token（词表外的特殊 id）按不命中处理，与逐元素比较的原实现一致
+    in_vocab = tokens < stacked.shape[1]
+    hits = torch.zeros(tokens.shape, dtype=torch.bool)
+    hits[in_vocab] = stacked[inverse[in_vocab], tokens[in_vocab]]
+    return hits
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,186 @@
+# textDetect.py
+# 无生成的检出：对任意 token 序列（如混淆后的代码）直接打分，供服务端 /v1/detect 使用。
+# - 与 batchedLP 的检出口径一致：把各行 token 注入单行处理器的运行时缓存，再调用其 detect_last()
+# - 整段文本都视为“续写”（无提示词前缀）；wllm / sweet 的首个 token 只作播种、不计分
+# - ewd / stone / waterfall 的 detect_last() 本身按行处理（waterfall 一次 verify 全部文本），
+#   所有行一次注入、一次调用；codeip 逐行调用
+# - wllm / sweet（simple_1 播种）：所有行的 (前一 token, 当前 token) 拼成一列，经 greenlist.py 的共享掩码缓存
+#   一次 gather 判定命中，再按行分段求和得到 G / T；z / p / 判决沿用单行处理器的静态方法与阈值，结果与 detect_last() 相同。
+#   greenlist 本身仍按去重后的种子逐个求（每个种子一条 randperm 流，不能合成一次批量 RNG），其余播种方式逐行调用
+# - sweet 需要逐位置熵（模型对该位置的预测分布熵），由调用方一次前向求出后传入
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+
+import torch
+from torch import Tensor
+
+from ..wllm import WLLMLogitsProcessor
+from ..sweet import SWEETLogitsProcessor
+from ..ewd import EWDWMLogitsProcessor
+from ..stone import STONEWMLogitsProcessor
+from ..waterfall import WaterfallLogitsProcessor
+from ..codeip.codeipLP import CodeipLogitsProcessor
+from . import greenlist as _greenlist
+
+
+DETECTABLE_TYPES = (
+    WLLMLogitsProcessor,
+    SWEETLogitsProcessor,
+    EWDWMLogitsProcessor,
+    STONEWMLogitsProcessor,
+    WaterfallLogitsProcessor,
+    CodeipLogitsProcessor,
+)
+
+
+def needs_entropy(proc: Any) -> bool:
+    return isinstance(proc, SWEETLogitsProcessor)
+
+
+def _split_rows(res: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+    """把多行 detect_last() 的 {"score": [..], ...} 拆成逐行的 {"score": x, ...}；单行结果原样返回。"""
+    if n == 1:
+        return [dict(res)]
+    out: List[Dict[str, Any]] = [{} for _ in range(n)]
+    for k, v in res.items():
+        for i in range(n):
+            out[i][k] = v[i] if isinstance(v, list) and len(v) == n else v
+    return out
+
+
+def _detect_one(proc: Any, ids: Tensor, entropy: Optional[Sequence[float]]) -> Dict[str, Any]:
+    if isinstance(proc, (WLLMLogitsProcessor, SWEETLogitsProcessor)):
+        proc._cache_full_ids = ids
+        proc._cache_prefix_len = 0
+        proc._cache_prev_len = int(ids.numel())
+        if isinstance(proc, SWEETLogitsProcessor):
+            proc._cache_entropy = list(entropy)
+    else:  # codeip
+        if getattr(proc, "_mode", None) != "random":
+            return {"error": "unsupported: codeip pda mode scores with generation-time statistics"}
+        proc._cache_full_ids = ids
+        proc._cache_prefix_len = 0
+        proc._cache_prev_len = int(ids.numel())
+    return proc.detect_last()
+
+
+def _row_entropy(proc: Any, ids: Tensor, entropy: Sequence[float]) -> List[float]:
+    """与 SWEETLogitsProcessor.detect_last() 相同的熵对齐：截到文本长度，只缺首位时前补 0.0。"""
+    ent = list(entropy[: int(ids.numel())])
+    if len(ent) != int(ids.numel()):
+        if len(ent) == int(ids.numel()) - 1:
+            ent = [0.0] + ent
+        else:
+            raise ValueError(f"entropy length mismatch: got {len(ent)} vs ids {int(ids.numel())}")
+    return ent
+
+
+def _score_green_rows(
+    proc: Any,
+    rows: Sequence[Tensor],
+    entropy_rows: Optional[Sequence[Sequence[float]]],
+) -> List[Dict[str, Any]]:
+    """wllm / sweet 的批量打分：rows 均非空，首个 token 只作播种。返回逐行 detect_last() 同款结果。"""
+    sweet = isinstance(proc, SWEETLogitsProcessor)
+    lengths = [int(r.numel()) - 1 for r in rows]
+    prev = torch.cat([r[:-1] for r in rows]).to(torch.long)
+    curr = torch.cat([r[1:] for r in rows]).to(torch.long)
+    scored = torch.ones(prev.shape, dtype=torch.bool)
+    if sweet:
+        ent = torch.tensor(
+            [e for r, er in zip(rows, entropy_rows) for e in _row_entropy(proc, r, er)[1:]], dtype=torch.float64
+        )
+        scored = ent > float(proc.entropy_threshold)
+    hits = torch.zeros(prev.shape, dtype=torch.bool)
+    if bool(scored.any()):
+        hits[scored] = _greenlist.green_hits(proc, prev[scored], curr[scored])
+
+    gamma, thr = float(proc.gamma), float(proc._z_threshold)
+    out: List[Dict[str, Any]] = []
+    for n, s, h in zip(lengths, torch.split(scored, lengths), torch.split(hits, lengths)):
+        if n < 1:
+            out.append({"invalid": True})
+            continue
+        T, G = int(s.sum()), int(h.sum())
+        if sweet and T < 1:
+            # 与 SweetDetector 一致：没有高熵位置时近似“人类生成”
+            res = {
+                "num_tokens_generated": n,
+                "num_tokens_scored": 0,
+                "num_green_tokens": 0,
+                "watermarking_fraction": 0.0,
+                "green_fraction": 0.0,
+                "z_score": -100.0,
+                "p_value": 1.0,
+            }
+        else:
+            z = proc._compute_z_score(G, T, gamma)
+            res = {"num_tokens_generated": n} if sweet else {}
+            res["num_tokens_scored"] = T
+            res["num_green_tokens"] = G
+            if sweet:
+                res["watermarking_fraction"] = float(T / max(1, n))
+            res["green_fraction"] = float(G / max(1, T))
+            res["z_score"] = z
+            res["p_value"] = proc._compute_p_value(float(z))
+        res["prediction"] = bool(float(res["z_score"]) > thr)
+        if res["prediction"]:
+            res["confidence"] = float(1.0 - float(res["p_value"]))
+        out.append(res)
+    return out
+
+
+def detect_token_rows(
+    proc: Any,
+    rows: Sequence[Tensor],
+    entropy_rows: Optional[Sequence[Sequence[float]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    rows[i] 为第 i 段文本的 token ids（1D，CPU）。返回逐行检出结果，字段与生成后 detect_last() 的单行结果一致；
+    空文本或单行失败返回 {"error": ...}。sweet 需提供与 rows 等长的 entropy_rows。
+    """
+    if not isinstance(proc, DETECTABLE_TYPES):
+        return [{"error": f"unsupported: {proc.__class__.__name__}"} for _ in rows]
+    if needs_entropy(proc) and entropy_rows is None:
+        raise ValueError("sweet detection needs entropy_rows")
+
+    out: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    live = []
+    for i, ids in enumerate(rows):
+        if ids.numel() == 0:
+            out[i] = {"error": "empty_text"}
+        else:
+            live.append(i)
+
+    if live and isinstance(proc, (EWDWMLogitsProcessor, STONEWMLogitsProcessor, WaterfallLogitsProcessor)):
+        if isinstance(proc, WaterfallLogitsProcessor):
+            proc._cache_rows_ids = [[int(t) for t in rows[i].tolist()] for i in live]
+        else:
+            proc._cache_full_ids_rows = [rows[i] for i in live]
+        try:
+            for i, r in zip(live, _split_rows(proc.detect_last(), len(live))):
+                out[i] = r
+        except Exception as e:
+            for i in live:
+                out[i] = {"error": f"detection_failed: {e.__class__.__name__}: {e}"}
+        return out
+
+    if live and isinstance(proc, (WLLMLogitsProcessor, SWEETLogitsProcessor)) and _greenlist.supports(proc):
+        try:
+            scores = _score_green_rows(
+                proc, [rows[i] for i in live], None if entropy_rows is None else [entropy_rows[i] for i in live]
+            )
+        except Exception:
+            # 个别行出错（如熵长度不符）时退回逐行，单行失败只影响该行
+            pass
+        else:
+            for i, r in zip(live, scores):
+                out[i] = r
+            return out
+
+    for i in live:
+        try:
+            out[i] = _detect_one(proc, rows[i], None if entropy_rows is None else entropy_rows[i])
+        except Exception as e:
+            out[i] = {"error": f"detection_failed: {e.__class__.__name__}: {e}"}
+    return out
@@ -32,6 +32,7 @@ Notes:
     before starting a new generation to avoid boundary mis-detection.
 """
 from __future__ import annotations
+import copy
 from typing import Any, Dict, Optional
 
 import torch
@@ -169,28 +170,32 @@ class CodeipLogitsProcessor(LogitsProcessor):
                     self._pda_token_sets = None
                     self._pda_p = None
 
-                if hasattr(mm, "get_pda_predictions"):
+                self._hook_pda_predictor(mm)
+
+    def _hook_pda_predictor(self, mm: Any) -> None:
+        """Hook the PDA predictor so each step's predicted class lands on this instance."""
+        if hasattr(mm, "get_pda_predictions"):
+            try:
+                orig_get = mm.get_pda_predictions
+
+                def _wrapped_get_pda_predictions(texts, *args, **kwargs):
+                    preds = orig_get(texts, *args, **kwargs)
                     try:
-                        orig_get = mm.get_pda_predictions
-
-                        def _wrapped_get_pda_predictions(texts, *args, **kwargs):
-                            preds = orig_get(texts, *args, **kwargs)
-                            try:
-                                if torch.is_tensor(preds) and preds.numel() > 0:
-                                    self._pda_last_pred = int(preds[0].item())
-                                elif hasattr(preds, "tolist") and not isinstance(preds, (str, bytes)):
-                                    lst = preds.tolist()
-                                    self._pda_last_pred = int(lst[0]) if len(lst) else None
-                                else:
-                                    self._pda_last_pred = int(preds[0]) if isinstance(preds, (list, tuple)) and len(preds) else None
-                            except Exception:
-                                self._pda_last_pred = None
-                            return preds
-
-                        mm.get_pda_predictions = _wrapped_get_pda_predictions
-                        self._pda_hooked = True
+                        if torch.is_tensor(preds) and preds.numel() > 0:
+                            self._pda_last_pred = int(preds[0].item())
+                        elif hasattr(preds, "tolist") and not isinstance(preds, (str, bytes)):
+                            lst = preds.tolist()
+                            self._pda_last_pred = int(lst[0]) if len(lst) else None
+                        else:
+                            self._pda_last_pred = int(preds[0]) if isinstance(preds, (list, tuple)) and len(preds) else None
                     except Exception:
-                        self._pda_hooked = False
+                        self._pda_last_pred = None
+                    return preds
+
+                mm.get_pda_predictions = _wrapped_get_pda_predictions
+                self._pda_hooked = True
+            except Exception:
+                self._pda_hooked = False
 
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
         
@@ -457,6 +462,25 @@ class CodeipLogitsProcessor(LogitsProcessor):
 
         return out
 
+    def spawn(self) -> "CodeipLogitsProcessor":
+        """
+        Per-request instance sharing the read-only parts with this one (message model,
+        tokenizer id maps, PDA token sets / probabilities). Caches, PDA online stats and
+        timing counters are private; in PDA mode the message model is shallow-copied and
+        re-hooked so predicted classes land on the new instance.
+        """
+        new = copy.copy(self)
+        new.clear_cached()
+        new._lp_time_s = 0.0
+        new._lp_calls = 0
+        if self._mode == "pda" and self._pda_hooked:
+            mm = copy.copy(self.processor.message_model)
+            mm.__dict__.pop("get_pda_predictions", None)  # drop the hook bound to the spec
+            new.processor = copy.copy(self.processor)
+            new.processor.message_model = mm
+            new._hook_pda_predictor(mm)
+        return new
+
     def timing(self) -> Dict[str, Any]:
         """
         Return accumulated logits-processor runtime.
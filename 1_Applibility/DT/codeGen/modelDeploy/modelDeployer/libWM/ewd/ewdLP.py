@@ -22,6 +22,7 @@
 #   and runs the original score_sequence() to get the z-score & decision.
 # ===========================================================================
 from __future__ import annotations
+import copy
 from typing import Any, Dict, List, Optional
 
 import torch
@@ -226,6 +227,22 @@ class EWDWMLogitsProcessor(EWDLogitsProcessor):
             return {"is_watermarked": results_bool[0], "score": results_score[0]}
         return {"is_watermarked": results_bool, "score": results_score}
 
+    def spawn(self) -> "EWDWMLogitsProcessor":
+        """
+        Per-request instance sharing the read-only config (tokenizer / model references,
+        gamma / delta / hash_key ...) with this one. The utils RNG, the detection caches
+        and the timing counters are private to the new instance.
+        """
+        new = copy.copy(self)
+        new.utils = copy.copy(self.utils)
+        new.utils.rng = torch.Generator(device=self.config.device)
+        new._cache_full_ids_rows = None
+        new._prev_len_rows = None
+        new._cache_bsz = None
+        new._lp_time_s = 0.0
+        new._lp_calls = 0
+        return new
+
     def timing(self) -> Dict[str, Any]:
         """
         Return accumulated logits-processor runtime.
@@ -87,8 +87,13 @@ class STONEUtils:
         z = numer / denom
         return z
 
-    def score_sequence(self, input_ids: torch.Tensor) -> tuple[float, list[int], list[int]]:
-        
+    def get_syntax_tokens(self) -> list[str]:
+        """Syntax tokens selected by skipping_rule for the configured language."""
+        keywords = []
+        operators = []
+        delimiters = []
+        whitespaces = []
+        types = []
         if self.language == 'python':
             keywords = [
                 'True', 'False', 'None', 'and', 'as', 'assert', 'async', 'await',
@@ -175,6 +180,11 @@ class STONEUtils:
             syntax_tokens = whitespaces
         elif self.skipping_rule == 'types':
             syntax_tokens = types
+        return syntax_tokens
+
+    def score_sequence(self, input_ids: torch.Tensor) -> tuple[float, list[int], list[int]]:
+        
+        syntax_tokens = self.get_syntax_tokens()
 
         decoded_texts = []
         for i in range(len(input_ids)):
@@ -20,6 +20,7 @@
 # - Cache full input_ids during generation and provide zero-arg detect_last()
 # ==============================================================================
 from __future__ import annotations
+import copy
 from typing import Any, Dict, List, Optional
 
 import torch
@@ -69,6 +70,16 @@ class _ConfigShim:
         self.model = model
 
 
+class _RecordingSTONEUtils(STONEUtils):
+    """记录最近一次计算的 greenlist，供在线检出在下一步判定采样结果。"""
+    last_greenlist_ids: Optional[Tensor] = None
+
+    def get_greenlist_ids(self, input_ids: torch.LongTensor):
+        greenlist_ids = super().get_greenlist_ids(input_ids)
+        self.last_greenlist_ids = greenlist_ids
+        return greenlist_ids
+
+
 class STONEWMLogitsProcessor(STONELogitsProcessor):
     """
     复用原始 STONELogitsProcessor 的偏置逻辑；
@@ -76,6 +87,10 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
       - 在 __init__ 里用 _ConfigShim 注入参数（无 STONEConfig 依赖）
       - 在 __call__ 后缓存本轮最新的 full input_ids（逐行）
       - detect_last(): 基于缓存做零参离线检测（用原 STONEUtils.score_sequence）
+      - 可选在线检出（online_detection=True）：逐 token O(1) 累计续写部分的 G/T，
+        online_snapshot() 随时给出 z；online_stop_threshold 给定时 z ≥ 阈值即 online_stop_reached()。
+        注意在线统计只覆盖续写 token（按生成时的 token 判定），
+        detect_last 则对“提示词+续写”解码后重新分词打分，两者口径不同。
     """
 
     def __init__(
@@ -92,6 +107,8 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
         language: str,
         watermark_on_pl: str = "True",
         skipping_rule: Optional[str] = None,
+        online_detection: bool = False,
+        online_stop_threshold: Optional[float] = None,
     ):
         # 1) 构造轻量“配置”并复用原工具类/处理器
         cfg = _ConfigShim(
@@ -105,7 +122,7 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
             prefix_length=prefix_length,
             language=language,
         )
-        utils = STONEUtils(
+        utils = _RecordingSTONEUtils(
             cfg,
             skipping_rule=skipping_rule,
             watermark_on_pl=watermark_on_pl,
@@ -125,7 +142,15 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
         self._prev_len_rows: Optional[List[int]] = None
         self._cache_bsz: Optional[int] = None
 
-        # 4) Performance counters (pure logits-processor overhead, accumulated per __call__)
+        # 4) 在线检出（可选；设置停止阈值即隐含开启）
+        self.online_stop_threshold: Optional[float] = (
+            None if online_stop_threshold is None else float(online_stop_threshold)
+        )
+        self.online_detection: bool = bool(online_detection) or self.online_stop_threshold is not None
+        self._online_syntax_tokens = set(utils.get_syntax_tokens())
+        self._online_reset()
+
+        # 5) Performance counters (pure logits-processor overhead, accumulated per __call__)
         self._lp_time_s: float = 0.0
         self._lp_calls: int = 0
 
@@ -134,6 +159,7 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
 
         # Time ONLY the logits-processor path (pure watermark LP overhead)
         t0 = _time.perf_counter()
+        self.utils.last_greenlist_ids = None
         try:
             scores_out = super().__call__(input_ids, scores)  # 原逻辑不变
         finally:
@@ -165,8 +191,69 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
         except Exception:
             pass  # 缓存失败不影响生成
 
+        if self.online_detection:
+            self._online_update(input_ids)
+
         return scores_out
 
+    # —— 在线检出：逐 token 累计（仅 batch=1） —— #
+    def _online_reset(self) -> None:
+        self._online_prev_len: Optional[int] = None
+        self._online_greenlist: Optional[Tensor] = None
+        self._online_generated: int = 0
+        self._online_scored: int = 0
+        self._online_green: int = 0
+
+    def _online_weight(self, token_id: int) -> bool:
+        """与 score_sequence 的 weights 一致：该 token 是否计入统计。"""
+        d = self.config.generation_tokenizer.decode(token_id, skip_special_tokens=True)  # type: ignore[attr-defined]
+        is_syntax = d in self._online_syntax_tokens or d.strip() in self._online_syntax_tokens
+        return is_syntax if self.watermark_on_pl == "True" else not is_syntax
+
+    def _online_update(self, input_ids: torch.LongTensor) -> None:
+        try:
+            if int(input_ids.shape[0]) != 1:
+                return
+            cur_len = int(input_ids.shape[1])
+            if self._online_prev_len is None or cur_len <= self._online_prev_len:
+                self._online_reset()
+            elif self._online_greenlist is not None:
+                # input_ids 的最后一个 token 由上一步采样得到：用上一步的 greenlist 判定
+                tok = int(input_ids[0, -1])
+                self._online_generated += 1
+                if self._online_weight(tok):
+                    self._online_scored += 1
+                    if bool((self._online_greenlist == tok).any()):
+                        self._online_green += 1
+            self._online_prev_len = cur_len
+            self._online_greenlist = self.utils.last_greenlist_ids
+        except Exception:
+            pass  # 在线统计失败不影响生成
+
+    def _online_z(self) -> float:
+        if self._online_scored < 1:
+            return float("-inf")
+        return float(self.utils._compute_z_score(self._online_green, self._online_scored))
+
+    def online_snapshot(self) -> Dict[str, Any]:
+        """当前的在线检出结果，字段沿用 detect_last()（is_watermarked / score）并附带计数。"""
+        z = self._online_z()
+        out: Dict[str, Any] = {
+            "is_watermarked": bool(z > float(self.config.z_threshold)),  # type: ignore[attr-defined]
+            "score": z,
+            "num_tokens_generated": int(self._online_generated),
+            "num_tokens_scored": int(self._online_scored),
+            "num_green_tokens": int(self._online_green),
+        }
+        if self.online_stop_threshold is not None:
+            out["stop_reached"] = bool(z >= self.online_stop_threshold)
+        return out
+
+    def online_stop_reached(self) -> bool:
+        if self.online_stop_threshold is None:
+            return False
+        return bool(self._online_z() >= self.online_stop_threshold)
+
     # —— 零参离线检测：与原逻辑对齐（decode → re-tokenize(no special tokens) → score） —— #
     def detect_last(self) -> Dict[str, Any]:
         """
@@ -225,6 +312,23 @@ class STONEWMLogitsProcessor(STONELogitsProcessor):
             return {"is_watermarked": results_bool[0], "score": results_score[0]}
         return {"is_watermarked": results_bool, "score": results_score}
 
+    def spawn(self) -> "STONEWMLogitsProcessor":
+        """
+        每请求实例：共享只读配置（tokenizer、语法 token 集合、gamma / delta / hash_key …），
+        utils 的 RNG 与 greenlist 记录、运行时缓存、在线统计与计时各自独立。
+        """
+        new = copy.copy(self)
+        new.utils = copy.copy(self.utils)
+        new.utils.rng = torch.Generator(device=self.config.device)
+        new.utils.last_greenlist_ids = None
+        new._cache_full_ids_rows = None
+        new._prev_len_rows = None
+        new._cache_bsz = None
+        new._online_reset()
+        new._lp_time_s = 0.0
+        new._lp_calls = 0
+        return new
+
     def timing(self) -> Dict[str, Any]:
         """
         Return accumulated logits-processor runtime.
@@ -1,5 +1,6 @@
 # sweetLP.py
 from __future__ import annotations
+import copy
 from typing import List, Dict, Optional
 from math import sqrt
 
@@ -19,6 +20,9 @@ class SWEETLogitsProcessor(WatermarkLogitsProcessor):
     - 运行时自动缓存侧信道：prefix_len / full_ids（至当前步）/ 每步 entropy
     - 提供 detect_last() 零参接口；server 端无需透传任何参数
       （阈值等可在 regWM.py 构造时注入）
+    - 可选在线检出（online_detection=True）：每步 O(1) 判定上一步采样出的 token，
+      仅在上一步熵 > 阈值时计入；online_snapshot() 随时给出与 detect_last() 同口径的结果，
+      online_stop_threshold 给定时 z ≥ 阈值即 online_stop_reached()
     """
 
     def __init__(
@@ -28,6 +32,8 @@ class SWEETLogitsProcessor(WatermarkLogitsProcessor):
         tokenizer=None,                 # 可选，仅占位，零参检出不依赖
         z_threshold: float = 4.0,
         ignore_repeated_bigrams: bool = False,
+        online_detection: bool = False,
+        online_stop_threshold: Optional[float] = None,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
@@ -44,7 +50,14 @@ class SWEETLogitsProcessor(WatermarkLogitsProcessor):
         self._cache_prefix_len: Optional[int] = None
         self._cache_full_ids: Optional[torch.LongTensor] = None
         self._cache_entropy: List[float] = []
-        
+
+        # ---- 在线检出（可选；设置停止阈值即隐含开启）----
+        self.online_stop_threshold: Optional[float] = (
+            None if online_stop_threshold is None else float(online_stop_threshold)
+        )
+        self.online_detection: bool = bool(online_detection) or self.online_stop_threshold is not None
+        self._online_reset()
+
         # ---- Performance counters (pure logits-processor overhead, accumulated per __call__) ----
         self._lp_time_s: float = 0.0
         self._lp_calls: int = 0
@@ -104,8 +117,85 @@ class SWEETLogitsProcessor(WatermarkLogitsProcessor):
         except Exception:
             pass  # 缓存失败不影响主流程
 
+        if self.online_detection:
+            self._online_update(input_ids, batched_greenlist_ids[0], float(ent[0].item()))
+
         return scores
 
+    # =========== 在线检出：逐 token 累计 ===========
+    def _online_reset(self) -> None:
+        self._online_prev_len: Optional[int] = None
+        self._online_greenlist: Optional[Tensor] = None
+        self._online_entropy: float = 0.0
+        self._online_generated: int = 0
+        self._online_scored: int = 0
+        self._online_green: int = 0
+
+    def _online_update(self, input_ids: torch.LongTensor, greenlist_ids: Tensor, entropy: float) -> None:
+        try:
+            if int(input_ids.shape[0]) != 1:
+                return
+            cur_len = int(input_ids.shape[1])
+            if self._online_prev_len is None or cur_len <= self._online_prev_len:
+                self._online_reset()
+            elif self._online_greenlist is not None:
+                # input_ids 的最后一个 token 由上一步采样得到：用上一步的 greenlist / 熵判定
+                self._online_generated += 1
+                if self._online_entropy > self.entropy_threshold:
+                    self._online_scored += 1
+                    if bool((self._online_greenlist == input_ids[0, -1]).any()):
+                        self._online_green += 1
+            self._online_prev_len = cur_len
+            self._online_greenlist = greenlist_ids
+            self._online_entropy = entropy
+        except Exception:
+            pass  # 在线统计失败不影响生成
+
+    def online_snapshot(self) -> Dict:
+        """当前的在线检出结果，字段与 detect_last() 一致（同样不含最后一步采样出的 token）。"""
+        n_gen, T, G = int(self._online_generated), int(self._online_scored), int(self._online_green)
+        if n_gen < 1:
+            return {"invalid": True, "num_tokens_generated": 0, "num_tokens_scored": 0, "num_green_tokens": 0}
+        if T < 1:
+            z, p = -100.0, 1.0
+        else:
+            z = self._compute_z_score(G, T, float(self.gamma))
+            p = self._compute_p_value(z)
+        out: Dict = {
+            "num_tokens_generated": n_gen,
+            "num_tokens_scored": T,
+            "num_green_tokens": G,
+            "watermarking_fraction": float(T / n_gen),
+            "green_fraction": float(G / max(1, T)),
+            "z_score": z,
+            "p_value": p,
+            "prediction": bool(z > float(self._z_threshold)),
+        }
+        if out["prediction"]:
+            out["confidence"] = float(1.0 - p)
+        if self.online_stop_threshold is not None:
+            out["stop_reached"] = bool(z >= self.online_stop_threshold)
+        return out
+
+    def online_stop_reached(self) -> bool:
+        if self.online_stop_threshold is None or self._online_scored < 1:
+            return False
+        z = self._compute_z_score(self._online_green, self._online_scored, float(self.gamma))
+        return bool(z >= self.online_stop_threshold)
+
+    def spawn(self) -> "SWEETLogitsProcessor":
+        """每请求实例：共享只读配置，RNG、运行时缓存（含逐步熵）、在线统计与计时各自独立。"""
+        new = copy.copy(self)
+        new.rng = torch.Generator()
+        new._online_reset()
+        new._cache_prev_len = None
+        new._cache_prefix_len = None
+        new._cache_full_ids = None
+        new._cache_entropy = []
+        new._lp_time_s = 0.0
+        new._lp_calls = 0
+        return new
+
     def timing(self) -> Dict[str, float]:
         """
         Return accumulated logits-processor runtime.
@@ -183,12 +273,18 @@ class SWEETLogitsProcessor(WatermarkLogitsProcessor):
                 "p_value": 1.0,
             }
 
+        # 低熵位置不计入统计，也就不必求 greenlist；其余同 wllm：按 (前一 token, 当前 token) 记忆命中
         green_token_count, green_token_mask = 0, []
+        hit_memo: Dict[tuple, bool] = {}
         for idx in range(prefix_len, len(input_ids)):
-            curr_token = int(input_ids[idx])
-            greenlist_ids = self._get_greenlist_ids(input_ids[:idx])
             if entropy[idx] > self.entropy_threshold:
-                if curr_token in set(int(t) for t in greenlist_ids):
+                curr_token = int(input_ids[idx])
+                pair = (int(input_ids[idx - 1]), curr_token)
+                hit = hit_memo.get(pair)
+                if hit is None:
+                    greenlist_ids = self._get_greenlist_ids(input_ids[:idx])
+                    hit = hit_memo[pair] = bool((greenlist_ids == curr_token).any())
+                if hit:
                     green_token_count += 1
                     green_token_mask.append(True)
                 else:
@@ -3,6 +3,7 @@
 # - 复用官方 PerturbationProcessor 与 WatermarkingFn*(生成同一 φ)
 # - 采样链顺序仍由你在外部控制（采样 warper 在前，waterfall 在后）
 # - 将“检出(verify)”能力归入处理器类，保持原嵌入逻辑不变
+import copy
 import numpy as np
 from typing import Iterable, Optional, List, Union, Dict, Any, cast
 import torch
@@ -51,6 +52,10 @@ class WaterfallLogitsProcessor(LogitsProcessor):
     - 离线检出能力（零参）：detect_last()
       * 处理器在 __call__ 内持续缓存“本轮新增的 continuation token”（不含提示词），
         服务端在生成结束后可直接零参调用检测。
+    - 可选在线检出（online_detection=True）：逐 token 把 (n-gram 置换后的) 计数 +1（O(1)，
+      置换在扰动时已进入 LRU），online_snapshot() 对累计计数做一次 q 计算（O(N log N)，计数不变时复用）；
+      online_stop_threshold 给定时 q_score ≥ 阈值即 online_stop_reached()。q 覆盖整个词表，
+      停止判据只在每新增 online_check_every 个计分 token 时重算一次，而不是每个解码步都算。
     """
 
     def __init__(
@@ -71,6 +76,10 @@ class WaterfallLogitsProcessor(LogitsProcessor):
         det_tokenizer=None,          # 可为 HF tokenizer 或 模型 ID 字符串
         # 缓存容量上限（极端长生成时可用以限制内存）
         cache_hard_limit_tokens: Optional[int] = None,
+        # 在线检出（可选；设置停止阈值即隐含开启）
+        online_detection: bool = False,
+        online_stop_threshold: Optional[float] = None,
+        online_check_every: int = 8,
     ):
         # ---- 1) 确定 N，与官方对齐 ----
         self._N = _resolve_vocab_size(tokenizer=tokenizer, vocab_ids=vocab_ids)
@@ -102,6 +111,7 @@ class WaterfallLogitsProcessor(LogitsProcessor):
         self._wm_fn = str(wm_fn)
         self._det_tokenizer = det_tokenizer if det_tokenizer is not None else tokenizer
         self._wm: Optional[Watermarker] = None  # 懒初始化，首次 detect 时创建
+        self._spec: Optional["WaterfallLogitsProcessor"] = None  # spawn 出的实例指向其 spec，共享 Watermarker
 
         # ---- 5) 侧信道缓存（仅在本轮生成期间累计 continuation token） ----
         self._cache_rows_ids: Optional[List[List[int]]] = None  # 每行样本的“新增 token”累积
@@ -109,6 +119,17 @@ class WaterfallLogitsProcessor(LogitsProcessor):
         # 逐行记录“上一调用看到的长度”，用于精确提取新增 span（避免把提示词尾 token 计入）
         self._prev_seen_len_rows: Optional[List[int]] = None
 
+        # ---- 6) 在线检出：续写 token 的置换计数（仅 batch=1） ----
+        self.online_stop_threshold: Optional[float] = (
+            None if online_stop_threshold is None else float(online_stop_threshold)
+        )
+        self.online_detection: bool = bool(online_detection) or self.online_stop_threshold is not None
+        if int(online_check_every) < 1:
+            raise ValueError("online_check_every 必须 ≥ 1")
+        self._online_check_every: int = int(online_check_every)
+        self._online_counts: Optional[np.ndarray] = None
+        self._online_reset()
+
         # ---- Performance counters (pure logits-processor overhead, accumulated per __call__) ----
         self._lp_time_s: float = 0.0
         self._lp_calls: int = 0
@@ -122,6 +143,7 @@ class WaterfallLogitsProcessor(LogitsProcessor):
         self._prev_len_rows = None
         self._cache_rows_ids = None  # 清空侧信道
         self._prev_seen_len_rows = None
+        self._online_reset()
         # timing counters are not reset here intentionally
 
     # —— 私有：在“发现新一轮生成开始”时，重置本地缓存 —— #
@@ -155,6 +177,7 @@ class WaterfallLogitsProcessor(LogitsProcessor):
             self._proc.reset(self._n_gram)
             # 重置侧信道缓存
             self._reset_local_caches(bsz)
+            self._online_reset()
             self._prev_seen_len_rows = [int(input_ids.shape[1])] * bsz  # 新一轮：基线为当前长度（不把提示词尾计入）
 
         # 若缓存还未初始化（例如 auto_reset=False 或首次调用）
@@ -169,6 +192,8 @@ class WaterfallLogitsProcessor(LogitsProcessor):
             if cur_len > prev:
                 # 只把 [prev:cur_len) 这段真正新出现的 token 并入缓存
                 new_span = input_ids[i, prev:cur_len].tolist()
+                if self.online_detection and bsz == 1:
+                    self._online_update(new_span)
                 if new_span:
                     self._cache_rows_ids[i].extend(int(t) for t in new_span)
                     # 硬上限裁剪（可选）
@@ -192,6 +217,93 @@ class WaterfallLogitsProcessor(LogitsProcessor):
             except Exception:
                 pass
 
+    # ------------------- 在线检出 ------------------- #
+    def _online_reset(self) -> None:
+        # 与 Watermarker.get_cumulative_token_count 对齐：续写的前 n_gram-1 个 token 只作种子，
+        # 遇到 id ≥ N 的 token 后不再计数
+        if self._online_counts is not None:
+            self._online_counts[:] = 0
+        self._online_window: List[int] = []
+        self._online_scored: int = 0
+        self._online_stopped: bool = False
+        # 最近一次 q 的结果及其对应的计分 token 数；计数只在 _online_scored 增加时变化
+        self._online_q_cache: Optional[Dict[str, Any]] = None
+        self._online_q_at: int = -1
+        self._online_next_check: int = self._online_check_every
+        self._online_stop_hit: bool = False
+
+    def _online_update(self, new_tokens: List[int]) -> None:
+        try:
+            if self._online_counts is None:
+                self._online_counts = np.zeros(self._N, dtype=np.int64)
+            window = self._n_gram - 1
+            for t in new_tokens:
+                t = int(t)
+                if not self._online_stopped and len(self._online_window) >= window:
+                    if t >= self._N:
+                        self._online_stopped = True
+                    else:
+                        prev = self._online_window[len(self._online_window) - window:]
+                        perm = self._proc.permute.get_permutation(prev, self._id_mu, cache=True)
+                        self._online_counts[perm[t]] += 1
+                        self._online_scored += 1
+                self._online_window.append(t)
+                if len(self._online_window) > window:
+                    del self._online_window[0]
+        except Exception:
+            pass  # 在线统计失败不影响生成
+
+    def _online_q(self) -> Dict[str, Any]:
+        if self._online_counts is None or self._online_scored < 1:
+            return {"q_score": 0.0, "num_tokens_scored": 0}
+        if self._online_q_cache is None or self._online_q_at != self._online_scored:
+            self._ensure_watermarker()
+            fn = self._wm.watermarking_fn  # type: ignore[union-attr]
+            q, _, k_p_extracted = fn.q(self._online_counts[None, :], k_p=[int(self._wm.k_p)])  # type: ignore[union-attr]
+            self._online_q_cache = {
+                "q_score": float(np.asarray(q).reshape(-1)[0]),
+                "k_p_extracted": int(np.asarray(k_p_extracted).reshape(-1)[0]),
+                "num_tokens_scored": int(self._online_scored),
+            }
+            self._online_q_at = self._online_scored
+        return dict(self._online_q_cache)
+
+    def online_snapshot(self) -> Dict[str, Any]:
+        """当前的在线检出结果（q_score 与 detect_last 同口径，但按生成时的 token 计数，不重新分词）。"""
+        out = self._online_q()
+        if self.online_stop_threshold is not None:
+            out["stop_reached"] = bool(out["q_score"] >= self.online_stop_threshold)
+        return out
+
+    def online_stop_reached(self) -> bool:
+        # 每个解码步都会被停止判据调用：只在计分 token 数跨过下一个检查点时重算 q
+        if self.online_stop_threshold is None or self._online_scored < 1:
+            return False
+        if not self._online_stop_hit and self._online_scored >= self._online_next_check:
+            self._online_stop_hit = bool(self._online_q()["q_score"] >= self.online_stop_threshold)
+            self._online_next_check = self._online_scored + self._online_check_every
+        return self._online_stop_hit
+
+    def spawn(self) -> "WaterfallLogitsProcessor":
+        """
+        每请求实例：φ、置换表与检出用 Watermarker 与本实例（spec）共享，只构造一次；
+        扰动器的 n-gram 起点、auto-reset 基线、continuation 缓存、在线计数与计时各自独立。
+        """
+        new = copy.copy(self)
+        new._proc = copy.copy(self._proc)
+        new._proc.n_gram = self._n_gram
+        new._proc.init_token_count = None
+        new._prev_len_batch = None
+        new._prev_len_rows = None
+        new._cache_rows_ids = None
+        new._prev_seen_len_rows = None
+        new._online_counts = None
+        new._online_reset()
+        new._spec = self
+        new._lp_time_s = 0.0
+        new._lp_calls = 0
+        return new
+
     def timing(self) -> Dict[str, Any]:
         """
         Return accumulated logits-processor runtime (waterfall perturbation part).
@@ -220,6 +332,10 @@ class WaterfallLogitsProcessor(LogitsProcessor):
         """
         if self._wm is not None:
             return
+        if self._spec is not None:
+            self._spec._ensure_watermarker()
+            self._wm = self._spec._wm
+            return
         if self._det_tokenizer is None:
             raise ValueError(
                 "WaterfallLogitsProcessor.detect_last(): 需要 det_tokenizer/tokenizer 以构造 Watermarker。"
@@ -6,6 +6,7 @@
 # - 在运行时自动缓存所需侧信道数据 (prefix_len、full_ids) 用于Detector检测
 
 from __future__ import annotations
+import copy
 from math import sqrt
 from typing import Dict, Optional, List
 
@@ -25,6 +26,10 @@ class WLLMLogitsProcessor(WatermarkLogitsProcessor):
       - 运行时自动缓存：prefix_len / full_ids（batch=1 场景）
       - 提供 detect_last()：无需 server 透传任何 ids/entropy 等
       - 与 WatermarkDetector 的 z/p 计算、假设检验完全对齐
+    可选在线检出（online_detection=True）：
+      - 每步只判定“上一步采样出的 token”是否落在上一步的 greenlist 中，O(1) 累计 G/T
+      - online_snapshot() 随时给出当前 z/p；生成结束时与 detect_last() 结果一致
+      - online_stop_threshold：z ≥ 阈值后 online_stop_reached() 为真，供服务端提前停止生成
     """
 
     def __init__(
@@ -33,6 +38,8 @@ class WLLMLogitsProcessor(WatermarkLogitsProcessor):
         tokenizer=None,                 # 可选，仅作扩展使用；当前零参检测不依赖
         z_threshold: float = 4.0,
         ignore_repeated_bigrams: bool = False,
+        online_detection: bool = False,
+        online_stop_threshold: Optional[float] = None,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
@@ -43,6 +50,14 @@ class WLLMLogitsProcessor(WatermarkLogitsProcessor):
         if getattr(self, "rng", None) is None:
             self.rng = torch.Generator()
 
+        # ---- 在线检出（可选；设置停止阈值即隐含开启）----
+        self.online_stop_threshold: Optional[float] = (
+            None if online_stop_threshold is None else float(online_stop_threshold)
+        )
+        self.online_detection: bool = bool(online_detection) or self.online_stop_threshold is not None
+        self._online_pending_greenlist: Optional[Tensor] = None
+        self._online_reset()
+
         # ---- 运行时缓存（用于零参检出）----
         self._cache_prev_len: Optional[int] = None
         self._cache_prefix_len: Optional[int] = None
@@ -85,8 +100,88 @@ class WLLMLogitsProcessor(WatermarkLogitsProcessor):
             # 缓存失败不影响主流程
             pass
 
+        if self.online_detection:
+            self._online_update(input_ids)
+
         return scores
 
+    # -------------- 在线检出：逐 token 累计 G/T --------------
+    def _get_greenlist_ids(self, input_ids: torch.LongTensor) -> list[int]:
+        greenlist_ids = super()._get_greenlist_ids(input_ids)
+        # 记录本步 greenlist，下一步用来判定本步采样出的 token
+        self._online_pending_greenlist = greenlist_ids
+        return greenlist_ids
+
+    def _online_reset(self) -> None:
+        self._online_prev_len: Optional[int] = None
+        self._online_greenlist: Optional[Tensor] = None
+        self._online_green: int = 0
+        self._online_scored: int = 0
+
+    def _online_update(self, input_ids: torch.LongTensor) -> None:
+        try:
+            if int(input_ids.shape[0]) != 1:
+                return
+            cur_len = int(input_ids.shape[1])
+            if self._online_prev_len is None or cur_len <= self._online_prev_len:
+                # 新一轮生成（判定方式与上面的缓存一致）
+                self._online_reset()
+            elif self._online_greenlist is not None:
+                # input_ids 的最后一个 token 即上一步采样结果
+                self._online_scored += 1
+                if bool((self._online_greenlist == input_ids[0, -1]).any()):
+                    self._online_green += 1
+            self._online_prev_len = cur_len
+            self._online_greenlist = self._online_pending_greenlist
+        except Exception:
+            pass  # 在线统计失败不影响生成
+
+    def online_snapshot(self) -> Dict:
+        """
+        当前的在线检出结果，字段与 detect_last() 一致。
+        与 detect_last 相同，不含最后一步采样出的 token（它不会再进入 input_ids）。
+        """
+        G, T = int(self._online_green), int(self._online_scored)
+        if T < 1:
+            return {"invalid": True, "num_tokens_scored": 0, "num_green_tokens": 0}
+        z = self._compute_z_score(G, T, float(self.gamma))
+        out: Dict = {
+            "num_tokens_scored": T,
+            "num_green_tokens": G,
+            "green_fraction": float(G / T),
+            "z_score": z,
+            "p_value": self._compute_p_value(z),
+            "prediction": bool(z > float(self._z_threshold)),
+        }
+        if out["prediction"]:
+            out["confidence"] = float(1.0 - out["p_value"])
+        if self.online_stop_threshold is not None:
+            out["stop_reached"] = bool(z >= self.online_stop_threshold)
+        return out
+
+    def online_stop_reached(self) -> bool:
+        if self.online_stop_threshold is None or self._online_scored < 1:
+            return False
+        z = self._compute_z_score(self._online_green, self._online_scored, float(self.gamma))
+        return bool(z >= self.online_stop_threshold)
+
+    def spawn(self) -> "WLLMLogitsProcessor":
+        """
+        每请求实例：与本实例共享只读配置（vocab / gamma / delta / hash_key / tokenizer …），
+        RNG、运行时缓存、在线统计与计时各自独立。服务端把 builder 产出的实例缓存为 spec，
+        每个请求 spawn 一份，不再重复构造。
+        """
+        new = copy.copy(self)
+        new.rng = torch.Generator()
+        new._online_pending_greenlist = None
+        new._online_reset()
+        new._cache_prev_len = None
+        new._cache_prefix_len = None
+        new._cache_full_ids = None
+        new._lp_time_s = 0.0
+        new._lp_calls = 0
+        return new
+
     def timing(self) -> Dict[str, float]:
         """
         Return accumulated logits-processor runtime.
@@ -144,11 +239,18 @@ class WLLMLogitsProcessor(WatermarkLogitsProcessor):
             score_dict["invalid"] = True
             return score_dict
 
+        # simple_1 播种下 greenlist 只取决于前一个 token：同一 (前一 token, 当前 token) 只判定一次；
+        # 命中判定直接在 greenlist 张量上比较，不再逐元素建 set
         green_token_count, green_token_mask = 0, []
+        hit_memo: Dict[tuple, bool] = {}
         for idx in range(prefix_len, len(input_ids)):
             curr_token = int(input_ids[idx])
-            greenlist_ids = self._get_greenlist_ids(input_ids[:idx])
-            if curr_token in set(int(t) for t in greenlist_ids):
+            pair = (int(input_ids[idx - 1]), curr_token)
+            hit = hit_memo.get(pair)
+            if hit is None:
+                greenlist_ids = self._get_greenlist_ids(input_ids[:idx])
+                hit = hit_memo[pair] = bool((greenlist_ids == curr_token).any())
+            if hit:
                 green_token_count += 1
                 green_token_mask.append(True)
             else:
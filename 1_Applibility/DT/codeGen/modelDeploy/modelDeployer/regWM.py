@@ -16,19 +16,26 @@ from server import register_internal, register_external_builder, model, tokenize
 # register_internal("greenlist_default", greenlist)
 
 # 示例B：你的自定义处理器，当作“外置”
-from libWM.wllm import WLLMLogitsProcessor as WLLM
-from libWM.sweet import SWEETLogitsProcessor as Sweet
-from libWM.waterfall import WaterfallLogitsProcessor as Waterfall
-from libWM.stone import STONEWMLogitsProcessor as Stone
-from libWM.ewd import EWDWMLogitsProcessor as EWD
-from libWM.codeip.codeipLP import CodeipLogitsProcessor as Codeip
+# 各后端（scipy / nltk / pygments / CodeIP 模型 / waterfall 的置换等）在对应 builder 首次被调用时才导入，
+# 只用 wllm 的部署不为其它后端付启动开销；需要提前导入的用 server 的 WARMUP_BUILDERS 预热
 
 # ===== 纯 builder 化：仅注册可参数化 builder =====
+def _online_cfg(cfg):
+    """
+    在线检出的通用字段（wllm / sweet / stone / waterfall）：
+      online_detection(bool)=False       每步累计统计，响应与流式块中附带快照
+      online_stop_threshold(float)=None  分数 ≥ 阈值即停止生成（隐含开启在线检出）
+    """
+    thr = cfg.get("online_stop_threshold", None)
+    return bool(cfg.get("online_detection", False)), (None if thr is None else float(thr))
+
 def build_wllm(**cfg):
+    from libWM.wllm import WLLMLogitsProcessor as WLLM
     gamma = cfg.get("gamma", 0.5)
     delta = cfg.get("delta", 1)
     z_threshold = cfg.get("z_threshold", 4.0)
     ignore_repeated_bigrams = cfg.get("ignore_repeated_bigrams", False)
+    online_detection, online_stop_threshold = _online_cfg(cfg)
     # vocab 由服务端注入 vocab_ids，这里不从 cfg 读取
     return WLLM(
         vocab=vocab_ids, 
@@ -37,14 +44,18 @@ def build_wllm(**cfg):
         tokenizer=tokenizer,
         z_threshold=float(z_threshold),
         ignore_repeated_bigrams = bool(ignore_repeated_bigrams),
+        online_detection=online_detection,
+        online_stop_threshold=online_stop_threshold,
     )
 
 def build_sweet(**cfg):
+    from libWM.sweet import SWEETLogitsProcessor as Sweet
     gamma = cfg.get("gamma", 0.5)
     delta = cfg.get("delta", 1)
     entropy_threshold = cfg.get("entropy_threshold", 0.9)
     z_threshold = cfg.get("z_threshold", 4.0)
     ignore_repeated_bigrams = cfg.get("ignore_repeated_bigrams", False)
+    online_detection, online_stop_threshold = _online_cfg(cfg)
     return Sweet(
         vocab=vocab_ids, 
         gamma=gamma, 
@@ -53,6 +64,8 @@ def build_sweet(**cfg):
         tokenizer=tokenizer,  # 便于 detect_from_text 使用；纯 token id 检测不强制
         z_threshold=z_threshold,
         ignore_repeated_bigrams=bool(ignore_repeated_bigrams),
+        online_detection=online_detection,
+        online_stop_threshold=online_stop_threshold,
     )
 
 # 例：若你的环境提供 tokenizer，可不传 vocab_ids/N
@@ -67,7 +80,11 @@ def build_waterfall(**cfg):
       tokenizer=None, vocab_ids=None,
       # 动态批检测（默认 'batch'；如有动态合批/拆分，建议 'row_any'）
       auto_reset(bool)=True, detect_mode(str)="batch"  # or "row_any"
+      # 在线检出（见 _online_cfg；停止阈值针对 q_score）
+      online_detection(bool)=False, online_stop_threshold(float)=None,
+      online_check_every(int)=8  # 停止判据每新增多少个计分 token 重算一次 q（q 覆盖整个词表）
     """
+    from libWM.waterfall import WaterfallLogitsProcessor as Waterfall
     # 先从 cfg 中读取并保存到局部变量
     id_mu = int(cfg.get("id_mu", 42))
     k_p = int(cfg.get("k_p", 1))
@@ -76,6 +93,8 @@ def build_waterfall(**cfg):
     wm_fn = str(cfg.get("wm_fn", "fourier"))
     auto_reset = bool(cfg.get("auto_reset", True))
     detect_mode = str(cfg.get("detect_mode", "batch"))
+    online_detection, online_stop_threshold = _online_cfg(cfg)
+    online_check_every = int(cfg.get("online_check_every", 8))
 
     # 使用上述变量进行构造
     return Waterfall(
@@ -89,6 +108,9 @@ def build_waterfall(**cfg):
         det_tokenizer=tokenizer,
         auto_reset=auto_reset,
         detect_mode=detect_mode,
+        online_detection=online_detection,
+        online_stop_threshold=online_stop_threshold,
+        online_check_every=online_check_every,
     )
 
 def infer_device(model) -> torch.device:
@@ -119,6 +141,7 @@ def infer_vocab_size(tokenizer, model) -> int:
     raise ValueError("无法推断 vocab_size：请手动传入或检查 tokenizer/model 是否已就绪")
 
 def build_ewd(**cfg):
+    from libWM.ewd import EWDWMLogitsProcessor as EWD
     # 先从 cfg / 现有上下文读取并保存到局部变量
     vocab_size   = infer_vocab_size(tokenizer, model)
     device       = infer_device(model)
@@ -143,6 +166,7 @@ def build_ewd(**cfg):
     )
 
 def build_stone(**cfg):
+    from libWM.stone import STONEWMLogitsProcessor as Stone
     # 先从 cfg 中读取并保存到局部变量
     vocab_size = infer_vocab_size(tokenizer, model)
     device     = infer_device(model)
@@ -154,6 +178,7 @@ def build_stone(**cfg):
     language       = str(cfg.get("language", "java"))
     watermark_on_pl = str(cfg.get("watermark_on_pl", "False"))
     skipping_rule  = cfg.get("skipping_rule", "all_pl")
+    online_detection, online_stop_threshold = _online_cfg(cfg)
 
     # 使用上述变量进行构造
     return Stone(
@@ -168,6 +193,8 @@ def build_stone(**cfg):
         language=language,
         watermark_on_pl=watermark_on_pl,
         skipping_rule=skipping_rule,
+        online_detection=online_detection,
+        online_stop_threshold=online_stop_threshold,
     )
     
 def build_codeip(**cfg):
@@ -181,6 +208,7 @@ def build_codeip(**cfg):
             - device
             - message (list[int])
         """
+        from libWM.codeip.codeipLP import CodeipLogitsProcessor as Codeip
         mode = str(cfg.get("mode", "random"))
         device = infer_device(model)
         delta = float(cfg.get("delta", 5.0))
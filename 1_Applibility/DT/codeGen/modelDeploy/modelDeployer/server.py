@@ -5,6 +5,7 @@ import time as _time
 import asyncio
 from typing import Any, Dict, List, Optional, Union, Callable
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from pydantic import BaseModel, PrivateAttr
 import torch
 import copy
@@ -14,15 +15,27 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from transformers import (
     AutoModelForCausalLM, AutoTokenizer,
     LogitsProcessorList,
-    LogitsProcessor
+    LogitsProcessor,
+    TextStreamer
 )
 from transformers.generation.stopping_criteria import (
-    StoppingCriteriaList, MaxLengthCriteria
+    StoppingCriteria, StoppingCriteriaList, MaxLengthCriteria
 )
 import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import os
+import sys
+
+# 本目录下的模块（metrics / specDecode / regWM / libWM）按文件所在目录查找，与启动时的工作目录无关
+_here = os.path.dirname(os.path.abspath(__file__))
+if _here not in sys.path:
+    sys.path.insert(0, _here)
+
+from metrics import REGISTRY
+from specDecode import speculative_generate
 
 # ================= 配置项(是否开启采样/双路同配置) =================
-import os
 # SERVER_DO_SAMPLE: "1"/"true" 开启采样；"0"/"false" 走贪心。默认开启。
 def _as_bool(x: str) -> bool:
     return str(x).strip().lower() not in ("0", "false", "no", "off", "")
@@ -71,31 +84,110 @@ if _as_bool(os.getenv("DETERMINISTIC", "0")):
 LOG_REQ_BODY = _as_bool(os.getenv("LOG_REQ_BODY", "0"))
 LOG_REQ_BODY_BYTES = int(os.getenv("LOG_REQ_BODY_BYTES", "4096"))
 
+# ====== 跨请求合批（默认关闭）======
+# BATCH_WINDOW_MS>0 开启：窗口期内到达、采样配置（do_sample/temperature/top_p/max_tokens）相同的非流式请求
+# 合成一次 generate；各行的水印方法/强度/密钥与 rng_seed 逐行生效，不要求一致
+# BATCH_MAX_ROWS：单批最多行数（并行请求每个占 2 行），攒满即立即发车
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "0"))
+BATCH_MAX_ROWS = max(1, int(os.getenv("BATCH_MAX_ROWS", "8")))
+
+# ====== 外置处理器 spec 缓存 ======
+# BUILDER_CACHE_SIZE：按（builder 名, 参数）缓存 builder 产出的处理器作为只读 spec，每请求 spawn 一份；0 关闭
+BUILDER_CACHE_SIZE = max(0, int(os.getenv("BUILDER_CACHE_SIZE", "32")))
+
+# ====== 无生成检出（/v1/detect）======
+# DETECT_BATCH_ROWS：sweet 求逐位置熵时单次前向的文本条数（logits 为 [行数, 长度, 词表]，大模型上宜小）
+DETECT_BATCH_ROWS = max(1, int(os.getenv("DETECT_BATCH_ROWS", "4")))
+
+# ====== 启动 / 就绪 ======
+# MODEL_LOAD：background（默认）进程先起来（/healthz 可用），模型在后台线程加载，加载并预热完才在 /readyz 报告就绪；
+#             eager 在 import 时同步加载（旧行为）
+# MODEL_USE_SAFETENSORS：只从 safetensors 加载（按 mmap 直接映射权重文件，不走 .bin 的整文件反序列化）
+# WARMUP_BUILDERS：逗号分隔的外置 builder 名，就绪前先导入对应后端并以默认参数构造一次（写入 spec 缓存）
+# WARMUP_TOKENS：>0 时就绪前用上述处理器跑一次短生成，让首个真实请求不再承担 kernel 初始化 / 编译
+MODEL_LOAD = os.getenv("MODEL_LOAD", "background").strip().lower()
+MODEL_USE_SAFETENSORS = _as_bool(os.getenv("MODEL_USE_SAFETENSORS", "1"))
+WARMUP_BUILDERS = [n.strip() for n in os.getenv("WARMUP_BUILDERS", "").split(",") if n.strip()]
+WARMUP_TOKENS = max(0, int(os.getenv("WARMUP_TOKENS", "0")))
+
+# ====== 投机解码（默认关闭）======
+# SPEC_DRAFT_MODEL_ID：草稿模型（须与 MODEL_ID 同一词表，如 Qwen/Qwen2.5-Coder-0.5B-Instruct），非空即开启
+# SPEC_K：每轮草稿提出的 token 数；目标模型一次前向验证 SPEC_K+1 个位置
+# 水印偏置在接受/拒绝时作用于目标分布，输出分布与逐 token 水印采样一致（见 specDecode.py）；
+# 链上处理器均可逐行参数化（同合批，见 libWM/batched）才走投机路径，其余请求照常 generate
+SPEC_DRAFT_MODEL_ID = os.getenv("SPEC_DRAFT_MODEL_ID", "").strip()
+SPEC_K = max(1, int(os.getenv("SPEC_K", "4")))
+
+# ====== 分阶段延迟指标（GET /metrics，Prometheus 文本格式）======
+# path 标签：internal_only / internal_plus_external 为逐条生成的两路，batched 为跨请求合批；
+# 响应序列化另有 parallel / single / stream
+_M_QUEUE_WAIT = REGISTRY.histogram(
+    "wm_server_queue_wait_seconds", "Time from submission to the start of generation in a worker thread.", ["path"])
+_M_TOKENIZE = REGISTRY.histogram(
+    "wm_server_tokenize_seconds", "Chat template rendering and tokenization of the prompt.")
+_M_PREFILL = REGISTRY.histogram(
+    "wm_server_prefill_seconds", "Time from generate() start to the first logits processor call.", ["path"])
+_M_DECODE = REGISTRY.histogram(
+    "wm_server_decode_seconds_per_token", "Mean time per decoded token after the first one.", ["path"])
+_M_LP = REGISTRY.histogram(
+    "wm_server_logits_processor_seconds_per_call",
+    "Mean per-call time of a watermark logits processor over one generation.", ["processor", "path"])
+_M_DETECT = REGISTRY.histogram(
+    "wm_server_detection_seconds", "detect_last() time of a watermark processor.", ["processor", "path"])
+_M_SPEC_ROUND = REGISTRY.histogram(
+    "wm_server_spec_tokens_per_round", "Tokens committed per target forward in speculative decoding.", ["path"],
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 12, 16))
+_M_SERIALIZE = REGISTRY.histogram(
+    "wm_server_serialize_seconds", "JSON encoding of a response body or stream chunk.", ["path"])
+
 # ================= 模型加载（默认不启用任何内置水印） =================
 MODEL_ID = "Qwen/Qwen2.5-Coder-32B-Instruct"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL_ID, torch_dtype=torch.bfloat16, device_map="cuda"
-)
-model.eval()
-# === 生成前的 tokenizer/model 配置兜底：避免 pad 缺失导致的警告或越界 ===
-try:
-    if tokenizer.pad_token_id is None and tokenizer.eos_token_id is not None:
-        tokenizer.pad_token_id = tokenizer.eos_token_id
-    if getattr(model, "config", None) is not None:
-        cfg = model.config
-        if getattr(cfg, "pad_token_id", None) is None and tokenizer.pad_token_id is not None:
-            cfg.pad_token_id = tokenizer.pad_token_id
-        if getattr(cfg, "eos_token_id", None) is None and tokenizer.eos_token_id is not None:
-            cfg.eos_token_id = tokenizer.eos_token_id
-except Exception:
-    # 兜底不应影响主流程，静默即可
-    pass
-
+# 由 _load_model() 填充；MODEL_LOAD=background 时在就绪前为 None
+tokenizer = None
+model = None
+# 由 _load_draft() 填充；未配置 SPEC_DRAFT_MODEL_ID 或词表不一致时为 None（不走投机解码）
+draft_model = None
 # 供你的处理器构造使用的词表（与本服务 tokenizer 完全一致）
 # 覆盖到外置 builder 的 vocab 参数：保证是 0..N-1 的连续 id
 # 使用连续 id 列表，避免 dict.values() 顺序不定导致 builder 误用
-vocab_ids: List[int] = list(range(len(tokenizer)))
+vocab_ids: List[int] = []
+
+def _load_model() -> None:
+    global tokenizer, model, vocab_ids
+    tok = AutoTokenizer.from_pretrained(MODEL_ID)
+    mdl = AutoModelForCausalLM.from_pretrained(
+        MODEL_ID, torch_dtype=torch.bfloat16, device_map="cuda",
+        use_safetensors=True if MODEL_USE_SAFETENSORS else None,
+    )
+    mdl.eval()
+    # === 生成前的 tokenizer/model 配置兜底：避免 pad 缺失导致的警告或越界 ===
+    try:
+        if tok.pad_token_id is None and tok.eos_token_id is not None:
+            tok.pad_token_id = tok.eos_token_id
+        if getattr(mdl, "config", None) is not None:
+            cfg = mdl.config
+            if getattr(cfg, "pad_token_id", None) is None and tok.pad_token_id is not None:
+                cfg.pad_token_id = tok.pad_token_id
+            if getattr(cfg, "eos_token_id", None) is None and tok.eos_token_id is not None:
+                cfg.eos_token_id = tok.eos_token_id
+    except Exception:
+        # 兜底不应影响主流程，静默即可
+        pass
+    tokenizer, model = tok, mdl
+    vocab_ids = list(range(len(tok)))
+
+def _load_draft() -> None:
+    global draft_model
+    tok = AutoTokenizer.from_pretrained(SPEC_DRAFT_MODEL_ID)
+    if tok.get_vocab() != tokenizer.get_vocab():
+        print(f"[server] draft model {SPEC_DRAFT_MODEL_ID} has a different vocabulary; speculative decoding disabled")
+        return
+    mdl = AutoModelForCausalLM.from_pretrained(
+        SPEC_DRAFT_MODEL_ID, torch_dtype=torch.bfloat16, device_map="cuda",
+        use_safetensors=True if MODEL_USE_SAFETENSORS else None,
+    )
+    mdl.eval()
+    draft_model = mdl
 
 # ================= 处理器注册表 & 注册函数 =================
 # 你可以按自己的喜好把“HF内置水印/你自定义的水印”注册到任意一侧
@@ -108,6 +200,56 @@ EXTERNAL_PROCESSORS: Dict[str, ProcessorFactory] = {} # 保留类型与 API，
 ParametricBuilder = Callable[..., Any]
 EXTERNAL_BUILDERS: Dict[str, ParametricBuilder] = {}
 
+class _BuilderSpecCache:
+    """
+    外置处理器 spec 的 LRU，键为 (builder 名, 请求参数的规范化 JSON)。
+    spec 即 builder 构造出的处理器链，只作模板、从不参与生成；每个请求用各处理器的 spawn()
+    得到共享只读配置（φ、词表映射、tokenizer/model 引用…）但运行时状态独立的实例。
+    链上有处理器未实现 spawn() 时不缓存，按原方式每请求构造。
+    """
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._specs: "OrderedDict[tuple, LogitsProcessorList]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name: str, cfg: Dict[str, Any]) -> Optional[tuple]:
+        if self.capacity <= 0:
+            return None
+        try:
+            return (name, json.dumps(cfg, sort_keys=True, separators=(",", ":")))
+        except (TypeError, ValueError):
+            return None  # 参数不可序列化：不缓存
+
+    def get(self, key: Optional[tuple]) -> Optional[LogitsProcessorList]:
+        if key is None:
+            return None
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._specs.move_to_end(key)
+            return spec
+
+    def put(self, key: Optional[tuple], spec: LogitsProcessorList) -> bool:
+        """缓存成功返回 True；此后调用方只能从 spec spawn，不能直接使用 spec。"""
+        if key is None or not all(callable(getattr(p, "spawn", None)) for p in spec):
+            return False
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.capacity:
+                self._specs.popitem(last=False)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._specs), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
+
+_SPEC_CACHE = _BuilderSpecCache(BUILDER_CACHE_SIZE)
+
 def register_external_builder(name: str, builder: ParametricBuilder) -> None:
     """
     注册可参数化的外置处理器 builder。请求端可通过 external_processor_params[name]
@@ -176,12 +318,12 @@ def register_external(name: str, factory_or_obj: Any) -> None:
 def _clone_lp_list(lp: LogitsProcessorList) -> LogitsProcessorList:
     """
     为每次请求克隆一份处理器实例，避免跨请求/双路共享内部状态导致串扰。
-    deepcopy 失败则回退到原对象（尽量不阻断）。
+    实现了 spawn() 的处理器只复制运行时状态；其余 deepcopy，失败则回退到原对象（尽量不阻断）。
     """
     new = []
     for p in lp:
         try:
-            new.append(copy.deepcopy(p))
+            new.append(p.spawn() if callable(getattr(p, "spawn", None)) else copy.deepcopy(p))
         except Exception:
             new.append(p)
     return LogitsProcessorList(new)
@@ -221,15 +363,23 @@ def _resolve_lp_list(
             # 从请求取参数并强制覆盖 vocab
             cfg = dict((external_params or {}).get(n) or {})
             cfg.pop("vocab", None)
-            try:
-                obj = EXTERNAL_BUILDERS[n](vocab=vocab_ids, **cfg)
-                lp = _ensure_lp_list(obj)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"External builder '{n}' error: {e}") from e
-            for it in lp:
-                if not isinstance(it, LogitsProcessor):
-                    raise HTTPException(status_code=400, detail=f"External builder '{n}' produced invalid item: {type(it)}")
-            chain.extend(lp)
+            # 同名同参的 spec 已缓存：只 spawn 运行时状态，跳过 builder
+            key = _SPEC_CACHE.key(n, cfg)
+            spec = _SPEC_CACHE.get(key)
+            if spec is None:
+                try:
+                    obj = EXTERNAL_BUILDERS[n](vocab=vocab_ids, **cfg)
+                    lp = _ensure_lp_list(obj)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f"External builder '{n}' error: {e}") from e
+                for it in lp:
+                    if not isinstance(it, LogitsProcessor):
+                        raise HTTPException(status_code=400, detail=f"External builder '{n}' produced invalid item: {type(it)}")
+                if not _SPEC_CACHE.put(key, lp):
+                    chain.extend(lp)
+                    continue
+                spec = lp
+            chain.extend(p.spawn() for p in spec)
 
     if not chain:
         return None
@@ -252,17 +402,25 @@ def _pick_seed(rng_seed: Optional[int], input_ids: torch.LongTensor) -> Optional
     return None
 
 # ===== 在此处插入：自动加载 uiAPI（可选）=====
-try:
-    import importlib, sys, os
-    here = os.path.dirname(os.path.abspath(__file__))
-    if here not in sys.path:
-        sys.path.insert(0, here)
-    importlib.import_module("regWM")  # 其中应在顶层调用 register_xxx 完成注册
-    print("[server] processors loaded ->",
-          "internal:", list(INTERNAL_PROCESSORS.keys()),
-          "external_builders:", list(EXTERNAL_BUILDERS.keys()))
-except Exception as e:
-    print(f"[server] regWM not loaded: {e}")
+# regWM 需要 model / tokenizer，在 _load_all() 里模型加载完成后导入（模块搜索路径已在文件开头设置）
+import importlib
+
+def _load_regwm() -> None:
+    try:
+        importlib.import_module("regWM")  # 其中应在顶层调用 register_xxx 完成注册（各后端在 builder 首次调用时才导入）
+        print("[server] processors loaded ->",
+              "internal:", list(INTERNAL_PROCESSORS.keys()),
+              "external_builders:", list(EXTERNAL_BUILDERS.keys()))
+    except Exception as e:
+        print(f"[server] regWM not loaded: {e}")
+
+# 合批 / 投机解码会导入全部可逐行参数化的后端，仅在开启时导入
+BatchedWatermarkLogitsProcessor = None
+if BATCH_WINDOW_MS > 0 or SPEC_DRAFT_MODEL_ID:
+    try:
+        from libWM.batched import BatchedWatermarkLogitsProcessor
+    except Exception as e:
+        print(f"[server] batched watermark processor unavailable: {e}")
 
 # ================== OpenAI 兼容请求/响应模型 ==================
 class Message(BaseModel):
@@ -275,7 +433,7 @@ class ChatRequest(BaseModel):
     temperature: Optional[float] = 0.7
     top_p: Optional[float] = 0.95
     max_tokens: Optional[int] = 512
-    stream: Optional[bool] = False  # 本示例不做流式
+    stream: Optional[bool] = False  # True 时以 SSE 逐段返回（OpenAI chat.completion.chunk 格式）
     # 可选：固定本次请求的随机种子（保证跨运行复现），不传也可耦合
     rng_seed: Optional[int] = None
 
@@ -291,6 +449,13 @@ class ChatRequest(BaseModel):
     # —— 隐藏开关：不出现在 schema，客户端也传不进来 —— #
     _do_sample: bool = PrivateAttr(default=SERVER_DO_SAMPLE)
 
+class DetectRequest(BaseModel):
+    # 待检文本（整段视为模型续写，不套 chat template）
+    texts: List[str]
+    # 与 chat 请求同名同义：按名称选 builder 并传参
+    external_processor_names: List[str]
+    external_processor_params: Optional[Dict[str, Dict[str, Any]]] = None
+
 # 归一处理传入参数
 def normalize_sampling_args(do_sample: bool,
                             temperature: Optional[float],
@@ -322,7 +487,23 @@ def normalize_sampling_args(do_sample: bool,
 
     return True, t, p
 
-app = FastAPI()
+# ====== 就绪状态（与存活分离）======
+_T_IMPORT = _time.perf_counter()
+_READY = threading.Event()
+_LOAD_ERROR: Optional[str] = None
+_STARTUP_TIMINGS: Dict[str, float] = {}
+
+def _require_ready() -> None:
+    if not _READY.is_set():
+        raise HTTPException(status_code=503, detail="model_not_ready", headers={"Retry-After": "5"})
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    if MODEL_LOAD != "eager":
+        threading.Thread(target=_load_all, name="model-loader", daemon=True).start()
+    yield
+
+app = FastAPI(lifespan=_lifespan)
 
 # ====== 简单请求体大小日志中间件（仅在特定路由启用）======
 logger = logging.getLogger("server")
@@ -332,7 +513,7 @@ if not logger.handlers:
 class LogReqSizeMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # 需要统计的路径可按需增减
-        if request.url.path in ("/v1/chat/completions", "/dbg/echo-len"):
+        if request.url.path in ("/v1/chat/completions", "/v1/detect", "/dbg/echo-len"):
             try:
                 body = await request.body()          # Starlette 会缓存，后续可重复读取
                 size = len(body or b"")
@@ -373,7 +554,8 @@ def list_processors():
     return {
         "internal": list(INTERNAL_PROCESSORS.keys()),
         "external": list(EXTERNAL_PROCESSORS.keys()),     # 保留兼容展示
-        "external_builders": list(EXTERNAL_BUILDERS.keys())
+        "external_builders": list(EXTERNAL_BUILDERS.keys()),
+        "builder_cache": _SPEC_CACHE.stats(),
     }
     
 @app.get("/v1/models")
@@ -429,8 +611,21 @@ def _cap_max_new_tokens(prompt_len: int, want_new: Optional[int]) -> int:
 
 @app.get("/healthz")
 def healthz():
-    """简单健康检查：可用于 LB 探活。"""
-    return {"status": "ok", "model": MODEL_ID}
+    """存活检查：进程能响应即 ok（模型可能仍在加载，见 /readyz）。"""
+    return {"status": "ok", "model": MODEL_ID, "ready": _READY.is_set()}
+
+@app.get("/readyz")
+def readyz():
+    """就绪检查：模型加载、regWM 注册与（可选）预热全部完成才返回 200，供 LB / 滚动发布摘挂流量。"""
+    if _READY.is_set():
+        return {"status": "ready", "model": MODEL_ID, "startup": _STARTUP_TIMINGS}
+    status = "failed" if _LOAD_ERROR else "loading"
+    return JSONResponse(status_code=503, content={"status": status, "error": _LOAD_ERROR, "startup": _STARTUP_TIMINGS})
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus 抓取端点：各阶段延迟直方图。"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 def _prep_inputs(messages: List[Dict[str, str]]) -> Dict[str, torch.Tensor]:
     chat_text = tokenizer.apply_chat_template(
@@ -546,6 +741,199 @@ def _count_new_and_reason(seqs: torch.LongTensor,
         reasons.append(reason)
     return new_lens, reasons
 
+class _AsyncTextStreamer(TextStreamer):
+    """
+    生成线程 → 事件循环 的文本桥：沿用 HF TextStreamer 的增量解码（与 TextIteratorStreamer 相同），
+    但把解码出的片段通过 call_soon_threadsafe 投递到 asyncio.Queue，事件循环侧 `async for` 逐段读取。
+    cancelled 置位后，配套的 _StreamCancelledCriteria 会让 generate 在下一步停止（客户端断开时使用）。
+    """
+    _END = object()
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, **decode_kwargs):
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.cancelled = False
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+        if stream_end:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, self._END)
+
+    def close(self):
+        """在事件循环线程调用：生成线程异常/未调用 generate 时也保证读端能结束。"""
+        self.queue.put_nowait(self._END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        item = await self.queue.get()
+        if item is self._END:
+            raise StopAsyncIteration
+        return item
+
+class _StreamCancelledCriteria(StoppingCriteria):
+    """流式请求被客户端取消后，尽快结束生成，释放 GPU。"""
+    def __init__(self, streamer: _AsyncTextStreamer):
+        self.streamer = streamer
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), bool(self.streamer.cancelled),
+                          dtype=torch.bool, device=input_ids.device)
+
+class _OnlineDetectionStop(StoppingCriteria):
+    """外置处理器开启 online_stop_threshold 时：在线检出分数达到阈值即停止生成（仅检出实验用）。"""
+    def __init__(self, procs: List[Any]):
+        self.procs = procs
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        reached = any(p.online_stop_reached() for p in self.procs)
+        return torch.full((input_ids.shape[0],), reached, dtype=torch.bool, device=input_ids.device)
+
+def _online_procs(lp: Optional[LogitsProcessorList]) -> List[tuple]:
+    """链上开启了在线检出的处理器：[(与 wm_detection 相同的键, 处理器), ...]"""
+    return [
+        (f"{proc.__class__.__name__}[{idx}]", proc)
+        for idx, proc in enumerate(list(lp or []))
+        if getattr(proc, "online_detection", False) and callable(getattr(proc, "online_snapshot", None))
+    ]
+
+def _online_snapshots(lp: Optional[LogitsProcessorList]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for key, proc in _online_procs(lp):
+        try:
+            out[key] = proc.online_snapshot()
+        except Exception as _e:
+            out[key] = {"error": f"online_snapshot_failed: {_e.__class__.__name__}: {_e}"}
+    return out
+
+class _StageTimer(LogitsProcessor):
+    """
+    挂在 logits_processor 链上记录生成阶段耗时：首次调用前为 prefill，其后每步为一个 decode token。
+    t_start 需在调用 generate 之前设置；不修改 scores。
+    """
+    def __init__(self):
+        self.t_start = _time.perf_counter()
+        self.t_first: Optional[float] = None
+        self.t_last: Optional[float] = None
+        self.calls = 0
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        now = _time.perf_counter()
+        if self.t_first is None:
+            self.t_first = now
+        self.t_last = now
+        self.calls += 1
+        return scores
+
+    def observe(self, path: str) -> None:
+        if self.t_first is None:
+            return
+        _M_PREFILL.observe(self.t_first - self.t_start, path=path)
+        if self.calls > 1:
+            _M_DECODE.observe((self.t_last - self.t_first) / (self.calls - 1), path=path)
+
+def _observe_lp_timing(procs: List[Any], path: str) -> None:
+    """读取链上各处理器自带的 timing()，按处理器类名记录本次生成的平均单步耗时。"""
+    for proc in procs:
+        if not callable(getattr(proc, "timing", None)):
+            continue
+        try:
+            tinfo = proc.timing()
+            calls = int(tinfo.get("lp_calls", 0))
+            if calls > 0:
+                _M_LP.observe(float(tinfo.get("lp_total_time_s", 0.0)) / calls,
+                              processor=proc.__class__.__name__, path=path)
+        except Exception:
+            pass
+
+async def _to_thread_timed(path: str, fn: Callable[..., Any], *args) -> Any:
+    """asyncio.to_thread，并记录从提交到工作线程开始执行的排队时间。"""
+    t_submit = _time.perf_counter()
+
+    def _job():
+        _M_QUEUE_WAIT.observe(_time.perf_counter() - t_submit, path=path)
+        return fn(*args)
+    return await asyncio.to_thread(_job)
+
+def _json_response(obj: Dict[str, Any], path: str) -> JSONResponse:
+    t0 = _time.perf_counter()
+    resp = JSONResponse(content=obj)
+    _M_SERIALIZE.observe(_time.perf_counter() - t0, path=path)
+    return resp
+
+def _spec_supported(lp: Optional[LogitsProcessorList]) -> bool:
+    """投机解码条件：已加载草稿模型，且链上处理器都可逐行参数化（不含 codeip、online_detection、其它内置处理器）。"""
+    if draft_model is None or BatchedWatermarkLogitsProcessor is None:
+        return False
+    return all(BatchedWatermarkLogitsProcessor.supports(p) for p in list(lp or []))
+
+def _spec_generate_single(input_ids: torch.LongTensor,
+                          lp_internal: Optional[LogitsProcessorList],
+                          gen_cfg,
+                          hf_lp: LogitsProcessorList,
+                          stage: "_StageTimer",
+                          stopping_criteria: StoppingCriteriaList,
+                          do_sample: bool,
+                          gen: Optional[torch.Generator],
+                          capped: int,
+                          streamer: Optional[_AsyncTextStreamer],
+                          path: str) -> torch.LongTensor:
+    """
+    _hf_generate_single 的投机解码分支，返回 sequences [1, L+new]。
+    - 每个水印处理器包成单行的 BatchedWatermarkLogitsProcessor：偏置只取决于前缀与本位置 scores，可在任意位置求值；
+      目标链与草稿链各用一份包装，草稿侧的调用不进入检出轨迹
+    - 两条链都按 generate 内部的顺序组装（HF 处理器 → 水印 → warpers），目标链即逐条生成时每步采样用的分布
+    - 生成后把轨迹注入原处理器的运行时缓存，_detect_external 照常调用 detect_last()
+    """
+    prompt_len = int(input_ids.shape[1])
+    eos = model.generation_config.eos_token_id
+    eos_ids = [eos] if isinstance(eos, int) else [int(x) for x in (eos or [])]
+    procs = list(lp_internal or [])
+    wms = [BatchedWatermarkLogitsProcessor([p], eos_token_ids=eos_ids) for p in procs]
+    draft_wms = [BatchedWatermarkLogitsProcessor([p], eos_token_ids=eos_ids) for p in procs]
+    # 与 generate 内部一致：未设置的字段依次按模型配置、全局默认补齐（如 top_k=50），否则两条路径的 warpers 不同
+    try:
+        gen_cfg, _ = model._prepare_generation_config(gen_cfg)
+    except Exception:
+        pass
+
+    def _chain(custom: List[LogitsProcessor]) -> LogitsProcessorList:
+        return model._get_logits_processor(
+            generation_config=gen_cfg,
+            input_ids_seq_length=prompt_len,
+            encoder_input_ids=None,
+            prefix_allowed_tokens_fn=None,
+            logits_processor=LogitsProcessorList(custom),
+        )
+
+    stage.t_start = _time.perf_counter()
+    seqs, stats = speculative_generate(
+        model, draft_model, input_ids,
+        k=SPEC_K,
+        max_new_tokens=capped,
+        target_lp=_chain([stage] + list(hf_lp) + wms),
+        draft_lp=_chain(list(hf_lp) + draft_wms),
+        do_sample=do_sample,
+        eos_token_ids=eos_ids,
+        stopping_criteria=stopping_criteria,
+        generator=gen,
+        streamer=streamer,
+    )
+    stage.observe(path)
+    _observe_lp_timing(wms, path)
+    for wm in wms:
+        wm.load_last()
+    if stats["rounds"]:
+        _M_SPEC_ROUND.observe(stats["new_tokens"] / stats["rounds"], path=path)
+    logger.info(
+        "[spec] path=%s rounds=%d new_tokens=%d accepted=%d/%d",
+        path, stats["rounds"], stats["new_tokens"], stats["accepted"], stats["drafted"],
+    )
+    return seqs
+
 @torch.inference_mode()
 def _hf_generate_single(inputs: Dict[str, torch.Tensor],
                         lp_internal: Optional[LogitsProcessorList],
@@ -553,7 +941,9 @@ def _hf_generate_single(inputs: Dict[str, torch.Tensor],
                         top_p: float,
                         max_new_tokens: int,
                         do_sample: bool,
-                        rng_seed: Optional[int]) -> tuple[str, int, int, int, str]:
+                        rng_seed: Optional[int],
+                        streamer: Optional[_AsyncTextStreamer] = None,
+                        path: str = "internal_only") -> tuple[str, int, int, int, str]:
     device = next(model.parameters()).device
     input_ids = inputs["input_ids"].to(device)
     attn = inputs.get("attention_mask", None)
@@ -568,8 +958,15 @@ def _hf_generate_single(inputs: Dict[str, torch.Tensor],
         reason = "length" if int(max_new_tokens or 0) > 0 else "stop"
         return "", prompt_len, 0, prompt_len, reason
     do_sample, temperature, top_p = normalize_sampling_args(do_sample, temperature, top_p)
-    _, hf_lp, _, stopping_criteria = _build_hf_components(prompt_len, do_sample, temperature, top_p, capped)
-    final_lp = LogitsProcessorList(list(hf_lp) + list(lp_internal or []))
+    gen_cfg, hf_lp, _, stopping_criteria = _build_hf_components(prompt_len, do_sample, temperature, top_p, capped)
+    stage = _StageTimer()
+    final_lp = LogitsProcessorList([stage] + list(hf_lp) + list(lp_internal or []))
+    if streamer is not None:
+        stopping_criteria.append(_StreamCancelledCriteria(streamer))
+    stop_procs = [proc for _, proc in _online_procs(lp_internal)
+                  if getattr(proc, "online_stop_threshold", None) is not None]
+    if stop_procs:
+        stopping_criteria.append(_OnlineDetectionStop(stop_procs))
     # 为本次调用创建“私有”随机数发生器；AB 两路用同一个 seed 即可复现且互不干扰
     # 优先尝试“私有 generator”路径；若目标模型不支持，则回退到全局 RNG + 互斥锁
     seed_to_use = _pick_seed(rng_seed, input_ids) if do_sample else None
@@ -578,49 +975,59 @@ def _hf_generate_single(inputs: Dict[str, torch.Tensor],
         gen = torch.Generator(device=input_ids.device)
         gen.manual_seed(seed_to_use)
 
-    def _call_generate_with(gen_arg):
-        return model.generate(
-            input_ids=input_ids,
-            attention_mask=attn,
-            do_sample=do_sample,
-            temperature=temperature,
-            top_p=top_p,
-            max_new_tokens=capped,
-            logits_processor=final_lp,
-            stopping_criteria=stopping_criteria,
-            pad_token_id=tokenizer.pad_token_id,
-            eos_token_id=model.generation_config.eos_token_id,
-            generator=gen_arg,
-            return_dict_in_generate=True,
-        )
+    if _spec_supported(lp_internal):
+        seqs = _spec_generate_single(input_ids, lp_internal, gen_cfg, hf_lp, stage, stopping_criteria,
+                                     do_sample, gen, capped, streamer, path)
+    else:
+        def _call_generate_with(gen_arg):
+            return model.generate(
+                input_ids=input_ids,
+                attention_mask=attn,
+                do_sample=do_sample,
+                temperature=temperature,
+                top_p=top_p,
+                max_new_tokens=capped,
+                logits_processor=final_lp,
+                stopping_criteria=stopping_criteria,
+                pad_token_id=tokenizer.pad_token_id,
+                eos_token_id=model.generation_config.eos_token_id,
+                generator=gen_arg,
+                return_dict_in_generate=True,
+                streamer=streamer,
+            )
+
+        try:
+            stage.t_start = _time.perf_counter()
+            out = _call_generate_with(gen)
+        except Exception as e:
+            msg = str(e)
+            # 仅当确认为“generator 未被模型接受”且允许回退时，启用安全回退
+            need_fallback = (
+                ALLOW_GENERATOR_FALLBACK
+                and do_sample
+                and seed_to_use is not None
+                # 更严格：必须同时包含两个核心提示词
+                and ("not used by the model" in msg)
+                and ("generator" in msg)
+            )
+            if not need_fallback:
+                raise
+            print("[server] generator not accepted by model; falling back to global RNG seeding")
+            # 回退：全局 RNG 受互斥锁保护，避免并行线程互相干扰
+            with _GLOBAL_RNG_LOCK:
+                try:
+                    torch.manual_seed(seed_to_use)
+                    if torch.cuda.is_available():
+                        torch.cuda.manual_seed_all(seed_to_use)
+                except Exception:
+                    pass
+                stage = _StageTimer()
+                final_lp[0] = stage
+                out = _call_generate_with(None)
+        stage.observe(path)
+        _observe_lp_timing(list(lp_internal or []), path)
+        seqs = out.sequences  # [1, L+new]
 
-    try:
-        out = _call_generate_with(gen)
-    except Exception as e:
-        msg = str(e)
-        # 仅当确认为“generator 未被模型接受”且允许回退时，启用安全回退
-        need_fallback = (
-            ALLOW_GENERATOR_FALLBACK
-            and do_sample
-            and seed_to_use is not None
-            # 更严格：必须同时包含两个核心提示词
-            and ("not used by the model" in msg)
-            and ("generator" in msg)
-        )
-        if not need_fallback:
-            raise
-        print("[server] generator not accepted by model; falling back to global RNG seeding")
-        # 回退：全局 RNG 受互斥锁保护，避免并行线程互相干扰
-        with _GLOBAL_RNG_LOCK:
-            try:
-                torch.manual_seed(seed_to_use)
-                if torch.cuda.is_available():
-                    torch.cuda.manual_seed_all(seed_to_use)
-            except Exception:
-                pass
-            out = _call_generate_with(None)
-    
-    seqs = out.sequences  # [1, L+new]
     eos = model.generation_config.eos_token_id
     eos_ids = [eos] if isinstance(eos, int) else [int(x) for x in (eos or [])]
     new_lens, reasons = _count_new_and_reason(seqs, prompt_len, capped, eos_ids, tokenizer.pad_token_id)
@@ -629,15 +1036,474 @@ def _hf_generate_single(inputs: Dict[str, torch.Tensor],
     total = prompt_len + comp
     return text, prompt_len, comp, total, reasons[0]
 
+class _PerRowSampler(LogitsProcessor):
+    """
+    合批生成时的逐行采样：每行用自己的 torch.Generator（由该行 rng_seed 派生），采样结果与同批其它行无关。
+    采到的 token 保留 0 分、其余置 -inf，generate 走贪心即原样取出。
+    """
+    def __init__(self, generators: List[Optional[torch.Generator]]):
+        self.generators = generators
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        probs = torch.softmax(scores.float(), dim=-1)
+        out = torch.full_like(scores, float("-inf"))
+        for b, gen in enumerate(self.generators):
+            tok = torch.multinomial(probs[b], num_samples=1, generator=gen)
+            out[b, tok] = 0.0
+        return out
+
+class _BatchRow:
+    """合批中的一行：提示词、该行的外置水印处理器（None 表示不加水印）、采样种子。"""
+    __slots__ = ("inputs", "proc", "rng_seed")
+
+    def __init__(self, inputs: Dict[str, torch.Tensor], proc: Optional[LogitsProcessor], rng_seed: Optional[int]):
+        self.inputs = inputs
+        self.proc = proc
+        self.rng_seed = rng_seed
+
+@torch.inference_mode()
+def _hf_generate_batch(rows: List[_BatchRow],
+                       temperature: float,
+                       top_p: float,
+                       max_new_tokens: int,
+                       do_sample: bool) -> List[tuple]:
+    """
+    多行一次 generate（左侧 pad）。采样参数需已经过 normalize_sampling_args。
+    每行返回 (text, prompt_tok, comp_tok, total_tok, finish_reason, wm_detection)，
+    wm_detection 的键与逐条生成时一致（f"{处理器类名}[0]"）。
+    """
+    device = next(model.parameters()).device
+    pad_id = tokenizer.pad_token_id
+    prompt_lens = [int(r.inputs["input_ids"].shape[1]) for r in rows]
+    width = max(prompt_lens)
+    input_ids = torch.full((len(rows), width), int(pad_id), dtype=torch.long)
+    attn = torch.zeros_like(input_ids)
+    for b, r in enumerate(rows):
+        input_ids[b, width - prompt_lens[b]:] = r.inputs["input_ids"][0]
+        attn[b, width - prompt_lens[b]:] = 1
+    input_ids, attn = input_ids.to(device), attn.to(device)
+
+    capped = _cap_max_new_tokens(width, int(max_new_tokens or 0))
+    if capped <= 0:
+        reason = "length" if int(max_new_tokens or 0) > 0 else "stop"
+        return [("", pl, 0, pl, reason, {}) for pl in prompt_lens]
+    gen_cfg, hf_lp, _, stopping_criteria = _build_hf_components(width, do_sample, temperature, top_p, capped)
+    eos = model.generation_config.eos_token_id
+    eos_ids = [eos] if isinstance(eos, int) else [int(x) for x in (eos or [])]
+    wm = BatchedWatermarkLogitsProcessor([r.proc for r in rows], eos_token_ids=eos_ids, pad_token_id=pad_id)
+    stage = _StageTimer()
+    final_lp = LogitsProcessorList([stage] + list(hf_lp) + [wm])
+    if do_sample:
+        # 按逐条生成时 generate 内部的顺序组装（含 temperature/top_p 等 warpers），末尾接逐行采样；
+        # generate 本身走贪心，只负责取出每行采到的 token
+        final_lp = model._get_logits_processor(
+            generation_config=gen_cfg,
+            input_ids_seq_length=width,
+            encoder_input_ids=None,
+            prefix_allowed_tokens_fn=None,
+            logits_processor=final_lp,
+        )
+        gens: List[Optional[torch.Generator]] = []
+        for r in rows:
+            seed = _pick_seed(r.rng_seed, r.inputs["input_ids"])
+            gen = None
+            if seed is not None:
+                gen = torch.Generator(device=device)
+                gen.manual_seed(seed)
+            gens.append(gen)
+        final_lp.append(_PerRowSampler(gens))
+
+    stage.t_start = _time.perf_counter()
+    out = model.generate(
+        input_ids=input_ids,
+        attention_mask=attn,
+        do_sample=False,
+        max_new_tokens=capped,
+        logits_processor=final_lp,
+        stopping_criteria=stopping_criteria,
+        pad_token_id=pad_id,
+        eos_token_id=eos,
+        return_dict_in_generate=True,
+    )
+    stage.observe("batched")
+    _observe_lp_timing([wm], "batched")
+    seqs = out.sequences  # [B, width+new]
+    new_lens, reasons = _count_new_and_reason(seqs, width, capped, eos_ids, pad_id)
+    texts = tokenizer.batch_decode(seqs[:, width:], skip_special_tokens=True)
+
+    t_det_start = _time.perf_counter()
+    dets = wm.detect_last()
+    det_elapsed_s = _time.perf_counter() - t_det_start
+    _M_DETECT.observe(det_elapsed_s, processor=wm.__class__.__name__, path="batched")
+    tinfo = wm.timing()
+    logger.info(
+        "[timing] wm_lp batched rows=%d lp_total=%s lp_calls=%d watermark_detect(detect_last)=%s",
+        tinfo["rows"], _fmt_ms(tinfo["lp_total_time_s"]), tinfo["lp_calls"], _fmt_ms(det_elapsed_s),
+    )
+    results = []
+    for b, r in enumerate(rows):
+        det: Dict[str, Any] = {}
+        if r.proc is not None and new_lens[b] > 0:
+            det[f"{r.proc.__class__.__name__}[0]"] = dets[b]
+        results.append((texts[b], prompt_lens[b], new_lens[b], prompt_lens[b] + new_lens[b], reasons[b], det))
+    return results
+
+def _generation_http_error(e: Exception) -> HTTPException:
+    """把生成阶段的异常统一映射为 HTTP 错误码（流式与非流式共用）。"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=f"bad_sampling_args: {e}")
+    if isinstance(e, torch.cuda.OutOfMemoryError):
+        try:
+            torch.cuda.empty_cache()
+        except Exception:
+            pass
+        return HTTPException(status_code=503, detail="generation_error: cuda_oom")
+    return HTTPException(status_code=500, detail=f"generation_error: {e.__class__.__name__}: {e}")
+
+def _resolve_parallel_chains(req: ChatRequest) -> tuple:
+    """
+    并行模式的两路处理器链：(仅内置, 内置+外置, 外置)。
+    两路内置链是相互独立的克隆；外置链可为空。
+    """
+    # 可选校验：并行时是否必须提供 external 链（通过环境变量控制）
+    if REQUIRE_EXTERNAL_IN_PARALLEL and not req.external_processor_names:
+        raise HTTPException(status_code=400, detail="parallel=True 需要提供 external_processor_names 列表（可通过环境变量 REQUIRE_EXTERNAL_IN_PARALLEL=0 关闭此限制）")
+
+    lp_internal_for_internal = _resolve_lp_list(
+        internal_names=req.internal_processor_names,
+        external_names=None,
+        mode="internal_only"
+    )
+    lp_internal_for_both = _resolve_lp_list(
+        internal_names=req.internal_processor_names,
+        external_names=None,
+        mode="internal_only"
+    )
+    lp_external = _resolve_lp_list(
+        internal_names=None,
+        external_names=req.external_processor_names,
+        mode="any",
+        external_params=req.external_processor_params
+    )
+
+    # 合成“内置+外置”的处理器链（保持顺序：先内置，后外置）
+    if lp_internal_for_both is None and lp_external is None:
+        lp_both = None
+    elif lp_internal_for_both is None:
+        lp_both = lp_external
+    elif lp_external is None:
+        lp_both = lp_internal_for_both
+    else:
+        lp_both = LogitsProcessorList(list(lp_internal_for_both) + list(lp_external))
+    return lp_internal_for_internal, lp_both, lp_external
+
+def _detect_external(lp_external: Optional[LogitsProcessorList], comp_tok: int,
+                     path: str = "internal_plus_external") -> Dict[str, Any]:
+    """外置链的“零参离线检出”：仅当存在外置链且生成了文本。"""
+    wm_detection_result: Dict[str, Any] = {}
+    det_elapsed_s: Optional[float] = None
+    try:
+        if lp_external is not None and comp_tok > 0:
+            # （可选）打印外置 logits_processor 自身累计耗时（更“纯”的开销口径）
+            try:
+                for idx, proc in enumerate(list(lp_external)):
+                    if hasattr(proc, "timing") and callable(getattr(proc, "timing")):
+                        tinfo = proc.timing()
+                        total_s = float(tinfo.get("lp_total_time_s", 0.0))
+                        calls = int(tinfo.get("lp_calls", 0))
+                        avg_us = float(tinfo.get("lp_avg_per_call_us", 0.0))
+                        logger.info(
+                            "[timing] wm_lp %s[%d] lp_total=%s lp_calls=%d lp_avg=%0.3fus",
+                            proc.__class__.__name__, idx, _fmt_ms(total_s), calls, avg_us
+                        )
+            except Exception as _e:
+                logger.info("[timing] wm_lp timing read failed: %s: %s", _e.__class__.__name__, _e)
+
+            # 在线检出快照先于 detect_last 读取，随对应处理器的结果一并返回（"online" 字段）
+            online = _online_snapshots(lp_external)
+            t_det_start = _time.perf_counter()
+            # 遍历外置链上的各个处理器实例；若实现 detect_last() 则直接零参调用
+            for idx, proc in enumerate(list(lp_external)):
+                if hasattr(proc, "detect_last") and callable(getattr(proc, "detect_last")):
+                    key = f"{proc.__class__.__name__}[{idx}]"
+                    t_proc = _time.perf_counter()
+                    try:
+                        wm_detection_result[key] = proc.detect_last()
+                    except Exception as _e:
+                        wm_detection_result[key] = {"error": f"detection_failed: {_e.__class__.__name__}: {_e}"}
+                    _M_DETECT.observe(_time.perf_counter() - t_proc, processor=proc.__class__.__name__, path=path)
+                    if key in online and isinstance(wm_detection_result[key], dict):
+                        wm_detection_result[key]["online"] = online[key]
+            t_det_end = _time.perf_counter()
+            det_elapsed_s = float(t_det_end - t_det_start)
+    except Exception as _outer_e:
+        wm_detection_result = {"__error__": f"{_outer_e.__class__.__name__}: {_outer_e}"}
+
+    # ====== 打印检测耗时统计（detect_last） ======
+    if det_elapsed_s is not None:
+        logger.info("[timing] watermark_detect(detect_last)=%s", _fmt_ms(det_elapsed_s))
+    return wm_detection_result
+
+def _batch_group_key(req: ChatRequest, lp_external: Optional[LogitsProcessorList]) -> Optional[tuple]:
+    """
+    跨请求合批的分组键：采样配置相同即可同批；水印方法/强度/密钥与 rng_seed 逐行生效，不进键。
+    返回 None 表示该请求走逐条生成：未开启合批、流式、带内置处理器、外置链多于一个或不支持逐行参数化
+    （如 codeip、开启 online_detection 的处理器）。
+    """
+    if BATCH_WINDOW_MS <= 0 or BatchedWatermarkLogitsProcessor is None:
+        return None
+    if req.stream or req.internal_processor_names:
+        return None
+    procs = list(lp_external or [])
+    if len(procs) > 1 or not all(BatchedWatermarkLogitsProcessor.supports(p) for p in procs):
+        return None
+    try:
+        do_sample, temperature, top_p = normalize_sampling_args(req._do_sample, req.temperature, req.top_p)
+    except ValueError:
+        return None  # 交给逐条路径按原口径报 400
+    return (bool(do_sample), temperature, top_p, int(req.max_tokens or 0))
+
+class _MicroBatcher:
+    """
+    按分组键收集窗口期（BATCH_WINDOW_MS）内到达的请求；窗口到期或行数达到 BATCH_MAX_ROWS 即合成一批，
+    在工作线程中跑 _hf_generate_batch，再按请求把各自的行结果交回。
+    """
+    def __init__(self, window_s: float, max_rows: int):
+        self.window_s = window_s
+        self.max_rows = max_rows
+        self._pending: Dict[tuple, List[tuple]] = {}  # key -> [(rows, future, 提交时刻), ...]
+        self._timers: Dict[tuple, asyncio.TimerHandle] = {}
+
+    async def submit(self, key: tuple, rows: List[_BatchRow]) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        bucket = self._pending.setdefault(key, [])
+        bucket.append((rows, fut, _time.perf_counter()))
+        if sum(len(r) for r, _, _ in bucket) >= self.max_rows:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window_s, self._flush, key)
+        return await fut
+
+    def _flush(self, key: tuple) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(key, None)
+        if items:
+            asyncio.ensure_future(self._run(key, items))
+
+    async def _run(self, key: tuple, items: List[tuple]) -> None:
+        do_sample, temperature, top_p, max_tokens = key
+        rows = [row for r, _, _ in items for row in r]
+        t0 = _time.perf_counter()
+
+        def _job():
+            t_run = _time.perf_counter()
+            for _, _, t_submit in items:
+                _M_QUEUE_WAIT.observe(t_run - t_submit, path="batched")
+            return _hf_generate_batch(rows, temperature, top_p, max_tokens, do_sample)
+        try:
+            results = await asyncio.to_thread(_job)
+        except Exception as e:
+            for _, fut, _ in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        logger.info("[timing] generation batched requests=%d rows=%d elapsed=%s",
+                    len(items), len(rows), _fmt_ms(_time.perf_counter() - t0))
+        i = 0
+        for r, fut, _ in items:
+            if not fut.done():
+                fut.set_result(results[i:i + len(r)])
+            i += len(r)
+
+_BATCHER = _MicroBatcher(BATCH_WINDOW_MS / 1000.0, BATCH_MAX_ROWS)
+
+def _sse(obj: Any) -> str:
+    t0 = _time.perf_counter()
+    data = json.dumps(obj, ensure_ascii=False)
+    _M_SERIALIZE.observe(_time.perf_counter() - t0, path="stream")
+    return f"data: {data}\n\n"
+
+async def _stream_chat(req: ChatRequest, inputs: Dict[str, torch.Tensor], paths: List[tuple]):
+    """
+    SSE 流式输出（OpenAI chat.completion.chunk 兼容）。
+    paths: [(variant 或 None, 处理器链, 需要做检出的外置链 或 None), ...]，按顺序逐路生成，
+    每路以 choices[i] 的增量块推送；每路最后一块带 finish_reason、usage 与（若有）wm_detection。
+    外置链开启在线检出时，每个增量块额外带 wm_online（各处理器当前的在线检出快照）。
+    """
+    cid = f"chatcmpl-{int(time.time()*1000)}"
+    created = int(time.time())
+    loop = asyncio.get_running_loop()
+
+    def chunk(choices: List[Dict[str, Any]], **extra) -> str:
+        obj = {"id": cid, "object": "chat.completion.chunk", "created": created,
+               "model": req.model, "choices": choices}
+        obj.update(extra)
+        return _sse(obj)
+
+    usages = []
+    for index, (variant, lp, lp_external) in enumerate(paths):
+        tag = {"variant": variant} if variant else {}
+        streamer = _AsyncTextStreamer(loop, skip_special_tokens=True)
+        t_gen_start = _time.perf_counter()
+        task = asyncio.ensure_future(_to_thread_timed(
+            variant or "internal_only",
+            _hf_generate_single,
+            inputs,
+            lp,
+            req.temperature,
+            req.top_p,
+            req.max_tokens,
+            req._do_sample,
+            req.rng_seed,
+            streamer,
+            variant or "internal_only",
+        ))
+        task.add_done_callback(lambda _t, _s=streamer: _s.close())
+        try:
+            yield chunk([{"index": index, "delta": {"role": "assistant", "content": ""},
+                          "finish_reason": None, **tag}])
+            has_online = bool(_online_procs(lp_external))
+            async for piece in streamer:
+                delta = {"index": index, "delta": {"content": piece}, "finish_reason": None, **tag}
+                if has_online:
+                    delta["wm_online"] = _online_snapshots(lp_external)
+                yield chunk([delta])
+            try:
+                _, prompt_tok, comp_tok, total_tok, fr = await task
+            except Exception as e:
+                err = _generation_http_error(e)
+                yield _sse({"error": {"message": err.detail, "code": err.status_code}})
+                yield "data: [DONE]\n\n"
+                return
+        finally:
+            # 客户端断开（生成器被关闭/取消）时让生成线程尽快停下
+            if not task.done():
+                streamer.cancelled = True
+        logger.info("[timing] generation(stream) %s=%s", variant or "single",
+                    _fmt_ms(float(_time.perf_counter() - t_gen_start)))
+
+        usage = {"prompt_tokens": int(prompt_tok), "completion_tokens": int(comp_tok),
+                 "total_tokens": int(total_tok)}
+        usages.append(usage)
+        last = {"index": index, "delta": {}, "finish_reason": fr, **tag}
+        if lp_external is not None:
+            # 检出可能很重（如 EWD 要跑一次前向），放到工作线程，不阻塞事件循环
+            last["wm_detection"] = await asyncio.to_thread(
+                _detect_external, lp_external, comp_tok, variant or "internal_plus_external")
+        if variant and USAGE_PER_CHOICE:
+            last["usage"] = usage
+        yield chunk([last])
+
+    # 非并行 / 旧口径：与非流式一致，在末尾给出顶层 usage（OpenAI include_usage 的形式）
+    if len(paths) == 1 or not USAGE_PER_CHOICE:
+        prompt_tok = usages[0]["prompt_tokens"]
+        comp_tok_sum = sum(u["completion_tokens"] for u in usages)
+        yield chunk([], usage={"prompt_tokens": prompt_tok, "completion_tokens": comp_tok_sum,
+                               "total_tokens": prompt_tok + comp_tok_sum})
+    yield "data: [DONE]\n\n"
+
+@torch.inference_mode()
+def _token_entropies(rows: List[torch.Tensor]) -> List[List[float]]:
+    """
+    逐位置熵（sweet 检出用）：第 i 位为模型看到前 i 个 token 后预测分布的熵，第 0 位无上文记 0。
+    右侧 pad 分块前向，每块 DETECT_BATCH_ROWS 条；熵的算法与 SWEETLogitsProcessor 生成时一致。
+    """
+    device = next(model.parameters()).device
+    out: List[List[float]] = []
+    for start in range(0, len(rows), DETECT_BATCH_ROWS):
+        chunk = rows[start:start + DETECT_BATCH_ROWS]
+        lens = [int(r.numel()) for r in chunk]
+        width = max(1, max(lens))
+        ids = torch.full((len(chunk), width), int(tokenizer.pad_token_id), dtype=torch.long)
+        attn = torch.zeros_like(ids)
+        for b, r in enumerate(chunk):
+            ids[b, :lens[b]] = r
+            attn[b, :lens[b]] = 1
+        logits = model(input_ids=ids.to(device), attention_mask=attn.to(device)).logits
+        for b, n in enumerate(lens):
+            if n == 0:
+                out.append([])
+                continue
+            probs = torch.softmax(logits[b, :n - 1].float(), dim=-1)
+            ent = -torch.where(probs > 0, probs * probs.log(), probs.new([0.0])).sum(dim=-1)
+            out.append([0.0] + ent.cpu().tolist())
+    return out
+
+def _detect_texts(texts: List[str], lp: LogitsProcessorList) -> tuple:
+    """一次批量分词，再逐处理器对全部文本打分。返回 (逐文本 wm_detection 列表, 逐文本 token 数)。"""
+    from libWM.batched.textDetect import detect_token_rows, needs_entropy  # 首次检出时才导入各后端
+    t_tok = _time.perf_counter()
+    enc = tokenizer(list(texts), add_special_tokens=False)
+    _M_TOKENIZE.observe(_time.perf_counter() - t_tok)
+    ctx_lim = _model_ctx_limit()
+    rows = [torch.tensor(ids[:ctx_lim] if isinstance(ctx_lim, int) else ids, dtype=torch.long)
+            for ids in enc["input_ids"]]
+
+    entropy_rows = None
+    if any(needs_entropy(p) for p in lp):
+        t_ent = _time.perf_counter()
+        entropy_rows = _token_entropies(rows)
+        logger.info("[timing] detect entropy forward rows=%d elapsed=%s", len(rows), _fmt_ms(_time.perf_counter() - t_ent))
+
+    results: List[Dict[str, Any]] = [{} for _ in rows]
+    for idx, proc in enumerate(lp):
+        key = f"{proc.__class__.__name__}[{idx}]"
+        t_det = _time.perf_counter()
+        for i, det in enumerate(detect_token_rows(proc, rows, entropy_rows)):
+            results[i][key] = det
+        elapsed = _time.perf_counter() - t_det
+        _M_DETECT.observe(elapsed, processor=proc.__class__.__name__, path="detect")
+        logger.info("[timing] detect %s texts=%d elapsed=%s", key, len(rows), _fmt_ms(elapsed))
+    return results, [int(r.numel()) for r in rows]
+
+@app.post("/v1/detect")
+async def detect(req: DetectRequest):
+    """
+    无生成检出：对一批文本直接跑外置处理器的检出逻辑（如对混淆后的代码打分）。
+    data[i].wm_detection 的键与 chat 响应一致（f"{处理器类名}[序号]"），字段与生成后 detect_last() 一致。
+    """
+    _require_ready()
+    if not req.texts:
+        raise HTTPException(status_code=422, detail="texts must not be empty")
+    if not req.external_processor_names:
+        raise HTTPException(status_code=422, detail="external_processor_names must not be empty")
+    lp = _resolve_lp_list(
+        internal_names=None,
+        external_names=req.external_processor_names,
+        mode="any",
+        external_params=req.external_processor_params,
+    )
+    try:
+        results, n_tokens = await _to_thread_timed("detect", _detect_texts, req.texts, lp)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"detection_error: {e.__class__.__name__}: {e}") from e
+    return _json_response({
+        "object": "list",
+        "model": MODEL_ID,
+        "data": [
+            {"index": i, "num_tokens": n_tokens[i], "wm_detection": results[i]}
+            for i in range(len(results))
+        ],
+        "usage": {"prompt_tokens": sum(n_tokens), "total_tokens": sum(n_tokens)},
+    }, "detect")
+
 @app.post("/v1/chat/completions")
-async def chat(req: ChatRequest) -> Dict[str, Any]:
-    print(f"[recv] at {time.time():.3f} messages={len(req.messages)} parallel={req.parallel}")
+async def chat(req: ChatRequest):
+    print(f"[recv] at {time.time():.3f} messages={len(req.messages)} parallel={req.parallel} stream={req.stream}")
     import sys; sys.stdout.flush()
+    _require_ready()
     # 基本校验：messages 不可为空
     if not req.messages:
         raise HTTPException(status_code=422, detail="messages must not be empty")
     msgs = [m.model_dump() for m in req.messages]
+    t_tok = _time.perf_counter()
     inputs = _prep_inputs(msgs)
+    _M_TOKENIZE.observe(_time.perf_counter() - t_tok)
     # 额外校验：prompt 不应超过上下文上限（超过直接 400）
     try:
         prompt_len = int(inputs["input_ids"].shape[1])
@@ -647,129 +1513,91 @@ async def chat(req: ChatRequest) -> Dict[str, Any]:
     if isinstance(ctx_lim, int) and prompt_len > ctx_lim:
         raise HTTPException(status_code=400, detail=f"prompt_too_long: {prompt_len}>{ctx_lim}")
 
+    # 流式：参数错误需在响应头发出前返回 400，因此先行校验采样参数
+    if req.stream:
+        try:
+            normalize_sampling_args(req._do_sample, req.temperature, req.top_p)
+        except ValueError as e:
+            raise _generation_http_error(e) from e
+
     # 并行：两路（仅内置）与（内置+外置）
     if req.parallel:
-        # 可选校验：并行时是否必须提供 external 链（通过环境变量控制）
-        if REQUIRE_EXTERNAL_IN_PARALLEL and not req.external_processor_names:
-            raise HTTPException(status_code=400, detail="parallel=True 需要提供 external_processor_names 列表（可通过环境变量 REQUIRE_EXTERNAL_IN_PARALLEL=0 关闭此限制）")
-
-        # 组装两套“仅内置链”（相互独立的克隆）与一套“外置链”（可为空）
-        lp_internal_for_internal = _resolve_lp_list(
-            internal_names=req.internal_processor_names,
-            external_names=None,
-            mode="internal_only"
-        )
-        lp_internal_for_both = _resolve_lp_list(
-            internal_names=req.internal_processor_names,
-            external_names=None,
-            mode="internal_only"
-        )
-        lp_external = _resolve_lp_list(
-            internal_names=None,
-            external_names=req.external_processor_names,
-            mode="any",
-            external_params=req.external_processor_params
-        )
-
-        # 合成“内置+外置”的处理器链（保持顺序：先内置，后外置）
-        if lp_internal_for_both is None and lp_external is None:
-            lp_both = None
-        elif lp_internal_for_both is None:
-            lp_both = lp_external
-        elif lp_external is None:
-            lp_both = lp_internal_for_both
-        else:
-            lp_both = LogitsProcessorList(list(lp_internal_for_both) + list(lp_external))
-
-        # 用“同一个 seed”分别做两次独立 generate，确保差异只来自外置处理器
-        try:
-            # ====== 生成耗时统计：第一路（未施加水印 logits processor） ======
-            t_gen0_start = _time.perf_counter()
-            text_internal, prompt_tok_0, comp_tok_0, total_tok_0, fr_internal = await asyncio.to_thread(
-                _hf_generate_single,
-                inputs,
-                lp_internal_for_internal,
-                req.temperature,
-                req.top_p,
-                req.max_tokens,
-                req._do_sample,
-                req.rng_seed,
+        lp_internal_for_internal, lp_both, lp_external = _resolve_parallel_chains(req)
+
+        if req.stream:
+            return StreamingResponse(
+                _stream_chat(req, inputs, [
+                    ("internal_only", lp_internal_for_internal, None),
+                    ("internal_plus_external", lp_both, lp_external),
+                ]),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
             )
-            t_gen0_end = _time.perf_counter()
 
-            # ====== 生成耗时统计：第二路（添加水印 logits processor） ======
-            t_gen1_start = _time.perf_counter()
-            text_both, prompt_tok_1, comp_tok_1, total_tok_1, fr_both = await asyncio.to_thread(
-                _hf_generate_single,
-                inputs,
-                lp_both,
-                req.temperature,
-                req.top_p,
-                req.max_tokens,
-                req._do_sample,
-                req.rng_seed,
-            )
-            t_gen1_end = _time.perf_counter()
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"bad_sampling_args: {e}") from e
-        except torch.cuda.OutOfMemoryError as e:
+        batch_key = _batch_group_key(req, lp_external)
+        if batch_key is not None:
+            # 合批：两路作为同一批中的两行，共用同一 seed；外置处理器只作用于第二行
             try:
-                torch.cuda.empty_cache()
-            except Exception:
-                pass
-            raise HTTPException(status_code=503, detail="generation_error: cuda_oom") from e
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"generation_error: {e.__class__.__name__}: {e}") from e
-
-        # ====== 打印生成耗时统计 ======
-        gen_internal_s = float(t_gen0_end - t_gen0_start)
-        gen_both_s = float(t_gen1_end - t_gen1_start)
-        logger.info(
-            "[timing] generation internal_only=%s internal_plus_external=%s",
-            _fmt_ms(gen_internal_s), _fmt_ms(gen_both_s),
-        )
+                res_internal, res_both = await _BATCHER.submit(batch_key, [
+                    _BatchRow(inputs, None, req.rng_seed),
+                    _BatchRow(inputs, lp_external[0] if lp_external else None, req.rng_seed),
+                ])
+            except Exception as e:
+                raise _generation_http_error(e) from e
+            text_internal, prompt_tok_0, comp_tok_0, total_tok_0, fr_internal, _ = res_internal
+            text_both, prompt_tok_1, comp_tok_1, total_tok_1, fr_both, wm_detection_result = res_both
+        else:
+            # 用“同一个 seed”分别做两次独立 generate，确保差异只来自外置处理器
+            try:
+                # ====== 生成耗时统计：第一路（未施加水印 logits processor） ======
+                t_gen0_start = _time.perf_counter()
+                text_internal, prompt_tok_0, comp_tok_0, total_tok_0, fr_internal = await _to_thread_timed(
+                    "internal_only",
+                    _hf_generate_single,
+                    inputs,
+                    lp_internal_for_internal,
+                    req.temperature,
+                    req.top_p,
+                    req.max_tokens,
+                    req._do_sample,
+                    req.rng_seed,
+                    None,
+                    "internal_only",
+                )
+                t_gen0_end = _time.perf_counter()
+
+                # ====== 生成耗时统计：第二路（添加水印 logits processor） ======
+                t_gen1_start = _time.perf_counter()
+                text_both, prompt_tok_1, comp_tok_1, total_tok_1, fr_both = await _to_thread_timed(
+                    "internal_plus_external",
+                    _hf_generate_single,
+                    inputs,
+                    lp_both,
+                    req.temperature,
+                    req.top_p,
+                    req.max_tokens,
+                    req._do_sample,
+                    req.rng_seed,
+                    None,
+                    "internal_plus_external",
+                )
+                t_gen1_end = _time.perf_counter()
+            except Exception as e:
+                raise _generation_http_error(e) from e
+
+            # ====== 打印生成耗时统计 ======
+            gen_internal_s = float(t_gen0_end - t_gen0_start)
+            gen_both_s = float(t_gen1_end - t_gen1_start)
+            logger.info(
+                "[timing] generation internal_only=%s internal_plus_external=%s",
+                _fmt_ms(gen_internal_s), _fmt_ms(gen_both_s),
+            )
 
-        # ====== 外置链的“零参离线检出”：仅当存在外置链且生成了文本 ======
-        wm_detection_result: Dict[str, Any] = {}
-        det_elapsed_s: Optional[float] = None
-        try:
-            if lp_external is not None and comp_tok_1 > 0:
-                # （可选）打印外置 logits_processor 自身累计耗时（更“纯”的开销口径）
-                try:
-                    for idx, proc in enumerate(list(lp_external)):
-                        if hasattr(proc, "timing") and callable(getattr(proc, "timing")):
-                            tinfo = proc.timing()
-                            total_s = float(tinfo.get("lp_total_time_s", 0.0))
-                            calls = int(tinfo.get("lp_calls", 0))
-                            avg_us = float(tinfo.get("lp_avg_per_call_us", 0.0))
-                            logger.info(
-                                "[timing] wm_lp %s[%d] lp_total=%s lp_calls=%d lp_avg=%0.3fus",
-                                proc.__class__.__name__, idx, _fmt_ms(total_s), calls, avg_us
-                            )
-                except Exception as _e:
-                    logger.info("[timing] wm_lp timing read failed: %s: %s", _e.__class__.__name__, _e)
-
-                t_det_start = _time.perf_counter()
-                # 遍历外置链上的各个处理器实例；若实现 detect_last() 则直接零参调用
-                for idx, proc in enumerate(list(lp_external)):
-                    if hasattr(proc, "detect_last") and callable(getattr(proc, "detect_last")):
-                        key = f"{proc.__class__.__name__}[{idx}]"
-                        try:
-                            wm_detection_result[key] = proc.detect_last()
-                        except Exception as _e:
-                            wm_detection_result[key] = {"error": f"detection_failed: {_e.__class__.__name__}: {_e}"}
-                t_det_end = _time.perf_counter()
-                det_elapsed_s = float(t_det_end - t_det_start)
-        except Exception as _outer_e:
-            wm_detection_result = {"__error__": f"{_outer_e.__class__.__name__}: {_outer_e}"}
-
-        # ====== 打印检测耗时统计（detect_last） ======
-        if det_elapsed_s is not None:
-            logger.info("[timing] watermark_detect(detect_last)=%s", _fmt_ms(det_elapsed_s))
+            wm_detection_result = await asyncio.to_thread(_detect_external, lp_external, comp_tok_1)
 
         if USAGE_PER_CHOICE:
             # 新口径：每个 choice 自带 usage；并行模式下不再返回顶层 usage
-            return {
+            return _json_response({
                 "id": f"chatcmpl-{int(time.time()*1000)}",
                 "object": "chat.completion",
                 "created": int(time.time()),
@@ -799,13 +1627,13 @@ async def chat(req: ChatRequest) -> Dict[str, Any]:
                         },
                     },
                 ],
-            }
+            }, "parallel")
         else:
             # 旧口径：合并统计（与之前行为完全一致）
             prompt_tok = int(prompt_tok_0)
             comp_tok_sum = int(comp_tok_0 + comp_tok_1)
             total_tok = int(prompt_tok + comp_tok_sum)
-            return {
+            return _json_response({
                 "id": f"chatcmpl-{int(time.time()*1000)}",
                 "object": "chat.completion",
                 "created": int(time.time()),
@@ -830,7 +1658,7 @@ async def chat(req: ChatRequest) -> Dict[str, Any]:
                     "completion_tokens": comp_tok_sum,
                     "total_tokens": total_tok
                 }
-            }
+            }, "parallel")
 
     # 非并行：使用纯 generate（batch=1），仅拼接 **你的内置链**（与并行 internal-only 对齐）
     lp_internal_only = _resolve_lp_list(
@@ -838,29 +1666,34 @@ async def chat(req: ChatRequest) -> Dict[str, Any]:
         external_names=None,
         mode="internal_only",
     )
-    try:
-        text, prompt_tok, comp_tok, total_tok, fr = await asyncio.to_thread(
-            _hf_generate_single,
-            inputs,
-            lp_internal_only,
-            req.temperature,
-            req.top_p,
-            req.max_tokens,
-            req._do_sample,
-            req.rng_seed,
+    if req.stream:
+        return StreamingResponse(
+            _stream_chat(req, inputs, [(None, lp_internal_only, None)]),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=f"bad_sampling_args: {e}") from e
-    except torch.cuda.OutOfMemoryError as e:
-        try:
-            torch.cuda.empty_cache()
-        except Exception:
-            pass
-        raise HTTPException(status_code=503, detail="generation_error: cuda_oom") from e
+    batch_key = _batch_group_key(req, None)
+    try:
+        if batch_key is not None:
+            [(text, prompt_tok, comp_tok, total_tok, fr, _)] = await _BATCHER.submit(
+                batch_key, [_BatchRow(inputs, None, req.rng_seed)]
+            )
+        else:
+            text, prompt_tok, comp_tok, total_tok, fr = await _to_thread_timed(
+                "internal_only",
+                _hf_generate_single,
+                inputs,
+                lp_internal_only,
+                req.temperature,
+                req.top_p,
+                req.max_tokens,
+                req._do_sample,
+                req.rng_seed,
+            )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"generation_error: {e.__class__.__name__}: {e}") from e
+        raise _generation_http_error(e) from e
     # fr 已在 _hf_generate_single 内部给出
-    return {
+    return _json_response({
         "id": f"chatcmpl-{int(time.time()*1000)}",
         "object": "chat.completion",
         "created": int(time.time()),
@@ -873,7 +1706,38 @@ async def chat(req: ChatRequest) -> Dict[str, Any]:
             "completion_tokens": comp_tok,
             "total_tokens": total_tok
         }
-    }
+    }, "single")
+
+def _warmup() -> None:
+    """导入并构造 WARMUP_BUILDERS（写入 spec 缓存）；WARMUP_TOKENS>0 时再用它们跑一次短生成。"""
+    lp = _resolve_lp_list(None, WARMUP_BUILDERS, "any") if WARMUP_BUILDERS else None
+    if WARMUP_TOKENS > 0:
+        inputs = _prep_inputs([{"role": "user", "content": "warmup"}])
+        _hf_generate_single(inputs, lp, 0.7, 0.95, WARMUP_TOKENS, SERVER_DO_SAMPLE, 0, path="warmup")
+
+def _load_all() -> None:
+    """模型加载 → regWM 注册 → 预热，全部成功后置就绪；失败时 /readyz 报告 failed 与原因。"""
+    global _LOAD_ERROR
+    stages = [("model_load_s", _load_model), ("register_s", _load_regwm)]
+    if SPEC_DRAFT_MODEL_ID:
+        stages.insert(1, ("draft_load_s", _load_draft))
+    if WARMUP_BUILDERS or WARMUP_TOKENS > 0:
+        stages.append(("warmup_s", _warmup))
+    try:
+        for name, fn in stages:
+            t0 = _time.perf_counter()
+            fn()
+            _STARTUP_TIMINGS[name] = round(_time.perf_counter() - t0, 3)
+    except Exception as e:
+        _LOAD_ERROR = f"{e.__class__.__name__}: {getattr(e, 'detail', e)}"
+        logger.exception("[startup] failed")
+        return
+    _STARTUP_TIMINGS["import_to_ready_s"] = round(_time.perf_counter() - _T_IMPORT, 3)
+    _READY.set()
+    logger.info("[startup] ready %s", _STARTUP_TIMINGS)
+
+if MODEL_LOAD == "eager":
+    _load_all()
 
 # 启动(开启采样): `uvicorn server:app --host 0.0.0.0 --port 8000`
 # 启动(关闭采样): `SERVER_DO_SAMPLE=0 uvicorn server:app --host 0.0.0.0 --port 8000`
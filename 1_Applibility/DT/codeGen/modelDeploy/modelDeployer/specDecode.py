@@ -0,0 +1,157 @@
+# specDecode.py
+# 投机解码：小草稿模型一次提出 k 个 token，目标模型一次前向验证，供 server.py 的逐条生成使用
+# - 目标分布 p_j：目标模型在第 j 个前缀上的 logits 依次经过完整处理链（HF 处理器 → 水印 → temperature/top_p 等 warpers），
+#   与非投机 generate 每步采样用的分布相同；草稿分布 q_j 由草稿模型 logits 经同样构造的处理链得到（水印也加，接受率更高）
+# - 接受/拒绝：以 min(1, p_j(x)/q_j(x)) 接受草稿 token x；拒绝时从 norm(max(0, p_j - q_j)) 重采样并结束本轮；
+#   k 个全部接受再从 p_k 采一个额外 token。输出序列的分布与逐 token 水印采样完全一致（与 q 的取法无关）
+# - 目标处理链只在被采用的位置上调用（拒绝点之后的位置不调用），因此水印处理器看到的前缀序列、次数与逐条生成相同，
+#   其运行时缓存（检出用）不需要回退
+# - 贪心：p/q 取 argmax 的 one-hot，上面的规则即退化为“草稿与目标 argmax 一致才接受”
+# - 两个模型各自维护 KV cache，拒绝后按已确认长度 crop；要求两者词表一致（草稿 logits 维度不足时补 -inf）
+import time as _time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import LogitsProcessorList
+
+
+def _forward(model, ids: torch.LongTensor, cache: Any, keep: int) -> Tuple[torch.Tensor, Any]:
+    """增量前向：ids 为 cache 之后的新 token，只取最后 keep 个位置的 logits。"""
+    out = model(input_ids=ids, past_key_values=cache, use_cache=True, logits_to_keep=keep)
+    return out.logits[0, -keep:, :], out.past_key_values
+
+
+def _crop(cache: Any, cache_len: int, keep: int) -> int:
+    """把 cache 截到前 keep 个 token（keep 不超过当前长度），返回新的长度。"""
+    if keep < cache_len:
+        # 传负数表示从尾部去掉的 token 数（正数的“截到长度”用法已弃用）
+        cache.crop(-(cache_len - keep))
+        return keep
+    return cache_len
+
+
+def _probs(scores: torch.Tensor, do_sample: bool) -> torch.Tensor:
+    if do_sample:
+        return torch.softmax(scores.float(), dim=-1)
+    out = torch.zeros(scores.shape, dtype=torch.float32, device=scores.device)
+    out.scatter_(-1, scores.argmax(dim=-1, keepdim=True), 1.0)
+    return out
+
+
+def _sample(probs: torch.Tensor, do_sample: bool, generator: Optional[torch.Generator]) -> torch.LongTensor:
+    if do_sample:
+        return torch.multinomial(probs, num_samples=1, generator=generator)
+    return probs.argmax(dim=-1, keepdim=True)
+
+
+def _fit_vocab(logits: torch.Tensor, vocab: int) -> torch.Tensor:
+    """草稿 logits 对齐到目标词表维度（多出的截掉，不足的补 -inf，即草稿永不提出这些 token）。"""
+    n = logits.shape[-1]
+    if n == vocab:
+        return logits
+    if n > vocab:
+        return logits[..., :vocab]
+    pad = logits.new_full(logits.shape[:-1] + (vocab - n,), float("-inf"))
+    return torch.cat([logits, pad], dim=-1)
+
+
+@torch.inference_mode()
+def speculative_generate(
+    target,
+    draft,
+    input_ids: torch.LongTensor,
+    *,
+    k: int,
+    max_new_tokens: int,
+    target_lp: LogitsProcessorList,
+    draft_lp: LogitsProcessorList,
+    do_sample: bool,
+    eos_token_ids: Sequence[int] = (),
+    stopping_criteria: Optional[Callable[[torch.LongTensor, Any], Any]] = None,
+    generator: Optional[torch.Generator] = None,
+    streamer: Any = None,
+) -> Tuple[torch.LongTensor, Dict[str, Any]]:
+    """
+    input_ids: [1, L]（batch=1）。返回 (sequences [1, L+new], stats)。
+    stats: rounds / drafted / accepted（被接受的草稿 token 数）/ new_tokens / t_first（首次目标前向结束的 perf_counter）
+    stopping_criteria 在每个新 token 追加后调用（scores 传 None），与 generate 的停止口径一致。
+    """
+    eos = set(int(x) for x in eos_token_ids)
+    seq = input_ids
+    prompt_len = int(seq.shape[1])
+    t_cache = d_cache = None
+    t_len = d_len = 0  # 两个 cache 已覆盖的 token 数
+    vocab = int(target.get_output_embeddings().weight.shape[0])
+    stats: Dict[str, Any] = {"rounds": 0, "drafted": 0, "accepted": 0, "new_tokens": 0, "t_first": None}
+    if streamer is not None:
+        streamer.put(seq.cpu())
+
+    done = max_new_tokens <= 0
+    while not done:
+        budget = max_new_tokens - (int(seq.shape[1]) - prompt_len)
+        # 最后一个名额总由目标模型给出（拒绝重采样或额外 token），草稿最多提出 budget-1 个
+        kk = max(0, min(int(k), budget - 1))
+        cur = int(seq.shape[1])
+
+        # 1) 草稿：逐个提出 kk 个 token，记录每个位置的 q
+        ids, qs = seq, []
+        for _ in range(kk):
+            logits, d_cache = _forward(draft, ids[:, d_len:], d_cache, 1)
+            d_len = int(ids.shape[1])
+            q = _probs(draft_lp(ids, _fit_vocab(logits.float(), vocab)), do_sample)
+            tok = _sample(q, do_sample, generator)
+            qs.append(q[0])
+            ids = torch.cat([ids, tok.to(ids.device)], dim=-1)
+
+        # 2) 目标：一次前向得到 cur..cur+kk 共 kk+1 个位置的 logits
+        logits, t_cache = _forward(target, ids[:, t_len:], t_cache, kk + 1)
+        t_len = int(ids.shape[1])
+        if stats["t_first"] is None:
+            stats["t_first"] = _time.perf_counter()
+
+        # 3) 逐位置接受/拒绝；目标处理链按位置顺序调用，到拒绝点或停止为止
+        new: List[int] = []
+        for j in range(kk + 1):
+            prefix = ids[:, : cur + j]
+            p = _probs(target_lp(prefix, logits[j : j + 1].float()), do_sample)[0]
+            accept = True
+            if j < kk:
+                x = int(ids[0, cur + j])
+                if do_sample:
+                    r = torch.rand((), generator=generator, device=p.device)
+                    accept = bool(r * qs[j][x] < p[x])
+                else:
+                    accept = bool(p[x] > 0)
+                if accept:
+                    tok = x
+                    stats["accepted"] += 1
+                else:
+                    residual = torch.clamp(p - qs[j], min=0.0)
+                    if float(residual.sum()) <= 0.0:
+                        residual = p
+                    tok = int(_sample((residual / residual.sum()).unsqueeze(0), do_sample, generator)[0, 0])
+            else:
+                tok = int(_sample(p.unsqueeze(0), do_sample, generator)[0, 0])
+            new.append(tok)
+            seq = torch.cat([seq, seq.new_tensor([[tok]])], dim=-1)
+            if (tok in eos or int(seq.shape[1]) - prompt_len >= max_new_tokens
+                    or (stopping_criteria is not None and bool(torch.as_tensor(stopping_criteria(seq, None)).any()))):
+                done = True
+                break
+            if not accept:
+                break
+
+        stats["rounds"] += 1
+        stats["drafted"] += kk
+        stats["new_tokens"] += len(new)
+        if streamer is not None:
+            streamer.put(torch.tensor(new, dtype=torch.long))
+        # 4) cache 只保留已确认序列去掉最后一个 token 的部分（最后一个 token 在下一轮作为输入）
+        keep = int(seq.shape[1]) - 1
+        t_len = _crop(t_cache, t_len, keep)
+        if d_cache is not None:
+            d_len = _crop(d_cache, d_len, keep)
+
+    if streamer is not None:
+        streamer.end()
+    return seq, stats
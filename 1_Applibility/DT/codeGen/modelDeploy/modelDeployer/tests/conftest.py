@@ -0,0 +1,65 @@
+# tests/conftest.py
+# 服务端测试共用的极小模型：现场训练 400 词的 BPE tokenizer（带 chat template），随机初始化 2 层 GPT-2，
+# 全部在 CPU 上跑、不下载任何权重；server 模块的 tokenizer / model / vocab_ids 由 fixture 直接替换（不走 _load_model）
+import os
+import sys
+
+import pytest
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_CORPUS = ["def foo(x):\n    return x + 1\n", "hello world, BFS and DFS differ.", "import os\nprint('hi')\n"] * 50
+_CHAT_TEMPLATE = (
+    "{% for m in messages %}<|im_start|>{{ m['role'] }}\n{{ m['content'] }}<|im_end|>\n{% endfor %}"
+    "{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}"
+)
+
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory):
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+    out = str(tmp_path_factory.mktemp("tiny_model"))
+    bpe = Tokenizer(models.BPE(unk_token="<unk>"))
+    bpe.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    bpe.decoder = decoders.ByteLevel()
+    bpe.train_from_iterator(_CORPUS, trainers.BpeTrainer(
+        vocab_size=400,
+        special_tokens=["<unk>", "<|endoftext|>", "<|im_start|>", "<|im_end|>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    ))
+    tok = PreTrainedTokenizerFast(
+        tokenizer_object=bpe, unk_token="<unk>", eos_token="<|endoftext|>", pad_token="<|endoftext|>"
+    )
+    tok.chat_template = _CHAT_TEMPLATE
+    tok.save_pretrained(out)
+    cfg = GPT2Config(vocab_size=len(tok), n_positions=512, n_embd=32, n_layer=2, n_head=2,
+                     eos_token_id=tok.eos_token_id, bos_token_id=tok.eos_token_id)
+    torch.manual_seed(0)
+    GPT2LMHeadModel(cfg).save_pretrained(out)
+    return out
+
+
+@pytest.fixture(scope="session")
+def tiny(tiny_model_dir):
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(tiny_model_dir)
+    mdl = AutoModelForCausalLM.from_pretrained(tiny_model_dir).eval()
+    # 放大词嵌入，让随机模型的分布更尖（贪心不易出现并列、草稿与目标的接受率更像真实模型）
+    with torch.no_grad():
+        mdl.transformer.wte.weight.mul_(6.0)
+    return tok, mdl
+
+
+@pytest.fixture
+def server_mod(tiny, monkeypatch):
+    import server
+
+    tok, mdl = tiny
+    monkeypatch.setattr(server, "tokenizer", tok)
+    monkeypatch.setattr(server, "model", mdl)
+    monkeypatch.setattr(server, "vocab_ids", list(range(len(tok))))
+    return server
@@ -0,0 +1,98 @@
+# tests/test_batched_lp.py
+# 逐行参数的批处理 logits processor：混合配置的一批里，每行偏置与单行处理器逐步加的偏置相同，逐行检出与单行 detect_last 相同
+import pytest
+import torch
+from transformers import LogitsProcessorList
+
+from libWM.batched import BatchedWatermarkLogitsProcessor
+from libWM.ewd import EWDWMLogitsProcessor
+from libWM.stone import STONEWMLogitsProcessor
+from libWM.sweet import SWEETLogitsProcessor
+from libWM.waterfall import WaterfallLogitsProcessor
+from libWM.wllm import WLLMLogitsProcessor
+
+
+def _makers(tok, mdl):
+    """混合配置：不同方法、同一方法的不同 gamma / delta / hash_key，以及不加水印的行（None）。"""
+    vocab = list(range(len(tok)))
+    dev = torch.device("cpu")
+    return [
+        lambda: WLLMLogitsProcessor(vocab=vocab, gamma=0.5, delta=2.0, tokenizer=tok),
+        lambda: WLLMLogitsProcessor(vocab=vocab, gamma=0.25, delta=4.0, hash_key=7919, tokenizer=tok),
+        lambda: SWEETLogitsProcessor(vocab=vocab, gamma=0.5, delta=3.0, entropy_threshold=0.5, tokenizer=tok),
+        lambda: WaterfallLogitsProcessor(id_mu=42, k_p=1, kappa=2.0, tokenizer=tok, det_tokenizer=tok),
+        lambda: EWDWMLogitsProcessor(tokenizer=tok, model=mdl, device=dev, vocab_size=len(tok), gamma=0.5,
+                                     delta=2.0, hash_key=15485863, z_threshold=4.0, prefix_length=1),
+        lambda: STONEWMLogitsProcessor(tokenizer=tok, vocab_size=len(tok), device=dev, gamma=0.5, delta=2.0,
+                                       hash_key=15485863, z_threshold=4.0, prefix_length=1, language="python",
+                                       watermark_on_pl="False", skipping_rule="all_pl"),
+        lambda: None,
+    ]
+
+
+def _prompts(tok, n):
+    # 等长提示词：批内不需要左侧 pad，逐条生成与合批生成的 logits 一致
+    texts = ["def foo(x):\n    return", "hello world, BFS and", "import os\nprint('hi')", "BFS and DFS differ.",
+             "return x + 1\nimport", "print('hi')\nhello", "world, BFS and DFS"]
+    ids = [tok.encode(t, add_special_tokens=False) for t in texts[:n]]
+    width = min(len(x) for x in ids)
+    return torch.tensor([x[:width] for x in ids])
+
+
+def test_batched_bias_matches_single_rows(tiny):
+    tok, mdl = tiny
+    makers = _makers(tok, mdl)
+    batched = BatchedWatermarkLogitsProcessor([m() for m in makers])
+    singles = [m() for m in makers]
+
+    g = torch.Generator().manual_seed(0)
+    input_ids = _prompts(tok, len(makers))
+    vocab = len(tok)
+    for _ in range(12):
+        scores = torch.randn(len(makers), vocab, generator=g) * 3
+        bias = batched(input_ids, scores.clone()) - scores
+        for b, proc in enumerate(singles):
+            if proc is None:
+                assert torch.count_nonzero(bias[b]) == 0
+                continue
+            ref = proc(input_ids[b : b + 1], scores[b : b + 1].clone()) - scores[b : b + 1]
+            torch.testing.assert_close(bias[b : b + 1], ref, msg=f"row {b}: {proc.__class__.__name__}")
+        nxt = torch.randint(0, vocab, (len(makers), 1), generator=g)
+        input_ids = torch.cat([input_ids, nxt], dim=-1)
+
+
+def _single_generate(mdl, tok, proc, prompt, max_new):
+    out = mdl.generate(input_ids=prompt[None, :], attention_mask=torch.ones(1, prompt.numel(), dtype=torch.long),
+                       do_sample=False, max_new_tokens=max_new, logits_processor=LogitsProcessorList([proc]),
+                       pad_token_id=tok.pad_token_id, eos_token_id=tok.eos_token_id)
+    return out[0, prompt.numel():]
+
+
+def _comparable(res):
+    # 只比较数值字段（不同实现附带的元信息字段可以不同）
+    return {k: v for k, v in res.items() if isinstance(v, (int, float, bool, list))}
+
+
+@pytest.mark.parametrize("max_new", [8, 24])
+def test_batched_detection_matches_single_detect_last(tiny, max_new):
+    tok, mdl = tiny
+    makers = _makers(tok, mdl)
+    prompts = _prompts(tok, len(makers))
+    batched = BatchedWatermarkLogitsProcessor([m() for m in makers], eos_token_ids=[tok.eos_token_id],
+                                              pad_token_id=tok.pad_token_id)
+    out = mdl.generate(input_ids=prompts, attention_mask=torch.ones_like(prompts), do_sample=False,
+                       max_new_tokens=max_new, logits_processor=LogitsProcessorList([batched]),
+                       pad_token_id=tok.pad_token_id, eos_token_id=tok.eos_token_id)
+    got = batched.detect_last()
+
+    for b, make in enumerate(makers):
+        proc = make()
+        if proc is None:
+            assert got[b] is None
+            continue
+        cont = _single_generate(mdl, tok, proc, prompts[b], max_new)
+        # 同一提示词、同一水印：合批与逐条生成出同一串 token（EOS 之后的 pad 不计）
+        row = out[b, prompts.shape[1]:]
+        assert row[: cont.numel()].tolist() == cont.tolist(), f"row {b}"
+        assert "error" not in got[b], got[b]
+        assert _comparable(got[b]) == _comparable(proc.detect_last()), f"row {b}: {proc.__class__.__name__}"
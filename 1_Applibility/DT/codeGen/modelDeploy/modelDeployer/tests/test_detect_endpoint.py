@@ -0,0 +1,107 @@
+# tests/test_detect_endpoint.py
+# /v1/detect：对生成出的文本检出，得到与生成时 detect_last 相同的 z；一批文本分别来自不同配置（wllm 两组参数 + sweet）
+import re
+import threading
+
+import pytest
+import torch
+from fastapi.testclient import TestClient
+from transformers import LogitsProcessor, LogitsProcessorList
+
+from libWM.sweet import SWEETLogitsProcessor
+from libWM.wllm import WLLMLogitsProcessor
+
+# 名称 -> (处理器类, 参数)；同一方法的两组参数各注册一个名字
+# 小模型各位置的熵约 4.9~5.5，sweet 的阈值取在其中，检出时确有位置被跳过
+_CONFIGS = {
+    "wllm_a": (WLLMLogitsProcessor, {"gamma": 0.5, "delta": 2.0}),
+    "wllm_b": (WLLMLogitsProcessor, {"gamma": 0.25, "delta": 4.0, "hash_key": 7919}),
+    "sweet_t": (SWEETLogitsProcessor, {"gamma": 0.5, "delta": 3.0, "entropy_threshold": 5.33}),
+}
+_N_ROWS = 4
+
+
+@pytest.fixture
+def client(server_mod, monkeypatch):
+    server = server_mod
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(server, "_READY", ready)
+    for name, (cls, _) in _CONFIGS.items():
+        monkeypatch.setitem(server.EXTERNAL_BUILDERS, name,
+                            lambda cls=cls, **cfg: cls(tokenizer=server.tokenizer, **cfg))
+    # 不进入 lifespan：模型已由 fixture 替换，不启动后台加载
+    return TestClient(server.app)
+
+
+class _WordsOnly(LogitsProcessor):
+    """
+    只允许以空格开头的整词 token（排在水印处理器之后）：ByteLevel 预分词在空格处切开，
+    这些 token 任意拼接后重新分词仍得到同一串 id，/v1/detect 与生成时看到的是同一个序列。
+    水印偏置与 sweet 的熵仍作用在完整词表上。
+    """
+
+    def __init__(self, tok):
+        self.allowed = [i for i in range(len(tok)) if re.fullmatch(r"Ġ[A-Za-z]+", tok.convert_ids_to_tokens(i))]
+        self.mask = torch.ones(len(tok), dtype=torch.bool)
+        self.mask[self.allowed] = False
+
+    def __call__(self, input_ids, scores):
+        return scores.masked_fill(self.mask[: scores.shape[-1]], float("-inf"))
+
+
+def _rows(server, name):
+    """按 _N_ROWS 个 seed 采样生成，返回 [(文本, 生成时 detect_last), ...]。"""
+    tok = server.tokenizer
+    words = _WordsOnly(tok)
+    cls, params = _CONFIGS[name]
+    rows = []
+    for seed in range(_N_ROWS):
+        proc = cls(vocab=server.vocab_ids, tokenizer=tok, **params)
+        inputs = {"input_ids": torch.tensor([[words.allowed[seed]]])}
+        server._hf_generate_single(inputs, LogitsProcessorList([proc, words]), 1.0, 1.0, 24, True, seed)
+        ids = proc._cache_full_ids.tolist()
+        text = tok.decode(ids)
+        assert tok.encode(text, add_special_tokens=False) == ids, (name, seed)
+        rows.append((text, proc.detect_last()))
+    return rows
+
+
+def _detect(client, texts, names):
+    resp = client.post("/v1/detect", json={
+        "texts": texts,
+        "external_processor_names": names,
+        "external_processor_params": {n: _CONFIGS[n][1] for n in names},
+    })
+    assert resp.status_code == 200, resp.text
+    return resp.json()["data"]
+
+
+@pytest.mark.parametrize("name", list(_CONFIGS))
+def test_detect_matches_generation_time_detect_last(server_mod, client, name):
+    server = server_mod
+    rows = _rows(server, name)
+    data = _detect(client, [t for t, _ in rows], [name])
+    key = f"{_CONFIGS[name][0].__name__}[0]"
+    for (_, expected), got in zip(rows, data):
+        det = got["wm_detection"][key]
+        assert det["z_score"] == pytest.approx(expected["z_score"], abs=1e-9)
+        assert det["num_tokens_scored"] == expected["num_tokens_scored"]
+        assert det["num_green_tokens"] == expected["num_green_tokens"]
+        assert det["prediction"] == expected["prediction"]
+
+
+def test_detect_batch_with_mixed_configs(server_mod, client):
+    # 一批文本来自不同配置；同一请求带上全部处理器，每行在“自己的”处理器下与生成时结果一致
+    server = server_mod
+    names = list(_CONFIGS)
+    per_name = {name: _rows(server, name) for name in names}
+    rows = [(name, *per_name[name][i]) for i in range(_N_ROWS) for name in names]
+    data = _detect(client, [t for _, t, _ in rows], names)
+    assert len(data) == len(rows)
+    for (name, _, expected), got in zip(rows, data):
+        idx = names.index(name)
+        det = got["wm_detection"][f"{_CONFIGS[name][0].__name__}[{idx}]"]
+        assert det["z_score"] == pytest.approx(expected["z_score"], abs=1e-9), name
+        assert det["num_tokens_scored"] == expected["num_tokens_scored"], name
+        assert len(got["wm_detection"]) == len(names)
@@ -0,0 +1,56 @@
+# tests/test_metrics.py
+# /metrics：几次 chat 请求之后，排队 / prefill / decode / 水印处理器各阶段直方图按 path、processor 标签出现并计数
+import re
+import threading
+
+from fastapi.testclient import TestClient
+
+from libWM.wllm import WLLMLogitsProcessor
+
+
+def _count(text: str, name: str, **labels) -> int:
+    """取某个直方图序列的 _count（标签按渲染顺序完全匹配；不存在时为 0）。"""
+    want = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    m = re.search(rf"^{name}_count\{{{re.escape(want)}\}} (\d+)$", text, re.M)
+    return int(m.group(1)) if m else 0
+
+
+def test_metrics_exposes_stage_histograms(server_mod, monkeypatch):
+    server = server_mod
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(server, "_READY", ready)
+    monkeypatch.setitem(server.EXTERNAL_BUILDERS, "wllm_t", lambda **cfg: WLLMLogitsProcessor(
+        vocab=cfg["vocab"], gamma=0.5, delta=2.0, tokenizer=server.tokenizer))
+    # 不进入 lifespan：模型已由 fixture 替换，不启动后台加载
+    client = TestClient(server.app)
+
+    series = [
+        ("wm_server_queue_wait_seconds", {"path": "internal_only"}),
+        ("wm_server_queue_wait_seconds", {"path": "internal_plus_external"}),
+        ("wm_server_prefill_seconds", {"path": "internal_only"}),
+        ("wm_server_prefill_seconds", {"path": "internal_plus_external"}),
+        ("wm_server_decode_seconds_per_token", {"path": "internal_only"}),
+        ("wm_server_decode_seconds_per_token", {"path": "internal_plus_external"}),
+        ("wm_server_logits_processor_seconds_per_call",
+         {"processor": "WLLMLogitsProcessor", "path": "internal_plus_external"}),
+    ]
+    before = client.get("/metrics").text
+    n = 3
+    for i in range(n):
+        r = client.post("/v1/chat/completions", json={
+            "messages": [{"role": "user", "content": "def foo(x):"}],
+            "max_tokens": 6,
+            "rng_seed": i,
+            "parallel": True,
+            "external_processor_names": ["wllm_t"],
+        })
+        assert r.status_code == 200, r.text
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    after = resp.text
+    for name, labels in series:
+        assert f"# TYPE {name} histogram" in after
+        assert _count(after, name, **labels) - _count(before, name, **labels) == n, (name, labels)
@@ -0,0 +1,127 @@
+# tests/test_online_detection.py
+# 在线检出：生成结束时 online_snapshot 与 detect_last 一致；online_stop_threshold 能提前停止生成；waterfall 的 q 按计数缓存
+import pytest
+import torch
+from transformers import LogitsProcessorList
+
+from libWM.sweet import SWEETLogitsProcessor
+from libWM.waterfall import WaterfallLogitsProcessor
+from libWM.wllm import WLLMLogitsProcessor
+
+_PROMPTS = ["def foo(x):", "hello world", "import os"]
+
+
+def _wllm(server, **kw):
+    kw = {"gamma": 0.5, "delta": 2.0, **kw}
+    return WLLMLogitsProcessor(vocab=server.vocab_ids, tokenizer=server.tokenizer, **kw)
+
+
+def _sweet(server, **kw):
+    kw = {"gamma": 0.5, "delta": 2.0, "entropy_threshold": 0.5, **kw}
+    return SWEETLogitsProcessor(vocab=server.vocab_ids, tokenizer=server.tokenizer, **kw)
+
+
+def _waterfall(server, **kw):
+    return WaterfallLogitsProcessor(id_mu=42, k_p=1, kappa=2.0, tokenizer=server.tokenizer,
+                                    det_tokenizer=server.tokenizer, **kw)
+
+
+def _generate(server, proc, prompt, max_new=40, do_sample=False, seed=None):
+    lp = LogitsProcessorList([proc])
+    inputs = server._prep_inputs([{"role": "user", "content": prompt}])
+    _, _, comp_tok, _, reason = server._hf_generate_single(inputs, lp, 1.0, 1.0, max_new, do_sample, seed)
+    return comp_tok, reason
+
+
+def _count_q_calls(proc, monkeypatch):
+    # 包一层 watermarking_fn.q，统计整词表 q 的计算次数
+    proc._ensure_watermarker()
+    fn = proc._wm.watermarking_fn
+    calls = []
+    orig = fn.q
+
+    def spy(*args, **kwargs):
+        calls.append(1)
+        return orig(*args, **kwargs)
+
+    monkeypatch.setattr(fn, "q", spy)
+    return calls
+
+
+@pytest.mark.parametrize("make", [_wllm, _sweet], ids=["wllm", "sweet"])
+@pytest.mark.parametrize("do_sample,seed", [(False, None), (True, 3)], ids=["greedy", "sample"])
+def test_snapshot_matches_detect_last(server_mod, make, do_sample, seed):
+    server = server_mod
+    for prompt in _PROMPTS:
+        proc = make(server, online_detection=True)
+        _generate(server, proc, prompt, do_sample=do_sample, seed=seed)
+        snap = proc.online_snapshot()
+        det = proc.detect_last()
+        assert snap["num_tokens_scored"] > 0
+        for k in ("z_score", "num_tokens_scored", "num_green_tokens"):
+            assert snap[k] == det[k], (prompt, k)
+
+
+def test_waterfall_snapshot_matches_detect_last(server_mod):
+    # detect_last 先解码再重新分词；用规范分词逐步喂给处理器，二者看到的是同一串 token
+    server = server_mod
+    tok = server.tokenizer
+    text = "def foo(x):\n    return x + 1\nimport os\nprint('hi')\nhello world, BFS and DFS differ."
+    ids = tok.encode(text, add_special_tokens=False)
+    assert tok.encode(tok.decode(ids), add_special_tokens=False) == ids
+
+    proc = _waterfall(server, online_detection=True)
+    prompt = tok.encode("hello", add_special_tokens=False)
+    vocab = len(tok)
+    for k in range(len(ids) + 1):
+        input_ids = torch.tensor([prompt + ids[:k]])
+        proc(input_ids, torch.zeros(1, vocab))
+    snap = proc.online_snapshot()
+    det = proc.detect_last()
+    assert snap["num_tokens_scored"] == len(ids) - 1
+    assert snap["q_score"] == pytest.approx(det["q_score"], abs=1e-6)
+    assert snap["k_p_extracted"] == det["k_p_extracted"]
+
+
+def test_waterfall_q_cached_until_counts_change(server_mod, monkeypatch):
+    server = server_mod
+    proc = _waterfall(server, online_detection=True)
+    calls = _count_q_calls(proc, monkeypatch)
+    _generate(server, proc, _PROMPTS[0], max_new=20)
+    first = proc.online_snapshot()
+    assert proc.online_snapshot() == first
+    assert len(calls) == 1
+
+    # 计数变化后重新计算
+    proc._online_update([5, 6])
+    assert proc.online_snapshot()["num_tokens_scored"] == first["num_tokens_scored"] + 2
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("make,threshold", [(_wllm, 2.0), (_sweet, 2.0), (_waterfall, -1.0)],
+                         ids=["wllm", "sweet", "waterfall"])
+def test_stop_threshold_ends_generation_early(server_mod, make, threshold):
+    server = server_mod
+    max_new = 60
+    # 阈值足够低：在线分数很快达到，生成应明显早于 max_new_tokens 结束
+    kw = {"delta": 8.0} if make is not _waterfall else {}
+    proc = make(server, online_stop_threshold=threshold, **kw)
+    comp_tok, reason = _generate(server, proc, _PROMPTS[1], max_new=max_new, do_sample=True, seed=7)
+    assert reason == "stop"
+    assert proc.online_snapshot()["stop_reached"] is True
+
+    # 不设阈值时同一请求（同一 seed）生成得更长
+    ref = make(server, online_detection=True, **kw)
+    ref_tok, _ = _generate(server, ref, _PROMPTS[1], max_new=max_new, do_sample=True, seed=7)
+    assert comp_tok < ref_tok
+
+
+def test_waterfall_stop_check_runs_every_n_tokens(server_mod, monkeypatch):
+    server = server_mod
+    # 阈值达不到：整个生成期间 q 只在每 online_check_every 个计分 token 处计算
+    proc = _waterfall(server, online_stop_threshold=1e9, online_check_every=8)
+    calls = _count_q_calls(proc, monkeypatch)
+    comp_tok, _ = _generate(server, proc, _PROMPTS[2], max_new=40)
+    assert comp_tok == 40
+    scored = proc.online_snapshot()["num_tokens_scored"]
+    assert len(calls) == scored // 8 + 1  # 加上最后这次 snapshot
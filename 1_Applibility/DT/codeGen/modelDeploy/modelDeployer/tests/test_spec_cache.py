@@ -0,0 +1,71 @@
+# tests/test_spec_cache.py
+# 外置处理器 spec 缓存：同名同参只跑一次 builder，之后每请求 spawn；spawn 出的实例运行时状态互不影响
+from transformers import LogitsProcessorList
+
+from libWM.wllm import WLLMLogitsProcessor
+
+
+def _counting_builder(server, calls):
+    def build(**cfg):
+        calls.append(dict(cfg))
+        return WLLMLogitsProcessor(vocab=cfg["vocab"], gamma=float(cfg.get("gamma", 0.5)),
+                                   delta=float(cfg.get("delta", 2.0)), tokenizer=server.tokenizer)
+    return build
+
+
+def _resolve(server, params):
+    lp = server._resolve_lp_list(None, ["wllm_t"], "any", external_params={"wllm_t": params})
+    assert len(lp) == 1
+    return lp[0]
+
+
+def _setup(server, monkeypatch):
+    calls = []
+    monkeypatch.setattr(server, "_SPEC_CACHE", server._BuilderSpecCache(4))
+    monkeypatch.setitem(server.EXTERNAL_BUILDERS, "wllm_t", _counting_builder(server, calls))
+    return calls
+
+
+def test_cache_hit_skips_builder(server_mod, monkeypatch):
+    server = server_mod
+    calls = _setup(server, monkeypatch)
+
+    a = _resolve(server, {"gamma": 0.5, "delta": 2.0})
+    b = _resolve(server, {"delta": 2.0, "gamma": 0.5})  # 参数顺序不同，键相同
+    # builder 只在首次构造 spec 时调用，命中后只 spawn
+    assert len(calls) == 1
+    assert server._SPEC_CACHE.stats()["hits"] == 1
+    assert server._SPEC_CACHE.stats()["misses"] == 1
+
+    # 参数不同：重新构造
+    c = _resolve(server, {"gamma": 0.25, "delta": 2.0})
+    assert len(calls) == 2
+    assert float(c.gamma) == 0.25
+
+    # 命中得到的实例与 spec 共享只读配置（不重新构造词表 / tokenizer）
+    spec = next(iter(server._SPEC_CACHE._specs.values()))[0]
+    assert a is not spec and b is not spec and a is not b
+    assert a.vocab is spec.vocab and b.vocab is spec.vocab
+
+
+def test_spawned_state_is_independent(server_mod, monkeypatch):
+    server = server_mod
+    _setup(server, monkeypatch)
+    params = {"gamma": 0.5, "delta": 2.0}
+
+    a = _resolve(server, params)
+    b = _resolve(server, params)
+    assert a.rng is not b.rng
+
+    inputs = server._prep_inputs([{"role": "user", "content": "def foo(x):"}])
+    server._hf_generate_single(inputs, LogitsProcessorList([a]), 1.0, 1.0, 8, False, None)
+    # 只有参与生成的实例记录了轨迹与计时，另一份与 spec 都不受影响
+    assert a._cache_full_ids is not None and a.timing()["lp_calls"] > 0
+    assert b._cache_full_ids is None and b.timing()["lp_calls"] == 0
+    spec = next(iter(server._SPEC_CACHE._specs.values()))[0]
+    assert spec._cache_full_ids is None and spec.timing()["lp_calls"] == 0
+
+    # spawn 出的实例与每请求现构造的实例检出结果相同
+    fresh = WLLMLogitsProcessor(vocab=server.vocab_ids, gamma=0.5, delta=2.0, tokenizer=server.tokenizer)
+    server._hf_generate_single(inputs, LogitsProcessorList([fresh]), 1.0, 1.0, 8, False, None)
+    assert a.detect_last() == fresh.detect_last()
@@ -0,0 +1,142 @@
+# tests/test_spec_decode.py
+# 投机解码：贪心时与 model.generate 逐 token 一致（带 wllm 水印，delta=0 与 delta=5），检出结果也一致；
+# 采样时逐 seed 不再逐 token 相同，比较多个 seed 下首 token 的分布与水印绿词比例
+import copy
+
+import pytest
+import torch
+from scipy.stats import chi2_contingency
+from transformers import LogitsProcessorList
+
+from libWM.batched import BatchedWatermarkLogitsProcessor
+from libWM.wllm import WLLMLogitsProcessor
+
+_PROMPTS = ["def foo(x):", "hello world", "import os", "BFS and DFS"]
+
+
+@pytest.fixture(scope="module")
+def draft(tiny):
+    # 目标模型加小噪声作草稿：大部分位置与目标一致，偶有拒绝（覆盖 KV cache 回退）
+    _, mdl = tiny
+    d = copy.deepcopy(mdl)
+    g = torch.Generator().manual_seed(1)
+    with torch.no_grad():
+        for p in d.parameters():
+            p.add_(torch.randn(p.shape, generator=g) * 0.05)
+    return d
+
+
+def _run(server, delta, prompt, spec):
+    proc = WLLMLogitsProcessor(vocab=server.vocab_ids, gamma=0.5, delta=delta, tokenizer=server.tokenizer)
+    lp = LogitsProcessorList([proc])
+    inputs = server._prep_inputs([{"role": "user", "content": prompt}])
+    assert server._spec_supported(lp) is spec
+    text, _, comp_tok, _, reason = server._hf_generate_single(inputs, lp, 1.0, 1.0, 24, False, None)
+    return text, comp_tok, reason, server._detect_external(lp, comp_tok)
+
+
+@pytest.mark.parametrize("delta", [0.0, 5.0])
+def test_greedy_spec_matches_generate(server_mod, draft, monkeypatch, delta):
+    server = server_mod
+    stats = []
+    orig = server.speculative_generate
+
+    def spy(*args, **kwargs):
+        seqs, st = orig(*args, **kwargs)
+        stats.append(st)
+        return seqs, st
+
+    monkeypatch.setattr(server, "BatchedWatermarkLogitsProcessor", BatchedWatermarkLogitsProcessor)
+    monkeypatch.setattr(server, "speculative_generate", spy)
+    for prompt in _PROMPTS:
+        monkeypatch.setattr(server, "draft_model", None)
+        ref = _run(server, delta, prompt, spec=False)
+        monkeypatch.setattr(server, "draft_model", draft)
+        got = _run(server, delta, prompt, spec=True)
+        assert got == ref, prompt
+
+    assert len(stats) == len(_PROMPTS)
+    drafted = sum(s["drafted"] for s in stats)
+    accepted = sum(s["accepted"] for s in stats)
+    # 既有接受也有拒绝：两条 cache 回退路径都走到
+    assert 0 < accepted < drafted
+
+
+@pytest.fixture(scope="module")
+def noisy_draft(tiny):
+    # 采样用的草稿噪声更大：草稿分布与目标明显不同，接受规则写错（如总是接受）时首 token 分布会偏向草稿
+    _, mdl = tiny
+    d = copy.deepcopy(mdl)
+    g = torch.Generator().manual_seed(2)
+    with torch.no_grad():
+        for p in d.parameters():
+            p.add_(torch.randn(p.shape, generator=g) * 0.3)
+    return d
+
+
+def _sample_runs(server, prompt, seeds, max_new):
+    """每个 seed 采样一次，返回 (首 token 列表, 绿词比例列表)。"""
+    inputs = server._prep_inputs([{"role": "user", "content": prompt}])
+    prompt_len = int(inputs["input_ids"].shape[1])
+    firsts, fracs = [], []
+    for seed in seeds:
+        proc = WLLMLogitsProcessor(vocab=server.vocab_ids, gamma=0.5, delta=2.0, tokenizer=server.tokenizer)
+        lp = LogitsProcessorList([proc])
+        _, _, comp_tok, _, _ = server._hf_generate_single(inputs, lp, 1.0, 1.0, max_new, True, seed)
+        # 处理器缓存的是最后一次调用时的前缀：只生成一个 token（即 EOS）时缓存里没有它
+        full = proc._cache_full_ids
+        firsts.append(int(full[prompt_len]) if comp_tok > 1 else server.tokenizer.eos_token_id)
+        det = proc.detect_last()
+        if det.get("num_tokens_scored"):
+            fracs.append(det["num_green_tokens"] / det["num_tokens_scored"])
+    return firsts, fracs
+
+
+def _contingency(a, b, min_expected=5.0):
+    """两组样本的列联表；期望频数不足 min_expected 的 token 合并成一列（卡方近似要求）。"""
+    tokens = sorted(set(a) | set(b))
+    counts = {t: (a.count(t), b.count(t)) for t in tokens}
+    n = len(a) + len(b)
+    big = [t for t in tokens if sum(counts[t]) * min(len(a), len(b)) / n >= min_expected]
+    rest = [t for t in tokens if t not in big]
+    rows = [counts[t] for t in big]
+    if rest:
+        rows.append((sum(counts[t][0] for t in rest), sum(counts[t][1] for t in rest)))
+    return torch.tensor(rows).T.numpy()
+
+
+def test_sampled_spec_matches_generate_in_distribution(server_mod, noisy_draft, monkeypatch):
+    # 投机采样的输出分布与逐 token 采样相同：两条路径各跑 n 个 seed，首 token 直方图做卡方齐性检验，
+    # 平均绿词比例之差在几个标准误以内（max_new=3：首 token 仍由草稿提出，拒绝时走残差重采样）
+    server = server_mod
+    n, max_new = 1000, 3
+    stats = []
+    orig = server.speculative_generate
+
+    def spy(*args, **kwargs):
+        seqs, st = orig(*args, **kwargs)
+        stats.append(st)
+        return seqs, st
+
+    monkeypatch.setattr(server, "BatchedWatermarkLogitsProcessor", BatchedWatermarkLogitsProcessor)
+    monkeypatch.setattr(server, "speculative_generate", spy)
+    monkeypatch.setattr(server, "draft_model", None)
+    ref_first, ref_frac = _sample_runs(server, _PROMPTS[0], range(n), max_new)
+    monkeypatch.setattr(server, "draft_model", noisy_draft)
+    spec_first, spec_frac = _sample_runs(server, _PROMPTS[0], range(n, 2 * n), max_new)
+
+    assert len(stats) == n
+    accepted = sum(s["accepted"] for s in stats)
+    assert 0 < accepted < sum(s["drafted"] for s in stats)
+
+    table = _contingency(ref_first, spec_first)
+    assert table.shape[1] >= 10  # 首 token 确实有多个取值
+    _, p_value, _, _ = chi2_contingency(table)
+    assert p_value > 1e-3, table
+
+    ref = torch.tensor(ref_frac, dtype=torch.float64)
+    got = torch.tensor(spec_frac, dtype=torch.float64)
+    se = (ref.var() / len(ref) + got.var() / len(got)).sqrt()
+    assert abs(float(ref.mean() - got.mean())) < 4 * float(se)
+    # 水印确实生效：两条路径的绿词比例都明显高于 gamma
+    assert float(ref.mean()) > 0.6 and float(got.mean()) > 0.6
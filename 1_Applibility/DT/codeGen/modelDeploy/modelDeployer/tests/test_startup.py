@@ -0,0 +1,78 @@
+# tests/test_startup.py
+# 启动 / 就绪：进程先起来（/healthz 可用），模型加载与 regWM 导入完成前 /readyz 一直报告未就绪
+import sys
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+
+def _fresh_state(server, monkeypatch, load_model):
+    monkeypatch.setattr(server, "_READY", threading.Event())
+    monkeypatch.setattr(server, "_LOAD_ERROR", None)
+    monkeypatch.setattr(server, "_STARTUP_TIMINGS", {})
+    monkeypatch.setattr(server, "MODEL_LOAD", "background")
+    monkeypatch.setattr(server, "SPEC_DRAFT_MODEL_ID", "")
+    monkeypatch.setattr(server, "WARMUP_BUILDERS", [])
+    monkeypatch.setattr(server, "WARMUP_TOKENS", 0)
+    monkeypatch.setattr(server, "_load_model", load_model)
+    # regWM 只能由 _load_all() 在模型加载之后导入
+    monkeypatch.delitem(sys.modules, "regWM", raising=False)
+
+
+def _wait(cond, timeout=30.0):
+    end = time.time() + timeout
+    while not cond():
+        assert time.time() < end, "timed out"
+        time.sleep(0.02)
+
+
+def test_readyz_waits_for_model_and_regwm(server_mod, monkeypatch):
+    server = server_mod
+    started, release = threading.Event(), threading.Event()
+
+    def load_model():
+        started.set()
+        release.wait(30)
+
+    _fresh_state(server, monkeypatch, load_model)
+    assert "regWM" not in sys.modules
+
+    with TestClient(server.app) as client:  # 进入 lifespan：后台线程开始加载
+        assert started.wait(30)
+        r = client.get("/readyz")
+        assert r.status_code == 503
+        assert r.json()["status"] == "loading"
+        assert "regWM" not in sys.modules
+        h = client.get("/healthz")
+        assert h.status_code == 200 and h.json()["ready"] is False
+        # 未就绪时生成请求直接 503，不会碰到尚未加载的模型
+        r = client.post("/v1/chat/completions", json={"messages": [{"role": "user", "content": "hi"}]})
+        assert r.status_code == 503
+
+        release.set()
+        _wait(server._READY.is_set)
+        assert "regWM" in sys.modules
+        r = client.get("/readyz")
+        assert r.status_code == 200
+        body = r.json()
+        assert body["status"] == "ready"
+        assert {"model_load_s", "register_s", "import_to_ready_s"} <= set(body["startup"])
+        assert client.get("/healthz").json()["ready"] is True
+
+
+def test_readyz_reports_load_failure(server_mod, monkeypatch):
+    server = server_mod
+
+    def load_model():
+        raise RuntimeError("weights missing")
+
+    _fresh_state(server, monkeypatch, load_model)
+    with TestClient(server.app) as client:
+        _wait(lambda: server._LOAD_ERROR is not None)
+        r = client.get("/readyz")
+        assert r.status_code == 503
+        assert r.json()["status"] == "failed"
+        assert "weights missing" in r.json()["error"]
+        assert not server._READY.is_set()
+        assert "regWM" not in sys.modules
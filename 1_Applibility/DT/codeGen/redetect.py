@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+redetect.py
+
+Offline re-detection over an existing results tree, without regenerating:
+
+(1) Walk resPath and collect every watermarked code file (*_wm.<ext>, pom_wm.* excluded),
+    laid out as codeGenBatch / detection_eval write them:
+    results/<project>_<method>_..._rngS=<seed>_.../<project>_<strength>/.../<name>_wm.<ext>
+(2) Group files by external_processor_params (strength from the <project>_<strength> folder
+    unless --strength is given; STONE language from the file extension unless --lang is given),
+    and send them in batches of --batch_size to the server's /v1/detect, --workers batches at a time.
+(3) Write <name>_wm_detRes.txt next to each code file (same format as generation writes them,
+    so detection_eval / safe_load_mapping read them unchanged), plus one consolidated CSV.
+
+Usage example:
+python3 redetect.py \
+  --resPath /home/zhaorz/project/CodeWM/results \
+  --method wllm \
+  --method_args_json '{"gamma":0.5,"z_threshold":4.0}' \
+  --server http://127.0.0.1:8000 \
+  --workers 4 --batch_size 16
+
+Notes:
+- Detection runs inside the model server (same builders and detectors as generation), so the
+  server must be up with the same model/tokenizer the results were generated with.
+- Generation-time detRes scores the raw completion; here the saved code file is scored as a
+  standalone text, so scores can differ slightly (code fences, first token used only as seed).
+- --detres_suffix other than the default writes alongside the original detRes instead of
+  overwriting it (e.g. _wm_detRes.redetect.txt); --dry_run only lists what would be scored.
+"""
+
+import os
+import sys
+import json
+import re
+import csv
+import time
+import argparse
+import urllib.request
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Any, Optional, Dict, Tuple
+
+from detection_eval import build_external_params, metric_from_mapping
+
+# STONE language by code file extension
+EXT_LANG = {
+    ".java": "java",
+    ".py": "python",
+    ".cpp": "cpp", ".cc": "cpp", ".cxx": "cpp", ".c": "cpp",
+    ".hpp": "cpp", ".hh": "cpp", ".h": "cpp",
+}
+
+RESULT_DIR_RE = re.compile(r"_rngS=(-?\d+)(?:_|$)")
+
+
+# =======================
+# (A) results tree walking
+# =======================
+
+def find_wm_code_files(res_root: Path, exclude_prefix: str = "pom_wm") -> List[Path]:
+    """
+    All <name>_wm.<ext> files under res_root (detRes txt files and pom_wm.* excluded).
+    """
+    out = []
+    for dirpath, _, filenames in os.walk(res_root):
+        for fn in filenames:
+            p = Path(dirpath) / fn
+            if not p.stem.endswith("_wm") or p.suffix in ("", ".txt"):
+                continue
+            if p.name.startswith(exclude_prefix):
+                continue
+            out.append(p)
+    return sorted(out)
+
+
+def locate_run(code_path: Path) -> Tuple[Optional[Path], Optional[int], Optional[str]]:
+    """
+    Find the <project>_<strength> folder (direct child of a *_rngS=<seed>_* result dir).
+    Returns (strength_dir, seed, strength_str); Nones when the file is not in that layout.
+    """
+    for p in code_path.parents:
+        m = RESULT_DIR_RE.search(p.parent.name)
+        if m:
+            strength = p.name.rsplit("_", 1)[-1] if "_" in p.name else None
+            return p, int(m.group(1)), strength
+    return None, None, None
+
+
+def detres_path_for(code_path: Path, detres_suffix: str) -> Path:
+    # <name>_wm.<ext> -> <name>_wm_detRes.txt (suffix replaces the trailing "_wm")
+    return code_path.with_name(code_path.stem[: -len("_wm")] + detres_suffix)
+
+
+# =======================
+# (B) /v1/detect client
+# =======================
+
+def post_detect(server: str, texts: List[str], method: str, params: Dict[str, Any],
+                timeout: float) -> List[Dict[str, Any]]:
+    body = json.dumps({
+        "texts": texts,
+        "external_processor_names": [method],
+        "external_processor_params": params,
+    }).encode("utf-8")
+    req = urllib.request.Request(
+        server.rstrip("/") + "/v1/detect", data=body,
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    # model still loading -> 503 with Retry-After; wait for it instead of failing the batch
+    while True:
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                data = json.loads(resp.read().decode("utf-8"))["data"]
+            break
+        except urllib.error.HTTPError as e:
+            if e.code != 503:
+                raise RuntimeError(f"/v1/detect HTTP {e.code}: {e.read().decode('utf-8', 'replace')}") from None
+            time.sleep(float(e.headers.get("Retry-After", 5)))
+    data.sort(key=lambda d: d["index"])
+    return [d["wm_detection"] for d in data]
+
+
+def detect_batch(server: str, batch: List[Dict[str, Any]], method: str, params: Dict[str, Any],
+                 timeout: float) -> List[Dict[str, Any]]:
+    texts = [it["code_path"].read_text(encoding="utf-8", errors="replace") for it in batch]
+    return post_detect(server, texts, method, params, timeout)
+
+
+# =======================
+# (C) CLI
+# =======================
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+
+    ap.add_argument("--resPath", type=str, required=True,
+                    help="Results root (or any sub-folder of it) to re-detect")
+    ap.add_argument("--server", type=str, default="http://127.0.0.1:8000",
+                    help="Model server base url (serves /v1/detect)")
+
+    ap.add_argument("--method", type=str, required=True,
+                    help="one of: wllm, sweet, ewd, stone, waterfall, codeip")
+    ap.add_argument("--method_args_json", type=str, required=True,
+                    help="JSON string for method args. Must match method requirements.")
+    ap.add_argument("--strength", type=float, default=None,
+                    help="override strength (delta/kappa); default: parsed from <project>_<strength> folders")
+    ap.add_argument("--lang", type=str, default=None,
+                    help="STONE language override; default: from file extension")
+
+    ap.add_argument("--batch_size", type=int, default=16, help="texts per /v1/detect request")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent /v1/detect requests")
+    ap.add_argument("--timeout", type=float, default=600.0, help="per-request timeout (s)")
+
+    ap.add_argument("--detres_suffix", type=str, default="_wm_detRes.txt",
+                    help="output detRes suffix; default overwrites the generation-time detRes")
+    ap.add_argument("--score_field", type=str, default="z_score",
+                    help="field reported in the consolidated CSV (e.g., z_score, q_score)")
+    ap.add_argument("--strategy_key", type=str, default=None,
+                    help="optional detRes key, e.g. WLLMLogitsProcessor[0]")
+    ap.add_argument("--out_csv", type=str, default=None,
+                    help="consolidated table; default: <resPath>/redetect_<method>_<ts>.csv")
+    ap.add_argument("--dry_run", action="store_true")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    res_root = Path(args.resPath).resolve()
+    if not res_root.is_dir():
+        raise FileNotFoundError(f"resPath not found: {res_root}")
+    method = args.method.lower()
+    method_args = json.loads(args.method_args_json)
+
+    # ---- collect + group by processor params
+    groups: Dict[str, Dict[str, Any]] = {}
+    skipped = 0
+    for code_path in find_wm_code_files(res_root):
+        st_dir, seed, st_str = locate_run(code_path)
+        strength = args.strength
+        if strength is None:
+            try:
+                strength = float(st_str)
+            except (TypeError, ValueError):
+                print(f"[WARN] cannot infer strength (use --strength): {code_path}", file=sys.stderr)
+                skipped += 1
+                continue
+        lang = args.lang or EXT_LANG.get(code_path.suffix.lower())
+        try:
+            params = build_external_params(method, method_args, strength, lang)
+        except RuntimeError as e:
+            print(f"[WARN] {e} {code_path}", file=sys.stderr)
+            skipped += 1
+            continue
+        key = json.dumps(params, sort_keys=True)
+        groups.setdefault(key, {"params": params, "items": []})["items"].append({
+            "code_path": code_path,
+            "strength_dir": st_dir,
+            "seed": seed,
+            "strength": strength,
+            "lang": lang,
+        })
+
+    n_files = sum(len(g["items"]) for g in groups.values())
+    print(f"[INFO] {n_files} files in {len(groups)} param group(s), {skipped} skipped")
+    if args.dry_run:
+        for g in groups.values():
+            print(f"  {json.dumps(g['params'], ensure_ascii=False)}: {len(g['items'])} files")
+        return
+    if not n_files:
+        return
+
+    # ---- batch through /v1/detect
+    batches = []
+    for g in groups.values():
+        items = g["items"]
+        for i in range(0, len(items), max(1, args.batch_size)):
+            batches.append((items[i:i + args.batch_size], g["params"]))
+
+    rows = []
+    failed = 0
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futs = {
+            pool.submit(detect_batch, args.server, batch, method, params, args.timeout): batch
+            for batch, params in batches
+        }
+        for done, fut in enumerate(as_completed(futs), 1):
+            batch = futs[fut]
+            try:
+                results = fut.result()
+            except Exception as e:
+                print(f"[WARN] batch of {len(batch)} failed: {e}", file=sys.stderr)
+                failed += len(batch)
+                continue
+            for it, det in zip(batch, results):
+                out_path = detres_path_for(it["code_path"], args.detres_suffix)
+                out_path.write_text(f"{det}", encoding="utf-8")
+                score = metric_from_mapping(det, field=args.score_field, strategy_key=args.strategy_key)
+                rows.append({
+                    "seed": it["seed"],
+                    "strength": it["strength"],
+                    "lang": it["lang"],
+                    "score": score,
+                    "path": str(it["code_path"].relative_to(res_root)),
+                    "detres": str(out_path.relative_to(res_root)),
+                    "detection": json.dumps(det, ensure_ascii=False),
+                })
+            print(f"[INFO] batch {done}/{len(batches)} done ({time.time() - t0:.1f}s)")
+
+    # ---- consolidated table
+    rows.sort(key=lambda r: r["path"])
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    out_csv = Path(args.out_csv) if args.out_csv else res_root / f"redetect_{method}_{ts}.csv"
+    fieldnames = ["seed", "strength", "lang", "score", "path", "detres", "detection"]
+    with out_csv.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        for r in rows:
+            w.writerow(r)
+
+    print(f"[INFO] re-detected {len(rows)} files, {failed} failed, {time.time() - t0:.1f}s")
+    print(f"[INFO] Saved CSV: {out_csv}")
+
+
+if __name__ == "__main__":
+    main()
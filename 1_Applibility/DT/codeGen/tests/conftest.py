@@ -0,0 +1,27 @@
+# tests/conftest.py
+# batchCodeGenDT 依赖 agentCodeGen（MetaGPT）；离线测试用本地替身代替，codeGen / make_seed 由各测试按需替换
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def _no_codegen(project_name, xargs):
+    raise AssertionError("测试未替换 codeGen")
+
+
+@pytest.fixture
+def batch(monkeypatch, tmp_path):
+    stand_in = types.ModuleType("agentCodeGen")
+    stand_in.codeGen = _no_codegen
+    stand_in.make_seed = lambda n: 0
+    monkeypatch.setitem(sys.modules, "agentCodeGen", stand_in)
+    monkeypatch.delitem(sys.modules, "batchCodeGenDT", raising=False)
+    import batchCodeGenDT
+
+    monkeypatch.setattr(batchCodeGenDT, "DT_CACHE_DIR", tmp_path / "dt_cache")
+    monkeypatch.setattr(batchCodeGenDT, "_DT_INFLIGHT", {})
+    return batchCodeGenDT
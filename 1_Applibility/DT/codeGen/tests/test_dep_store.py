@@ -0,0 +1,86 @@
+# tests/test_dep_store.py
+# 依赖集的键：pom.xml 的依赖列表规范化（命名空间、顺序、空白、重复、test scope），键只随依赖 / JDK / Maven 参数变化
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import depStore  # noqa: E402
+
+_NS = 'xmlns="http://maven.apache.org/POM/4.0.0"'
+
+
+def _pom(tmp_path, deps, jdk="17", ns=True, name="pom.xml"):
+    items = "".join(f"<dependency>{d}</dependency>" for d in deps)
+    props = f"<properties><maven.compiler.source>{jdk}</maven.compiler.source></properties>" if jdk else ""
+    p = tmp_path / name
+    p.write_text(f'<project {_NS if ns else ""}>{props}<dependencies>{items}</dependencies></project>')
+    return p
+
+
+JSOUP = "<groupId>org.jsoup</groupId><artifactId>jsoup</artifactId><version>1.17.2</version>"
+OKHTTP = "<groupId>com.squareup.okhttp3</groupId><artifactId>okhttp</artifactId><version>4.12.0</version>"
+# 同一依赖，字段值带换行与缩进（手写 pom 常见）
+JSOUP_SPACED = "\n  <groupId>  org.jsoup\n</groupId><artifactId> jsoup </artifactId><version>1.17.2</version>  "
+FX = ("<groupId>org.openjfx</groupId><artifactId>javafx-controls</artifactId><version>17</version>"
+      "<classifier>linux</classifier><scope>runtime</scope>")
+
+
+def test_parse_pom_normalizes(tmp_path):
+    deps, jdk = depStore.parse_pom(_pom(tmp_path, [
+        OKHTTP,
+        JSOUP_SPACED,
+        JSOUP,                                                    # 重复
+        FX,
+        "<groupId>junit</groupId><artifactId>junit</artifactId><version>4.13</version><scope>test</scope>",
+        "<artifactId>no-group</artifactId><version>1</version>",  # 缺 groupId
+    ]))
+    assert jdk == "17"
+    assert deps == sorted(deps, key=lambda d: json.dumps(d, sort_keys=True))
+    assert {(d["group"], d["artifact"], d["version"], d["classifier"], d["scope"]) for d in deps} == {
+        ("org.jsoup", "jsoup", "1.17.2", "", "compile"),
+        ("com.squareup.okhttp3", "okhttp", "4.12.0", "", "compile"),
+        ("org.openjfx", "javafx-controls", "17", "linux", "runtime"),
+    }
+    assert len(deps) == 3
+
+
+def test_parse_pom_without_namespace_or_properties(tmp_path):
+    deps, jdk = depStore.parse_pom(_pom(tmp_path, [JSOUP], jdk=None, ns=False))
+    assert jdk == "11"
+    assert [d["artifact"] for d in deps] == ["jsoup"]
+    deps, _ = depStore.parse_pom(_pom(tmp_path, [], name="empty.xml"))
+    assert deps == []
+
+
+def test_key_ignores_order_whitespace_and_duplicates(tmp_path):
+    a = _pom(tmp_path, [JSOUP, OKHTTP], name="a.xml")
+    b = _pom(tmp_path, [OKHTTP, JSOUP_SPACED, JSOUP], name="b.xml")
+    c = _pom(tmp_path, [JSOUP, OKHTTP, FX.replace("runtime", "test")], name="c.xml")
+    keys = {depStore.dep_set_key(p)[0] for p in (a, b, c)}
+    assert len(keys) == 1
+
+
+@pytest.mark.parametrize("change", ["version", "classifier", "scope", "jdk"])
+def test_key_changes_with_dependencies_and_jdk(tmp_path, change):
+    base = depStore.dep_set_key(_pom(tmp_path, [JSOUP, FX], name="base.xml"))[0]
+    deps, jdk = [JSOUP, FX], "17"
+    if change == "version":
+        deps = [JSOUP.replace("1.17.2", "1.17.1"), FX]
+    elif change == "classifier":
+        deps = [JSOUP, FX.replace("linux", "mac")]
+    elif change == "scope":
+        deps = [JSOUP, FX.replace("runtime", "compile")]
+    else:
+        jdk = "11"
+    assert depStore.dep_set_key(_pom(tmp_path, deps, jdk=jdk, name="changed.xml"))[0] != base
+
+
+def test_key_follows_maven_args(tmp_path, monkeypatch):
+    pom = _pom(tmp_path, [JSOUP])
+    before = depStore.dep_set_key(pom)[0]
+    monkeypatch.setattr(depStore, "EXTRA_MVN_ARGS", "-Djavafx.platform=mac")
+    assert depStore.dep_set_key(pom)[0] != before
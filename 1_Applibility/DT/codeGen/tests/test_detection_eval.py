@@ -0,0 +1,61 @@
+# tests/test_detection_eval.py
+# 经结果索引读 detRes：索引时文件还空着 / 只写了一半，重新刷新后取到分数；超过 wait_sec 才放弃
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+_HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(_HERE), "eval"))
+
+import detection_eval  # noqa: E402
+from results_index import ResultsIndex  # noqa: E402
+
+
+@pytest.fixture
+def index(tmp_path):
+    root = tmp_path / "res"
+    (root / "proj").mkdir(parents=True)
+    (root / "proj" / "A_wm_detRes.txt").write_text(json.dumps({"z_score": 2.0}))
+    (root / "proj" / "B_wm_detRes.txt").write_text("")
+    with ResultsIndex(root) as idx:
+        idx.refresh()
+        yield idx
+
+
+def _files(index):
+    return [index.root / "proj" / "A_wm_detRes.txt", index.root / "proj" / "B_wm_detRes.txt"]
+
+
+def test_entry_filled_after_indexing_is_scored(index):
+    b = index.root / "proj" / "B_wm_detRes.txt"
+
+    def fill():
+        b.write_text('{"z_score": ')
+        threading.Event().wait(0.3)
+        b.write_text(json.dumps({"z_score": 4.0}))
+
+    t = threading.Timer(0.2, fill)
+    t.start()
+    try:
+        score = detection_eval.aggregate_detres_scores(
+            _files(index), field="z_score", strategy_key=None, mode="mean", wait_sec=10.0, index=index)
+    finally:
+        t.join()
+    assert score == pytest.approx(3.0)
+
+
+def test_entry_still_empty_after_wait_is_dropped(index, capsys):
+    score = detection_eval.aggregate_detres_scores(
+        _files(index), field="z_score", strategy_key=None, mode="mean", wait_sec=0.5, index=index)
+    assert score == pytest.approx(2.0)
+    assert "B_wm_detRes.txt" in capsys.readouterr().err
+
+
+def test_read_detres_from_index_gives_up(index):
+    b = index.root / "proj" / "B_wm_detRes.txt"
+    with pytest.raises(ValueError):
+        detection_eval.read_detres_from_index(index, b, max_wait_sec=0.3, poll_interval_sec=0.1)
@@ -0,0 +1,105 @@
+# tests/test_dt_cache.py
+# docker test 结果缓存：键随代码/pom/环境变化；只缓存成功与含 COMPILATION ERROR 的失败，环境问题（RC 75、无日志）不缓存
+import json
+
+import pytest
+
+
+@pytest.fixture
+def proj(tmp_path):
+    d = tmp_path / "proj"
+    d.mkdir()
+    (d / "pom.xml").write_text("<project><dependencies/></project>")
+    test = tmp_path / "dockerTest" / "test_podman.sh"
+    test.parent.mkdir()
+    test.write_text("#!/bin/bash\nexit 0\n")
+    return d, test
+
+
+def _results(d, log, name="full_1.log"):
+    res = d / "DTResults"
+    (res / "logs").mkdir(parents=True, exist_ok=True)
+    (res / "logs" / name).write_text(log)
+    (res / "summary.txt").write_text("done")
+    return res
+
+
+def test_key_ignores_whitespace_only_changes(batch, proj):
+    d, test = proj
+    a = batch.dt_cache_key("class A {\r\n  int x;   \r\n}\n\n", d / "pom.xml", "Java", test)
+    b = batch.dt_cache_key("class A {\n  int x;\n}", d / "pom.xml", "java", test)
+    assert a == b
+    assert a != batch.dt_cache_key("class A {\n  int y;\n}", d / "pom.xml", "java", test)
+
+
+def test_key_depends_on_pom_runner_and_env(batch, proj, monkeypatch):
+    d, test = proj
+    code = "class A {}"
+    base = batch.dt_cache_key(code, d / "pom.xml", "java", test)
+    (d / "pom.xml").write_text("<project><dependencies><dependency/></dependencies></project>")
+    with_pom = batch.dt_cache_key(code, d / "pom.xml", "java", test)
+    assert with_pom != base
+    (test.parent / "run_app.sh").write_text("#!/bin/bash\n")
+    with_runner = batch.dt_cache_key(code, d / "pom.xml", "java", test)
+    assert with_runner != with_pom
+    monkeypatch.setenv("TIME_LIMIT", "30")
+    with_env = batch.dt_cache_key(code, d / "pom.xml", "java", test)
+    assert with_env != with_runner
+    # 不在 DT_CACHE_ENV_KEYS 里的变量不影响键
+    monkeypatch.setenv("SOME_OTHER_VAR", "1")
+    assert batch.dt_cache_key(code, d / "pom.xml", "java", test) == with_env
+
+
+def test_success_is_cached_and_restored(batch, proj, tmp_path):
+    d, _ = proj
+    res = _results(d, "BUILD SUCCESS\n")
+    batch.dt_cache_store("k0", 0, res, "wmS=1.0")
+    meta = json.loads((batch.DT_CACHE_DIR / "k0" / "meta.json").read_text())
+    assert meta["retCode"] == 0 and meta["desc"] == "wmS=1.0"
+
+    dest = tmp_path / "elsewhere" / "DTResults"
+    dest.mkdir(parents=True)
+    (dest / "stale.txt").write_text("old")
+    assert batch.dt_cache_load("k0", dest) == 0
+    assert (dest / "logs" / "full_1.log").read_text() == "BUILD SUCCESS\n"
+    assert not (dest / "stale.txt").exists()
+
+
+def test_compilation_error_is_cached(batch, proj):
+    d, _ = proj
+    res = _results(d, "[ERROR] COMPILATION ERROR :\n[ERROR] A.java:[3,5] cannot find symbol\n")
+    batch.dt_cache_store("k1", 1, res, "wmS=9.0")
+    assert batch.dt_cache_load("k1", d / "restored") == 1
+
+
+@pytest.mark.parametrize("ret_code,log", [
+    (75, "compile daemon lost\n"),               # DT_RC_DAEMON_LOST：编译服务中途断开
+    (75, "[ERROR] COMPILATION ERROR :\n"),       # 即使日志里有编译错误，RC 75 也不可信
+    (1, "Could not resolve dependencies\n"),      # 其它失败：依赖下载、容器问题等
+    (137, "Killed\n"),
+])
+def test_uncertain_results_are_not_cached(batch, proj, ret_code, log):
+    d, _ = proj
+    res = _results(d, log)
+    batch.dt_cache_store("k2", ret_code, res, "wmS=2.0")
+    assert not (batch.DT_CACHE_DIR / "k2").exists()
+    assert batch.dt_cache_load("k2", d / "restored") is None
+
+
+def test_results_without_logs_are_not_cached(batch, proj):
+    d, _ = proj
+    res = d / "DTResults"
+    res.mkdir()
+    batch.dt_cache_store("k3", 0, res, "wmS=0.0")
+    batch.dt_cache_store("k4", 0, d / "missing", "wmS=0.0")
+    assert not (batch.DT_CACHE_DIR / "k3").exists()
+    assert not (batch.DT_CACHE_DIR / "k4").exists()
+
+
+def test_existing_entry_is_kept(batch, proj):
+    d, _ = proj
+    batch.dt_cache_store("k5", 0, _results(d, "BUILD SUCCESS\n"), "first")
+    batch.dt_cache_store("k5", 1, _results(d, "COMPILATION ERROR\n"), "second")
+    meta = json.loads((batch.DT_CACHE_DIR / "k5" / "meta.json").read_text())
+    assert meta == {**meta, "retCode": 0, "desc": "first"}
+    assert not list(batch.DT_CACHE_DIR.glob(".*.tmp"))
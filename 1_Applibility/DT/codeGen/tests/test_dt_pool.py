@@ -0,0 +1,157 @@
+# tests/test_dt_pool.py
+# 容器池：PodmanBackend 的容器创建参数（podman 调用用桩记录），DTPool 的调度与回收（LocalBackend）
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dtPool  # noqa: E402
+
+
+class _FakePodman:
+    """记录 podman 调用；existing: 名称 -> (状态, DISPLAY)"""
+
+    def __init__(self, existing=None):
+        self.existing = dict(existing or {})
+        self.calls = []
+
+    def __call__(self, cmd, check=False, text=False, capture_output=False, **kw):
+        self.calls.append(list(cmd))
+        out = ""
+        if cmd[:3] == ["podman", "ps", "-a"]:
+            out = "".join(f"{n} {st}\n" for n, (st, _) in self.existing.items())
+        elif cmd[:2] == ["podman", "inspect"]:
+            out = f"PATH=/usr/bin\nDISPLAY={self.existing[cmd[-1]][1]}\n"
+        return subprocess.CompletedProcess(cmd, 0, stdout=out, stderr="")
+
+
+def _runs(fake):
+    return [c for c in fake.calls if c[:2] == ["podman", "run"]]
+
+
+def test_each_container_gets_its_own_display(monkeypatch):
+    fake = _FakePodman()
+    monkeypatch.setattr(dtPool.subprocess, "run", fake)
+    names = dtPool.PodmanBackend(prefix="P").start(3)
+    assert names == ["P-0", "P-1", "P-2"]
+    runs = _runs(fake)
+    assert len(runs) == 3
+    displays = [c[c.index("-e") + 1] for c in runs]
+    assert displays == ["DISPLAY=:99", "DISPLAY=:100", "DISPLAY=:101"]
+    assert all("--network=host" in c for c in runs)
+
+
+def test_containers_with_a_shared_display_are_recreated(monkeypatch):
+    # P-0 的显示号正确且在运行；P-1 沿用镜像默认 :99（与 P-0 冲突）
+    fake = _FakePodman({"P-0": ("running", ":99"), "P-1": ("exited", ":99")})
+    monkeypatch.setattr(dtPool.subprocess, "run", fake)
+    dtPool.PodmanBackend(prefix="P").start(2)
+    assert ["podman", "rm", "-f", "P-1"] in fake.calls
+    assert ["podman", "rm", "-f", "P-0"] not in fake.calls
+    runs = _runs(fake)
+    assert len(runs) == 1 and "DISPLAY=:100" in runs[0] and runs[0][runs[0].index("--name") + 1] == "P-1"
+    # 已删除重建，不再 podman start
+    assert not [c for c in fake.calls if c[:2] == ["podman", "start"]]
+
+
+# 测试脚本：把代码文件内容写进 DTResults/full_1.log，睡眠后以代码文件首行的数字作为返回码退出
+_SCRIPT = """#!/bin/bash
+f="$1"
+d=$(dirname "$f")
+mkdir -p "$d/DTResults"
+cp "$f" "$d/DTResults/full_1.log"
+sleep "$(sed -n 2p "$f")"
+exit "$(head -n 1 "$f")"
+"""
+
+
+def _project(root, rc, sleep="0"):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "Main.java").write_text(f"{rc}\n{sleep}\n")
+    (root / "pom.xml").write_text("<project/>")
+    return root
+
+
+def _pool(tmp_path, n):
+    script = tmp_path / "test.sh"
+    script.write_text(_SCRIPT)
+    return dtPool.DTPool(n, script, backend=dtPool.LocalBackend(str(tmp_path / "ctrs")), jobRoot=str(tmp_path / "jobs"))
+
+
+def test_local_pool_returns_each_jobs_own_result(tmp_path):
+    # 先提交的任务睡得更久：完成顺序与提交顺序相反，每个 Future 仍拿到自己的返回码与产物
+    proj = tmp_path / "proj"
+    got = {}
+    with _pool(tmp_path, 3) as pool:
+        futs = []
+        for i, sleep in enumerate(["0.6", "0.3", "0"]):
+            _project(proj, i + 10, sleep)
+            futs.append(pool.submit(proj, "Main.java", f"job{i}",
+                                    on_done=lambda rc, res, i=i: got.__setitem__(i, (rc, (res / "full_1.log").read_text()))))
+        assert [f.result(timeout=30) for f in futs] == [10, 11, 12]
+    # 提交时即快照：之后改写工作区不影响已排队的任务
+    assert got == {0: (10, "10\n0.6\n"), 1: (11, "11\n0.3\n"), 2: (12, "12\n0\n")}
+    assert not (tmp_path / "jobs").exists()
+
+
+def test_local_pool_runs_one_job_per_container(tmp_path):
+    pool = _pool(tmp_path, 2)
+    orig = pool.backend.run
+    lock = threading.Lock()
+    running, seen = set(), []
+
+    def run(ctr, codeFile, testFilePath, env):
+        with lock:
+            assert ctr not in running, f"{ctr} 同时跑了两个任务"
+            running.add(ctr)
+            seen.append(ctr)
+        try:
+            return orig(ctr, codeFile, testFilePath, env)
+        finally:
+            with lock:
+                running.discard(ctr)
+
+    pool.backend.run = run
+    try:
+        futs = [pool.submit(_project(tmp_path / f"p{i}", 0, "0.1"), "Main.java", f"job{i}") for i in range(6)]
+        assert [f.result(timeout=30) for f in futs] == [0] * 6
+        assert len(seen) == 6 and set(seen) == set(pool.containers)
+    finally:
+        pool.shutdown()
+
+
+def test_on_done_error_fails_only_that_job(tmp_path):
+    def boom(rc, res):
+        raise RuntimeError("collect failed")
+
+    with _pool(tmp_path, 1) as pool:
+        bad = pool.submit(_project(tmp_path / "a", 0), "Main.java", "bad", on_done=boom)
+        good = pool.submit(_project(tmp_path / "b", 3), "Main.java", "good")
+        with pytest.raises(RuntimeError, match="collect failed"):
+            bad.result(timeout=30)
+        # 唯一的容器已归还：后续任务照常执行
+        assert good.result(timeout=30) == 3
+        assert not list((tmp_path / "jobs").iterdir())
+
+
+def test_backend_error_returns_container(tmp_path):
+    with _pool(tmp_path, 1) as pool:
+        orig = pool.backend.run
+        calls = []
+
+        def flaky(ctr, codeFile, testFilePath, env):
+            calls.append(ctr)
+            if len(calls) == 1:
+                raise OSError("podman cp failed")
+            return orig(ctr, codeFile, testFilePath, env)
+
+        pool.backend.run = flaky
+        first = pool.submit(_project(tmp_path / "a", 0), "Main.java", "first")
+        second = pool.submit(_project(tmp_path / "b", 5), "Main.java", "second")
+        with pytest.raises(OSError, match="podman cp failed"):
+            first.result(timeout=30)
+        assert second.result(timeout=30) == 5
@@ -0,0 +1,102 @@
+# tests/test_search_breakpoints.py
+# 自适应临界点搜索：codeGen / docker_exec 用桩代替，z 分数与构建结果按已知阈值随强度变化，二分应定位到这两个阈值
+import asyncio
+import json
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+_ARGS = {
+    "temperature": 0.7, "max_tokens": 64, "parallel": True, "processor_names_ext": "wllm",
+    "gamma": 0.5, "ET": 0.85, "id_mu": 42, "k_p": 1, "n_gram": 2, "wm_fn": "fourier", "auto_reset": True,
+    "detect_mode": "batch", "hash_key": 15485863, "prefix_length": 1, "watermark_on_pl": "False",
+    "skipping_rule": "all_pl", "z_threshold": 4.0, "mode": "random", "message_code_len": 20,
+    "encode_ratio": 10.0, "top_k": 1000, "message": [1, 0],
+}
+DETECT_AT = Decimal("2.3")  # 强度 >= 2.3 时 z >= 4
+FAIL_AT = Decimal("7.5")    # 强度 >= 7.5 时构建失败
+
+
+@pytest.fixture
+def layout(tmp_path):
+    src = tmp_path / "src"
+    repo = src / "proj"
+    (repo / "proj").mkdir(parents=True)
+    (repo / "proj" / "Main.java").write_text("class Main {}\n")
+    (src / "storage").mkdir()
+    (src / "storage" / "ckpt.json").write_text("{}")
+    ws = tmp_path / "ws"
+    return {"repo": repo, "ckpt": src / "storage", "ws": ws, "code": ws / "proj" / "proj", "res": tmp_path / "res"}
+
+
+def _stubs(batch, monkeypatch, layout, z_noise=(0,), fail_noise=(False,)):
+    """codeGen 写出 Main_wm.java 与 detRes（z 随强度线性变化），docker_exec 按强度给返回码；第 k 次重复加各自的噪声。"""
+    calls = {"gen": [], "test": []}
+
+    async def codeGen(project_name, xargs):
+        wmS = Decimal(str(xargs["external_processor_params"]["wllm"]["delta"]))
+        k = sum(1 for s in calls["gen"] if s == wmS)
+        calls["gen"].append(wmS)
+        z = float(wmS) / float(DETECT_AT) * 4.0 + z_noise[k % len(z_noise)]
+        code = layout["code"]
+        # 工作区已由 reset 恢复：上一轮的产物不应残留
+        assert not (code / "Main_wm.java").exists()
+        (code / "Main_wm.java").write_text(f"{wmS}\n{k}\n")
+        (code / "Main_wm_detRes.txt").write_text(json.dumps({"z_score": z}))
+
+    def docker_exec(prev, codeFilePath, testFilePath, LANG, desc):
+        wmS, k = (codeFilePath / "Main_wm.java").read_text().split()
+        calls["test"].append(Decimal(wmS))
+        fail = (Decimal(wmS) >= FAIL_AT) != fail_noise[int(k) % len(fail_noise)]
+        return "code", 1 if fail else 0
+
+    monkeypatch.setattr(batch, "codeGen", codeGen)
+    monkeypatch.setattr(batch, "docker_exec", docker_exec)
+    return calls
+
+
+def _search(batch, layout, args=None, **kw):
+    return asyncio.run(batch.searchBreakpoints(
+        123, "proj", layout["repo"], layout["ckpt"], layout["code"], str(layout["ws"]), str(layout["res"]),
+        Path("test_podman.sh"), dict(args or _ARGS), "java", **kw))
+
+
+def test_search_finds_both_breakpoints(batch, monkeypatch, layout):
+    calls = _stubs(batch, monkeypatch, layout)
+    summary = _search(batch, layout)
+    assert summary["detect_breakpoint"] == str(DETECT_AT)
+    assert summary["build_breakpoint"] == str(FAIL_AT)
+    # 150 个网格点：两次二分各约 log2(150) 次，端点共享
+    assert summary["generations"] == len(summary["points"]) == len(set(calls["gen"]))
+    assert summary["generations"] <= 2 * 9
+    assert calls["gen"] == calls["test"]
+
+    result_dir = layout["res"] / batch.result_dir_name("proj", _ARGS, 123, "java")
+    saved = json.loads((result_dir / "search_summary.json").read_text())
+    assert saved["detect_breakpoint"] == summary["detect_breakpoint"]
+    # 每个评估过的强度都按逐点扫描的布局保存了生成结果
+    for p in summary["points"]:
+        assert (result_dir / f"proj_{p['wmS']}" / "proj" / "Main_wm_detRes.txt").is_file()
+
+
+def test_search_uses_majority_and_median_over_repeats(batch, monkeypatch, layout):
+    # 第 0 次重复总是构建失败、z 偏低；多数票与中位数仍给出同样的临界点
+    calls = _stubs(batch, monkeypatch, layout, z_noise=(-3.0, 0.0, 0.5), fail_noise=(True, False, False))
+    summary = _search(batch, layout, repeats=3)
+    assert summary["detect_breakpoint"] == str(DETECT_AT)
+    assert summary["build_breakpoint"] == str(FAIL_AT)
+    assert summary["generations"] == 3 * len(summary["points"]) == len(calls["gen"])
+    result_dir = layout["res"] / batch.result_dir_name("proj", _ARGS, 123, "java")
+    p = summary["points"][0]
+    assert len(p["retCodes"]) == 3 and len(p["scores"]) == 3
+    assert (result_dir / f"proj_{p['wmS']}" / "repeat_2" / "proj" / "Main_wm_detRes.txt").is_file()
+
+
+def test_search_reports_endpoints(batch, monkeypatch, layout):
+    # 区间内从未检出 / 起点就构建失败：检出临界点为 None，构建临界点为起点
+    _stubs(batch, monkeypatch, layout)
+    summary = _search(batch, layout, dict(_ARGS, detect_threshold=1e9), start=Decimal("8.0"), end=Decimal("9.0"))
+    assert summary["detect_breakpoint"] is None
+    assert summary["build_breakpoint"] == "8.0"
+    assert summary["generations"] == 2
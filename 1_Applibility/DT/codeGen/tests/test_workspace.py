@@ -0,0 +1,113 @@
+# tests/test_workspace.py
+# 增量工作区：reset 删除多出的文件/目录、恢复被改动或缺失的文件，未改动的文件原地保留
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workspace import Workspace  # noqa: E402
+
+
+def _tree(root):
+    """root 下 相对路径 -> 文件内容（目录为 None）"""
+    out = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        for d in dirnames:
+            out[os.path.normpath(os.path.join(rel, d))] = None
+        for f in filenames:
+            with open(os.path.join(dirpath, f), "rb") as fh:
+                out[os.path.normpath(os.path.join(rel, f))] = fh.read()
+    return out
+
+
+@pytest.fixture
+def ws(tmp_path):
+    repo = tmp_path / "src" / "proj"
+    (repo / "proj" / "src").mkdir(parents=True)
+    (repo / "proj" / "src" / "Main.java").write_text("class Main {}\n")
+    (repo / "proj" / "pom.xml").write_text("<project/>")
+    (repo / "proj" / "empty").mkdir()
+    ckpt = tmp_path / "src" / "storage"
+    (ckpt / "team").mkdir(parents=True)
+    (ckpt / "team" / "team.json").write_text('{"round": 0}')
+    cfg = tmp_path / "src" / "config.yaml"
+    cfg.write_text("llm: local\n")
+    w = Workspace(tmp_path / "ws", [repo, ckpt, cfg])
+    expected = {**{f"proj/{k}": v for k, v in _tree(repo).items()}, "proj": None,
+                **{f"storage/{k}": v for k, v in _tree(ckpt).items()}, "storage": None,
+                "config.yaml": b"llm: local\n"}
+    return w, expected
+
+
+def test_first_reset_copies_everything(ws):
+    w, expected = ws
+    st = w.reset()
+    assert _tree(w.root) == expected
+    assert st["files"] == 4 and st["copied"] == 4 and st["removed"] == 0
+    assert w.changed() == []
+
+
+def test_reset_restores_extra_modified_and_missing(ws):
+    w, expected = ws
+    w.reset()
+    r = w.root
+    # 多出的文件、多出的目录（带子目录）
+    (r / "proj" / "proj" / "Main_wm.java").write_text("class Main { int wm; }\n")
+    (r / "proj" / "proj" / "DTResults" / "logs").mkdir(parents=True)
+    (r / "proj" / "proj" / "DTResults" / "logs" / "full_1.log").write_text("ok")
+    # 改动：内容大小不变（只有 mtime 变）与大小变化各一个
+    time.sleep(0.01)
+    (r / "proj" / "proj" / "pom.xml").write_text("<PROJECT/>")
+    (r / "storage" / "team" / "team.json").write_text('{"round": 12, "done": true}')
+    # 缺失：单个文件、整个顶层源目录里的空目录、顶层单文件
+    (r / "proj" / "proj" / "src" / "Main.java").unlink()
+    (r / "proj" / "proj" / "empty").rmdir()
+    (r / "config.yaml").unlink()
+
+    assert {str(p) for p in w.changed()} == {
+        "proj/proj/Main_wm.java", "proj/proj/DTResults/logs/full_1.log", "proj/proj/pom.xml", "storage/team/team.json"}
+    st = w.reset()
+    assert _tree(r) == expected
+    assert st["removed"] == 2  # Main_wm.java + DTResults 整棵
+    assert st["copied"] == 4   # pom.xml、team.json、Main.java、config.yaml
+    assert w.changed() == []
+
+
+def test_reset_restores_missing_source_dir(ws):
+    w, expected = ws
+    w.reset()
+    shutil.rmtree(w.root / "storage")
+    st = w.reset()
+    assert _tree(w.root) == expected
+    assert st["copied"] == 1
+
+
+def test_unchanged_files_are_kept_in_place(ws):
+    w, _ = ws
+    w.reset()
+    main = w.root / "proj" / "proj" / "src" / "Main.java"
+    inode = main.stat().st_ino
+    (w.root / "proj" / "proj" / "pom.xml").write_text("<changed/>")
+    st = w.reset()
+    assert st["copied"] == 1 and st["removed"] == 0
+    assert main.stat().st_ino == inode
+
+
+def test_reset_does_not_touch_sources(ws, tmp_path):
+    w, _ = ws
+    w.reset()
+    (w.root / "proj" / "proj" / "src" / "Main.java").write_text("overwritten in place")
+    w.reset()
+    assert (tmp_path / "src" / "proj" / "proj" / "src" / "Main.java").read_text() == "class Main {}\n"
+
+
+def test_rejects_missing_source_and_root(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Workspace(tmp_path / "ws", [tmp_path / "nope"])
+    with pytest.raises(RuntimeError):
+        Workspace("/", [tmp_path])
@@ -0,0 +1,122 @@
+# workspace.py
+# 增量工作区：代替每轮 shellDelete + shellPaste 的全量删除/复制
+# - 基底（base）：若干源目录（项目仓库、storage 检查点），与 shellPaste 一样放在工作区下的同名目录
+# - reset()：把工作区恢复成基底。复制保留 mtime，未被改动的文件 (size, mtime_ns) 与基底一致，直接保留；
+#   只删除多出来的文件/目录、重新复制被改动或缺失的文件。开销正比于文件数（stat），与检查点字节数无关
+# - 首次（或工作区为空时）整目录复制用 cp -a --reflink=auto：文件系统支持时为写时复制，不占额外空间
+# - changed()/export_changes()：相对基底新增或改动的文件（即本轮生成产物），便于只归档差异
+# - 不用硬链接：生成过程会原地改写文件，硬链接会把改动写回基底
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+
+def _scan(root: Path) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """root 下所有文件（含符号链接）的 相对路径 -> (size, mtime_ns)，以及所有子目录相对路径。"""
+    files: Dict[str, Tuple[int, int]] = {}
+    dirs: List[str] = []
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        with os.scandir(root / rel if rel else root) as it:
+            for e in it:
+                r = f"{rel}/{e.name}" if rel else e.name
+                if e.is_dir(follow_symlinks=False):
+                    dirs.append(r)
+                    stack.append(r)
+                else:
+                    st = e.stat(follow_symlinks=False)
+                    files[r] = (st.st_size, st.st_mtime_ns)
+    return files, dirs
+
+
+class Workspace:
+    """
+    ws = Workspace(workspacePath, [repoPath, ckptPath])
+    ws.reset()                 # 代替 shellDelete(workspacePath) + shellPaste([repoPath, ckptPath], workspacePath)
+    ...生成...
+    ws.changed()               # 本轮新增/改动的文件（相对工作区）
+    """
+
+    def __init__(self, root: Union[str, Path], sources: List[Union[str, Path]]):
+        self.root = Path(root).resolve()
+        self.sources = [Path(s).resolve() for s in sources]
+        for s in self.sources:
+            if not s.exists():
+                raise FileNotFoundError(f"{s} 不存在")
+        if self.root == Path(self.root.anchor):
+            raise RuntimeError(f"为安全起见，拒绝使用根路径作为工作区：{self.root}")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _base(self) -> Tuple[Dict[str, Tuple[int, int, Path]], set]:
+        """基底文件：工作区相对路径 -> (size, mtime_ns, 源文件)；以及基底目录集合。"""
+        files: Dict[str, Tuple[int, int, Path]] = {}
+        dirs = set()
+        for src in self.sources:
+            if src.is_dir():
+                dirs.add(src.name)
+                f, d = _scan(src)
+                dirs.update(f"{src.name}/{r}" for r in d)
+                for r, (size, mtime) in f.items():
+                    files[f"{src.name}/{r}"] = (size, mtime, src / r)
+            else:
+                st = src.stat()
+                files[src.name] = (st.st_size, st.st_mtime_ns, src)
+        return files, dirs
+
+    def reset(self) -> Dict[str, int]:
+        base_files, base_dirs = self._base()
+        cur_files, cur_dirs = _scan(self.root)
+        removed = copied = 0
+
+        # 1) 多出来的目录整棵删除（先删浅层），其下文件不再单独处理
+        gone = set()
+        for d in sorted(cur_dirs, key=lambda r: r.count("/")):
+            if d in base_dirs or any(d.startswith(g + "/") for g in gone):
+                continue
+            shutil.rmtree(self.root / d)
+            gone.add(d)
+            removed += 1
+        # 2) 多出来或被改动的文件
+        stale = []
+        for r, stat in cur_files.items():
+            if any(r.startswith(g + "/") for g in gone):
+                continue
+            b = base_files.get(r)
+            if b is None:
+                (self.root / r).unlink()
+                removed += 1
+            elif stat != b[:2]:
+                (self.root / r).unlink()
+                stale.append(r)
+        # 3) 缺失的顶层源目录整体复制（reflink），其余缺失/改动的文件逐个复制
+        missing = [r for r in base_files if r not in cur_files or r in stale]
+        for src in self.sources:
+            if src.is_dir() and not (self.root / src.name).exists():
+                subprocess.run(["cp", "-a", "--reflink=auto", str(src), str(self.root)], check=True)
+                copied += sum(1 for r in missing if r.startswith(src.name + "/"))
+                missing = [r for r in missing if not r.startswith(src.name + "/")]
+        for d in base_dirs:
+            (self.root / d).mkdir(parents=True, exist_ok=True)
+        for r in missing:
+            shutil.copy2(base_files[r][2], self.root / r, follow_symlinks=False)
+            copied += 1
+        return {"files": len(base_files), "removed": removed, "copied": copied}
+
+    def changed(self) -> List[Path]:
+        """相对基底新增或改动的文件（工作区内相对路径）。"""
+        base_files, _ = self._base()
+        cur_files, _ = _scan(self.root)
+        return sorted(Path(r) for r, stat in cur_files.items()
+                      if r not in base_files or base_files[r][:2] != stat)
+
+    def export_changes(self, dest: Union[str, Path]) -> List[Path]:
+        """把新增/改动的文件按相对路径复制到 dest，返回复制的文件列表。"""
+        dest = Path(dest)
+        out = self.changed()
+        for r in out:
+            (dest / r).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self.root / r, dest / r, follow_symlinks=False)
+        return out
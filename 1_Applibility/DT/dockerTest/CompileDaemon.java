@@ -0,0 +1,174 @@
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.StandardLocation;
+import javax.tools.ToolProvider;
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStreamWriter;
+import java.io.PrintWriter;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.StandardCopyOption;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.List;
+import java.util.Locale;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.stream.Collectors;
+import java.util.stream.Stream;
+
+/**
+ * 容器内常驻编译服务：JVM 与 javac 只热身一次，每个依赖集的 classpath（jar 列表及已打开的 jar 索引）常驻内存。
+ *
+ * 启动：java -cp /opt/codewm CompileDaemon [端口文件]
+ *   监听 127.0.0.1 的随机端口，把端口写入端口文件（默认 /tmp/codewm_compile_daemon.port）。
+ *   容器以 --network=host 运行时多个容器共享端口空间，随机端口避免互相冲突。
+ *
+ * 协议（每个连接一个请求，UTF-8 文本行）：
+ *   PING                                          -> PONG
+ *   COMPILE\t<项目目录>\t<依赖 lib 目录>\t<-source 版本，可为空>
+ *     -> 诊断信息若干行，最后一行 "RC 0"（成功）或 "RC 1"（javac 报告编译失败）
+ *   编译 <项目目录>/src/main/java 下全部 .java 到 target/classes，并拷贝 src/main/resources，
+ *   与 Maven package 之后运行阶段看到的 target/classes 布局一致。
+ *   服务自身出错（读源码 / 列依赖目录的 IO 异常、编译器异常、请求格式不对）时最后一行为 "ERR <原因>"：
+ *   代码能否编译未知，test_podman.sh 按环境问题处理（不记为编译失败、不缓存）
+ */
+public class CompileDaemon {
+    private static final JavaCompiler COMPILER = ToolProvider.getSystemJavaCompiler();
+    // lib 目录 -> 文件管理器（持有 classpath 与已打开的 jar）；StandardJavaFileManager 非线程安全，使用时加锁
+    private static final Map<String, StandardJavaFileManager> MANAGERS = new ConcurrentHashMap<>();
+
+    public static void main(String[] args) throws IOException {
+        if (COMPILER == null) {
+            System.err.println("No system Java compiler (JRE only?)");
+            System.exit(1);
+        }
+        Path portFile = Paths.get(args.length > 0 ? args[0] : "/tmp/codewm_compile_daemon.port");
+        ServerSocket server = new ServerSocket(0, 50, InetAddress.getLoopbackAddress());
+        Path tmp = portFile.resolveSibling(portFile.getFileName() + ".tmp");
+        Files.write(tmp, String.valueOf(server.getLocalPort()).getBytes(StandardCharsets.UTF_8));
+        Files.move(tmp, portFile, StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE);
+        System.out.println("CompileDaemon listening on 127.0.0.1:" + server.getLocalPort());
+
+        ExecutorService pool = Executors.newFixedThreadPool(Math.max(1, Runtime.getRuntime().availableProcessors()));
+        while (true) {
+            Socket sock = server.accept();
+            pool.submit(() -> handle(sock));
+        }
+    }
+
+    private static void handle(Socket sock) {
+        try (Socket s = sock;
+             BufferedReader in = new BufferedReader(new InputStreamReader(s.getInputStream(), StandardCharsets.UTF_8));
+             PrintWriter out = new PrintWriter(new OutputStreamWriter(s.getOutputStream(), StandardCharsets.UTF_8), true)) {
+            String line = in.readLine();
+            if (line == null) {
+                return;
+            }
+            String[] parts = line.split("\t", -1);
+            if ("PING".equals(parts[0])) {
+                out.println("PONG");
+            } else if ("COMPILE".equals(parts[0]) && parts.length >= 3) {
+                String release = parts.length > 3 ? parts[3].trim() : "";
+                try {
+                    // 只有编译器给出的结果才是 RC
+                    boolean ok = compile(Paths.get(parts[1]), parts[2], release, out);
+                    out.println("RC " + (ok ? 0 : 1));
+                } catch (Exception e) {
+                    out.println("ERR " + oneLine(e.toString()));
+                }
+            } else {
+                out.println("ERR bad request: " + oneLine(line));
+            }
+        } catch (IOException e) {
+            System.err.println("connection failed: " + e);
+        }
+    }
+
+    private static String oneLine(String s) {
+        return s.replace('\r', ' ').replace('\n', ' ');
+    }
+
+    private static StandardJavaFileManager manager(String libDir) {
+        return MANAGERS.computeIfAbsent(libDir, dir -> {
+            StandardJavaFileManager fm = COMPILER.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8);
+            try {
+                fm.setLocation(StandardLocation.CLASS_PATH, listJars(Paths.get(dir)));
+            } catch (IOException e) {
+                throw new RuntimeException(e);
+            }
+            return fm;
+        });
+    }
+
+    private static List<File> listJars(Path dir) throws IOException {
+        if (!Files.isDirectory(dir)) {
+            return Collections.emptyList();
+        }
+        try (Stream<Path> s = Files.list(dir)) {
+            return s.filter(p -> p.toString().endsWith(".jar")).sorted().map(Path::toFile).collect(Collectors.toList());
+        }
+    }
+
+    private static boolean compile(Path projectDir, String libDir, String release, PrintWriter out) throws IOException {
+        Path srcRoot = projectDir.resolve("src/main/java");
+        Path classes = projectDir.resolve("target/classes");
+        Files.createDirectories(classes);
+        copyResources(projectDir.resolve("src/main/resources"), classes);
+
+        List<File> sources;
+        try (Stream<Path> s = Files.walk(srcRoot)) {
+            sources = s.filter(p -> p.toString().endsWith(".java")).map(Path::toFile).collect(Collectors.toList());
+        }
+        List<String> options = new ArrayList<>(List.of("-nowarn", "-encoding", "UTF-8", "-proc:none"));
+        if (!release.isEmpty()) {
+            options.addAll(List.of("-source", release, "-target", release));
+        }
+
+        StandardJavaFileManager fm = manager(libDir);
+        DiagnosticCollector<JavaFileObject> diags = new DiagnosticCollector<>();
+        boolean ok;
+        synchronized (fm) {
+            fm.setLocation(StandardLocation.CLASS_OUTPUT, List.of(classes.toFile()));
+            Iterable<? extends JavaFileObject> units = fm.getJavaFileObjectsFromFiles(sources);
+            ok = COMPILER.getTask(null, fm, diags, options, null, units).call();
+        }
+        for (Diagnostic<? extends JavaFileObject> d : diags.getDiagnostics()) {
+            if (d.getKind() == Diagnostic.Kind.ERROR || !ok) {
+                String src = d.getSource() == null ? "" : d.getSource().getName() + ":[" + d.getLineNumber() + "," + d.getColumnNumber() + "] ";
+                out.println("[" + d.getKind() + "] " + src + d.getMessage(Locale.ROOT));
+            }
+        }
+        return ok;
+    }
+
+    private static void copyResources(Path resDir, Path classes) throws IOException {
+        if (!Files.isDirectory(resDir)) {
+            return;
+        }
+        try (Stream<Path> s = Files.walk(resDir)) {
+            for (Path p : (Iterable<Path>) s::iterator) {
+                Path dest = classes.resolve(resDir.relativize(p).toString());
+                if (Files.isDirectory(p)) {
+                    Files.createDirectories(dest);
+                } else {
+                    Files.copy(p, dest, StandardCopyOption.REPLACE_EXISTING);
+                }
+            }
+        }
+    }
+}
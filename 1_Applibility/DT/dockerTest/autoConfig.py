@@ -4,6 +4,8 @@ import re
 import time
 import os
 import argparse
+from typing import Dict, List, Optional
+from depResolver import DependencyResolver
 
 def getDependency(client:Client, filePath:str, lang:str, max_retries=3, retry_delay=2) -> Optional[Dict]:
     """
@@ -51,6 +53,53 @@ def getDependency(client:Client, filePath:str, lang:str, max_retries=3, retry_de
     return None  # 如果达到最大重试次数仍然失败，返回 None
 
 
+def getPackageDependency(client:Client, filePath:str, lang:str, packages:List[str], max_retries=3, retry_delay=2) -> Optional[Dict]:
+    """
+    只询问依赖表中未知的包对应的依赖（供 DependencyResolver 回退调用）
+    :param packages: 未知的包名列表
+    :return: {"jdk_version": ..., "packages": {包名: [依赖, ...]}}
+    """
+    pkg_list = "\n".join(f"        - {p}" for p in packages)
+    prompt = f"""
+        请分析上面的{lang}代码，对下列 import 的包，分别给出提供该包的 Maven 依赖，以JSON格式返回。包列表：
+{pkg_list}
+        输出内容如下(**不包含任何其他内容！！！**)：
+        ```json
+        {{
+            "jdk_version": "11", # 根据Java代码中使用的特性，推断合适的JDK版本。输出时请只包含版本号，例如 `11`
+            "packages": {{
+                "com.example.pkg": [ # 包名，与上面的列表一致
+                    {{
+                        "group": "com.example", # 依赖的 `groupId`
+                        "artifact": "example-artifact", # 依赖的 `artifactId`
+                        "version": "1.0.0" # 依赖的版本号
+                    }}
+                ],
+                ...
+            }}
+        }}
+        ```
+        请注意：
+        - 如果某个包属于当前项目自身或标准JDK类库，对应列表留空。
+        - 请确保每个依赖都有`group`, `artifact`, 和 `version` 字段，并包含运行时所有必要的库。
+    """
+    retries = 0
+    while retries < max_retries:
+        try:
+            deps = files_chat(client, Model.gpt4o_ca, [filePath], [prompt], StreamMode=True)
+            match = re.search(r'```json(.*?)```', deps, re.DOTALL)
+            if match:
+                return json.loads(match.group(1).strip())
+            else:
+                raise ValueError("No JSON content found in the response.")
+        except Exception as e:
+            retries += 1
+            print(f"Error get {filePath} package dependency: {e}")
+            time.sleep(retry_delay)
+    print("Max retries reached. Could not process the response successfully.")
+    return None
+
+
 def genPOM(json_data, java_file_path):
     # 解析 JSON 数据
     dependencies = json_data.get('dependencies', [])
@@ -108,14 +157,20 @@ def genPOM(json_data, java_file_path):
 
     print(f'pom.xml has been generated at: {pom_file_path}')
 
-def autoConfig(client:Client, filePath:str, lang:str):
+def autoConfig(client:Client, filePath:str, lang:str, resolver:Optional[DependencyResolver]=None):
     """
     TODO: 在文件对应目录下自动配置依赖
     :param client: aiAPI 客户端
     :param filePath: 文件路径
     :param lang: 语言类型
+    :param resolver: import 依赖表；给定时先查表，只对未知的包询问 LLM，否则整份文件交给 LLM
     """
-    deps = getDependency(client, filePath, lang)
+    if resolver is not None:
+        with open(filePath, encoding='utf-8', errors='replace') as f:
+            code = f.read()
+        deps = resolver.resolve(code, ask=lambda pkgs: getPackageDependency(client, filePath, lang, pkgs))
+    else:
+        deps = getDependency(client, filePath, lang)
     if deps:
         genPOM(deps, filePath)
     else:
@@ -135,6 +190,8 @@ def main():
     parser = argparse.ArgumentParser(description='Process some inputs.')
     parser.add_argument('--filepath', type=str, help='Path to the file', required=True)
     parser.add_argument('--config', type=str, help='Path to the config file', default="/home/zrz/.config/Personal_config/config_aiAPI.ini")
+    parser.add_argument('--table', type=str, help='Import dependency table (default: $DEP_TABLE)', default=None)
+    parser.add_argument('--no_table', action='store_true', help='Always ask the LLM with the whole file')
 
     # 解析命令行参数
     args = parser.parse_args()
@@ -145,7 +202,10 @@ def main():
 
     # 继续你原来的逻辑
     client = Client(clientPath, "paid")
-    autoConfig(client, filePath, "java")
+    resolver = None if args.no_table else DependencyResolver(args.table)
+    autoConfig(client, filePath, "java", resolver)
+    if resolver is not None:
+        resolver.close()
     # print(deps)
 
 if __name__ == '__main__':
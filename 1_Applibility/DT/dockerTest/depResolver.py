@@ -0,0 +1,224 @@
+# depResolver.py
+# 按 import 推断 Maven 依赖：本地持久表 + 仅对未知包询问 LLM
+# - 从 Java 源码提取 import，归一化为包名（去掉类名/静态成员/通配符），过滤 JDK 自带包
+# - import_sets：import 签名（排序后包名列表的 sha256）-> 整份依赖配置；相同 import 集合直接命中
+# - prefixes：包前缀 -> 依赖坐标列表（最长前缀匹配，如 com.google.gson -> com.google.code.gson:gson）
+# - 只有前缀表无法覆盖的包才调用 ask(未知包列表)，返回
+#     {"jdk_version": "11", "packages": {"包名": [{"group","artifact","version"}, ...]}}
+#   回答里明确给出的包（含空列表，即无需依赖）写回前缀表，之后同一包不再询问；jdk_version 只作用于本次配置，
+#   不写进前缀表。回答漏掉的包不入表，本次配置也不写入 import_sets，下次同样的 import 集合会重新询问这些包
+# - ask 可替换为任意可调用对象（如本地桩），整条路径可离线测试；autoConfig.py 里是调用 LLM 的实现
+#
+# 用法：
+#   python3 depResolver.py list                                   # 查看前缀表
+#   python3 depResolver.py add org.jsoup org.jsoup:jsoup:1.17.2   # 手动补充前缀
+#   python3 depResolver.py resolve /path/to/Main.java             # 只查表，不调用 LLM
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+DEP_TABLE = Path(os.environ.get("DEP_TABLE", "~/.cache/codewm_deps/import_table.sqlite")).expanduser()
+
+# JDK 自带的包（不需要依赖）；javafx 从 JDK 11 起不再自带
+JDK_PREFIXES = (
+    "java", "javax.swing", "javax.sound", "javax.imageio", "javax.xml", "javax.net", "javax.crypto",
+    "javax.naming", "javax.management", "javax.print", "javax.script", "javax.sql", "javax.security",
+    "javax.accessibility", "javax.annotation.processing", "javax.lang.model", "javax.tools", "javax.rmi",
+    "javax.transaction.xa", "org.w3c.dom", "org.xml.sax", "org.ietf.jgss", "sun", "com.sun", "jdk",
+)
+
+# 初始前缀表（仅在表中没有对应前缀时写入）；test_podman.sh 对 JavaFX 固定加载 controls/media/swing 三个模块
+SEED_PREFIXES = {
+    "javafx": [
+        {"group": "org.openjfx", "artifact": "javafx-controls", "version": "17.0.2"},
+        {"group": "org.openjfx", "artifact": "javafx-media", "version": "17.0.2"},
+        {"group": "org.openjfx", "artifact": "javafx-swing", "version": "17.0.2"},
+    ],
+    "com.google.gson": [{"group": "com.google.code.gson", "artifact": "gson", "version": "2.10.1"}],
+    "org.json": [{"group": "org.json", "artifact": "json", "version": "20231013"}],
+    "org.apache.commons.lang3": [{"group": "org.apache.commons", "artifact": "commons-lang3", "version": "3.14.0"}],
+}
+
+_IMPORT_RE = re.compile(r"^\s*import\s+(static\s+)?([\w.]+?)(\.\*)?\s*;", re.MULTILINE)
+
+
+def extract_packages(code: str) -> List[str]:
+    """import 语句 -> 去重排序的外部包名（类名以大写开头处截断）。"""
+    pkgs = set()
+    for m in _IMPORT_RE.finditer(code):
+        parts = m.group(2).split(".")
+        cut = next((i for i, p in enumerate(parts) if p[:1].isupper()), len(parts))
+        if cut == 0:
+            continue
+        pkg = ".".join(parts[:cut])
+        if any(pkg == p or pkg.startswith(p + ".") for p in JDK_PREFIXES):
+            continue
+        pkgs.add(pkg)
+    return sorted(pkgs)
+
+
+def import_signature(pkgs: List[str]) -> str:
+    return hashlib.sha256("\n".join(pkgs).encode("utf-8")).hexdigest()
+
+
+def merge_deps(groups: List[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """按 group:artifact 去重（先出现的版本优先），保持顺序。"""
+    seen, out = set(), []
+    for deps in groups:
+        for d in deps:
+            k = (d.get("group", ""), d.get("artifact", ""))
+            if k in seen or not all(k):
+                continue
+            seen.add(k)
+            out.append({"group": k[0], "artifact": k[1], "version": d.get("version", "")})
+    return out
+
+
+class DependencyResolver:
+    """
+    resolver = DependencyResolver()
+    resolver.resolve(code, ask=lambda pkgs: {...}) -> {"jdk_version": ..., "dependencies": [...]} 或 None
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else DEP_TABLE
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS prefixes (
+                prefix TEXT PRIMARY KEY, deps TEXT NOT NULL, jdk TEXT, source TEXT, updated REAL);
+            CREATE TABLE IF NOT EXISTS import_sets (
+                sig TEXT PRIMARY KEY, packages TEXT NOT NULL, config TEXT NOT NULL, updated REAL);
+        """)
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO prefixes VALUES (?, ?, NULL, 'seed', ?)",
+            [(p, json.dumps(d), now) for p, d in SEED_PREFIXES.items()],
+        )
+        self.conn.commit()
+        self._lock = threading.Lock()
+        self.stats = {"set_hits": 0, "prefix_hits": 0, "asked": 0}
+
+    def lookup(self, pkg: str) -> Optional[tuple]:
+        """最长前缀匹配，返回 (deps, jdk) 或 None。"""
+        parts = pkg.split(".")
+        for i in range(len(parts), 0, -1):
+            row = self.conn.execute(
+                "SELECT deps, jdk FROM prefixes WHERE prefix = ?", (".".join(parts[:i]),)).fetchone()
+            if row:
+                return json.loads(row[0]), row[1]
+        return None
+
+    def add_prefix(self, prefix: str, deps: List[Dict[str, str]], jdk: Optional[str] = None,
+                   source: str = "manual") -> None:
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO prefixes VALUES (?, ?, ?, ?, ?)",
+                              (prefix, json.dumps(deps), jdk, source, time.time()))
+            self.conn.commit()
+
+    def resolve(self, code: str,
+                ask: Optional[Callable[[List[str]], Optional[Dict]]] = None) -> Optional[Dict]:
+        pkgs = extract_packages(code)
+        sig = import_signature(pkgs)
+        row = self.conn.execute("SELECT config FROM import_sets WHERE sig = ?", (sig,)).fetchone()
+        if row:
+            self.stats["set_hits"] += 1
+            return json.loads(row[0])
+
+        found, jdks, unknown = [], [], []
+        complete = True
+        for pkg in pkgs:
+            hit = self.lookup(pkg)
+            if hit is None:
+                unknown.append(pkg)
+            else:
+                found.append(hit[0])
+                if hit[1]:
+                    jdks.append(hit[1])
+
+        if unknown:
+            if ask is None:
+                return None
+            answer = ask(unknown)
+            if not answer:
+                return None
+            self.stats["asked"] += 1
+            jdk = str(answer.get("jdk_version") or "") or None
+            if jdk:
+                jdks.append(jdk)
+            answered = answer.get("packages")
+            if not isinstance(answered, dict):
+                answered = {}
+            for pkg in unknown:
+                deps = answered.get(pkg)
+                if not isinstance(deps, list):
+                    complete = False
+                    continue
+                # 空列表也是明确的回答（如同项目内的包）；jdk 是整份代码的要求，不归属单个包
+                deps = merge_deps([deps])
+                self.add_prefix(pkg, deps, None, source="llm")
+                found.append(deps)
+        else:
+            self.stats["prefix_hits"] += 1
+
+        config = {
+            "jdk_version": max(jdks, key=lambda v: [int(x) for x in re.findall(r"\d+", v)] or [0]) if jdks else "11",
+            "dependencies": merge_deps(found),
+        }
+        if not complete:
+            # 有包没得到回答：本次配置照常返回，但不能作为这组 import 的定论
+            return config
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO import_sets VALUES (?, ?, ?, ?)",
+                              (sig, json.dumps(pkgs), json.dumps(config), time.time()))
+            self.conn.commit()
+        return config
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-keyed Maven dependency table.")
+    parser.add_argument("--table", type=str, default=None, help="SQLite table path (default: $DEP_TABLE)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Show the prefix table")
+    p_add = sub.add_parser("add", help="Map a package prefix to group:artifact:version coordinates")
+    p_add.add_argument("prefix", type=str)
+    p_add.add_argument("coords", type=str, nargs="*")
+    p_res = sub.add_parser("resolve", help="Resolve a Java file from the table only (no LLM)")
+    p_res.add_argument("filepath", type=str)
+    args = parser.parse_args()
+
+    resolver = DependencyResolver(args.table)
+    if args.cmd == "list":
+        for prefix, deps, jdk, source in resolver.conn.execute(
+                "SELECT prefix, deps, jdk, source FROM prefixes ORDER BY prefix"):
+            coords = ", ".join(f"{d['group']}:{d['artifact']}:{d['version']}" for d in json.loads(deps))
+            print(f"{prefix:<40} [{source}{', jdk ' + jdk if jdk else ''}] {coords or '-'}")
+    elif args.cmd == "add":
+        deps = []
+        for c in args.coords:
+            group, artifact, version = c.split(":")
+            deps.append({"group": group, "artifact": artifact, "version": version})
+        resolver.add_prefix(args.prefix, deps)
+    else:
+        code = Path(args.filepath).read_text(encoding="utf-8", errors="replace")
+        config = resolver.resolve(code)
+        if config is None:
+            print(f"Unknown packages: {[p for p in extract_packages(code) if resolver.lookup(p) is None]}")
+        else:
+            print(json.dumps(config, indent=4))
+    resolver.close()
+
+
+if __name__ == "__main__":
+    main()
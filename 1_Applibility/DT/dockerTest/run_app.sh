@@ -0,0 +1,57 @@
+#!/usr/bin/env bash
+# 在容器内运行被测程序（由 test_podman.sh 拷入 /opt/codewm 调用）：
+#   run_app.sh <command...>
+# - 始终受 timeout 约束：TIME_LIMIT 秒后 TERM，再过 KILL_AFTER 秒 KILL，超时退出码 124（与原流程一致）
+# - EARLY_EXIT=1 时提前判定“健康稳态”：进程仍存活、Xvfb 上有已映射窗口、且最近 QUIET_PERIOD 秒内
+#   stderr 没有新的异常输出，则结束程序并返回 0；进程自行退出（含崩溃）时立即返回其退出码
+# - REQUIRE_WINDOW=0 时不要求窗口（控制台程序存活且安静即视为稳态）
+set -u
+
+TIME_LIMIT=${TIME_LIMIT:-120}
+KILL_AFTER=${KILL_AFTER:-5}
+EARLY_EXIT=${EARLY_EXIT:-1}
+QUIET_PERIOD=${QUIET_PERIOD:-10}
+REQUIRE_WINDOW=${REQUIRE_WINDOW:-1}
+POLL_INTERVAL=${POLL_INTERVAL:-0.5}
+
+if [[ "$EARLY_EXIT" != "1" ]]; then
+  exec timeout --signal=TERM --kill-after="${KILL_AFTER}s" "${TIME_LIMIT}s" "$@"
+fi
+
+ERR_LOG="$(mktemp)"
+trap 'rm -f "$ERR_LOG"' EXIT
+
+# stdout 原样透传；stderr 同时落盘，用于检测异常
+timeout --signal=TERM --kill-after="${KILL_AFTER}s" "${TIME_LIMIT}s" "$@" 2> >(tee -a "$ERR_LOG" >&2) &
+PID=$!
+
+window_mapped() {
+  local id
+  for id in $(xwininfo -root -children 2>/dev/null | awk '/^[[:space:]]+0x/{print $1}'); do
+    xwininfo -id "$id" 2>/dev/null | grep -q "Map State: IsViewable" && return 0
+  done
+  return 1
+}
+
+QUIET_SINCE=$SECONDS
+ERR_SEEN=0
+while kill -0 "$PID" 2>/dev/null; do
+  sleep "$POLL_INTERVAL"
+  ERR_SIZE=$(stat -c %s "$ERR_LOG" 2>/dev/null || echo 0)
+  if (( ERR_SIZE > ERR_SEEN )); then
+    if tail -c +"$((ERR_SEEN + 1))" "$ERR_LOG" | grep -qE "Exception|Error"; then
+      QUIET_SINCE=$SECONDS
+    fi
+    ERR_SEEN=$ERR_SIZE
+  fi
+  if (( SECONDS - QUIET_SINCE >= QUIET_PERIOD )) && kill -0 "$PID" 2>/dev/null; then
+    if [[ "$REQUIRE_WINDOW" != "1" ]] || window_mapped; then
+      echo "[INFO] Healthy steady state (alive, quiet ${QUIET_PERIOD}s$([[ "$REQUIRE_WINDOW" == "1" ]] && echo ", window mapped")) after $((SECONDS))s; stopping early."
+      kill -TERM "$PID" 2>/dev/null
+      wait "$PID" 2>/dev/null
+      exit 0
+    fi
+  fi
+done
+
+wait "$PID"
@@ -6,11 +6,23 @@ CTR_NAME=${CTR_NAME:-CodeWM-DT}     # 你的长期运行容器名
 WORKDIR=/workspace                  # 容器工作区
 EXTRA_MVN_ARGS=${EXTRA_MVN_ARGS:-"-Djavafx.platform=linux"}  # OpenJFX 平台 classifier，可按需置空
 EXTRA_JAVA_ARGS=${EXTRA_JAVA_ARGS:-""}   # 额外 JVM 参数(如 -Xmx512m). 不要加 -Djava.awt.headless=true
+DEP_SET=${DEP_SET:-}                # codeGen/depStore.py 物化的依赖集 key；非空时离线构建，跳过 Maven
+DEP_MOUNT=${DEP_MOUNT:-/deps}       # 依赖仓库在容器内的只读挂载点（podman run -v $DEP_STORE:/deps:ro）
+COMPILE_DAEMON=${COMPILE_DAEMON:-1} # 离线构建时用容器内常驻编译服务（CompileDaemon.java）；0 则每次调用 javac
+DAEMON_DIR=/opt/codewm              # 编译服务在容器内的类目录
+DAEMON_PORT_FILE=/tmp/codewm_compile_daemon.port
+DAEMON_LOST_RC=75                   # 编译服务未返回 RC（连接中断、服务崩溃、服务内部出错 ERR）时的退出码：环境问题，batchCodeGenDT 不缓存
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # 统一超时策略：若两分钟仍未退出，则强制结束并视为“成功”
 TIME_LIMIT=${TIME_LIMIT:-120}       # 秒
 KILL_AFTER=${KILL_AFTER:-5}         # 超时后再等多少秒发送 SIGKILL
 # 说明：timeout 退出码 124 表示超时，这里把 124 当作 0（成功）
+# 提前结束：进程存活、Xvfb 上有已映射窗口且 QUIET_PERIOD 秒内 stderr 无异常，即判定成功并结束（见 run_app.sh）
+EARLY_EXIT=${EARLY_EXIT:-1}         # 0 则总是跑满 TIME_LIMIT
+QUIET_PERIOD=${QUIET_PERIOD:-10}    # 秒
+REQUIRE_WINDOW=${REQUIRE_WINDOW:-1} # 0 则控制台程序存活且安静也算稳态
+RUN_APP=/opt/codewm/run_app.sh      # 容器内运行器路径
 
 # ====== 宿主机代理 ======
 HOST_HTTP_PROXY=${HTTP_PROXY:-}
@@ -51,6 +63,45 @@ if ! podman exec "$CTR_NAME" sh -lc 'xdpyinfo -display "${DISPLAY:-:99}" >/dev/n
   exit 1
 fi
 
+# 依赖集未挂载/未物化、或多模块项目时回退到 Maven 在线构建
+if [[ -n "$DEP_SET" ]] && grep -q "<modules>" "$PROJECT_DIR/pom.xml"; then
+  echo "[INFO] Multi-module project; building with Maven."
+  DEP_SET=""
+fi
+if [[ -n "$DEP_SET" ]] && ! podman exec "$CTR_NAME" test -f "${DEP_MOUNT}/sets/${DEP_SET}/.complete"; then
+  echo "[WARN] Dependency set ${DEP_SET} not found under ${CTR_NAME}:${DEP_MOUNT}; falling back to Maven."
+  DEP_SET=""
+fi
+
+# 编译服务是否存活：读端口文件，PING 应答 PONG
+daemon_alive() {
+  podman exec -e DAEMON_PORT_FILE="$DAEMON_PORT_FILE" "$CTR_NAME" bash -c '
+    P="$(cat "$DAEMON_PORT_FILE" 2>/dev/null)" || exit 1
+    { exec 3<>"/dev/tcp/127.0.0.1/$P"; } 2>/dev/null || exit 1
+    echo PING >&3
+    read -r -t 5 R <&3 && [[ "$R" == PONG ]]
+  '
+}
+
+# 首次使用时在容器内编译并后台启动编译服务（之后所有构建复用同一个热 JVM）
+if [[ -n "$DEP_SET" && "$COMPILE_DAEMON" == "1" ]] && ! daemon_alive; then
+  echo ">>> Start compile daemon in ${CTR_NAME}"
+  podman exec "$CTR_NAME" mkdir -p "$DAEMON_DIR"
+  podman cp "$SCRIPT_DIR/CompileDaemon.java" "$CTR_NAME:$DAEMON_DIR/CompileDaemon.java"
+  podman exec "$CTR_NAME" rm -f "$DAEMON_PORT_FILE"
+  if podman exec "$CTR_NAME" javac -d "$DAEMON_DIR" "$DAEMON_DIR/CompileDaemon.java"; then
+    podman exec -d "$CTR_NAME" bash -c "java -cp '$DAEMON_DIR' CompileDaemon '$DAEMON_PORT_FILE' > /tmp/codewm_compile_daemon.log 2>&1"
+    for _ in $(seq 1 40); do
+      daemon_alive && break
+      sleep 0.25
+    done
+  fi
+  if ! daemon_alive; then
+    echo "[WARN] Compile daemon unavailable; compiling with javac per build."
+    COMPILE_DAEMON=0
+  fi
+fi
+
 STAMP="$(date +%Y%m%d_%H%M%S)"
 IN_CTR_DIR="${WORKDIR}/proj_${STAMP}"
 
@@ -80,8 +131,11 @@ podman exec \
   -e HTTPS_PROXY="$HOST_HTTPS_PROXY" \
   "$CTR_NAME" bash -lc "mkdir -p '$IN_CTR_DIR'"
 podman cp "$PROJECT_DIR/." "$CTR_NAME:$IN_CTR_DIR/"
+podman exec "$CTR_NAME" mkdir -p "$(dirname "$RUN_APP")"
+podman cp "$SCRIPT_DIR/run_app.sh" "$CTR_NAME:$RUN_APP"
 
-# ====== 写入 Maven 代理配置（按需修改/去掉） =======
+# ====== 写入 Maven 代理配置（按需修改/去掉；离线构建不需要） =======
+if [[ -z "$DEP_SET" ]]; then
 echo ">>> Write Maven proxy config to container"
 podman exec "$CTR_NAME" bash -lc '
   mkdir -p /root/.m2
@@ -109,6 +163,7 @@ podman exec "$CTR_NAME" bash -lc '
 </settings>
 EOF
 '
+fi
 
 # ====== Normalize source layout =======
 echo ">>> Normalize source layout (src/main/java)"
@@ -137,6 +192,58 @@ podman exec \
   '
 
 # ====== Resolve deps & package via pom.xml =======
+if [[ -n "$DEP_SET" ]]; then
+  # 离线：target/dependency 指向只读的预置 classpath，由编译服务（或 javac）编译到 target/classes；
+  # 不产出 JAR，下面走 classes 运行
+  echo ">>> Offline build against prebuilt classpath: ${DEP_MOUNT}/sets/${DEP_SET}"
+  podman exec \
+    -e IN_CTR_DIR="$IN_CTR_DIR" \
+    -e DEP_LIB="${DEP_MOUNT}/sets/${DEP_SET}/lib" \
+    -e COMPILE_DAEMON="$COMPILE_DAEMON" \
+    -e DAEMON_PORT_FILE="$DAEMON_PORT_FILE" \
+    -e DAEMON_LOST_RC="$DAEMON_LOST_RC" \
+    "$CTR_NAME" bash -lc '
+      set -e
+      cd "$IN_CTR_DIR"
+      mkdir -p target/classes
+      ln -sfn "$DEP_LIB" target/dependency
+      JDK_VER="$(sed -n "s:.*<maven.compiler.source>\(.*\)</maven.compiler.source>.*:\1:p" pom.xml | head -n1)"
+      RC=""
+      if [[ "$COMPILE_DAEMON" == "1" ]] && P="$(cat "$DAEMON_PORT_FILE" 2>/dev/null)" \
+         && { exec 3<>"/dev/tcp/127.0.0.1/$P"; } 2>/dev/null; then
+        echo "[INFO] Compiling via compile daemon (port $P)"
+        printf "COMPILE\t%s\t%s\t%s\n" "$PWD" "$DEP_LIB" "$JDK_VER" >&3
+        while IFS= read -r line <&3; do
+          case "$line" in
+            "RC "*) RC="${line#RC }"; break ;;
+            "ERR "*) echo "[ERROR] compile daemon: ${line#ERR }"; break ;;
+            *) echo "$line" ;;
+          esac
+        done
+        exec 3>&-
+      else
+        if [[ -d src/main/resources ]]; then cp -r src/main/resources/. target/classes/; fi
+        SRC_ARGS=""
+        if [[ -n "$JDK_VER" ]]; then SRC_ARGS="-source $JDK_VER -target $JDK_VER"; fi
+        find src/main/java -name "*.java" > target/sources.txt
+        if javac -nowarn -encoding UTF-8 $SRC_ARGS -d target/classes -cp "target/dependency/*" @target/sources.txt; then
+          RC=0
+        else
+          RC=$?
+        fi
+      fi
+      # 编译服务没有给出 RC 行（连接中断或服务内部出错 ERR）：不知道代码能否编译，不能记成编译失败
+      if [[ ! "$RC" =~ ^[0-9]+$ ]]; then
+        echo "[ERROR] Compile daemon returned no compiler result; build outcome unknown"
+        exit "$DAEMON_LOST_RC"
+      fi
+      # 与 maven-compiler-plugin 失败时的日志保持一致，便于统计编译失败（仅限编译服务或 javac 确实报告失败）
+      if [[ "$RC" != "0" ]]; then
+        echo "[ERROR] COMPILATION ERROR : javac failed"
+        exit 1
+      fi
+  '
+else
 echo ">>> Resolve deps & package via pom.xml"
 podman exec \
   -e HTTP_PROXY="$HOST_HTTP_PROXY" \
@@ -151,6 +258,7 @@ podman exec \
     mvn -q -B \$MAVEN_OPTS -DskipTests package ${EXTRA_MVN_ARGS}
     mvn -q -B \$MAVEN_OPTS dependency:copy-dependencies -DoutputDirectory=target/dependency ${EXTRA_MVN_ARGS} || true
 "
+fi
 
 # ====== Find executable JAR =======
 JAR_PATH="$(podman exec "$CTR_NAME" bash -lc "
@@ -187,6 +295,10 @@ run_with_timeout() {
     -e EXTRA_JAVA_ARGS="$EXTRA_JAVA_ARGS" \
     -e TIME_LIMIT="$TIME_LIMIT" \
     -e KILL_AFTER="$KILL_AFTER" \
+    -e EARLY_EXIT="$EARLY_EXIT" \
+    -e QUIET_PERIOD="$QUIET_PERIOD" \
+    -e REQUIRE_WINDOW="$REQUIRE_WINDOW" \
+    -e RUN_APP="$RUN_APP" \
     "$_ctr" bash -lc "$_cmd"
   local rc=$?
   set -e
@@ -205,7 +317,7 @@ if [[ -n "$JAR_PATH" ]]; then
       set -e
       cd "$IN_CTR_DIR"
       echo "Running JAR with timeout ${TIME_LIMIT}s: $JAR_PATH"
-      timeout --signal=TERM --kill-after=${KILL_AFTER}s ${TIME_LIMIT}s \
+      "$RUN_APP" \
         java $EXTRA_JAVA_ARGS -jar "$JAR_PATH"
     '; then
     echo ">>> java -jar failed (non-timeout). Falling back to classpath/module-path..."
@@ -214,7 +326,7 @@ if [[ -n "$JAR_PATH" ]]; then
         set -e
         cd "$IN_CTR_DIR"
         echo "Running main (JavaFX, module-path) with timeout ${TIME_LIMIT}s: $MAIN_CLASS"
-        timeout --signal=TERM --kill-after=${KILL_AFTER}s ${TIME_LIMIT}s \
+        "$RUN_APP" \
           java $EXTRA_JAVA_ARGS \
             --module-path target/dependency \
             --add-modules javafx.controls,javafx.media,javafx.swing \
@@ -226,7 +338,7 @@ if [[ -n "$JAR_PATH" ]]; then
         set -e
         cd "$IN_CTR_DIR"
         echo "Running main (classpath) with timeout ${TIME_LIMIT}s: $MAIN_CLASS"
-        timeout --signal=TERM --kill-after=${KILL_AFTER}s ${TIME_LIMIT}s \
+        "$RUN_APP" \
           java $EXTRA_JAVA_ARGS -cp "target/classes:target/dependency/*" "$MAIN_CLASS"
       '
     fi
@@ -238,7 +350,7 @@ else
       set -e
       cd "$IN_CTR_DIR"
       echo "Running main (JavaFX, module-path) with timeout ${TIME_LIMIT}s: $MAIN_CLASS"
-      timeout --signal=TERM --kill-after=${KILL_AFTER}s ${TIME_LIMIT}s \
+      "$RUN_APP" \
         java $EXTRA_JAVA_ARGS \
           --module-path target/dependency \
           --add-modules javafx.controls,javafx.media,javafx.swing \
@@ -250,7 +362,7 @@ else
       set -e
       cd "$IN_CTR_DIR"
       echo "Running main (classpath) with timeout ${TIME_LIMIT}s: $MAIN_CLASS"
-      timeout --signal=TERM --kill-after=${KILL_AFTER}s ${TIME_LIMIT}s \
+      "$RUN_APP" \
         java $EXTRA_JAVA_ARGS -cp "target/classes:target/dependency/*" "$MAIN_CLASS"
     '
   fi
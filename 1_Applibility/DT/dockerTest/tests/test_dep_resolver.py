@@ -0,0 +1,96 @@
+# tests/test_dep_resolver.py
+# 依赖表的离线测试：用桩函数代替 LLM 的 ask，记录每次被问到的包
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from depResolver import DependencyResolver  # noqa: E402
+
+CODE = """
+package demo;
+import java.util.List;
+import org.jsoup.Jsoup;
+import org.jsoup.nodes.Document;
+import demo.util.Helper;
+import okhttp3.OkHttpClient;
+"""
+
+JSOUP = {"group": "org.jsoup", "artifact": "jsoup", "version": "1.17.2"}
+OKHTTP = {"group": "com.squareup.okhttp3", "artifact": "okhttp", "version": "4.12.0"}
+
+
+def _stub(packages, jdk="17"):
+    asked = []
+
+    def ask(pkgs):
+        asked.append(list(pkgs))
+        return {"jdk_version": jdk, "packages": {p: d for p, d in packages.items() if p in pkgs}}
+    return ask, asked
+
+
+def _prefix_rows(resolver):
+    return {p: (json.loads(d), jdk) for p, d, jdk in resolver.conn.execute("SELECT prefix, deps, jdk FROM prefixes")}
+
+
+def _set_count(resolver):
+    return resolver.conn.execute("SELECT COUNT(*) FROM import_sets").fetchone()[0]
+
+
+def test_complete_answer_is_cached(tmp_path):
+    resolver = DependencyResolver(tmp_path / "t.sqlite")
+    # 同项目内的包明确回答为空列表
+    ask, asked = _stub({"org.jsoup": [JSOUP], "org.jsoup.nodes": [JSOUP], "demo.util": [], "okhttp3": [OKHTTP]})
+
+    config = resolver.resolve(CODE, ask=ask)
+    assert asked == [["demo.util", "okhttp3", "org.jsoup", "org.jsoup.nodes"]]
+    assert config == {"jdk_version": "17", "dependencies": [OKHTTP, JSOUP]}
+
+    rows = _prefix_rows(resolver)
+    assert rows["demo.util"] == ([], None)
+    assert rows["okhttp3"] == ([OKHTTP], None)
+    # jdk_version 只属于这份代码，不写进前缀表
+    assert all(rows[p][1] is None for p in ("demo.util", "okhttp3", "org.jsoup", "org.jsoup.nodes"))
+    assert _set_count(resolver) == 1
+
+    # 同样的 import 集合直接命中，不再询问
+    assert resolver.resolve(CODE, ask=ask) == config
+    assert len(asked) == 1 and resolver.stats["set_hits"] == 1
+
+    # 新代码只用到已入表的包：走前缀表，jdk 回到默认值
+    assert resolver.resolve("import okhttp3.Call;\n", ask=ask) == {"jdk_version": "11", "dependencies": [OKHTTP]}
+    assert len(asked) == 1
+    resolver.close()
+
+
+def test_unanswered_packages_are_not_cached(tmp_path):
+    resolver = DependencyResolver(tmp_path / "t.sqlite")
+    # 回答漏掉了 okhttp3
+    ask, asked = _stub({"org.jsoup": [JSOUP], "org.jsoup.nodes": [JSOUP], "demo.util": []})
+
+    config = resolver.resolve(CODE, ask=ask)
+    assert config == {"jdk_version": "17", "dependencies": [JSOUP]}
+    assert "okhttp3" not in _prefix_rows(resolver)
+    assert _set_count(resolver) == 0
+
+    # 下次只问漏掉的包；这次答全了才写入 import_sets
+    ask2, asked2 = _stub({"okhttp3": [OKHTTP]}, jdk="11")
+    config = resolver.resolve(CODE, ask=ask2)
+    assert asked2 == [["okhttp3"]]
+    assert config == {"jdk_version": "11", "dependencies": [JSOUP, OKHTTP]}
+    assert _set_count(resolver) == 1
+    resolver.close()
+
+
+def test_no_answer_returns_none(tmp_path):
+    resolver = DependencyResolver(tmp_path / "t.sqlite")
+    assert resolver.resolve(CODE) is None
+    assert resolver.resolve(CODE, ask=lambda pkgs: None) is None
+    # 回答里 packages 不是字典：全部视为未回答
+    assert resolver.resolve(CODE, ask=lambda pkgs: {"jdk_version": "11", "packages": ["x"]}) == {
+        "jdk_version": "11", "dependencies": []}
+    rows = _prefix_rows(resolver)
+    assert not {"demo.util", "okhttp3", "org.jsoup", "org.jsoup.nodes"} & set(rows)
+    assert _set_count(resolver) == 0
+    resolver.close()
@@ -8,6 +8,8 @@ import argparse
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
+from results_index import ResultsIndex, open_index
+
 
 FOLDER_RE = re.compile(r"^(?P<prefix>.+)_(?P<int>\d+)\.(?P<frac>\d+)$")
 
@@ -42,19 +44,32 @@ def read_first_non_empty_line(path: Path) -> str:
     raise ValueError(f"No non-empty lines in {path}")
 
 
-def find_project_dir(child_dir: Path) -> Path:
+def list_subdirs(d: Path, index: Optional[ResultsIndex] = None):
+    if index is not None:
+        return index.subdirs(d)
+    return [p for p in d.iterdir() if p.is_dir()]
+
+
+def list_detres(d: Path, index: Optional[ResultsIndex] = None):
+    if index is not None:
+        return index.glob(d, "*_wm_detRes.txt")
+    return sorted(d.glob("*_wm_detRes.txt"))
+
+
+def find_project_dir(child_dir: Path, index: Optional[ResultsIndex] = None) -> Path:
     """
     在 xxx_p.q 子目录下，找到项目目录 ./xxx （如 tiny_calculator）。
     约束：该目录应包含 *_wm_detRes.txt 文件。
+    index 非空时从结果索引查询，不访问文件系统（下同）。
     """
-    candidates = [p for p in child_dir.iterdir() if p.is_dir()]
+    candidates = list_subdirs(child_dir, index)
     if not candidates:
         raise FileNotFoundError(f"No subdirectories found under {child_dir}")
 
     # 以是否存在 *_wm_detRes.txt 作为判据
     scored = []
     for d in candidates:
-        wm_files = list(d.glob("*_wm_detRes.txt"))
+        wm_files = list_detres(d, index)
         if wm_files:
             scored.append(d)
 
@@ -65,14 +80,15 @@ def find_project_dir(child_dir: Path) -> Path:
     raise RuntimeError(f"Ambiguous project dirs under {child_dir}: {scored}")
 
 
-def find_target_detres_file(project_dir: Path, exclude_name: str = "pom_wm_detRes.txt") -> Path:
+def find_target_detres_file(project_dir: Path, exclude_name: str = "pom_wm_detRes.txt",
+                            index: Optional[ResultsIndex] = None) -> Path:
     """
     在 ./xxx 下只会有两个 *_wm_detRes.txt：
       - pom_wm_detRes.txt（排除）
       - 目标文件（保留）
     用“排除法”找到目标文件。
     """
-    all_detres = sorted(project_dir.glob("*_wm_detRes.txt"))
+    all_detres = list_detres(project_dir, index)
     if not all_detres:
         raise FileNotFoundError(f"No '*_wm_detRes.txt' files found in {project_dir}")
 
@@ -88,14 +104,18 @@ def find_target_detres_file(project_dir: Path, exclude_name: str = "pom_wm_detRe
     )
 
 
-def extract_metric_from_detres(detres_path: Path, field: str, strategy_key: Optional[str] = None) -> float:
+def extract_metric_from_detres(detres_path: Path, field: str, strategy_key: Optional[str] = None,
+                               index: Optional[ResultsIndex] = None) -> float:
     """
     从 detRes 文件（单行 dict/JSON）中提取指定字段 field（如 z_score）。
     - strategy_key=None：取外层 dict 的第一个 key
     - strategy_key=xxx：取指定策略 key
     """
-    line = read_first_non_empty_line(detres_path)
-    obj = safe_load_single_line_mapping(line)
+    if index is not None:
+        obj = index.detres(detres_path)
+    else:
+        line = read_first_non_empty_line(detres_path)
+        obj = safe_load_single_line_mapping(line)
 
     if not isinstance(obj, dict) or not obj:
         raise ValueError(f"Unexpected content in {detres_path}: not a non-empty dict")
@@ -121,14 +141,13 @@ def extract_metric_from_detres(detres_path: Path, field: str, strategy_key: Opti
     return float(v)
 
 
-def read_baseline_metric(root_dir: Path, baseline_strength: float, field: str, strategy_key: Optional[str]) -> Tuple[Path, float]:
+def read_baseline_metric(root_dir: Path, baseline_strength: float, field: str, strategy_key: Optional[str],
+                         index: Optional[ResultsIndex] = None) -> Tuple[Path, float]:
     """
     读取 p.q=baseline_strength 子目录的目标 detRes 文件中的 field 值（作为基线）。
     """
     baseline_dir = None
-    for child in root_dir.iterdir():
-        if not child.is_dir():
-            continue
+    for child in list_subdirs(root_dir, index):
         s = parse_strength_from_folder(child.name)
         if s is not None and abs(s - baseline_strength) < 1e-12:
             baseline_dir = child
@@ -137,13 +156,14 @@ def read_baseline_metric(root_dir: Path, baseline_strength: float, field: str, s
     if baseline_dir is None:
         raise FileNotFoundError(f"Cannot find baseline folder for strength {baseline_strength} under {root_dir}")
 
-    project_dir = find_project_dir(baseline_dir)
-    detres_path = find_target_detres_file(project_dir)
-    metric0 = extract_metric_from_detres(detres_path, field=field, strategy_key=strategy_key)
+    project_dir = find_project_dir(baseline_dir, index)
+    detres_path = find_target_detres_file(project_dir, index=index)
+    metric0 = extract_metric_from_detres(detres_path, field=field, strategy_key=strategy_key, index=index)
     return baseline_dir, metric0
 
 
-def find_metrics_with_dtresults(root_dir: Path, field: str, strategy_key: Optional[str]) -> Dict[float, float]:
+def find_metrics_with_dtresults(root_dir: Path, field: str, strategy_key: Optional[str],
+                                index: Optional[ResultsIndex] = None) -> Dict[float, float]:
     """
     遍历 root_dir 下所有 xxx_p.q：
       - 只取含 DTResults/ 的
@@ -152,19 +172,18 @@ def find_metrics_with_dtresults(root_dir: Path, field: str, strategy_key: Option
     返回 {strength: metric}
     """
     out: Dict[float, float] = {}
-    for child in root_dir.iterdir():
-        if not child.is_dir():
-            continue
+    for child in list_subdirs(root_dir, index):
         s = parse_strength_from_folder(child.name)
         if s is None:
             continue
 
-        if not (child / "DTResults").is_dir():
+        has_dt = index.is_dir(child / "DTResults") if index is not None else (child / "DTResults").is_dir()
+        if not has_dt:
             continue
 
-        project_dir = find_project_dir(child)
-        detres_path = find_target_detres_file(project_dir)
-        metric = extract_metric_from_detres(detres_path, field=field, strategy_key=strategy_key)
+        project_dir = find_project_dir(child, index)
+        detres_path = find_target_detres_file(project_dir, index=index)
+        metric = extract_metric_from_detres(detres_path, field=field, strategy_key=strategy_key, index=index)
         out[s] = metric
 
     return out
@@ -202,15 +221,28 @@ def main():
     )
     parser.add_argument("--epsilon", type=float, default=1e-12, help="Guard for division by zero on |baseline|")
     parser.add_argument("--print-pairs", action="store_true", help="Print extracted strength->metric and strength->value")
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const="",
+        default=None,
+        help="Query the results index (results_index.py) instead of walking root_dir; optional index file path "
+             "(default: <root_dir>/.results_index.sqlite). The index is refreshed incrementally first.",
+    )
+    parser.add_argument("--no-refresh", action="store_true", help="With --index: query the index as-is, skip refresh")
 
     args = parser.parse_args()
     root_dir = Path(args.root_dir).expanduser().resolve()
     if not root_dir.is_dir():
         raise NotADirectoryError(f"Not a directory: {root_dir}")
 
+    index = None
+    if args.index is not None:
+        index = open_index(root_dir, args.index, refresh=not args.no_refresh)
+
     # baseline metric
     baseline_dir, m0 = read_baseline_metric(
-        root_dir, baseline_strength=args.baseline, field=args.field, strategy_key=args.strategy_key
+        root_dir, baseline_strength=args.baseline, field=args.field, strategy_key=args.strategy_key, index=index
     )
     abs_m0 = abs(m0)
     if abs_m0 < args.epsilon:
@@ -219,7 +251,9 @@ def main():
         )
 
     # metrics only for folders with DTResults
-    metrics_dt = find_metrics_with_dtresults(root_dir, field=args.field, strategy_key=args.strategy_key)
+    metrics_dt = find_metrics_with_dtresults(root_dir, field=args.field, strategy_key=args.strategy_key, index=index)
+    if index is not None:
+        index.close()
 
     # compute normalized values (exclude baseline)
     values: Dict[float, float] = {}
@@ -3,13 +3,18 @@
 
 import argparse
 from pathlib import Path
+from typing import Optional
 
+from results_index import ResultsIndex, open_index
 
-def dtresults_has_any_target(dtresults_dir: Path) -> bool:
+
+def dtresults_has_any_target(dtresults_dir: Path, index: Optional[ResultsIndex] = None) -> bool:
     """
     判断 DTResults/ 及其子目录中是否存在名为 'target' 的目录（递归）。
     只要存在任意一个 DTResults/**/target/，返回 True。
     """
+    if index is not None:
+        return bool(index.rglob(dtresults_dir, "target", dirs=True))
     for p in dtresults_dir.rglob("target"):
         if p.is_dir():
             return True
@@ -28,37 +33,41 @@ def file_contains_keyword(path: Path, keyword: str) -> bool:
     return False
 
 
-def count_error_files(root_dir: Path, keyword: str = "COMPILATION ERROR") -> int:
+def count_error_files(root_dir: Path, keyword: str = "COMPILATION ERROR",
+                      index: Optional[ResultsIndex] = None) -> int:
     """
     遍历 root_dir 下所有子目录：
       - 若存在 DTResults/
       - 且 DTResults/**/target 不存在
       - 且 DTResults/** 下存在 full_*.log
     则对这些 full_*.log 中“包含 keyword 的文件”计数（按文件数，不按出现次数）。
+    index 非空时目录结构从结果索引查询，关键字命中按文件缓存（文件未变动则不再读取）。
     """
     total_files = 0
 
-    for child in root_dir.iterdir():
-        if not child.is_dir():
-            continue
-
+    children = index.subdirs(root_dir) if index is not None else [c for c in root_dir.iterdir() if c.is_dir()]
+    for child in children:
         dtresults_dir = child / "DTResults"
-        if not dtresults_dir.is_dir():
+        if not (index.is_dir(dtresults_dir) if index is not None else dtresults_dir.is_dir()):
             continue
 
         # 条件 1：DTResults 子树中不能有任何 target/
-        if dtresults_has_any_target(dtresults_dir):
+        if dtresults_has_any_target(dtresults_dir, index):
             continue
 
         # 条件 2：DTResults 子树中要有 full_*.log
-        log_files = list(dtresults_dir.rglob("full_*.log"))
+        if index is not None:
+            log_files = index.rglob(dtresults_dir, "full_*.log")
+        else:
+            log_files = list(dtresults_dir.rglob("full_*.log"))
         if not log_files:
             continue
 
         # 对满足条件的 log：统计“包含关键字”的文件数
         for log_path in log_files:
             try:
-                if file_contains_keyword(log_path, keyword):
+                hit = index.contains(log_path, keyword) if index is not None else file_contains_keyword(log_path, keyword)
+                if hit:
                     total_files += 1
             except Exception as e:
                 print(f"[WARN] Failed to read {log_path}: {e}")
@@ -77,13 +86,28 @@ def main():
         default="COMPILATION ERROR",
         help="Keyword to search in log files (default: 'COMPILATION ERROR')",
     )
+    parser.add_argument(
+        "--index",
+        nargs="?",
+        const="",
+        default=None,
+        help="Query the results index (results_index.py) instead of walking root_dir; optional index file path "
+             "(default: <root_dir>/.results_index.sqlite). The index is refreshed incrementally first.",
+    )
+    parser.add_argument("--no-refresh", action="store_true", help="With --index: query the index as-is, skip refresh")
 
     args = parser.parse_args()
     root_dir = Path(args.root_dir).expanduser().resolve()
     if not root_dir.is_dir():
         raise NotADirectoryError(f"Not a directory: {root_dir}")
 
-    n = count_error_files(root_dir, keyword=args.keyword)
+    index = None
+    if args.index is not None:
+        index = open_index(root_dir, args.index, refresh=not args.no_refresh)
+
+    n = count_error_files(root_dir, keyword=args.keyword, index=index)
+    if index is not None:
+        index.close()
     print(f"Number of full_*.log files containing '{args.keyword}': {n}")
 
 
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果目录的增量索引（SQLite，单文件，默认 <root>/.results_index.sqlite）
+
+- 扫描一次 root，记录每个条目的 (path, mtime, size)，并把 *_detRes.txt 解析后的 dict 存为 JSON
+- 之后的 refresh() 只 stat 不读文件：mtime/size 未变的条目沿用已解析结果，只重新解析变动的文件；
+  已删除的条目从索引中移除
+- 日志关键字检索（如 full_*.log 是否含 "COMPILATION ERROR"）按 (文件, 关键字) 缓存，文件变动后失效
+- 名为 target 的目录（maven 构建输出）只记录目录本身、不下钻
+
+calc_weighted_avg.py / count_logfiles.py（--index）与 codeGen/detection_eval.py（--results_index）
+通过 is_dir / subdirs / glob / rglob / detres / contains 查询索引，代替 iterdir/glob/rglob + 读文件。
+
+用法：
+    python3 results_index.py /path/to/results            # 建立或增量刷新索引
+    python3 results_index.py /path/to/results --stats    # 同时打印索引概况
+"""
+
+import os
+import ast
+import json
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+DEFAULT_DB_NAME = ".results_index.sqlite"
+DETRES_SUFFIX = "_detRes.txt"
+# 只记录、不下钻的目录
+PRUNE_DIRS = {"target", ".git", "__pycache__", "node_modules"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path      TEXT PRIMARY KEY,     -- 相对 root 的 posix 路径
+    parent    TEXT NOT NULL,        -- 父目录相对路径（root 下为 ''）
+    name      TEXT NOT NULL,
+    is_dir    INTEGER NOT NULL,
+    mtime_ns  INTEGER,
+    size      INTEGER,
+    detres    TEXT,                 -- detRes 解析结果（JSON）
+    detres_error TEXT               -- 解析失败原因（空文件、非 dict 等）
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+CREATE TABLE IF NOT EXISTS keyword_hits (
+    path    TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    hit     INTEGER NOT NULL,
+    PRIMARY KEY (path, keyword)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _parse_detres(path: Path) -> dict:
+    """
+    与各脚本一致：取首个非空行，先 json.loads，失败再 ast.literal_eval（单引号 dict）。
+    """
+    with path.open("r", encoding="utf-8") as f:
+        for raw in f:
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                obj = json.loads(raw)
+            except Exception:
+                obj = ast.literal_eval(raw)
+            if not isinstance(obj, dict):
+                raise ValueError("not a dict")
+            return obj
+    raise ValueError(f"No non-empty lines in {path}")
+
+
+def _subtree_bounds(rel: str):
+    """rel 子树（不含 rel 自身）的主键范围：'rel/' <= path < 'rel0'（'0' 紧随 '/'）"""
+    return (rel + "/", rel + "0") if rel else ("", "\U0010ffff")
+
+
+class ResultsIndex:
+    def __init__(self, root: Union[str, Path], db_path: Union[str, Path, None] = None):
+        self.root = Path(root).expanduser().resolve()
+        self.db_path = Path(db_path) if db_path else self.root / DEFAULT_DB_NAME
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._root_prefix = str(self.root) + os.sep
+        self._pending_hits = 0
+        self._hits: Dict[str, Dict[str, bool]] = {}
+        row = self._conn.execute("SELECT value FROM meta WHERE key='root'").fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO meta(key, value) VALUES ('root', ?)", (str(self.root),))
+            self._conn.commit()
+        elif row[0] != str(self.root):
+            raise ValueError(f"{self.db_path} indexes {row[0]}, not {self.root}")
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- 路径换算 ----------------
+
+    def _rel(self, p: Union[str, Path]) -> str:
+        s = str(p)
+        if s.startswith(self._root_prefix):
+            return s[len(self._root_prefix):].replace(os.sep, "/")
+        p = Path(p)
+        if p.is_absolute():
+            try:
+                p = p.relative_to(self.root)
+            except ValueError:
+                p = p.resolve().relative_to(self.root)
+        rel = p.as_posix()
+        return "" if rel == "." else rel
+
+    def _abs(self, rel: str) -> Path:
+        return self.root / rel if rel else self.root
+
+    # ---------------- 扫描 ----------------
+
+    def refresh(self, sub: Union[str, Path, None] = None) -> Dict[str, int]:
+        """
+        增量刷新整个 root（或其中一个子树 sub）。返回 {"entries", "parsed", "removed", "seconds"}。
+        """
+        t0 = time.time()
+        self._hits.clear()
+        top = self._rel(sub) if sub is not None else ""
+        lo, hi = _subtree_bounds(top)
+        conn = self._conn
+
+        known = {
+            path: (mtime, size)
+            for path, mtime, size in conn.execute(
+                "SELECT path, mtime_ns, size FROM entries WHERE path >= ? AND path < ?", (lo, hi))
+        }
+        seen = set()
+        upserts = []
+        parsed = 0
+
+        stack = [top]
+        while stack:
+            d = stack.pop()
+            try:
+                it = os.scandir(self._abs(d))
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    if e.name.startswith(DEFAULT_DB_NAME) or e.is_symlink():
+                        continue
+                    rel = f"{d}/{e.name}" if d else e.name
+                    seen.add(rel)
+                    try:
+                        st = e.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    is_dir = e.is_dir(follow_symlinks=False)
+                    size = 0 if is_dir else st.st_size
+                    if is_dir and e.name not in PRUNE_DIRS:
+                        stack.append(rel)
+
+                    # 目录的 mtime 只反映增删条目，不参与比对
+                    sig = (None, 0) if is_dir else (st.st_mtime_ns, size)
+                    if known.get(rel) == sig:
+                        continue
+
+                    detres = err = None
+                    if not is_dir and e.name.endswith(DETRES_SUFFIX):
+                        parsed += 1
+                        try:
+                            detres = json.dumps(_parse_detres(Path(e.path)), ensure_ascii=False)
+                        except Exception as ex:
+                            err = f"{ex.__class__.__name__}: {ex}"
+                    upserts.append((rel, d, e.name, int(is_dir), sig[0], size, detres, err))
+
+        # 只刷新子树时，子树根及其祖先目录也要在索引里（subdirs/is_dir 依赖）
+        parts = top.split("/") if top else []
+        for i in range(1, len(parts) + 1):
+            rel = "/".join(parts[:i])
+            if rel not in known and self._abs(rel).is_dir():
+                upserts.append((rel, "/".join(parts[:i - 1]), parts[i - 1], 1, None, 0, None, None))
+
+        # 变动的文件：旧的关键字缓存失效；消失的条目：连同缓存一起删除
+        stale = [(p,) for p in known if p not in seen]
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+            conn.executemany(
+                "DELETE FROM keyword_hits WHERE path = ?", [(u[0],) for u in upserts if u[0] in known])
+            conn.executemany("DELETE FROM keyword_hits WHERE path = ?", stale)
+            conn.executemany("DELETE FROM entries WHERE path = ?", stale)
+
+        return {
+            "entries": len(seen),
+            "parsed": parsed,
+            "removed": len(stale),
+            "seconds": round(time.time() - t0, 3),
+        }
+
+    # ---------------- 查询 ----------------
+
+    def is_dir(self, p: Union[str, Path]) -> bool:
+        row = self._conn.execute("SELECT is_dir FROM entries WHERE path = ?", (self._rel(p),)).fetchone()
+        return bool(row and row[0])
+
+    def subdirs(self, d: Union[str, Path]) -> List[Path]:
+        rows = self._conn.execute(
+            "SELECT path FROM entries WHERE parent = ? AND is_dir = 1 ORDER BY path", (self._rel(d),))
+        return [self._abs(r[0]) for r in rows]
+
+    def glob(self, d: Union[str, Path], pattern: str) -> List[Path]:
+        """d 下直接子文件中 name 匹配 pattern（GLOB 语义同 pathlib，大小写敏感）"""
+        rows = self._conn.execute(
+            "SELECT path FROM entries WHERE parent = ? AND is_dir = 0 AND name GLOB ? ORDER BY path",
+            (self._rel(d), pattern))
+        return [self._abs(r[0]) for r in rows]
+
+    def rglob(self, d: Union[str, Path], pattern: str, dirs: bool = False) -> List[Path]:
+        """d 子树中 name 匹配 pattern 的文件（dirs=True 时为目录）"""
+        lo, hi = _subtree_bounds(self._rel(d))
+        rows = self._conn.execute(
+            "SELECT path FROM entries WHERE path >= ? AND path < ? AND is_dir = ? AND name GLOB ? ORDER BY path",
+            (lo, hi, int(dirs), pattern))
+        return [self._abs(r[0]) for r in rows]
+
+    def detres(self, p: Union[str, Path]) -> dict:
+        """已解析的 detRes dict；未索引或解析失败时抛 ValueError"""
+        rel = self._rel(p)
+        row = self._conn.execute("SELECT detres, detres_error FROM entries WHERE path = ?", (rel,)).fetchone()
+        if row is None:
+            raise ValueError(f"Not indexed: {self._abs(rel)}")
+        if row[0] is None:
+            raise ValueError(f"Unparsable detRes {self._abs(rel)}: {row[1]}")
+        return json.loads(row[0])
+
+    def contains(self, p: Union[str, Path], keyword: str) -> bool:
+        """文件内容是否含 keyword；首次查询读文件，结果缓存到文件下次变动为止"""
+        rel = self._rel(p)
+        hits = self._hits.get(keyword)
+        if hits is None:
+            # 同一关键字一次性取回全部缓存，避免逐文件查询
+            hits = self._hits[keyword] = {
+                path: bool(h) for path, h in self._conn.execute(
+                    "SELECT path, hit FROM keyword_hits WHERE keyword = ?", (keyword,))
+            }
+        if rel in hits:
+            return hits[rel]
+        hit = False
+        with self._abs(rel).open("r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                if keyword in line:
+                    hit = True
+                    break
+        # 攒一批再提交（close() 时提交剩余）
+        hits[rel] = hit
+        self._conn.execute("INSERT OR REPLACE INTO keyword_hits VALUES (?, ?, ?)", (rel, keyword, int(hit)))
+        self._pending_hits += 1
+        if self._pending_hits >= 1000:
+            self._conn.commit()
+            self._pending_hits = 0
+        return hit
+
+    def stats(self) -> Dict[str, int]:
+        q = self._conn.execute
+        return {
+            "files": q("SELECT COUNT(*) FROM entries WHERE is_dir = 0").fetchone()[0],
+            "dirs": q("SELECT COUNT(*) FROM entries WHERE is_dir = 1").fetchone()[0],
+            "detres": q("SELECT COUNT(*) FROM entries WHERE detres IS NOT NULL").fetchone()[0],
+            "detres_errors": q("SELECT COUNT(*) FROM entries WHERE detres_error IS NOT NULL").fetchone()[0],
+            "keyword_hits": q("SELECT COUNT(*) FROM keyword_hits").fetchone()[0],
+        }
+
+
+def open_index(root: Path, db_path: Optional[str], refresh: bool = True) -> ResultsIndex:
+    """
+    脚本共用入口：打开（必要时建立）索引，refresh=True 时先增量刷新。
+    db_path 指向的索引若建在 root 的某个上级目录上，则沿用该索引、只刷新 root 这一子树。
+    """
+    root = Path(root).expanduser().resolve()
+    index_root, sub = root, None
+    if db_path and Path(db_path).is_file():
+        conn = sqlite3.connect(db_path)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key='root'").fetchone()
+        except sqlite3.Error:
+            row = None
+        finally:
+            conn.close()
+        if row and Path(row[0]) != root and Path(row[0]) in root.parents:
+            index_root, sub = Path(row[0]), root
+
+    index = ResultsIndex(index_root, db_path or None)
+    if refresh:
+        st = index.refresh(sub)
+        print(f"[INFO] results index {index.db_path}: {st['entries']} entries, "
+              f"{st['parsed']} parsed, {st['removed']} removed, {st['seconds']}s")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or incrementally refresh the results index of a results tree.")
+    parser.add_argument("root_dir", type=str, help="Results root to index")
+    parser.add_argument("--db", type=str, default=None, help=f"Index file (default: <root_dir>/{DEFAULT_DB_NAME})")
+    parser.add_argument("--sub", type=str, default=None, help="Only refresh this sub-folder of root_dir")
+    parser.add_argument("--stats", action="store_true", help="Print index summary after refresh")
+
+    args = parser.parse_args()
+    root_dir = Path(args.root_dir).expanduser().resolve()
+    if not root_dir.is_dir():
+        raise NotADirectoryError(f"Not a directory: {root_dir}")
+
+    with ResultsIndex(root_dir, args.db) as index:
+        st = index.refresh(args.sub)
+        print(f"Indexed {st['entries']} entries ({st['parsed']} detRes parsed, {st['removed']} removed) in {st['seconds']}s")
+        if args.stats:
+            for k, v in index.stats().items():
+                print(f"  {k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
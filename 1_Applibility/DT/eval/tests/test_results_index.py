@@ -0,0 +1,139 @@
+# tests/test_results_index.py
+# 结果目录索引：增量 refresh 只重新解析变动的 detRes，mtime / size 变化使解析结果与关键字缓存失效
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_index import ResultsIndex  # noqa: E402
+
+
+def _write(path, obj=None, text=None, mtime_ns=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj) if text is None else text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "res"
+    _write(root / "p1" / "A_wm_detRes.txt", {"z_score": 1.0})
+    _write(root / "p1" / "B_wm_detRes.txt", {"z_score": 2.0})
+    _write(root / "p1" / "full_1.log", text="BUILD SUCCESS\n")
+    _write(root / "p2" / "C_wm_detRes.txt", {"z_score": 3.0})
+    _write(root / "p2" / "target" / "classes" / "X.class", text="x")
+    return root
+
+
+def test_first_refresh_indexes_tree(tree):
+    with ResultsIndex(tree) as index:
+        st = index.refresh()
+        assert st["parsed"] == 3 and st["removed"] == 0
+        assert index.subdirs(tree) == [tree / "p1", tree / "p2"]
+        assert index.rglob(tree, "*_wm_detRes.txt") == [
+            tree / "p1" / "A_wm_detRes.txt", tree / "p1" / "B_wm_detRes.txt", tree / "p2" / "C_wm_detRes.txt"]
+        assert index.detres(tree / "p2" / "C_wm_detRes.txt") == {"z_score": 3.0}
+        # target 目录只记录自身，不下钻
+        assert index.is_dir(tree / "p2" / "target")
+        assert not index.rglob(tree, "*.class")
+
+
+def test_unchanged_tree_reparses_nothing(tree):
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        st = index.refresh()
+        assert st["parsed"] == 0 and st["removed"] == 0
+
+
+def test_refresh_reopens_existing_index(tree):
+    with ResultsIndex(tree) as index:
+        index.refresh()
+    with ResultsIndex(tree) as index:
+        assert index.refresh()["parsed"] == 0
+        assert index.detres(tree / "p1" / "A_wm_detRes.txt") == {"z_score": 1.0}
+
+
+def test_mtime_change_reparses(tree):
+    p = tree / "p1" / "A_wm_detRes.txt"
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        # 同样大小、内容不同：只有 mtime 变了
+        old = p.stat().st_mtime_ns
+        _write(p, {"z_score": 9.0}, mtime_ns=old + 10**9)
+        assert p.stat().st_size == len(json.dumps({"z_score": 1.0}))
+        st = index.refresh()
+        assert st["parsed"] == 1
+        assert index.detres(p) == {"z_score": 9.0}
+
+
+def test_size_change_reparses(tree):
+    p = tree / "p1" / "B_wm_detRes.txt"
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        # mtime 不变、大小变了
+        old = p.stat().st_mtime_ns
+        _write(p, {"z_score": 2.5, "extra": 1}, mtime_ns=old)
+        st = index.refresh()
+        assert st["parsed"] == 1
+        assert index.detres(p) == {"z_score": 2.5, "extra": 1}
+
+
+def test_half_written_detres_parses_after_refresh(tree):
+    p = tree / "p2" / "D_wm_detRes.txt"
+    _write(p, text="")
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        with pytest.raises(ValueError):
+            index.detres(p)
+        _write(p, text='{"z_score": ')
+        index.refresh(tree / "p2")
+        with pytest.raises(ValueError):
+            index.detres(p)
+        _write(p, {"z_score": 4.0})
+        index.refresh(tree / "p2")
+        assert index.detres(p) == {"z_score": 4.0}
+
+
+def test_removed_and_added_entries(tree):
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        (tree / "p1" / "B_wm_detRes.txt").unlink()
+        _write(tree / "p3" / "E_wm_detRes.txt", {"z_score": 5.0})
+        st = index.refresh()
+        assert st["removed"] == 1 and st["parsed"] == 1
+        with pytest.raises(ValueError, match="Not indexed"):
+            index.detres(tree / "p1" / "B_wm_detRes.txt")
+        assert index.subdirs(tree) == [tree / "p1", tree / "p2", tree / "p3"]
+
+
+def test_subtree_refresh_leaves_other_entries(tree):
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        _write(tree / "p1" / "A_wm_detRes.txt", {"z_score": 7.5})
+        (tree / "p2" / "C_wm_detRes.txt").unlink()
+        st = index.refresh(tree / "p1")
+        assert st["parsed"] == 1 and st["removed"] == 0
+        # p2 不在刷新范围内：仍是旧的索引内容
+        assert index.detres(tree / "p2" / "C_wm_detRes.txt") == {"z_score": 3.0}
+        assert index.detres(tree / "p1" / "A_wm_detRes.txt") == {"z_score": 7.5}
+
+
+def test_keyword_cache_invalidated_by_change(tree):
+    log = tree / "p1" / "full_1.log"
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        assert not index.contains(log, "COMPILATION ERROR")
+        _write(log, text="[ERROR] COMPILATION ERROR :\n")
+        # 刷新前沿用缓存
+        assert not index.contains(log, "COMPILATION ERROR")
+        index.refresh()
+        assert index.contains(log, "COMPILATION ERROR")
+    # 缓存落盘：重新打开后不读文件也能答出
+    with ResultsIndex(tree) as index:
+        index.refresh()
+        log.unlink()
+        assert index.contains(log, "COMPILATION ERROR")
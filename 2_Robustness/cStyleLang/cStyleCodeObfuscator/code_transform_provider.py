@@ -3,6 +3,7 @@ from itertools import product
 from .mutable_tree.nodes import Node
 from .mutable_tree.adaptors import JavaAdaptor, CppAdaptor, JavaScriptAdaptor
 from .mutable_tree.stringifiers import (
+    SourceMap,
     JavaStringifier,
     CppStringifier,
     JavaScriptStringifier,
@@ -13,16 +14,22 @@ from .mutable_tree.transformers import CodeTransformer, TransformerPipeline
 #     IdentifierAppendingVisitor,
 # )
 
-from typing import Sequence, List
+from typing import Sequence, List, Tuple
 
 
 class CodeTransformProvider:
     def __init__(
-        self, lang: str, parser: tree_sitter.Parser, transformers: List[CodeTransformer]
+        self,
+        lang: str,
+        parser: tree_sitter.Parser,
+        transformers: List[CodeTransformer],
+        iterative: bool = False,
     ) -> None:
         self.lang = lang
         self.parser = parser
-        self.pipeline = TransformerPipeline(transformers)
+        # iterative: visitors walk unhandled subtrees with an explicit stack,
+        # for very large or deeply nested functions (see Visitor.iterative)
+        self.pipeline = TransformerPipeline(transformers, iterative=iterative)
         self.transform_keys = self._get_all_transform_combinations(transformers)
 
         if self.lang not in {"cpp", "java", "javascript"}:
@@ -128,5 +135,12 @@ class CodeTransformProvider:
         transformed = self.pipeline.mutable_tree_transform(mutable_root, transform_keys)
         return self.stringifier.stringify(transformed)
 
+    def code_transform_with_source_map(
+        self, code: str, transform_keys: Sequence[str]
+    ) -> Tuple[str, SourceMap]:
+        mutable_root = self.to_mutable_tree(code)
+        transformed = self.pipeline.mutable_tree_transform(mutable_root, transform_keys)
+        return self.stringifier.stringify_with_source_map(transformed)
+
     def get_transform_keys(self) -> List[str]:
         return self.transform_keys
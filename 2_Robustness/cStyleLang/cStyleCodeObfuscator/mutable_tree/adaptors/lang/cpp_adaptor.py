@@ -229,10 +229,18 @@ def convert_assignment_expr(node: tree_sitter.Node) -> AssignmentExpression:
 
 
 def convert_binary_expr(node: tree_sitter.Node) -> BinaryExpression:
-    lhs = convert_expression(node.child_by_field_name("left"))
-    rhs = convert_expression(node.child_by_field_name("right"))
-    op = get_binary_op(node.child_by_field_name("operator").text.decode())
-    return node_factory.create_binary_expr(lhs, rhs, op)
+    # left-associative chains (a + b + c + ...) nest on the left; walk that
+    # spine with a loop so long chains do not exhaust the recursion limit
+    spine = []
+    while node.type == "binary_expression":
+        spine.append(node)
+        node = node.child_by_field_name("left")
+    expr = convert_expression(node)
+    for bin_node in reversed(spine):
+        rhs = convert_expression(bin_node.child_by_field_name("right"))
+        op = get_binary_op(bin_node.child_by_field_name("operator").text.decode())
+        expr = node_factory.create_binary_expr(expr, rhs, op)
+    return expr
 
 
 def convert_update_expr(node: tree_sitter.Node) -> UpdateExpression:
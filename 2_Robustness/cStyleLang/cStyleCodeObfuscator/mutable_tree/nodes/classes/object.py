@@ -7,6 +7,8 @@ from typing import List, Union
 
 
 class ComputedPropertyName(Node):
+    __slots__ = ("expr",)
+
     def __init__(self, node_type: NodeType, expr: Expression):
         super().__init__(node_type)
         self.expr = expr
@@ -25,6 +27,8 @@ class ComputedPropertyName(Node):
 
 
 class KeyValuePair(Node):
+    __slots__ = ("key", "value")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -64,6 +68,8 @@ ObjectMember = Union[KeyValuePair, SpreadElement, FunctionDeclaration]
 
 
 class ObjectMembers(NodeList):
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType, members: List[ObjectMember]):
         super().__init__(node_type)
         self.node_list = members
@@ -84,6 +90,8 @@ class ObjectMembers(NodeList):
 
 
 class Object(Expression):
+    __slots__ = ("members",)
+
     def __init__(self, node_type: NodeType, members: ObjectMembers):
         super().__init__(node_type)
         self.members = members
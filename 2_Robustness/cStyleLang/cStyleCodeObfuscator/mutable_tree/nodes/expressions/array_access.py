@@ -5,6 +5,8 @@ from .expression import is_primary_expression, is_expression
 
 
 class ArrayAccess(Expression):
+    __slots__ = ("array", "index", "optional")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -7,6 +7,8 @@ from typing import List, Optional
 
 
 class ArrayCreationExpression(Expression):
+    __slots__ = ("type_id", "dimensions", "value")
+
     def __init__(
         self,
         node_type: NodeType,
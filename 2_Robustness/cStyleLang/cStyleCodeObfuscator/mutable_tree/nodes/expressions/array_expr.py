@@ -6,6 +6,8 @@ from typing import List
 
 
 class ArrayExpression(Expression):
+    __slots__ = ("elements",)
+
     def __init__(self, node_type: NodeType, elements: ExpressionList):
         super().__init__(node_type)
         self.elements = elements
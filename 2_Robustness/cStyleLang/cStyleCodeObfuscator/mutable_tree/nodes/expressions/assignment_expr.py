@@ -50,6 +50,8 @@ def get_assignment_op(op: str) -> AssignmentOps:
 
 
 class AssignmentExpression(Expression):
+    __slots__ = ("left", "right", "op")
+
     def __init__(
         self, node_type: NodeType, left: Node, right: Expression, op: AssignmentOps
     ):
@@ -70,6 +70,8 @@ def get_binary_op(op: str) -> BinaryOps:
 
 
 class BinaryExpression(Expression):
+    __slots__ = ("left", "right", "op")
+
     def __init__(
         self, node_type: NodeType, left: Expression, right: Expression, op: BinaryOps
     ):
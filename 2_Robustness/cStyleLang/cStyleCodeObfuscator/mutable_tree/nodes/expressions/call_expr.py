@@ -7,6 +7,8 @@ from typing import List
 
 
 class CallExpression(Expression):
+    __slots__ = ("callee", "args", "optional")
+
     def __init__(
         self,
         node_type: NodeType,
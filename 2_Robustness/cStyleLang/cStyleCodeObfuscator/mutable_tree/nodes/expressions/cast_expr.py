@@ -6,6 +6,8 @@ from .expression import is_expression
 
 
 class CastExpression(Expression):
+    __slots__ = ("type", "value")
+
     def __init__(
         self, node_type: NodeType, type_identifier: TypeIdentifier, value: Expression
     ):
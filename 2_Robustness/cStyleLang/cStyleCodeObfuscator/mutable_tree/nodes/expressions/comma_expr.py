@@ -6,6 +6,8 @@ from typing import List
 
 
 class CommaExpression(Expression):
+    __slots__ = ("left", "right")
+
     def __init__(self, node_type: NodeType, left: Expression, right: Expression):
         super().__init__(node_type)
         self.left = left
@@ -7,6 +7,8 @@ from typing import List
 
 
 class CompoundLiteralExpression(Expression):
+    __slots__ = ("type_id", "value")
+
     def __init__(
         self, node_type: NodeType, type: TypeIdentifier, value: ArrayExpression
     ):
@@ -6,6 +6,8 @@ from typing import List
 
 
 class DeleteExpression(Expression):
+    __slots__ = ("operand", "is_array")
+
     def __init__(
         self, node_type: NodeType, operand: Expression, is_array: bool = False
     ):
@@ -2,6 +2,8 @@ from ..node import Node, NodeType
 
 
 class Expression(Node):
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType):
         super().__init__(node_type)
 
@@ -6,6 +6,7 @@ from typing import List
 
 
 class ExpressionList(NodeList):
+    __slots__ = ()
     node_list: List[Expression]
 
     def __init__(self, node_type: NodeType, exprs: List[Expression]):
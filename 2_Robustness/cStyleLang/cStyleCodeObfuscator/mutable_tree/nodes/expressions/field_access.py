@@ -19,6 +19,8 @@ def get_field_access_op(op: str) -> FieldAccessOps:
 
 
 class FieldAccess(Expression):
+    __slots__ = ("object", "field", "op", "optional")
+
     def __init__(
         self,
         node_type: NodeType,
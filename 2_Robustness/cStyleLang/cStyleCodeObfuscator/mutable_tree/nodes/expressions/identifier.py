@@ -4,6 +4,8 @@ from typing import List
 
 
 class Identifier(Expression):
+    __slots__ = ("name",)
+
     def __init__(self, node_type: NodeType, name: str):
         super().__init__(node_type)
         self.name = name
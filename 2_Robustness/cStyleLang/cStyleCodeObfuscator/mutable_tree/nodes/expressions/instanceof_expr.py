@@ -6,6 +6,8 @@ from .expression import is_expression
 
 
 class InstanceofExpression(Expression):
+    __slots__ = ("left", "right")
+
     def __init__(self, node_type: NodeType, left: Expression, right: TypeIdentifier):
         super().__init__(node_type)
         self.left = left
@@ -4,6 +4,8 @@ from typing import List, Union
 
 
 class Literal(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, node_type: NodeType, value: Union[str, int, float]):
         super().__init__(node_type)
         self.value = value
@@ -7,6 +7,8 @@ from typing import List, Optional
 
 
 class NewExpression(Expression):
+    __slots__ = ("type", "args")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -5,6 +5,8 @@ from typing import List
 
 
 class ParenthesizedExpression(Expression):
+    __slots__ = ("expr",)
+
     def __init__(self, node_type: NodeType, expr: Expression):
         super().__init__(node_type)
         self.expr = expr
@@ -19,6 +19,8 @@ def get_pointer_op(op: str) -> PointerOps:
 
 
 class PointerExpression(Expression):
+    __slots__ = ("operand", "op")
+
     def __init__(self, node_type: NodeType, operand: Expression, op: PointerOps):
         super().__init__(node_type)
         self.operand = operand
@@ -7,6 +7,8 @@ from typing import List, Optional, Union
 
 
 class ScopeResolution(Node):
+    __slots__ = ("scope",)
+
     def __init__(
         self,
         node_type: NodeType,
@@ -36,6 +38,8 @@ class ScopeResolution(Node):
 
 
 class QualifiedIdentifier(Expression):
+    __slots__ = ("scope", "name")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -7,6 +7,8 @@ from typing import List, Union
 
 
 class SizeofExpression(Expression):
+    __slots__ = ("operand",)
+
     def __init__(self, node_type: NodeType, operand: Union[Expression, TypeIdentifier]):
         super().__init__(node_type)
         self.operand = operand
@@ -5,6 +5,8 @@ from typing import List
 
 
 class TernaryExpression(Expression):
+    __slots__ = ("condition", "consequence", "alternative")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -4,6 +4,8 @@ from typing import List
 
 
 class ThisExpression(Expression):
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType):
         super().__init__(node_type)
         self._check_types()
@@ -32,6 +32,8 @@ def get_unary_op(op: str) -> UnaryOps:
 
 
 class UnaryExpression(Expression):
+    __slots__ = ("operand", "op")
+
     def __init__(self, node_type: NodeType, operand: Expression, op: UnaryOps):
         super().__init__(node_type)
         self.operand = operand
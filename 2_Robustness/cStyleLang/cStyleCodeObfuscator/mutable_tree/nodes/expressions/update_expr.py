@@ -19,6 +19,8 @@ def get_update_op(op: str) -> UpdateOps:
 
 
 class UpdateExpression(Expression):
+    __slots__ = ("operand", "op", "prefix")
+
     def __init__(
         self, node_type: NodeType, operand: Expression, op: UpdateOps, prefix: bool
     ):
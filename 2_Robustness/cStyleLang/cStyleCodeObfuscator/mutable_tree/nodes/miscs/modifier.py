@@ -4,6 +4,8 @@ from typing import List
 
 
 class Modifier(Node):
+    __slots__ = ("modifier",)
+
     def __init__(self, node_type: NodeType, modifier: str):
         super().__init__(node_type)
         self.modifier = modifier
@@ -21,6 +23,7 @@ class Modifier(Node):
 
 
 class ModifierList(NodeList):
+    __slots__ = ()
     node_list: List[Modifier]
 
     def __init__(self, node_type: NodeType, modifiers: List[Modifier]):
@@ -117,6 +117,7 @@ class NodeType(Enum):
 
 
 class Node:
+    __slots__ = ("node_type",)
     node_type: NodeType
 
     def __init__(self, node_type: NodeType):
@@ -143,6 +144,7 @@ class Node:
 
 
 class NodeList(Node):
+    __slots__ = ("node_list",)
     node_list: List[Node]
 
     def __init__(self, node_type: NodeType):
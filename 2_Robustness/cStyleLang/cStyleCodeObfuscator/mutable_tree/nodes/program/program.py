@@ -5,6 +5,8 @@ from typing import List
 
 
 class Program(Node):
+    __slots__ = ("main",)
+
     def __init__(self, node_type: NodeType, stmts: StatementList):
         super().__init__(node_type)
         self.main = stmts
@@ -6,6 +6,8 @@ from typing import List, Optional
 
 
 class AssertStatement(Statement):
+    __slots__ = ("condition", "message")
+
     def __init__(
         self,
         node_type: NodeType,
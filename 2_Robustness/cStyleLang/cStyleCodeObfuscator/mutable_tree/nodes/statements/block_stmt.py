@@ -6,6 +6,8 @@ from typing import List
 
 
 class BlockStatement(Statement):
+    __slots__ = ("stmts",)
+
     def __init__(self, node_type: NodeType, stmts: StatementList):
         super().__init__(node_type)
         self.stmts = stmts
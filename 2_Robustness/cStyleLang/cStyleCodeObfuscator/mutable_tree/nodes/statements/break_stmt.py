@@ -5,6 +5,8 @@ from typing import List, Optional
 
 
 class BreakStatement(Statement):
+    __slots__ = ("label",)
+
     def __init__(self, node_type: NodeType, label: Optional[Expression] = None):
         super().__init__(node_type)
         self.label = label
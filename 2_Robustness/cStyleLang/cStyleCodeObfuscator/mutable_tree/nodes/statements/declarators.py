@@ -7,7 +7,7 @@ from typing import List, Union
 
 
 class Declarator(Node):
-    pass
+    __slots__ = ()
 
 
 def is_declarator(node: Node) -> bool:
@@ -15,6 +15,8 @@ def is_declarator(node: Node) -> bool:
 
 
 class InitializingDeclarator(Declarator):
+    __slots__ = ("declarator", "value")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -47,6 +49,8 @@ class InitializingDeclarator(Declarator):
 
 
 class DestructuringDeclarator(Declarator):
+    __slots__ = ("pattern",)
+
     def __init__(self, node_type: NodeType, pattern: Expression):
         super().__init__(node_type)
         self.pattern = pattern
@@ -66,6 +70,8 @@ class DestructuringDeclarator(Declarator):
 
 
 class VariableDeclarator(Declarator):
+    __slots__ = ("decl_id",)
+
     def __init__(self, node_type: NodeType, decl_id: Identifier):
         super().__init__(node_type)
         self.decl_id = decl_id
@@ -83,6 +89,8 @@ class VariableDeclarator(Declarator):
 
 
 class AnonymousDeclarator(Declarator):
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType):
         super().__init__(node_type)
         self._check_types()
@@ -99,6 +107,8 @@ class AnonymousDeclarator(Declarator):
 
 
 class PointerDeclarator(Declarator):
+    __slots__ = ("declarator",)
+
     def __init__(self, node_type: NodeType, declarator: Declarator):
         super().__init__(node_type)
         self.declarator = declarator
@@ -118,6 +128,8 @@ class PointerDeclarator(Declarator):
 
 
 class ReferenceDeclarator(Declarator):
+    __slots__ = ("declarator", "r_ref")
+
     def __init__(
         self, node_type: NodeType, declarator: Declarator, r_ref: bool = False
     ):
@@ -140,6 +152,8 @@ class ReferenceDeclarator(Declarator):
 
 
 class ArrayDeclarator(Declarator):
+    __slots__ = ("declarator", "dim")
+
     def __init__(
         self, node_type: NodeType, declarator: Declarator, dim: DimensionSpecifier
     ):
@@ -7,6 +7,8 @@ from typing import List
 
 
 class DoStatement(Statement):
+    __slots__ = ("condition", "body")
+
     def __init__(self, node_type: NodeType, body: Statement, condition: Expression):
         super().__init__(node_type)
         self.condition = condition
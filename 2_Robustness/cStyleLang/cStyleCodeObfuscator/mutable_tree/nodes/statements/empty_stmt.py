@@ -5,6 +5,8 @@ from typing import List
 
 
 class EmptyStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType):
         super().__init__(node_type)
         self._check_types()
@@ -28,6 +28,15 @@ def get_forin_type(op: str) -> ForInType:
 
 
 class ForInStatement(Statement):
+    __slots__ = (
+        "decl_type",
+        "declarator",
+        "iterable",
+        "body",
+        "forin_type",
+        "is_async",
+    )
+
     def __init__(
         self,
         node_type: NodeType,
@@ -11,6 +11,8 @@ ForInit = Union[LocalVariableDeclaration, ExpressionList]
 
 
 class ForStatement(Statement):
+    __slots__ = ("init", "condition", "update", "body", "is_init_decl")
+
     def __init__(
         self,
         node_type: NodeType,
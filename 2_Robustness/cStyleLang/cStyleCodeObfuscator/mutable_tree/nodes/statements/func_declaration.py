@@ -11,7 +11,7 @@ from typing import List, Optional, Union
 
 
 class FormalParameter(Node):
-    pass
+    __slots__ = ()
 
 
 def is_formal_parameter(node: Node) -> bool:
@@ -19,6 +19,8 @@ def is_formal_parameter(node: Node) -> bool:
 
 
 class VariadicParameter(FormalParameter):
+    __slots__ = ()
+
     def __init__(self, node_type: NodeType):
         super().__init__(node_type)
         self._check_types()
@@ -29,6 +31,8 @@ class VariadicParameter(FormalParameter):
 
 
 class UntypedParameter(FormalParameter):
+    __slots__ = ("declarator",)
+
     def __init__(self, node_type: NodeType, decl: Declarator):
         super().__init__(node_type)
         self.declarator = decl
@@ -48,6 +52,8 @@ class UntypedParameter(FormalParameter):
 
 
 class TypedFormalParameter(FormalParameter):
+    __slots__ = ("declarator", "decl_type")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -78,6 +84,8 @@ class TypedFormalParameter(FormalParameter):
 
 
 class SpreadParameter(FormalParameter):
+    __slots__ = ("declarator", "decl_type")
+
     def __init__(
         self, node_type: NodeType, decl: Declarator, decl_type: DeclaratorType
     ):
@@ -102,6 +110,7 @@ class SpreadParameter(FormalParameter):
 
 
 class FormalParameterList(NodeList):
+    __slots__ = ()
     node_list: List[FormalParameter]
 
     def __init__(self, node_type: NodeType, parameters: List[FormalParameter]):
@@ -118,6 +127,8 @@ class FormalParameterList(NodeList):
 
 
 class FunctionDeclarator(Declarator):
+    __slots__ = ("declarator", "parameters")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -145,6 +156,15 @@ class FunctionDeclarator(Declarator):
 
 
 class FunctionHeader(Node):
+    __slots__ = (
+        "return_type",
+        "func_decl",
+        "dimensions",
+        "throws",
+        "modifiers",
+        "type_params",
+    )
+
     def __init__(
         self,
         node_type: NodeType,
@@ -225,6 +245,8 @@ class FunctionHeader(Node):
 
 
 class FunctionDeclaration(Statement):
+    __slots__ = ("header", "body")
+
     def __init__(
         self,
         node_type: NodeType,
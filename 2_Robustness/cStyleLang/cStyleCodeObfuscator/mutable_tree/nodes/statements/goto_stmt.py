@@ -6,6 +6,8 @@ from typing import List
 
 
 class GotoStatement(Statement):
+    __slots__ = ("label",)
+
     def __init__(self, node_type: NodeType, label: Identifier):
         super().__init__(node_type)
         self.label = label
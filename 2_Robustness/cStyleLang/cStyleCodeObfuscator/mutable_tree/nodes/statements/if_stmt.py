@@ -7,6 +7,8 @@ from typing import List, Optional
 
 
 class IfStatement(Statement):
+    __slots__ = ("condition", "consequence", "alternate")
+
     def __init__(
         self,
         node_type: NodeType,
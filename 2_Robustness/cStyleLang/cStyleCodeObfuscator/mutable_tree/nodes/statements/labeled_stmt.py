@@ -7,6 +7,8 @@ from typing import List
 
 
 class LabeledStatement(Statement):
+    __slots__ = ("label", "stmt")
+
     def __init__(self, node_type: NodeType, label: Identifier, stmt: Statement):
         super().__init__(node_type)
         self.label = label
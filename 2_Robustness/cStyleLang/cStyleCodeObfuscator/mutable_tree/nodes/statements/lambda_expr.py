@@ -9,6 +9,8 @@ from typing import List, Union, Optional
 
 
 class LambdaExpression(Expression):
+    __slots__ = ("params", "body", "parenthesized", "modifiers")
+
     def __init__(
         self,
         node_type: NodeType,
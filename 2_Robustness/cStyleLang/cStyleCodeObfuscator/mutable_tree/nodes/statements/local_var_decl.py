@@ -8,6 +8,8 @@ from typing import List, Optional
 
 
 class DeclaratorType(Node):
+    __slots__ = ("type_id", "prefix_modifiers", "postfix_modifiers")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -54,6 +56,7 @@ class DeclaratorType(Node):
 
 
 class DeclaratorList(NodeList):
+    __slots__ = ()
     node_list: List[Declarator]
 
     def __init__(self, node_type: NodeType, declarators: List[Declarator]):
@@ -70,6 +73,8 @@ class DeclaratorList(NodeList):
 
 
 class LocalVariableDeclaration(Statement):
+    __slots__ = ("type", "declarators")
+
     def __init__(
         self,
         node_type: NodeType,
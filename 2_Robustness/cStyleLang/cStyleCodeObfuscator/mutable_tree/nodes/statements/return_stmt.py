@@ -6,6 +6,8 @@ from typing import List, Optional
 
 
 class ReturnStatement(Statement):
+    __slots__ = ("expr",)
+
     def __init__(self, node_type: NodeType, expr: Optional[Expression] = None):
         super().__init__(node_type)
         self.expr = expr
@@ -6,6 +6,7 @@ from typing import List
 
 
 class StatementList(NodeList):
+    __slots__ = ()
     node_list: List[Statement]
 
     def __init__(self, node_type: NodeType, stmts: List[Statement]):
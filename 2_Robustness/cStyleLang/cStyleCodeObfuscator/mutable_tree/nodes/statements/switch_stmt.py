@@ -8,6 +8,8 @@ from typing import List, Optional
 
 
 class SwitchCase(Node):
+    __slots__ = ("case", "stmts")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -38,6 +40,7 @@ class SwitchCase(Node):
 
 
 class SwitchCaseList(NodeList):
+    __slots__ = ()
     node_list: List[SwitchCase]
 
     def __init__(self, node_type: NodeType, cases: List[SwitchCase]):
@@ -52,6 +55,8 @@ class SwitchCaseList(NodeList):
 
 
 class SwitchStatement(Statement):
+    __slots__ = ("condition", "cases")
+
     def __init__(
         self, node_type: NodeType, condition: Expression, cases: SwitchCaseList
     ):
@@ -7,6 +7,8 @@ from typing import List
 
 
 class SynchronizedStatement(Statement):
+    __slots__ = ("expr", "body")
+
     def __init__(
         self, node_type: NodeType, expr: ParenthesizedExpression, body: BlockStatement
     ):
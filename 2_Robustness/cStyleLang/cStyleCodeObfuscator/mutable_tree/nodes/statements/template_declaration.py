@@ -22,6 +22,8 @@ def get_typename_opts(tn: str) -> TypenameOpts:
 
 
 class TypeParameterDeclaration(Node):
+    __slots__ = ("type_id", "typename_opt")
+
     def __init__(
         self, node_type: NodeType, type_id: TypeIdentifier, typename_opt: TypenameOpts
     ):
@@ -41,6 +43,7 @@ TemplateParameter = Union[TypeParameterDeclaration, FormalParameter]
 
 
 class TemplateParameterList(NodeList):
+    __slots__ = ()
     node_list: List[TemplateParameter]
 
     def __init__(self, node_type: NodeType, params: List[TemplateParameter]):
@@ -60,6 +63,8 @@ class TemplateParameterList(NodeList):
 
 
 class TemplateDeclaration(Statement):
+    __slots__ = ("params", "func_decl")
+
     def __init__(
         self,
         node_type: NodeType,
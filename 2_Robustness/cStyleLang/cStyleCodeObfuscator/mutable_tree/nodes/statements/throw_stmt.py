@@ -7,6 +7,8 @@ from typing import List
 
 
 class ThrowStatement(Statement):
+    __slots__ = ("expr",)
+
     def __init__(self, node_type: NodeType, expr: Expression):
         super().__init__(node_type)
         self.expr = expr
@@ -9,6 +9,8 @@ from typing import List, Optional, Union
 
 
 class CatchClause(Node):
+    __slots__ = ("catch_types", "exception", "body", "modifiers")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -56,6 +58,7 @@ class CatchClause(Node):
 
 
 class TryHandlers(NodeList):
+    __slots__ = ()
     node_list: List[CatchClause]
 
     def __init__(self, node_type: NodeType, handlers: List[CatchClause]):
@@ -71,6 +74,8 @@ class TryHandlers(NodeList):
 
 
 class FinallyClause(Node):
+    __slots__ = ("body",)
+
     def __init__(self, node_type: NodeType, body: BlockStatement):
         super().__init__(node_type)
         self.body = body
@@ -87,6 +92,8 @@ class FinallyClause(Node):
 
 
 class TryStatement(Statement):
+    __slots__ = ("body", "handlers", "finalizer")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -10,6 +10,8 @@ from typing import List, Optional, Union
 
 
 class TryResource(Node):
+    __slots__ = ("resource",)
+
     def __init__(
         self,
         node_type: NodeType,
@@ -39,6 +41,7 @@ class TryResource(Node):
 
 
 class TryResourceList(NodeList):
+    __slots__ = ()
     node_list: List[TryResource]
 
     def __init__(self, node_type: NodeType, resources: List[TryResource]):
@@ -54,6 +57,8 @@ class TryResourceList(NodeList):
 
 
 class TryWithResourcesStatement(Statement):
+    __slots__ = ("body", "resources", "handlers", "finalizer")
+
     def __init__(
         self,
         node_type: NodeType,
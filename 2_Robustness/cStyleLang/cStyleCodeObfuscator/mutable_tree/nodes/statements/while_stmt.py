@@ -8,6 +8,8 @@ from typing import List
 
 
 class WhileStatement(Statement):
+    __slots__ = ("condition", "body")
+
     def __init__(self, node_type: NodeType, condition: Expression, body: Statement):
         super().__init__(node_type)
         self.condition = condition
@@ -8,6 +8,8 @@ from typing import List
 
 
 class WithStatement(Statement):
+    __slots__ = ("object", "body")
+
     def __init__(self, node_type: NodeType, object: Expression, body: Statement):
         super().__init__(node_type)
         self.object = object
@@ -7,6 +7,8 @@ from typing import List, Optional
 
 
 class YieldStatement(Statement):
+    __slots__ = ("expr", "is_delegate")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -5,6 +5,8 @@ from typing import List, Optional
 
 
 class DimensionSpecifier(Node):
+    __slots__ = ("expr",)
+
     def __init__(self, node_type: NodeType, expr: Optional[Expression] = None):
         super().__init__(node_type)
         self.expr = expr
@@ -27,6 +29,7 @@ class DimensionSpecifier(Node):
 
 
 class Dimensions(NodeList):
+    __slots__ = ()
     node_list: List[DimensionSpecifier]
 
     def __init__(self, node_type: NodeType, dims: List[DimensionSpecifier]):
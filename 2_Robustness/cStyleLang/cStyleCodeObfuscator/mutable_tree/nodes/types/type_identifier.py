@@ -4,6 +4,8 @@ from typing import List, Optional
 
 
 class TypeIdentifier(Node):
+    __slots__ = ("type_identifier", "dimension")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -5,6 +5,7 @@ from typing import List
 
 
 class TypeIdentifierList(NodeList):
+    __slots__ = ()
     node_list: List[TypeIdentifier]
 
     def __init__(self, node_type: NodeType, type_ids: List[TypeIdentifier]):
@@ -5,6 +5,8 @@ from typing import List, Optional
 
 
 class TypeParameter(Node):
+    __slots__ = ("type_identifier", "extends")
+
     def __init__(
         self,
         node_type: NodeType,
@@ -5,6 +5,7 @@ from typing import List
 
 
 class TypeParameterList(NodeList):
+    __slots__ = ()
     node_list: List[TypeParameter]
 
     def __init__(self, node_type: NodeType, type_params: List[TypeParameter]):
@@ -1,5 +1,5 @@
 from .node import Node, NodeType
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple, Type
 
 
 def throw_invalid_type(ty: NodeType, obj: Node, attr: Optional[str] = None):
@@ -8,3 +8,47 @@ def throw_invalid_type(ty: NodeType, obj: Node, attr: Optional[str] = None):
     else:
         msg = f"Invalid type: {ty} for {type(obj).__name__}"
     raise TypeError(msg)
+
+
+def get_node_classes() -> List[Type[Node]]:
+    classes = []
+    stack = [Node]
+    while stack:
+        cls = stack.pop()
+        for sub in cls.__subclasses__():
+            if sub not in classes:
+                classes.append(sub)
+                stack.append(sub)
+    return classes
+
+
+_DISPATCH_TABLES: Dict[Tuple[type, str], Dict[Type[Node], Optional[Callable]]] = {}
+
+
+def get_dispatch_table(
+    owner: type, prefix: str
+) -> Dict[Type[Node], Optional[Callable]]:
+    # one table per (visitor/stringifier class, handler prefix), built on first
+    # use; subclasses get their own entry and never share their parent's table
+    key = (owner, prefix)
+    table = _DISPATCH_TABLES.get(key)
+    if table is None:
+        table = {
+            node_cls: getattr(owner, f"{prefix}{node_cls.__name__}", None)
+            for node_cls in get_node_classes()
+        }
+        _DISPATCH_TABLES[key] = table
+    return table
+
+
+def lookup_handler(
+    owner: type, prefix: str, node_cls: Type[Node]
+) -> Optional[Callable]:
+    table = get_dispatch_table(owner, prefix)
+    try:
+        return table[node_cls]
+    except KeyError:
+        # node class defined after the table was built
+        handler = getattr(owner, f"{prefix}{node_cls.__name__}", None)
+        table[node_cls] = handler
+        return handler
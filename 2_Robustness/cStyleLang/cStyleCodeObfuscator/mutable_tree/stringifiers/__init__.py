@@ -1,4 +1,4 @@
-from .common import BaseStringifier
+from .common import BaseStringifier, SourceMap
 from .cpp_stringifier import CppStringifier
 from .java_stringifier import JavaStringifier
 from .js_stringifier import JavaScriptStringifier
@@ -1,4 +1,6 @@
 from ..nodes import Node, is_expression
+from ..nodes.utils import lookup_handler
+from typing import Iterable, List, Optional, Tuple
 from ..nodes import (
     ArrayAccess,
     ArrayCreationExpression,
@@ -89,509 +91,608 @@ from ..nodes import (
 )
 
 
-class BaseStringifier:
-    def stringify(self, node: Node) -> str:
-        stringifier = getattr(self, f"stringify_{type(node).__name__}", None)
-        if stringifier is None:
-            raise NotImplementedError(f"No stringifier for {type(node).__name__}")
-        return stringifier(node)
-
-    def stringify_Program(self, node: Program) -> str:
-        return "\n".join([self.stringify(s) for s in node.main.get_children()])
+SourceMap = List[Tuple[int, int, Node]]
 
-    def stringify_ArrayAccess(self, node: ArrayAccess) -> str:
-        return f"{self.stringify(node.array)}[{self.stringify(node.index)}]"
 
-    def stringify_ArrayCreationExpression(self, node: ArrayCreationExpression) -> str:
-        type_str = self.stringify(node.type_id)
-        dims_str = self.stringify(node.dimensions)
-        if node.value is not None:
-            value_str = self.stringify(node.value)
-            return f"new {type_str}{dims_str} {value_str}"
-        else:
-            return f"new {type_str}{dims_str}"
+class BaseStringifier:
+    """
+    Stringifiers write fragments into one shared buffer that is joined once at
+    the end, instead of returning and concatenating a new string per node.
 
-    def stringify_ArrayExpression(self, node: ArrayExpression) -> str:
-        children_strs = [self.stringify(elem) for elem in node.elements.get_children()]
-        return f'{{{", ".join(children_strs)}}}'
+    `stringify_<NodeClass>` handlers emit their output through `_write`,
+    `_write_node` and `_write_nodes` and return nothing.
+    """
 
-    def stringify_AssignmentExpression(self, node: AssignmentExpression) -> str:
-        return (
-            f"{self.stringify(node.left)} {node.op.value} {self.stringify(node.right)}"
-        )
+    def __init__(self):
+        self._buf: List[str] = []
+        self._pos = 0
+        self._source_map: Optional[SourceMap] = None
 
-    def stringify_BinaryExpression(self, node: BinaryExpression) -> str:
-        return (
-            f"{self.stringify(node.left)} {node.op.value} {self.stringify(node.right)}"
+    def stringify(self, node: Node) -> str:
+        return self._run(node, None)[0]
+
+    def stringify_with_source_map(self, node: Node) -> Tuple[str, SourceMap]:
+        """
+        Stringify `node` and also return the (start, end, node) output span of
+        every stringified node, in post-order (children before their parent).
+        """
+        return self._run(node, [])
+
+    def _run(
+        self, node: Node, source_map: Optional[SourceMap]
+    ) -> Tuple[str, Optional[SourceMap]]:
+        # save the outer state so stringify stays reentrant
+        outer = (
+            getattr(self, "_buf", None),
+            getattr(self, "_pos", 0),
+            getattr(self, "_source_map", None),
         )
-
-    def stringify_CallExpression(self, node: CallExpression) -> str:
-        arg_list_strs = [self.stringify(arg) for arg in node.args.get_children()]
-        arg_list = ", ".join(arg_list_strs)
-        return f"{self.stringify(node.callee)}({arg_list})"
-
-    def stringify_CastExpression(self, node: CastExpression) -> str:
-        return f"({self.stringify(node.type)}) {self.stringify(node.value)}"
-
-    def stringify_CommaExpression(self, node: CommaExpression) -> str:
-        return f"{self.stringify(node.left)}, {self.stringify(node.right)}"
-
-    def stringify_CompoundLiteralExpression(
-        self, node: CompoundLiteralExpression
-    ) -> str:
-        return f"({self.stringify(node.type_id)}) {self.stringify(node.value)}"
-
-    def stringify_DeleteExpression(self, node: DeleteExpression) -> str:
+        self._buf, self._pos, self._source_map = [], 0, source_map
+        try:
+            self._write_node(node)
+            return "".join(self._buf), source_map
+        finally:
+            self._buf, self._pos, self._source_map = outer
+
+    def _write(self, text: str):
+        self._buf.append(text)
+        self._pos += len(text)
+
+    def _write_node(self, node: Node):
+        stringifier = lookup_handler(type(self), "stringify_", type(node))
+        if stringifier is None:
+            raise NotImplementedError(f"No stringifier for {type(node).__name__}")
+        if self._source_map is None:
+            stringifier(self, node)
+        else:
+            start = self._pos
+            stringifier(self, node)
+            self._source_map.append((start, self._pos, node))
+
+    def _write_nodes(self, nodes: Iterable[Node], sep: str):
+        first = True
+        for node in nodes:
+            if not first:
+                self._write(sep)
+            first = False
+            self._write_node(node)
+
+    def _drop_last_char(self):
+        while not self._buf[-1]:
+            self._buf.pop()
+        self._buf[-1] = self._buf[-1][:-1]
+        self._pos -= 1
+        if self._source_map is not None:
+            # spans are recorded in post-order, so their ends never decrease
+            for i in range(len(self._source_map) - 1, -1, -1):
+                start, end, node = self._source_map[i]
+                if end <= self._pos:
+                    break
+                self._source_map[i] = (min(start, self._pos), self._pos, node)
+
+    def stringify_Program(self, node: Program):
+        self._write_nodes(node.main.get_children(), "\n")
+
+    def stringify_ArrayAccess(self, node: ArrayAccess):
+        self._write_node(node.array)
+        self._write("[")
+        self._write_node(node.index)
+        self._write("]")
+
+    def stringify_ArrayCreationExpression(self, node: ArrayCreationExpression):
+        self._write("new ")
+        self._write_node(node.type_id)
+        self._write_node(node.dimensions)
+        if node.value is not None:
+            self._write(" ")
+            self._write_node(node.value)
+
+    def stringify_ArrayExpression(self, node: ArrayExpression):
+        self._write("{")
+        self._write_nodes(node.elements.get_children(), ", ")
+        self._write("}")
+
+    def stringify_AssignmentExpression(self, node: AssignmentExpression):
+        self._write_node(node.left)
+        self._write(f" {node.op.value} ")
+        self._write_node(node.right)
+
+    def stringify_BinaryExpression(self, node: BinaryExpression):
+        # left-associative chains (a + b + c + ...) nest on the left; walk that
+        # spine with a loop so long chains do not exhaust the recursion limit
+        spine = [node]
+        while type(spine[-1].left) is BinaryExpression:
+            spine.append(spine[-1].left)
+        start = self._pos
+        self._write_node(spine[-1].left)
+        for i in range(len(spine) - 1, -1, -1):
+            cur = spine[i]
+            self._write(f" {cur.op.value} ")
+            self._write_node(cur.right)
+            # the outermost span is recorded by _write_node
+            if i > 0 and self._source_map is not None:
+                self._source_map.append((start, self._pos, cur))
+
+    def stringify_CallExpression(self, node: CallExpression):
+        self._write_node(node.callee)
+        self._write("(")
+        self._write_nodes(node.args.get_children(), ", ")
+        self._write(")")
+
+    def stringify_CastExpression(self, node: CastExpression):
+        self._write("(")
+        self._write_node(node.type)
+        self._write(") ")
+        self._write_node(node.value)
+
+    def stringify_CommaExpression(self, node: CommaExpression):
+        self._write_node(node.left)
+        self._write(", ")
+        self._write_node(node.right)
+
+    def stringify_CompoundLiteralExpression(self, node: CompoundLiteralExpression):
+        self._write("(")
+        self._write_node(node.type_id)
+        self._write(") ")
+        self._write_node(node.value)
+
+    def stringify_DeleteExpression(self, node: DeleteExpression):
         if node.is_array:
-            return f"delete[] {self.stringify(node.operand)}"
+            self._write("delete[] ")
         else:
-            return f"delete {self.stringify(node.operand)}"
+            self._write("delete ")
+        self._write_node(node.operand)
 
-    def stringify_FieldAccess(self, node: FieldAccess) -> str:
-        return (
-            f"{self.stringify(node.object)}{node.op.value}{self.stringify(node.field)}"
-        )
+    def stringify_FieldAccess(self, node: FieldAccess):
+        self._write_node(node.object)
+        self._write(node.op.value)
+        self._write_node(node.field)
 
-    def stringify_Identifier(self, node: Identifier) -> str:
-        return str(node.name)
+    def stringify_Identifier(self, node: Identifier):
+        self._write(str(node.name))
 
-    def stringify_InstanceofExpression(self, node: InstanceofExpression) -> str:
-        return f"{self.stringify(node.left)} instanceof {self.stringify(node.right)}"
+    def stringify_InstanceofExpression(self, node: InstanceofExpression):
+        self._write_node(node.left)
+        self._write(" instanceof ")
+        self._write_node(node.right)
 
-    def stringify_Literal(self, node: Literal) -> str:
-        return str(node.value)
+    def stringify_Literal(self, node: Literal):
+        self._write(str(node.value))
 
-    def stringify_NewExpression(self, node: NewExpression) -> str:
+    def stringify_NewExpression(self, node: NewExpression):
+        self._write("new ")
+        self._write_node(node.type)
         if node.args is not None:
-            arg_list_strs = [self.stringify(arg) for arg in node.args.get_children()]
-            arg_list = ", ".join(arg_list_strs)
-            return f"new {self.stringify(node.type)}({arg_list})"
-        else:
-            return f"new {self.stringify(node.type)}"
+            self._write("(")
+            self._write_nodes(node.args.get_children(), ", ")
+            self._write(")")
 
-    def stringify_ParenthesizedExpression(self, node: ParenthesizedExpression) -> str:
-        return f"({self.stringify(node.expr)})"
+    def stringify_ParenthesizedExpression(self, node: ParenthesizedExpression):
+        self._write("(")
+        self._write_node(node.expr)
+        self._write(")")
 
-    def stringify_PointerExpression(self, node: PointerExpression) -> str:
-        return f"{node.op.value}{self.stringify(node.operand)}"
+    def stringify_PointerExpression(self, node: PointerExpression):
+        self._write(node.op.value)
+        self._write_node(node.operand)
 
-    def stringify_ScopeResolution(self, node: ScopeResolution) -> str:
-        if node.scope is None:
-            return "::"
-        return f"{self.stringify(node.scope)}::"
+    def stringify_ScopeResolution(self, node: ScopeResolution):
+        if node.scope is not None:
+            self._write_node(node.scope)
+        self._write("::")
 
-    def stringify_QualifiedIdentifier(self, node: QualifiedIdentifier) -> str:
-        return f"{self.stringify(node.scope)}{self.stringify(node.name)}"
+    def stringify_QualifiedIdentifier(self, node: QualifiedIdentifier):
+        self._write_node(node.scope)
+        self._write_node(node.name)
 
-    def stringify_SizeofExpression(self, node: SizeofExpression) -> str:
+    def stringify_SizeofExpression(self, node: SizeofExpression):
         if is_expression(node.operand):
-            return f"sizeof {self.stringify(node.operand)}"
+            self._write("sizeof ")
+            self._write_node(node.operand)
         else:
-            return f"sizeof({self.stringify(node.operand)})"
+            self._write("sizeof(")
+            self._write_node(node.operand)
+            self._write(")")
 
-    def stringify_TernaryExpression(self, node: TernaryExpression) -> str:
-        return (
-            f"{self.stringify(node.condition)} ? "
-            f"{self.stringify(node.consequence)} : "
-            f"{self.stringify(node.alternative)}"
-        )
+    def stringify_TernaryExpression(self, node: TernaryExpression):
+        self._write_node(node.condition)
+        self._write(" ? ")
+        self._write_node(node.consequence)
+        self._write(" : ")
+        self._write_node(node.alternative)
 
-    def stringify_ThisExpression(self, node: ThisExpression) -> str:
-        return "this"
+    def stringify_ThisExpression(self, node: ThisExpression):
+        self._write("this")
 
-    def stringify_UnaryExpression(self, node: UnaryExpression) -> str:
-        return f"{node.op.value}{self.stringify(node.operand)}"
+    def stringify_UnaryExpression(self, node: UnaryExpression):
+        self._write(node.op.value)
+        self._write_node(node.operand)
 
-    def stringify_UpdateExpression(self, node: UpdateExpression) -> str:
+    def stringify_UpdateExpression(self, node: UpdateExpression):
         if node.prefix:
-            return f"{node.op.value}{self.stringify(node.operand)}"
+            self._write(node.op.value)
+            self._write_node(node.operand)
         else:
-            return f"{self.stringify(node.operand)}{node.op.value}"
+            self._write_node(node.operand)
+            self._write(node.op.value)
 
-    def stringify_Modifier(self, node: Modifier) -> str:
-        return node.modifier
+    def stringify_Modifier(self, node: Modifier):
+        self._write(node.modifier)
 
-    def stringify_ModifierList(self, node: ModifierList) -> str:
-        return " ".join([self.stringify(mod) for mod in node.get_children()])
+    def stringify_ModifierList(self, node: ModifierList):
+        self._write_nodes(node.get_children(), " ")
 
-    def stringify_AssertStatement(self, node: AssertStatement) -> str:
+    def stringify_AssertStatement(self, node: AssertStatement):
+        self._write("assert ")
+        self._write_node(node.condition)
         if node.message is not None:
-            return (
-                f"assert {self.stringify(node.condition)} : "
-                f"{self.stringify(node.message)};"
-            )
-        else:
-            return f"assert {self.stringify(node.condition)};"
+            self._write(" : ")
+            self._write_node(node.message)
+        self._write(";")
 
-    def stringify_BlockStatement(self, node: BlockStatement) -> str:
-        stmt_strs = [self.stringify(stmt) for stmt in node.stmts.get_children()]
-        return "{\n" + "\n".join(stmt_strs) + "\n}"
+    def stringify_BlockStatement(self, node: BlockStatement):
+        self._write("{\n")
+        self._write_nodes(node.stmts.get_children(), "\n")
+        self._write("\n}")
 
-    def stringify_BreakStatement(self, node: BreakStatement) -> str:
+    def stringify_BreakStatement(self, node: BreakStatement):
         if node.label is not None:
-            return f"break {self.stringify(node.label)};"
+            self._write("break ")
+            self._write_node(node.label)
+            self._write(";")
         else:
-            return "break;"
+            self._write("break;")
 
-    def stringify_ContinueStatement(self, node: ContinueStatement) -> str:
+    def stringify_ContinueStatement(self, node: ContinueStatement):
         if node.label is not None:
-            return f"continue {self.stringify(node.label)};"
+            self._write("continue ")
+            self._write_node(node.label)
+            self._write(";")
         else:
-            return "continue;"
-
-    def stringify_DoStatement(self, node: DoStatement) -> str:
-        return (
-            f"do\n{self.stringify(node.body)}\n"
-            f"while ({self.stringify(node.condition)});"
-        )
-
-    def stringify_EmptyStatement(self, node: EmptyStatement) -> str:
-        return ";"
-
-    def stringify_ExpressionStatement(self, node: ExpressionStatement) -> str:
-        return f"{self.stringify(node.expr)};"
-
-    def stringify_ForInStatement(self, node: ForInStatement) -> str:
-        decl_type_str = self.stringify(node.decl_type)
-        iter_str = self.stringify(node.declarator)
-        iterable_str = self.stringify(node.iterable)
-        body_str = self.stringify(node.body)
-        op = node.forin_type.value
-        return f"for ({decl_type_str} {iter_str} {op} {iterable_str}) {body_str}"
-
-    def stringify_ForStatement(self, node: ForStatement) -> str:
+            self._write("continue;")
+
+    def stringify_DoStatement(self, node: DoStatement):
+        self._write("do\n")
+        self._write_node(node.body)
+        self._write("\nwhile (")
+        self._write_node(node.condition)
+        self._write(");")
+
+    def stringify_EmptyStatement(self, node: EmptyStatement):
+        self._write(";")
+
+    def stringify_ExpressionStatement(self, node: ExpressionStatement):
+        self._write_node(node.expr)
+        self._write(";")
+
+    def stringify_ForInStatement(self, node: ForInStatement):
+        self._write("for (")
+        self._write_node(node.decl_type)
+        self._write(" ")
+        self._write_node(node.declarator)
+        self._write(f" {node.forin_type.value} ")
+        self._write_node(node.iterable)
+        self._write(") ")
+        self._write_node(node.body)
+
+    def stringify_ForStatement(self, node: ForStatement):
+        self._write("for (")
         if node.init is None:
-            init_str = ";"
+            self._write(";")
         elif node.is_init_decl:
-            init_str = self.stringify(node.init)
+            self._write_node(node.init)
         else:
-            init_str = (
-                ", ".join(self.stringify(init) for init in node.init.get_children())
-                + ";"
-            )
+            self._write_nodes(node.init.get_children(), ", ")
+            self._write(";")
 
         if node.condition is None:
-            cond_str = ";"
-        else:
-            cond_str = " " + self.stringify(node.condition) + ";"
-
-        if node.update is None:
-            update_str = ""
-        else:
-            update_str = " " + ", ".join(
-                self.stringify(u) for u in node.update.get_children()
-            )
-
-        body_str = self.stringify(node.body)
-        return f"for ({init_str}{cond_str}{update_str}) {body_str}"
-
-    def stringify_GotoStatement(self, node: GotoStatement) -> str:
-        return f"goto {self.stringify(node.label)};"
-
-    def stringify_IfStatement(self, node: IfStatement) -> str:
-        cond_str = self.stringify(node.condition)
-        then_str = self.stringify(node.consequence)
-        if node.alternate is None:
-            return f"if ({cond_str}) {then_str}"
-        else:
-            else_str = self.stringify(node.alternate)
-            return f"if ({cond_str}) {then_str} else {else_str}"
-
-    def stringify_LabeledStatement(self, node: LabeledStatement) -> str:
-        return f"{self.stringify(node.label)}: {self.stringify(node.stmt)}"
-
-    def stringify_LambdaExpression(self, node: LambdaExpression) -> str:
-        params_str = ", ".join(
-            [self.stringify(param) for param in node.params.get_children()]
-        )
-        body_str = self.stringify(node.body)
-
-        if not node.parenthesized:
-            return f"{params_str} -> {body_str}"
+            self._write(";")
         else:
-            return f"({params_str}) -> {body_str}"
-
-    def stringify_ReturnStatement(self, node: ReturnStatement) -> str:
+            self._write(" ")
+            self._write_node(node.condition)
+            self._write(";")
+
+        if node.update is not None:
+            self._write(" ")
+            self._write_nodes(node.update.get_children(), ", ")
+
+        self._write(") ")
+        self._write_node(node.body)
+
+    def stringify_GotoStatement(self, node: GotoStatement):
+        self._write("goto ")
+        self._write_node(node.label)
+        self._write(";")
+
+    def stringify_IfStatement(self, node: IfStatement):
+        self._write("if (")
+        self._write_node(node.condition)
+        self._write(") ")
+        self._write_node(node.consequence)
+        if node.alternate is not None:
+            self._write(" else ")
+            self._write_node(node.alternate)
+
+    def stringify_LabeledStatement(self, node: LabeledStatement):
+        self._write_node(node.label)
+        self._write(": ")
+        self._write_node(node.stmt)
+
+    def stringify_LambdaExpression(self, node: LambdaExpression):
+        if node.parenthesized:
+            self._write("(")
+        self._write_nodes(node.params.get_children(), ", ")
+        if node.parenthesized:
+            self._write(")")
+        self._write(" -> ")
+        self._write_node(node.body)
+
+    def stringify_ReturnStatement(self, node: ReturnStatement):
         if node.expr is None:
-            return "return;"
+            self._write("return;")
         else:
-            return f"return {self.stringify(node.expr)};"
+            self._write("return ")
+            self._write_node(node.expr)
+            self._write(";")
 
-    def stringify_SwitchCase(self, node: SwitchCase) -> str:
+    def stringify_SwitchCase(self, node: SwitchCase):
         if node.case is not None:
-            case_str = f"case {self.stringify(node.case)}:"
+            self._write("case ")
+            self._write_node(node.case)
+            self._write(":")
         else:
-            case_str = "default:"
-        stmts_str = "\n".join(
-            [self.stringify(stmt) for stmt in node.stmts.get_children()]
-        )
-        return f"{case_str}\n{stmts_str}"
-
-    def stringify_SwitchStatement(self, node: SwitchStatement) -> str:
-        cond_str = self.stringify(node.condition)
-        cases_str = "\n".join(
-            [self.stringify(case) for case in node.cases.get_children()]
-        )
-        return f"switch ({cond_str}) {{\n{cases_str}\n}}"
-
-    def stringify_SynchronizedStatement(self, node: SynchronizedStatement) -> str:
-        expr_str = self.stringify(node.expr)
-        body_str = self.stringify(node.body)
-        return f"synchronized {expr_str} {body_str}"
-
-    def stringify_ThrowStatement(self, node: ThrowStatement) -> str:
-        return f"throw {self.stringify(node.expr)};"
-
-    def stringify_CatchClause(self, node: CatchClause) -> str:
+            self._write("default:")
+        self._write("\n")
+        self._write_nodes(node.stmts.get_children(), "\n")
+
+    def stringify_SwitchStatement(self, node: SwitchStatement):
+        self._write("switch (")
+        self._write_node(node.condition)
+        self._write(") {\n")
+        self._write_nodes(node.cases.get_children(), "\n")
+        self._write("\n}")
+
+    def stringify_SynchronizedStatement(self, node: SynchronizedStatement):
+        self._write("synchronized ")
+        self._write_node(node.expr)
+        self._write(" ")
+        self._write_node(node.body)
+
+    def stringify_ThrowStatement(self, node: ThrowStatement):
+        self._write("throw ")
+        self._write_node(node.expr)
+        self._write(";")
+
+    def stringify_CatchClause(self, node: CatchClause):
         assert node.exception is not None
         assert node.catch_types is not None
 
-        catch_types_str = " | ".join(
-            [self.stringify(t) for t in node.catch_types.get_children()]
-        )
-        exception_str = self.stringify(node.exception)
-        body_str = self.stringify(node.body)
-
+        self._write("catch (")
         if node.modifiers is not None:
-            modifiers_str = self.stringify(node.modifiers)
-            return (
-                f"catch ({modifiers_str} {catch_types_str} {exception_str}) {body_str}"
-            )
-        else:
-            return f"catch ({catch_types_str} {exception_str}) {body_str}"
-
-    def stringify_FinallyClause(self, node: FinallyClause) -> str:
-        body_str = self.stringify(node.body)
-        return f"finally {body_str}"
-
-    def stringify_TryStatement(self, node: TryStatement) -> str:
+            self._write_node(node.modifiers)
+            self._write(" ")
+        self._write_nodes(node.catch_types.get_children(), " | ")
+        self._write(" ")
+        self._write_node(node.exception)
+        self._write(") ")
+        self._write_node(node.body)
+
+    def stringify_FinallyClause(self, node: FinallyClause):
+        self._write("finally ")
+        self._write_node(node.body)
+
+    def stringify_TryStatement(self, node: TryStatement):
         assert node.handlers is not None
 
-        body_str = self.stringify(node.body)
-        handlers_str = "\n".join(
-            [self.stringify(handler) for handler in node.handlers.get_children()]
-        )
+        self._write("try ")
+        self._write_node(node.body)
+        self._write("\n")
+        self._write_nodes(node.handlers.get_children(), "\n")
         if node.finalizer is not None:
-            finalizer_str = self.stringify(node.finalizer)
-            return f"try {body_str}\n{handlers_str}\n{finalizer_str}"
-        else:
-            return f"try {body_str}\n{handlers_str}"
+            self._write("\n")
+            self._write_node(node.finalizer)
 
-    def stringify_TryResource(self, node: TryResource) -> str:
-        resource_str = self.stringify(node.resource)
-        if is_expression(node.resource):
-            return resource_str
-        else:
-            return resource_str[:-1]  # remove semicolon
-
-    def stringify_TryWithResourcesStatement(
-        self, node: TryWithResourcesStatement
-    ) -> str:
-        resource_str = "; ".join(
-            self.stringify(res) for res in node.resources.get_children()
-        )
-        body_str = self.stringify(node.body)
+    def stringify_TryResource(self, node: TryResource):
+        self._write_node(node.resource)
+        if not is_expression(node.resource):
+            self._drop_last_char()  # remove semicolon
 
-        res_str = f"try ({resource_str}) {body_str}"
+    def stringify_TryWithResourcesStatement(self, node: TryWithResourcesStatement):
+        self._write("try (")
+        self._write_nodes(node.resources.get_children(), "; ")
+        self._write(") ")
+        self._write_node(node.body)
 
         if node.handlers is not None:
-            handlers_str = "\n".join(
-                [self.stringify(handler) for handler in node.handlers.get_children()]
-            )
-            res_str += f"\n{handlers_str}"
+            self._write("\n")
+            self._write_nodes(node.handlers.get_children(), "\n")
 
         if node.finalizer is not None:
-            finalizer_str = self.stringify(node.finalizer)
-            res_str += f"\n{finalizer_str}"
-
-        return res_str
-
-    def stringify_WhileStatement(self, node: WhileStatement) -> str:
-        cond_str = self.stringify(node.condition)
-        body_str = self.stringify(node.body)
-        return f"while ({cond_str}) {body_str}"
-
-    def stringify_YieldStatement(self, node: YieldStatement) -> str:
-        return f"yield {self.stringify(node.expr)};"
-
-    def stringify_DimensionSpecifier(self, node: DimensionSpecifier) -> str:
+            self._write("\n")
+            self._write_node(node.finalizer)
+
+    def stringify_WhileStatement(self, node: WhileStatement):
+        self._write("while (")
+        self._write_node(node.condition)
+        self._write(") ")
+        self._write_node(node.body)
+
+    def stringify_YieldStatement(self, node: YieldStatement):
+        self._write("yield ")
+        self._write_node(node.expr)
+        self._write(";")
+
+    def stringify_DimensionSpecifier(self, node: DimensionSpecifier):
+        self._write("[")
         if node.expr is not None:
-            return f"[{self.stringify(node.expr)}]"
-        else:
-            return "[]"
+            self._write_node(node.expr)
+        self._write("]")
 
-    def stringify_Dimensions(self, node: Dimensions) -> str:
-        return "".join([self.stringify(dim) for dim in node.get_children()])
+    def stringify_Dimensions(self, node: Dimensions):
+        self._write_nodes(node.get_children(), "")
 
-    def stringify_TypeIdentifier(self, node: TypeIdentifier) -> str:
+    def stringify_TypeIdentifier(self, node: TypeIdentifier):
+        self._write(node.type_identifier)
         if node.dimension is not None:
-            dim_str = self.stringify(node.dimension)
-            return f"{node.type_identifier}{dim_str}"
-        else:
-            return node.type_identifier
+            self._write_node(node.dimension)
 
-    def stringify_TypeParameter(self, node: TypeParameter) -> str:
+    def stringify_TypeParameter(self, node: TypeParameter):
+        self._write(node.type_identifier)
         if node.extends is not None:
-            bounds_str = " & ".join(
-                [self.stringify(type_id) for type_id in node.extends.get_children()]
-            )
-            return f"{node.type_identifier} extends {bounds_str}"
-        else:
-            return node.type_identifier
+            self._write(" extends ")
+            self._write_nodes(node.extends.get_children(), " & ")
 
-    def stringify_TypeParameterList(self, node: TypeParameterList) -> str:
-        body_str = ", ".join(
-            [self.stringify(type_param) for type_param in node.get_children()]
-        )
-        return f"<{body_str}>"
+    def stringify_TypeParameterList(self, node: TypeParameterList):
+        self._write("<")
+        self._write_nodes(node.get_children(), ", ")
+        self._write(">")
 
-    def stringify_InitializingDeclarator(self, node: InitializingDeclarator) -> str:
+    def stringify_InitializingDeclarator(self, node: InitializingDeclarator):
+        self._write_node(node.declarator)
         if is_expression(node.value):
-            return f"{self.stringify(node.declarator)} = {self.stringify(node.value)}"
+            self._write(" = ")
+            self._write_node(node.value)
         else:
-            arg_list = ", ".join(
-                [self.stringify(arg) for arg in node.value.get_children()]
-            )
-            return f"{self.stringify(node.declarator)}({arg_list})"
+            self._write("(")
+            self._write_nodes(node.value.get_children(), ", ")
+            self._write(")")
 
-    def stringify_VariableDeclarator(self, node: VariableDeclarator) -> str:
-        return self.stringify(node.decl_id)
+    def stringify_VariableDeclarator(self, node: VariableDeclarator):
+        self._write_node(node.decl_id)
 
-    def stringify_PointerDeclarator(self, node: PointerDeclarator) -> str:
-        return f"*{self.stringify(node.declarator)}"
+    def stringify_PointerDeclarator(self, node: PointerDeclarator):
+        self._write("*")
+        self._write_node(node.declarator)
 
-    def stringify_ReferenceDeclarator(self, node: ReferenceDeclarator) -> str:
-        return f'{"&" if not node.r_ref else "&&"}{self.stringify(node.declarator)}'
+    def stringify_ReferenceDeclarator(self, node: ReferenceDeclarator):
+        self._write("&" if not node.r_ref else "&&")
+        self._write_node(node.declarator)
 
-    def stringify_ArrayDeclarator(self, node: ArrayDeclarator) -> str:
-        return f"{self.stringify(node.declarator)}{self.stringify(node.dim)}"
+    def stringify_ArrayDeclarator(self, node: ArrayDeclarator):
+        self._write_node(node.declarator)
+        self._write_node(node.dim)
 
-    def stringify_VariadicParameter(self, node: VariadicParameter) -> str:
-        return "..."
+    def stringify_VariadicParameter(self, node: VariadicParameter):
+        self._write("...")
 
-    def stringify_UntypedParameter(self, node: UntypedParameter) -> str:
-        return self.stringify(node.declarator)
+    def stringify_UntypedParameter(self, node: UntypedParameter):
+        self._write_node(node.declarator)
 
-    def stringify_TypedFormalParameter(self, node: TypedFormalParameter) -> str:
+    def stringify_TypedFormalParameter(self, node: TypedFormalParameter):
+        self._write_node(node.decl_type)
         if node.declarator is not None:
-            return f"{self.stringify(node.decl_type)} {self.stringify(node.declarator)}"
-        else:
-            return self.stringify(node.decl_type)
+            self._write(" ")
+            self._write_node(node.declarator)
 
-    def stringify_SpreadParameter(self, node: SpreadParameter) -> str:
-        return f"{self.stringify(node.decl_type)} ...{self.stringify(node.declarator)}"
+    def stringify_SpreadParameter(self, node: SpreadParameter):
+        self._write_node(node.decl_type)
+        self._write(" ...")
+        self._write_node(node.declarator)
 
-    def stringify_FunctionDeclarator(self, node: FunctionDeclarator) -> str:
-        params_str = ", ".join(
-            [self.stringify(param) for param in node.parameters.get_children()]
-        )
-        return f"{self.stringify(node.declarator)}({params_str})"
+    def stringify_FunctionDeclarator(self, node: FunctionDeclarator):
+        self._write_node(node.declarator)
+        self._write("(")
+        self._write_nodes(node.parameters.get_children(), ", ")
+        self._write(")")
 
-    def stringify_FunctionHeader(self, node: FunctionHeader) -> str:
-        if node.return_type is None:
-            ret_type_str = ""
-        else:
-            ret_type_str = self.stringify(node.return_type)
-        decl_str = self.stringify(node.func_decl)
-        res = f"{ret_type_str} {decl_str}"
+    def stringify_FunctionHeader(self, node: FunctionHeader):
+        if node.modifiers is not None:
+            self._write_node(node.modifiers)
+            self._write(" ")
 
         if node.type_params is not None:
-            type_param_str = self.stringify(node.type_params)
-            res = f"{type_param_str} {res}"
+            self._write_node(node.type_params)
+            self._write(" ")
 
-        if node.modifiers is not None:
-            modifiers_str = self.stringify(node.modifiers)
-            res = f"{modifiers_str} {res}"
+        if node.return_type is not None:
+            self._write_node(node.return_type)
+        self._write(" ")
+        self._write_node(node.func_decl)
 
         if node.throws is not None:
-            throws_str = ", ".join(
-                self.stringify(throw) for throw in node.throws.get_children()
-            )
-            res = f"{res} throws {throws_str}"
-
-        return res
+            self._write(" throws ")
+            self._write_nodes(node.throws.get_children(), ", ")
 
-    def stringify_FunctionDeclaration(self, node: FunctionDeclaration) -> str:
-        header_str = self.stringify(node.header)
-        body_str = self.stringify(node.body)
-        return f"{header_str} {body_str}"
+    def stringify_FunctionDeclaration(self, node: FunctionDeclaration):
+        self._write_node(node.header)
+        self._write(" ")
+        self._write_node(node.body)
 
-    def stringify_DeclaratorType(self, node: DeclaratorType) -> str:
+    def stringify_DeclaratorType(self, node: DeclaratorType):
         if node.prefix_modifiers is not None:
-            prefix_str = self.stringify(node.prefix_modifiers) + " "
-        else:
-            prefix_str = ""
-
-        if node.postfix_modifiers is not None:
-            postfix_str = " " + self.stringify(node.postfix_modifiers)
-        else:
-            postfix_str = ""
-
-        return f"{prefix_str}{self.stringify(node.type_id)}{postfix_str}"
-
-    def stringify_LocalVariableDeclaration(self, node: LocalVariableDeclaration) -> str:
-        decl_strs = ", ".join(
-            self.stringify(decl) for decl in node.declarators.get_children()
-        )
-        res = f"{self.stringify(node.type)} {decl_strs};"
-        return res
-
-    def stringify_TypeParameterDeclaration(self, node: TypeParameterDeclaration) -> str:
-        return (
-            f"{self.stringify(node.typename_opt.value)} {self.stringify(node.type_id)}"
-        )
-
-    def stringify_TemplateParameterList(self, node: TemplateParameterList) -> str:
-        param_str = ", ".join([self.stringify(param) for param in node.node_list])
-        return f"<{param_str}>"
-
-    def stringify_TemplateDeclaration(self, node: TemplateDeclaration) -> str:
-        params_str = self.stringify(node.params)
-        func_decl_str = self.stringify(node.func_decl)
-        return f"template {params_str}\n{func_decl_str}"
-
-    def stringify_AnonymousDeclarator(self, node: AnonymousDeclarator) -> str:
-        return ""
-
-    def stringify_SpreadElement(self, node: SpreadElement) -> str:
-        expr_str = self.stringify(node.expr)
-        return f"...{expr_str}"
-
-    def stringify_AwaitExpression(self, node: AwaitExpression) -> str:
-        expr_str = self.stringify(node.expr)
-        return f"await {expr_str}"
+            self._write_node(node.prefix_modifiers)
+            self._write(" ")
 
-    def stringify_WithStatement(self, node: WithStatement) -> str:
-        obj_str = self.stringify(node.object)
-        body_str = self.stringify(node.body)
-        return f"with ({obj_str}) {body_str}"
+        self._write_node(node.type_id)
 
-    def stringify_KeyValuePair(self, node: KeyValuePair) -> str:
-        key_str = self.stringify(node.key)
-        value_str = self.stringify(node.value)
-
-        return f"{key_str}: {value_str}"
-
-    def _stringify_ObjectMethod(self, node: FunctionDeclaration) -> str:
-        header_str = self.stringify(node.header)
-        body_str = self.stringify(node.body)
-        return f"{header_str} {body_str}"
-
-    def stringify_Object(self, node: Object) -> str:
-        member_strs = []
-        for member in node.members.get_children():
+        if node.postfix_modifiers is not None:
+            self._write(" ")
+            self._write_node(node.postfix_modifiers)
+
+    def stringify_LocalVariableDeclaration(self, node: LocalVariableDeclaration):
+        self._write_node(node.type)
+        self._write(" ")
+        self._write_nodes(node.declarators.get_children(), ", ")
+        self._write(";")
+
+    def stringify_TypeParameterDeclaration(self, node: TypeParameterDeclaration):
+        self._write_node(node.typename_opt.value)
+        self._write(" ")
+        self._write_node(node.type_id)
+
+    def stringify_TemplateParameterList(self, node: TemplateParameterList):
+        self._write("<")
+        self._write_nodes(node.node_list, ", ")
+        self._write(">")
+
+    def stringify_TemplateDeclaration(self, node: TemplateDeclaration):
+        self._write("template ")
+        self._write_node(node.params)
+        self._write("\n")
+        self._write_node(node.func_decl)
+
+    def stringify_AnonymousDeclarator(self, node: AnonymousDeclarator):
+        pass
+
+    def stringify_SpreadElement(self, node: SpreadElement):
+        self._write("...")
+        self._write_node(node.expr)
+
+    def stringify_AwaitExpression(self, node: AwaitExpression):
+        self._write("await ")
+        self._write_node(node.expr)
+
+    def stringify_WithStatement(self, node: WithStatement):
+        self._write("with (")
+        self._write_node(node.object)
+        self._write(") ")
+        self._write_node(node.body)
+
+    def stringify_KeyValuePair(self, node: KeyValuePair):
+        self._write_node(node.key)
+        self._write(": ")
+        self._write_node(node.value)
+
+    def _stringify_ObjectMethod(self, node: FunctionDeclaration):
+        self._write_node(node.header)
+        self._write(" ")
+        self._write_node(node.body)
+
+    def stringify_Object(self, node: Object):
+        self._write("{\n")
+        for i, member in enumerate(node.members.get_children()):
+            if i > 0:
+                self._write(",\n")
             if isinstance(member, FunctionDeclaration):
-                member_strs.append(self._stringify_ObjectMethod(member))
+                self._stringify_ObjectMethod(member)
             else:
-                member_strs.append(self.stringify(member))
-
-        member_str = ",\n".join(member_strs)
-        return f"{{\n{member_str}\n}}"
+                self._write_node(member)
+        self._write("\n}")
 
-    def stringify_DestructuringDeclarator(self, node: DestructuringDeclarator) -> str:
-        pattern_str = self.stringify(node.pattern)
-        return pattern_str
+    def stringify_DestructuringDeclarator(self, node: DestructuringDeclarator):
+        self._write_node(node.pattern)
 
-    def stringify_ComputedPropertyName(self, node: ComputedPropertyName) -> str:
-        expr_str = self.stringify(node.expr)
-        return f"[{expr_str}]"
+    def stringify_ComputedPropertyName(self, node: ComputedPropertyName):
+        self._write("[")
+        self._write_node(node.expr)
+        self._write("]")
@@ -38,204 +38,193 @@ class JavaScriptStringifier(BaseStringifier):
         super().__init__()
         self.semicolon = semicolon
 
-    def _semicolon(self, input_str: str) -> str:
+    def _semicolon(self):
         if self.semicolon:
-            return f"{input_str};"
-        else:
-            return input_str
+            self._write(";")
 
-    def stringify_ArrayExpression(self, node: ArrayExpression) -> str:
-        children_strs = [self.stringify(elem) for elem in node.elements.get_children()]
-        return f'[{", ".join(children_strs)}]'
+    def stringify_ArrayExpression(self, node: ArrayExpression):
+        self._write("[")
+        self._write_nodes(node.elements.get_children(), ", ")
+        self._write("]")
 
-    def stringify_ArrayAccess(self, node: ArrayAccess) -> str:
+    def stringify_ArrayAccess(self, node: ArrayAccess):
         if node.optional:
-            return f"{self.stringify(node.array)}?.[{self.stringify(node.index)}]"
+            self._write_node(node.array)
+            self._write("?.[")
+            self._write_node(node.index)
+            self._write("]")
         else:
-            return super().stringify_ArrayAccess(node)
-
-    def stringify_FieldAccess(self, node: FieldAccess) -> str:
-        object_str = self.stringify(node.object)
-        field_str = self.stringify(node.field)
+            super().stringify_ArrayAccess(node)
 
-        if node.optional:
-            return f"{object_str}?.{field_str}"
-        else:
-            return f"{object_str}.{field_str}"
+    def stringify_FieldAccess(self, node: FieldAccess):
+        self._write_node(node.object)
+        self._write("?." if node.optional else ".")
+        self._write_node(node.field)
 
-    def stringify_CallExpression(self, node: CallExpression) -> str:
-        arg_list_strs = [self.stringify(arg) for arg in node.args.get_children()]
-        arg_list = ", ".join(arg_list_strs)
-        if node.optional:
-            return f"{self.stringify(node.callee)}?.({arg_list})"
-        else:
-            return f"{self.stringify(node.callee)}({arg_list})"
+    def stringify_CallExpression(self, node: CallExpression):
+        self._write_node(node.callee)
+        self._write("?.(" if node.optional else "(")
+        self._write_nodes(node.args.get_children(), ", ")
+        self._write(")")
 
-    def stringify_YieldStatement(self, node: YieldStatement) -> str:
+    def stringify_YieldStatement(self, node: YieldStatement):
         if node.expr is None:
-            return "yield"
-        elif node.is_delegate:
-            return f"yield* {self.stringify(node.expr)}"
+            self._write("yield")
         else:
-            return f"yield {self.stringify(node.expr)}"
+            self._write("yield* " if node.is_delegate else "yield ")
+            self._write_node(node.expr)
 
-    def stringify_SpreadElement(self, node: SpreadElement) -> str:
-        expr_str = self.stringify(node.expr)
-        return f"...{expr_str}"
+    def stringify_SpreadElement(self, node: SpreadElement):
+        self._write("...")
+        self._write_node(node.expr)
 
-    def stringify_AwaitExpression(self, node: AwaitExpression) -> str:
-        expr_str = self.stringify(node.expr)
-        return f"await {expr_str}"
+    def stringify_AwaitExpression(self, node: AwaitExpression):
+        self._write("await ")
+        self._write_node(node.expr)
 
-    def stringify_ExpressionStatement(self, node: ExpressionStatement) -> str:
-        expr_str = self.stringify(node.expr)
-        return self._semicolon(expr_str)
+    def stringify_ExpressionStatement(self, node: ExpressionStatement):
+        self._write_node(node.expr)
+        self._semicolon()
 
-    def stringify_DoStatement(self, node: DoStatement) -> str:
-        do_str = (
-            f"do\n{self.stringify(node.body)}\n"
-            f"while ({self.stringify(node.condition)})"
-        )
-        return self._semicolon(do_str)
+    def stringify_DoStatement(self, node: DoStatement):
+        self._write("do\n")
+        self._write_node(node.body)
+        self._write("\nwhile (")
+        self._write_node(node.condition)
+        self._write(")")
+        self._semicolon()
 
-    def stringify_BreakStatement(self, node: BreakStatement) -> str:
+    def stringify_BreakStatement(self, node: BreakStatement):
         if node.label is not None:
-            break_str = f"break {self.stringify(node.label)}"
+            self._write("break ")
+            self._write_node(node.label)
         else:
-            break_str = "break"
-        return self._semicolon(break_str)
+            self._write("break")
+        self._semicolon()
 
-    def stringify_ContinueStatement(self, node: ContinueStatement) -> str:
+    def stringify_ContinueStatement(self, node: ContinueStatement):
         if node.label is not None:
-            continue_str = f"continue {self.stringify(node.label)}"
+            self._write("continue ")
+            self._write_node(node.label)
         else:
-            continue_str = "continue"
-        return self._semicolon(continue_str)
+            self._write("continue")
+        self._semicolon()
 
-    def stringify_ReturnStatement(self, node: ReturnStatement) -> str:
+    def stringify_ReturnStatement(self, node: ReturnStatement):
         if node.expr is None:
-            return_str = "return"
+            self._write("return")
         else:
-            return_str = f"return {self.stringify(node.expr)}"
-        return self._semicolon(return_str)
+            self._write("return ")
+            self._write_node(node.expr)
+        self._semicolon()
 
-    def stringify_ThrowStatement(self, node: ThrowStatement) -> str:
-        return self._semicolon(f"throw {self.stringify(node.expr)}")
+    def stringify_ThrowStatement(self, node: ThrowStatement):
+        self._write("throw ")
+        self._write_node(node.expr)
+        self._semicolon()
 
-    def stringify_CatchClause(self, node: CatchClause) -> str:
-        body_str = self.stringify(node.body)
+    def stringify_CatchClause(self, node: CatchClause):
+        self._write("catch ")
         if node.exception is not None:
-            parameter_str = f"({self.stringify(node.exception)})"
-            return f"catch {parameter_str} {body_str}"
-        else:
-            return f"catch {body_str}"
-
-    def stringify_WithStatement(self, node: WithStatement) -> str:
-        obj_str = self.stringify(node.object)
-        body_str = self.stringify(node.body)
-        return f"with ({obj_str}) {body_str}"
+            self._write("(")
+            self._write_node(node.exception)
+            self._write(") ")
+        self._write_node(node.body)
 
-    def stringify_AnonymousDeclarator(self, node: AnonymousDeclarator) -> str:
-        return ""
+    def stringify_WithStatement(self, node: WithStatement):
+        self._write("with (")
+        self._write_node(node.object)
+        self._write(") ")
+        self._write_node(node.body)
 
-    def stringify_FunctionHeader(self, node: FunctionHeader) -> str:
-        decl_str = self.stringify(node.func_decl)
+    def stringify_AnonymousDeclarator(self, node: AnonymousDeclarator):
+        pass
 
+    def stringify_FunctionHeader(self, node: FunctionHeader):
         if node.modifiers is not None:
-            modifier_str = self.stringify(node.modifiers)
-            return f"{modifier_str} function {decl_str}"
-        else:
-            return f"function {decl_str}"
-
-    def stringify_LambdaExpression(self, node: LambdaExpression) -> str:
-        params_str = ", ".join(
-            [self.stringify(param) for param in node.params.get_children()]
-        )
-        body_str = self.stringify(node.body)
+            self._write_node(node.modifiers)
+            self._write(" ")
+        self._write("function ")
+        self._write_node(node.func_decl)
 
+    def stringify_LambdaExpression(self, node: LambdaExpression):
         if node.modifiers is not None:
-            modifier_str = self.stringify(node.modifiers) + " "
-        else:
-            modifier_str = ""
+            self._write_node(node.modifiers)
+            self._write(" ")
 
         if node.parenthesized:
-            return f"{modifier_str}({params_str}) => {body_str}"
-        else:
-            return f"{modifier_str}{params_str} => {body_str}"
-
-    def stringify_KeyValuePair(self, node: KeyValuePair) -> str:
-        key_str = self.stringify(node.key)
-        value_str = self.stringify(node.value)
+            self._write("(")
+        self._write_nodes(node.params.get_children(), ", ")
+        if node.parenthesized:
+            self._write(")")
 
-        return f"{key_str}: {value_str}"
+        self._write(" => ")
+        self._write_node(node.body)
 
-    def _stringify_MethodHeader(self, node: FunctionHeader) -> str:
-        decl_str = self.stringify(node.func_decl)
+    def stringify_KeyValuePair(self, node: KeyValuePair):
+        self._write_node(node.key)
+        self._write(": ")
+        self._write_node(node.value)
 
+    def _stringify_MethodHeader(self, node: FunctionHeader):
         if node.modifiers is not None:
-            modifier_str = self.stringify(node.modifiers)
-            return f"{modifier_str} {decl_str}"
-        else:
-            return decl_str
-
-    def _stringify_ObjectMethod(self, node: FunctionDeclaration) -> str:
-        header_str = self.stringify(node.header)
-        body_str = self.stringify(node.body)
-        return f"{header_str} {body_str}"
-
-    def stringify_Object(self, node: Object) -> str:
-        member_strs = []
-        for member in node.members.get_children():
+            self._write_node(node.modifiers)
+            self._write(" ")
+        self._write_node(node.func_decl)
+
+    def _stringify_ObjectMethod(self, node: FunctionDeclaration):
+        self._write_node(node.header)
+        self._write(" ")
+        self._write_node(node.body)
+
+    def stringify_Object(self, node: Object):
+        self._write("{\n")
+        for i, member in enumerate(node.members.get_children()):
+            if i > 0:
+                self._write(",\n")
             if isinstance(member, FunctionDeclaration):
-                member_strs.append(self._stringify_ObjectMethod(member))
+                self._stringify_ObjectMethod(member)
             else:
-                member_strs.append(self.stringify(member))
+                self._write_node(member)
+        self._write("\n}")
 
-        member_str = ",\n".join(member_strs)
-        return f"{{\n{member_str}\n}}"
+    def stringify_DestructuringDeclarator(self, node: DestructuringDeclarator):
+        self._write_node(node.pattern)
 
-    def stringify_DestructuringDeclarator(self, node: DestructuringDeclarator) -> str:
-        pattern_str = self.stringify(node.pattern)
-        return pattern_str
+    def stringify_ComputedPropertyName(self, node: ComputedPropertyName):
+        self._write("[")
+        self._write_node(node.expr)
+        self._write("]")
 
-    def stringify_ComputedPropertyName(self, node: ComputedPropertyName) -> str:
-        expr_str = self.stringify(node.expr)
-        return f"[{expr_str}]"
-
-    def stringify_InitializingDeclarator(self, node: InitializingDeclarator) -> str:
+    def stringify_InitializingDeclarator(self, node: InitializingDeclarator):
+        self._write_node(node.declarator)
         if (
             is_expression(node.value)
             or node.value.node_type == NodeType.FUNCTION_DEFINITION
         ):
-            return f"{self.stringify(node.declarator)} = {self.stringify(node.value)}"
+            self._write(" = ")
+            self._write_node(node.value)
         else:
-            arg_list = ", ".join(
-                [self.stringify(arg) for arg in node.value.get_children()]
-            )
-            return f"{self.stringify(node.declarator)}({arg_list})"
+            self._write("(")
+            self._write_nodes(node.value.get_children(), ", ")
+            self._write(")")
 
-    def stringify_UnaryExpression(self, node: UnaryExpression) -> str:
+    def stringify_UnaryExpression(self, node: UnaryExpression):
         op = node.op
         if op in {UnaryOps.TYPEOF, UnaryOps.DELETE}:
-            return f"{op.value} {self.stringify(node.operand)}"
+            self._write(f"{op.value} ")
         else:
-            return f"{op.value}{self.stringify(node.operand)}"
+            self._write(op.value)
+        self._write_node(node.operand)
 
-    def stringify_TryStatement(self, node: TryStatement) -> str:
-        body_str = self.stringify(node.body)
+    def stringify_TryStatement(self, node: TryStatement):
+        self._write("try ")
+        self._write_node(node.body)
 
         if node.handlers is not None:
-            handlers_str = "\n".join(
-                [self.stringify(handler) for handler in node.handlers.get_children()]
-            )
-            if node.finalizer is not None:
-                finalizer_str = self.stringify(node.finalizer)
-                return f"try {body_str}\n{handlers_str}\n{finalizer_str}"
-            else:
-                return f"try {body_str}\n{handlers_str}"
-        else:
-            if node.finalizer is not None:
-                finalizer_str = self.stringify(node.finalizer)
-                return f"try {body_str}\n{finalizer_str}"
-            else:
-                return f"try {body_str}"
+            self._write("\n")
+            self._write_nodes(node.handlers.get_children(), "\n")
+
+        if node.finalizer is not None:
+            self._write("\n")
+            self._write_node(node.finalizer)
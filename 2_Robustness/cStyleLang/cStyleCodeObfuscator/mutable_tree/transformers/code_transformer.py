@@ -6,6 +6,11 @@ from typing import Dict
 
 class CodeTransformer:
     name: str
+    # passed on to the visitors, see Visitor.iterative
+    iterative: bool = False
+    # False when the visitors draw from an unseeded RNG, so the same input can
+    # give different outputs (transform caches must not persist those)
+    deterministic: bool = True
 
     @abc.abstractmethod
     def get_available_transforms(self):
@@ -14,6 +14,8 @@ class CondBlockSwapTransformer(CodeTransformer):
         return [self.TRANSFORM_IF_BLOCK_SWAP]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_IF_BLOCK_SWAP: CondBlockSwapper(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
@@ -17,8 +17,10 @@ class ConditionTransformer(CodeTransformer):
         return [self.TRANSFORM_COND_TOIF]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             # self.TRANSFORM_COND_SWITCH: SwitchToIfVisitor(),
             # self.TRANSFORM_COND_TERNARY: TernaryToIfVisitor(),
             self.TRANSFORM_COND_TOIF: ConditionTransVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
@@ -5,6 +5,7 @@ from ..tree_manip.visitors import IdRenameVisitor
 
 class IdRenameTransformer(CodeTransformer):
     name = "IdRenameTransformer"
+    deterministic = False
     TRANSFORM_ID_RENAME = "IdRenameTransformer.id_rename"
 
     def __init__(self) -> None:
@@ -14,6 +15,8 @@ class IdRenameTransformer(CodeTransformer):
         return [self.TRANSFORM_ID_RENAME]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_ID_RENAME: IdRenameVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
@@ -14,6 +14,8 @@ class IfFlatNestTransformer(CodeTransformer):
         return [self.TRANSFORM_IF_FlatNest]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_IF_FlatNest: IfFlatNestTransVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
@@ -5,6 +5,7 @@ from ..tree_manip.visitors import LoopCondTransVisitor
 
 class LoopCondTransformer(CodeTransformer):
     name = "LoopCondTransformer"
+    deterministic = False
     TRANSFORM_INFLOOP_COND = "LoopCondTransformer.cond_trans"
 
     def __init__(self) -> None:
@@ -14,6 +15,8 @@ class LoopCondTransformer(CodeTransformer):
         return [self.TRANSFORM_INFLOOP_COND]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_INFLOOP_COND: LoopCondTransVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
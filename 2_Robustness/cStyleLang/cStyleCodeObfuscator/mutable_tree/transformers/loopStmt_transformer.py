@@ -14,6 +14,8 @@ class LoopStmtTransformer(CodeTransformer):
         return [self.TRANSFORM_LOOP_STMT]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_LOOP_STMT: LoopStmtTransVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
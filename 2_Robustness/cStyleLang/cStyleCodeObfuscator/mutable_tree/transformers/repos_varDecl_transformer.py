@@ -7,6 +7,7 @@ from ..tree_manip.visitors import (
 
 class ReposVarDeclTransformer(CodeTransformer):
     name = "ReposVarDeclTransformer"
+    deterministic = False
     TRANSFORM_VARDECL_RANDOM = "ReposVarDeclTransformer.random_pos"
 
     def __init__(self) -> None:
@@ -18,6 +19,8 @@ class ReposVarDeclTransformer(CodeTransformer):
         ]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_VARDECL_RANDOM: ReposVarDeclVisitor(),
-        }[dst_style].visit(node)
\ No newline at end of file
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
\ No newline at end of file
@@ -4,7 +4,11 @@ from typing import List, Dict, Sequence
 
 
 class TransformerPipeline:
-    def __init__(self, transformers: List[CodeTransformer]) -> None:
+    def __init__(
+        self, transformers: List[CodeTransformer], iterative: bool = False
+    ) -> None:
+        for transformer in transformers:
+            transformer.iterative = iterative
         self.names = [transformer.name for transformer in transformers]
         self.transformers: Dict[str, CodeTransformer] = {
             transformer.name: transformer for transformer in transformers
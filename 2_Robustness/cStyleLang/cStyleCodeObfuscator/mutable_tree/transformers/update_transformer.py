@@ -11,6 +11,7 @@ from ..tree_manip.visitors import (
 
 class UpdateTransformer(CodeTransformer):
     name = "UpdateTransformer"
+    deterministic = False
     # TRANSFORM_PREFIX_UPDATE = "UpdateTransformer.prefix_update"
     # TRANSFORM_POSTFIX_UPDATE = "UpdateTransformer.postfix_update"
     # TRANSFORM_BINOP_UPDATE = "UpdateTransformer.binop_update"
@@ -30,10 +31,12 @@ class UpdateTransformer(CodeTransformer):
         ]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             # self.TRANSFORM_PREFIX_UPDATE: PrefixUpdateVisitor(),
             # self.TRANSFORM_POSTFIX_UPDATE: PostfixUpdateVisitor(),
             # self.TRANSFORM_BINOP_UPDATE: BinopUpdateVisitor(),
             # self.TRANSFORM_ASSIGN_UPDATE: AssignUpdateVisitor(),
             self.TRANSFORM_VAREXP_UPDATE: UpdateTransVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
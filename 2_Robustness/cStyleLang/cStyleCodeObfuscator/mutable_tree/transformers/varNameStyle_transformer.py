@@ -7,6 +7,7 @@ from ..tree_manip.visitors import (
 
 class VarNameStyleTransformer(CodeTransformer):
     name = "VarNameStyleTransformer"
+    deterministic = False
     TRANSFORM_VARNAME_STYLE = "VarNameStyleTransformer.varname_style"
 
     def __init__(self) -> None:
@@ -18,6 +19,8 @@ class VarNameStyleTransformer(CodeTransformer):
         ]
 
     def mutable_tree_transform(self, node: Node, dst_style: str):
-        return {
+        visitor = {
             self.TRANSFORM_VARNAME_STYLE: VarNameStyleTransVisitor(),
-        }[dst_style].visit(node)
+        }[dst_style]
+        visitor.iterative = self.iterative
+        return visitor.visit(node)
@@ -49,14 +49,19 @@ class LoopStmtTransVisitor(TransformingVisitor):
 
     def _collect_continue_stmts(self, node: Node, parent: Optional[Node] = None) -> List[Tuple[Node, Optional[Node]]]:
         """Collect `continue` statements that are in the same loop scope (do not descend into nested loops)."""
-        if isinstance(node, ContinueStatement):
-            return [(node, parent)]
         results: List[Tuple[Node, Optional[Node]]] = []
-        for child_attr in node.get_children_names():
-            child = node.get_child_at(child_attr)
-            # only collect in the same scope: stop descending into nested loops
-            if child is not None and not isinstance(child, ForStatement) and not isinstance(child, WhileStatement):
-                results += self._collect_continue_stmts(child, node)
+        # pre-order walk with an explicit stack, so long expression chains do not hit the recursion limit
+        stack: List[Tuple[Node, Optional[Node]]] = [(node, parent)]
+        while stack:
+            cur, cur_parent = stack.pop()
+            if isinstance(cur, ContinueStatement):
+                results.append((cur, cur_parent))
+                continue
+            children = [cur.get_child_at(child_attr) for child_attr in cur.get_children_names()]
+            for child in reversed(children):
+                # only collect in the same scope: stop descending into nested loops
+                if child is not None and not isinstance(child, ForStatement) and not isinstance(child, WhileStatement):
+                    stack.append((child, cur))
         return results
 
     # ---------- for -> while ----------
@@ -45,17 +45,15 @@ def get_all_identifiers(node: Node) -> List[str]:
     # 复用 var_pos 风格的标识符收集（不做改动以最大复用）
     ids: List[str] = []
 
-    def _walk(n: Node):
+    # 显式栈前序遍历（顺序与递归版相同），超长表达式链不会触发递归深度上限
+    stack = [node]
+    while stack:
+        n = stack.pop()
         if isinstance(n, Identifier):
             ids.append(n.name)
-        else:
-            for attr in n.get_children_names():
-                ch = n.get_child_at(attr)
-                if ch is None:
-                    continue
-                _walk(ch)
-
-    _walk(node)
+            continue
+        children = [n.get_child_at(attr) for attr in n.get_children_names()]
+        stack.extend(ch for ch in reversed(children) if ch is not None)
     return ids
 
 
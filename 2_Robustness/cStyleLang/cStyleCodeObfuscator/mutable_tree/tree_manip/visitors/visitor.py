@@ -1,41 +1,83 @@
 from ...nodes import Node, NodeList, Statement
 from ...nodes import is_statement
 from ...nodes import node_factory
+from ...nodes.utils import lookup_handler
 from typing import Optional, List
 
+_DONE = object()
+
 
 class Visitor:
+    # when set, subtrees without a visit_* handler are walked with an explicit
+    # stack instead of recursive generic_visit calls, so python recursion depth
+    # only grows with the nesting of handled nodes
+    iterative: bool = False
+
+    def __init__(self, iterative: bool = False):
+        self.iterative = iterative
+
     def generic_visit(
         self,
         node: Node,
         parent: Optional[Node] = None,
         parent_attr: Optional[str] = None,
     ):
+        if self.iterative:
+            return self._iterative_generic_visit(node)
+
         for child_attr in node.get_children_names():
             child = node.get_child_at(child_attr)
             if child is not None:
                 self._visit(child, node, child_attr)
 
+    def _iterative_generic_visit(self, node: Node):
+        stack = [(node, iter(node.get_children_names()))]
+        while stack:
+            cur, child_attrs = stack[-1]
+            child_attr = next(child_attrs, _DONE)
+            if child_attr is _DONE:
+                stack.pop()
+                continue
+            child = cur.get_child_at(child_attr)
+            if child is None:
+                continue
+            visitor = lookup_handler(type(self), "visit_", type(child))
+            if visitor is None:
+                stack.append((child, iter(child.get_children_names())))
+            else:
+                visitor(self, child, cur, child_attr)
+
     def _visit(
         self,
         node: Node,
         parent: Optional[Node] = None,
         parent_attr: Optional[str] = None,
     ):
-        visitor = getattr(self, f"visit_{type(node).__name__}", self.generic_visit)
-        visitor(node, parent, parent_attr)
+        visitor = lookup_handler(type(self), "visit_", type(node))
+        if visitor is None:
+            return self.generic_visit(node, parent, parent_attr)
+        return visitor(self, node, parent, parent_attr)
 
     def visit(self, node: Node):
         self._visit(node)
 
 
 class TransformingVisitor:
+    # see Visitor.iterative
+    iterative: bool = False
+
+    def __init__(self, iterative: bool = False):
+        self.iterative = iterative
+
     def generic_visit(
         self,
         node: Node,
         parent: Optional[Node] = None,
         parent_attr: Optional[str] = None,
     ):
+        if self.iterative:
+            return self._iterative_generic_visit(node)
+
         if isinstance(node, NodeList):
             new_node_list = []
             for child_attr in node.get_children_names():
@@ -60,6 +102,52 @@ class TransformingVisitor:
 
         return (False, [])
 
+    def _iterative_generic_visit(self, node: Node):
+        # same child order and update rules as the recursive generic_visit;
+        # each frame carries the rebuilt node_list when the node is a NodeList,
+        # and the parent's list that the node is added to once it is finished
+        def _frame(n: Node, parent_list: Optional[List[Node]] = None):
+            new_node_list = [] if isinstance(n, NodeList) else None
+            return n, iter(n.get_children_names()), new_node_list, parent_list
+
+        stack = [_frame(node)]
+        while stack:
+            cur, child_attrs, new_node_list, parent_list = stack[-1]
+            child_attr = next(child_attrs, _DONE)
+            if child_attr is _DONE:
+                stack.pop()
+                if new_node_list is not None:
+                    cur.node_list = new_node_list
+                if parent_list is not None:
+                    # generic_visit never asks its parent for an update, and a
+                    # NodeList child is spliced only after its own list is rebuilt
+                    if isinstance(cur, NodeList):
+                        parent_list += cur
+                    else:
+                        parent_list.append(cur)
+                continue
+            child = cur.get_child_at(child_attr)
+            if child is None:
+                continue
+
+            visitor = lookup_handler(type(self), "visit_", type(child))
+            if visitor is None:
+                stack.append(_frame(child, new_node_list))
+                continue
+
+            should_update, new_nodes = visitor(self, child, cur, child_attr)
+            if new_node_list is not None:
+                if should_update:
+                    new_node_list += new_nodes
+                elif isinstance(child, NodeList):
+                    new_node_list += child
+                else:
+                    new_node_list.append(child)
+            elif should_update:
+                self._node_update(cur, child_attr, new_nodes)
+
+        return (False, [])
+
     def _node_update(self, node: Node, child_attr: str, new_nodes: List[Node]):
         if len(new_nodes) == 1:
             node.set_child_at(child_attr, new_nodes[0])
@@ -76,8 +164,10 @@ class TransformingVisitor:
         parent: Optional[Node] = None,
         parent_attr: Optional[str] = None,
     ):
-        visitor = getattr(self, f"visit_{type(node).__name__}", self.generic_visit)
-        return visitor(node, parent, parent_attr)
+        visitor = lookup_handler(type(self), "visit_", type(node))
+        if visitor is None:
+            return self.generic_visit(node, parent, parent_attr)
+        return visitor(self, node, parent, parent_attr)
 
     def visit(self, node: Node):
         self._visit(node)
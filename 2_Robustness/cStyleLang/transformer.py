@@ -50,13 +50,15 @@ except Exception:
     import mutable_tree.transformers as ast_transformers  # noqa: F401  # 仅用于类型提示/示例
 
 def _collect_tokens(root: tree_sitter.Node) -> List[str]:
+    # 显式栈做先序遍历：很长的表达式链嵌套极深，递归会超出 Python 递归上限
     toks: List[str] = []
-    def _walk(n: tree_sitter.Node):
+    stack = [root]
+    while stack:
+        n = stack.pop()
         if n.child_count == 0:
             toks.append(n.text.decode())
-        for ch in n.children:
-            _walk(ch)
-    _walk(root)
+        else:
+            stack.extend(reversed(n.children))
     return toks
 
 def _wrap_for_lang(code: str, lang: str) -> str:
@@ -88,6 +90,12 @@ def enumerate_feasible_keys_for_code(
     """
     per_tf_feasible: Dict[str, List[str]] = {}
 
+    # 原始代码的 token 与 key 无关，只解析一次
+    code_wrapped = _wrap_for_lang(source_code, lang)
+    if lang == "javascript":
+        code_wrapped = _normalize_js_wrapped(provider, code_wrapped, lang)
+    old_toks = _collect_tokens(parser.parse(code_wrapped.encode("utf-8")).root_node)
+
     for t in transformers:
         t_name = t.name
         feasibles: List[str] = []
@@ -101,12 +109,7 @@ def enumerate_feasible_keys_for_code(
                 continue  # 此 key 不可用
 
             # 2) 语法树 token 对比
-            code_wrapped = _wrap_for_lang(source_code, lang)
             new_code_wrapped = _wrap_for_lang(new_code, lang)
-            if lang == "javascript":
-                code_wrapped = _normalize_js_wrapped(provider, code_wrapped, lang)
-
-            code_tree = parser.parse(code_wrapped.encode("utf-8"))
             new_code_tree = parser.parse(new_code_wrapped.encode("utf-8"))
 
             # 3) 新代码可再次解析为 mutable_tree（语法有效）
@@ -116,7 +119,6 @@ def enumerate_feasible_keys_for_code(
                 feasible = False
                 continue
 
-            old_toks = _collect_tokens(code_tree.root_node)
             new_toks = _collect_tokens(new_code_tree.root_node)
             if len(old_toks) != len(new_toks):
                 feasible = True
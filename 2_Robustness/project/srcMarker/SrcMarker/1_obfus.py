@@ -2,24 +2,39 @@
 
 from tqdm import tqdm
 from argparse import ArgumentParser
-from typing import Optional, Sequence, Tuple, Dict, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple, Dict, List, Iterator
 from cStyleCodeObfuscator.code_transform_provider import CodeTransformProvider
 from cStyleCodeObfuscator.format import *
+from transform_store import TransformStore, open_transform_store, cached_code_transform
 import json
 import re
 import os
 import time
 import random
-import subprocess
 import textwrap
 import tree_sitter
 
+# local
+# PARSER_SO = "/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/cStyleLang/parser/languages.so"
+# server
+PARSER_SO = "/home/zrz/projects/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/cStyleLang/parser/languages.so"
+
+# local
+# JSON_SRC = "/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/testResult/4bit_gru_srcmarker_42_csn_java_test.jsonl"
+# JSON_DEST = "/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/obfusResult/4bit_gru_srcmarker_42_csn_java_obfus_ALL.jsonl"
+# server
+JSON_SRC = "/home/zrz/projects/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/testResult/4bit_gru_codemark_42_github_java_funcs_test.jsonl"
+JSON_DEST = "/home/zrz/projects/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/obfusResult/4bit_gru_codemark_42_github_java_funcs_obfus_AL2.jsonl"
+
+
 def count_lines_in_jsonl(file_path):
-    # 执行 wc -l 命令
-    result = subprocess.run(['wc', '-l', file_path], capture_output=True, text=True)
-    
-    # result.stdout 的格式为 '  1234 your_file.jsonl'，需要提取数字
-    line_count = int(result.stdout.split()[0])
+    # 逐块统计换行符，仅用于兼容没有 checkpoint 的旧输出文件
+    line_count = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            line_count += chunk.count(b"\n")
     return line_count
 
 def parse_args():
@@ -28,149 +43,171 @@ def parse_args():
     parser.add_argument("--sample", action="store_true", help="Enable sample mode")
     parser.add_argument("--sample_size", type=int, default=50)
     parser.add_argument("--result_dir", type=str, default="/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/obfusResult")
+    parser.add_argument("--lang", choices=["cpp", "java", "javascript"], default="java")
+    parser.add_argument("--json_src", type=str, default=JSON_SRC)
+    parser.add_argument("--json_dest", type=str, default=JSON_DEST)
+    parser.add_argument("--parser_so", type=str, default=PARSER_SO)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--max_inflight", type=int, default=None, help="Max lines submitted but not yet written (default: 4 * workers)")
+    parser.add_argument("--ckpt_every", type=int, default=64, help="Flush output and checkpoint every N lines")
+    parser.add_argument("--transform_store", type=str, default=None, help="SQLite transform cache shared across runs")
+    parser.add_argument("--iterative", action="store_true", help="Walk trees with an explicit stack (for very large or deeply nested functions)")
     return parser.parse_args()
 
-def obfus(line:str, lang:str):
+# --------------------------------------
+# 可执行变换枚举（逻辑同 cStyleLang/transformer.py）
+# --------------------------------------
+def _collect_tokens(root: tree_sitter.Node) -> List[str]:
+    # 显式栈做先序遍历：很长的表达式链嵌套极深，递归会超出 Python 递归上限
+    toks: List[str] = []
+    stack = [root]
+    while stack:
+        n = stack.pop()
+        if n.child_count == 0:
+            toks.append(n.text.decode())
+        else:
+            stack.extend(reversed(n.children))
+    return toks
+
+def _wrap_for_lang(code: str, lang: str) -> str:
+    # 与原脚本一致：Java 为了解析/比对加类包装；其它语言原样
+    if lang == "java":
+        return f"public class Test {{\n{code}\n}}"
+    return code
+
+def _normalize_js_wrapped(provider: CodeTransformProvider, code_wrapped: str, lang: str) -> str:
     from cStyleCodeObfuscator.mutable_tree.stringifiers import JavaScriptStringifier
-    import cStyleCodeObfuscator.mutable_tree.transformers as ast_transformers
-    
-    def _collect_tokens(root: tree_sitter.Node) -> List[str]:
-        toks: List[str] = []
-        def _walk(n: tree_sitter.Node):
-            if n.child_count == 0:
-                toks.append(n.text.decode())
-            for ch in n.children:
-                _walk(ch)
-        _walk(root)
-        return toks
-    
-    def _wrap_for_lang(code: str, lang: str) -> str:
-        # 与原脚本一致：Java 为了解析/比对加类包装；其它语言原样
-        if lang == "java":
-            return f"public class Test {{\n{code}\n}}"
-        return code
-
-    def _normalize_js_wrapped(provider: CodeTransformProvider, code_wrapped: str, lang: str) -> str:
-        # 与原脚本一致：JS 先 stringify 一次，减少无关格式差异
-        if lang != "javascript":
-            return code_wrapped
-        try:
-            mroot = provider.to_mutable_tree(code_wrapped)
-            return JavaScriptStringifier().stringify(mroot)
-        except Exception:
-            return code_wrapped
-
-    def enumerate_feasible_keys_for_code(
-        provider: CodeTransformProvider,
-        parser: tree_sitter.Parser,
-        transformers,  # List[CodeTransformer]
-        lang: str,
-        source_code: str,
-    ) -> Dict[str, List[str]]:
-        """
-        返回: { transformer_name: [feasible_key, ...], ... }
-        - 单 key 可行性：code_transform 成功 + 新旧 token 有变化 + 新代码可再次解析为 mutable_tree
-        """
-        per_tf_feasible: Dict[str, List[str]] = {}
-
-        for t in transformers:
-            t_name = t.name
-            feasibles: List[str] = []
-            keys = t.get_available_transforms()
-            for key in keys:
+
+    # 与原脚本一致：JS 先 stringify 一次，减少无关格式差异
+    if lang != "javascript":
+        return code_wrapped
+    try:
+        mroot = provider.to_mutable_tree(code_wrapped)
+        return JavaScriptStringifier().stringify(mroot)
+    except Exception:
+        return code_wrapped
+
+def enumerate_feasible_keys_for_code(
+    provider: CodeTransformProvider,
+    parser: tree_sitter.Parser,
+    transformers,  # List[CodeTransformer]
+    lang: str,
+    source_code: str,
+    errors: Optional[List[str]] = None,
+) -> Dict[str, List[str]]:
+    """
+    返回: { transformer_name: [feasible_key, ...], ... }
+    - 单 key 可行性：code_transform 成功 + 新旧 token 有变化 + 新代码可再次解析为 mutable_tree
+    - errors: 若给出，记录抛异常（按不可行处理）的 key，调用方据此判断结果是否可以持久化
+    """
+    per_tf_feasible: Dict[str, List[str]] = {}
+
+    # 原始代码的 token 与 key 无关，只解析一次
+    code_wrapped = _wrap_for_lang(source_code, lang)
+    if lang == "javascript":
+        code_wrapped = _normalize_js_wrapped(provider, code_wrapped, lang)
+    old_toks = _collect_tokens(parser.parse(code_wrapped.encode("utf-8")).root_node)
+
+    for t in transformers:
+        t_name = t.name
+        feasibles: List[str] = []
+        keys = t.get_available_transforms()
+        for key in keys:
+            feasible = False
+            # 1) 单 key 尝试
+            try:
+                new_code = provider.code_transform(source_code, [key])
+            except Exception as e:
+                if errors is not None:
+                    errors.append(f"{t_name}/{key}: {type(e).__name__}: {e}")
+                continue  # 此 key 不可用
+
+            # 2) 语法树 token 对比
+            new_code_wrapped = _wrap_for_lang(new_code, lang)
+            new_code_tree = parser.parse(new_code_wrapped.encode("utf-8"))
+
+            # 3) 新代码可再次解析为 mutable_tree（语法有效）
+            try:
+                provider.to_mutable_tree(new_code)
+            except Exception as e:
+                if errors is not None:
+                    errors.append(f"{t_name}/{key}: {type(e).__name__}: {e}")
                 feasible = False
-                # 1) 单 key 尝试
-                try:
-                    new_code = provider.code_transform(source_code, [key])
-                except Exception:
-                    continue  # 此 key 不可用
-
-                # 2) 语法树 token 对比
-                code_wrapped = _wrap_for_lang(source_code, lang)
-                new_code_wrapped = _wrap_for_lang(new_code, lang)
-                if lang == "javascript":
-                    code_wrapped = _normalize_js_wrapped(provider, code_wrapped, lang)
-
-                code_tree = parser.parse(code_wrapped.encode("utf-8"))
-                new_code_tree = parser.parse(new_code_wrapped.encode("utf-8"))
-
-                # 3) 新代码可再次解析为 mutable_tree（语法有效）
-                try:
-                    provider.to_mutable_tree(new_code)
-                except Exception:
-                    feasible = False
-                    continue
-
-                old_toks = _collect_tokens(code_tree.root_node)
-                new_toks = _collect_tokens(new_code_tree.root_node)
-                if len(old_toks) != len(new_toks):
-                    feasible = True
-                else:
-                    for i in range(len(old_toks)):
-                        if old_toks[i] != new_toks[i]:
-                            feasible = True
-                            break
-
-                if feasible:
-                    feasibles.append(key)
-
-            per_tf_feasible[t_name] = feasibles
-
-        return per_tf_feasible
-
-    def enumerate_feasible_combos_for_code(
-        provider: CodeTransformProvider,
-        parser: tree_sitter.Parser,
-        transformers,  # List[CodeTransformer]
-        lang: str,
-        source_code: str,
-    ) -> List[Tuple[str, ...]]:
-        """
-        - 基于“当前源码”求每个变换器的可执行 keys；
-        - 若某变换器无可执行 key，按原脚本逻辑补上它的“第一个理论 key”兜底；
-        - 对各变换器 keys 做笛卡尔积，得到可执行组合（近似）。
-        """
-        per_tf = enumerate_feasible_keys_for_code(provider, parser, transformers, lang, source_code)
-
-        # 兜底补全
-        idict: Dict[str, List[str]] = {}
-        for t in transformers:
-            t_name = t.name
-            theoreticals = list(t.get_available_transforms())
-            feasibles = list(per_tf.get(t_name, []))
-            if len(feasibles) < len(theoreticals):
-                # 至少有一个不可行；补一个未出现过的理论 key
-                for tt in theoreticals:
-                    if tt not in feasibles:
-                        feasibles.append(tt)
+                continue
+
+            new_toks = _collect_tokens(new_code_tree.root_node)
+            if len(old_toks) != len(new_toks):
+                feasible = True
+            else:
+                for i in range(len(old_toks)):
+                    if old_toks[i] != new_toks[i]:
+                        feasible = True
                         break
-            # 若理论 keys 为空（极少见），仍保证字典中有键
-            if not feasibles and theoreticals:
-                feasibles = [theoreticals[0]]
-            idict[t_name] = feasibles
-
-        # 笛卡尔积（按 transformers 顺序）
-        combos: List[Tuple[str, ...]] = []
-        def _dfs(i: int, cur: List[str]):
-            if i == len(transformers):
-                combos.append(tuple(cur))
-                return
-            t_name = transformers[i].name
-            for k in idict[t_name]:
-                _dfs(i + 1, cur + [k])
-        _dfs(0, [])
-        return combos
-    
-    # 1) parser setup
-    parser = tree_sitter.Parser()
-    # local
-    # parser_lang = tree_sitter.Language("/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/cStyleLang/parser/languages.so", lang)
-    #server
-    parser_lang = tree_sitter.Language("/home/zrz/projects/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/cStyleLang/parser/languages.so", lang)
-    parser.set_language(parser_lang)
-    
-    # 2) 选择要用的变换器（示例仅用你的 ReposVarDecl；需要可自行增删）
-    code_transformers = [
+
+            if feasible:
+                feasibles.append(key)
+
+        per_tf_feasible[t_name] = feasibles
+
+    return per_tf_feasible
+
+def enumerate_feasible_combos_for_code(
+    provider: CodeTransformProvider,
+    parser: tree_sitter.Parser,
+    transformers,  # List[CodeTransformer]
+    lang: str,
+    source_code: str,
+    errors: Optional[List[str]] = None,
+) -> List[Tuple[str, ...]]:
+    """
+    - 基于“当前源码”求每个变换器的可执行 keys；
+    - 若某变换器无可执行 key，按原脚本逻辑补上它的“第一个理论 key”兜底；
+    - 对各变换器 keys 做笛卡尔积，得到可执行组合（近似）。
+    """
+    per_tf = enumerate_feasible_keys_for_code(provider, parser, transformers, lang, source_code, errors)
+
+    # 兜底补全
+    idict: Dict[str, List[str]] = {}
+    for t in transformers:
+        t_name = t.name
+        theoreticals = list(t.get_available_transforms())
+        feasibles = list(per_tf.get(t_name, []))
+        if len(feasibles) < len(theoreticals):
+            # 至少有一个不可行；补一个未出现过的理论 key
+            for tt in theoreticals:
+                if tt not in feasibles:
+                    feasibles.append(tt)
+                    break
+        # 若理论 keys 为空（极少见），仍保证字典中有键
+        if not feasibles and theoreticals:
+            feasibles = [theoreticals[0]]
+        idict[t_name] = feasibles
+
+    # 笛卡尔积（按 transformers 顺序）
+    combos: List[Tuple[str, ...]] = []
+    def _dfs(i: int, cur: List[str]):
+        if i == len(transformers):
+            combos.append(tuple(cur))
+            return
+        t_name = transformers[i].name
+        for k in idict[t_name]:
+            _dfs(i + 1, cur + [k])
+    _dfs(0, [])
+    return combos
+
+# --------------------------------------
+# 每个进程只构建一次 parser / provider / transformers
+# --------------------------------------
+_worker_state = None
+
+# 整行可执行组合在 transform store 中的键（与真实变换 key 不会冲突）
+FEASIBLE_COMBOS_KEY = ("__feasible_combos__",)
+
+def build_code_transformers():
+    import cStyleCodeObfuscator.mutable_tree.transformers as ast_transformers
+
+    # 选择要用的变换器
+    return [
         # NL:content 级别
         # ast_transformers.IdRenameTransformer(),
         # ast_transformers.VarNameStyleTransformer(),
@@ -185,48 +222,157 @@ def obfus(line:str, lang:str):
         ast_transformers.CondBlockSwapTransformer(),
     ]
 
-    # 3) provider
-    provider = CodeTransformProvider(lang, parser, code_transformers)
-    # print("Total theoretical combos (cartesian product over transformers):", len(provider.get_transform_keys()))
-    
-    data = json.loads(line)  # 解析 JSON 行
-    if "after_watermark" in data:  # 确保 "test" 字段存在
-        sourceCode = data["after_watermark"]
-        
-        try:
-            # 5) 基于“当前源码”计算可执行组合（近似），并选一个组合来执行
-            feasible_combos = enumerate_feasible_combos_for_code(
-                provider=provider,
-                parser=parser,
-                transformers=code_transformers,
-                lang=lang,
-                source_code=sourceCode,
-            )
-            # print(f"# feasible combos for this source: {len(feasible_combos)}")
-            # for i, combo in enumerate(feasible_combos[:5]):
-            #     print(f"[{i}] {combo}")
-                
-            # 选第 0 个可执行组合
-            selected_keys = feasible_combos[0] if feasible_combos else provider.get_transform_keys()[0]
-
-            # 6) 实际执行转换（直接用 provider；也可以把 Runner 扩展为接受 selected_keys）
-            source_prep = preprocess_code(sourceCode)  # 你的预处理
-            code_obfus = provider.code_transform(source_prep, selected_keys)
-            
-            data["after_obfus"] = code_obfus
-        except Exception as e:
-            data["after_obfus"] = ''
-            print(f'An error occurred, error: {e}')
-        
-        json_data = json.dumps(data, ensure_ascii=False)
-        return json_data
-    else:
-        return None
-    
-#
-# if you don't want to use Python module, you can import directly from the file
-#
-#from pelock.jobfuscator import JObfuscator
+def init_worker(lang: str, parser_so: str = PARSER_SO, store_path: Optional[str] = None, iterative: bool = False):
+    global _worker_state
+    parser = tree_sitter.Parser()
+    parser.set_language(tree_sitter.Language(parser_so, lang))
+    code_transformers = build_code_transformers()
+    provider = CodeTransformProvider(lang, parser, code_transformers, iterative=iterative)
+    # 递归 / 迭代遍历的可行性结论不同（深链只在递归时超限），各用一个版本号
+    store = open_transform_store(store_path, provider, salt=f"iterative={iterative}")
+    _worker_state = (lang, parser, code_transformers, provider, store)
+
+def get_feasible_combos(
+    provider: CodeTransformProvider,
+    parser: tree_sitter.Parser,
+    transformers,
+    lang: str,
+    source_code: str,
+    store: Optional[TransformStore] = None,
+) -> List[Tuple[str, ...]]:
+    # 先查 transform store，命中时完全跳过可行性枚举
+    if store is not None:
+        cached = store.get(source_code, FEASIBLE_COMBOS_KEY)
+        if cached is not None:
+            return [tuple(c) for c in cached["combos"]]
+    errors: List[str] = []
+    combos = enumerate_feasible_combos_for_code(provider, parser, transformers, lang, source_code, errors)
+    # 有 key 抛异常时结论不确定（可能只是本次环境 / 递归深度的问题），不写入 store
+    if store is not None and not errors:
+        store.put(source_code, FEASIBLE_COMBOS_KEY, {"combos": combos, "error": None})
+    return combos
+
+def obfus_line(idx: int, line: str) -> Tuple[Optional[str], dict]:
+    """
+    混淆一行 JSONL，返回 (输出行或 None, 旁路记录)；
+    旁路记录包含该行的状态、耗时、所选组合与错误信息。
+    """
+    lang, parser, code_transformers, provider, store = _worker_state
+    start = time.perf_counter()
+    meta = {"idx": idx, "status": "skipped", "combo": None, "error": None}
+
+    try:
+        data = json.loads(line)  # 解析 JSON 行
+    except ValueError as e:
+        # 坏行（例如上次中断写了一半）不中断整个任务，只在旁路记录里报错
+        meta["status"] = "error"
+        meta["error"] = f"{type(e).__name__}: {e}"
+        meta["elapsed_s"] = round(time.perf_counter() - start, 6)
+        return None, meta
+    if "after_watermark" not in data:
+        meta["elapsed_s"] = round(time.perf_counter() - start, 6)
+        return None, meta
+
+    sourceCode = data["after_watermark"]
+    try:
+        # 基于“当前源码”计算可执行组合（近似），并选一个组合来执行
+        feasible_combos = get_feasible_combos(
+            provider=provider,
+            parser=parser,
+            transformers=code_transformers,
+            lang=lang,
+            source_code=sourceCode,
+            store=store,
+        )
+        # 选第 0 个可执行组合
+        selected_keys = feasible_combos[0] if feasible_combos else provider.get_transform_keys()[0]
+        meta["combo"] = list(selected_keys)
+
+        # 实际执行转换
+        source_prep = preprocess_code(sourceCode)  # 你的预处理
+        data["after_obfus"] = cached_code_transform(store, provider, source_prep, selected_keys)
+        meta["status"] = "ok"
+    except Exception as e:
+        data["after_obfus"] = ''
+        meta["status"] = "error"
+        meta["error"] = f"{type(e).__name__}: {e}"
+
+    meta["elapsed_s"] = round(time.perf_counter() - start, 6)
+    return json.dumps(data, ensure_ascii=False), meta
+
+def obfus(line: str, lang: str):
+    # 单行接口：首次调用（或语言变化）时构建 parser / provider，之后复用
+    if _worker_state is None or _worker_state[0] != lang:
+        init_worker(lang)
+    return obfus_line(0, line)[0]
+
+# --------------------------------------
+# 断点续跑：按字节偏移记录源文件 / 输出文件 / 旁路文件的位置
+# --------------------------------------
+def load_checkpoint(ckpt_path: str, json_dest: str) -> dict:
+    if os.path.exists(ckpt_path):
+        with open(ckpt_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    ckpt = {"next_idx": 0, "src_offset": 0, "dest_offset": 0, "meta_offset": 0}
+    if os.path.exists(json_dest):
+        # 旧输出文件（无 checkpoint）：按已写行数续跑，源文件偏移需要重新定位一次
+        ckpt["next_idx"] = count_lines_in_jsonl(json_dest)
+        ckpt["dest_offset"] = os.path.getsize(json_dest)
+        ckpt["src_offset"] = None
+    return ckpt
+
+def save_checkpoint(ckpt_path: str, ckpt: dict):
+    tmp_path = ckpt_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(ckpt, f)
+    os.replace(tmp_path, ckpt_path)
+
+def _truncate(path: str, size: int):
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)
+
+def iter_src_lines(json_src: str, start_idx: int, start_offset: Optional[int]) -> Iterator[Tuple[int, str, int]]:
+    # 产出 (行号, 行内容, 该行之后的字节偏移)
+    with open(json_src, "rb") as f:
+        idx = start_idx if start_offset is not None else 0
+        offset = start_offset or 0
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            if idx >= start_idx:
+                yield idx, raw.decode("utf-8"), offset
+            idx += 1
+
+def _result_or_error(future, idx: int) -> Tuple[Optional[str], dict]:
+    # worker 崩溃（BrokenProcessPool）或任务被取消时，该行按出错处理并写入旁路记录
+    try:
+        return future.result()
+    except Exception as e:
+        meta = {"idx": idx, "status": "error", "combo": None, "error": f"{type(e).__name__}: {e}", "elapsed_s": None}
+        return None, meta
+
+def run_ordered(items, lang: str, parser_so: str, workers: int, max_inflight: int, store_path: Optional[str] = None,
+                iterative: bool = False):
+    """
+    按输入顺序产出 (输出行, 旁路记录, 源文件偏移)；
+    多进程时同时在途的行数不超过 max_inflight。
+    """
+    if workers <= 1:
+        init_worker(lang, parser_so, store_path, iterative)
+        for idx, line, offset in items:
+            yield (*obfus_line(idx, line), offset)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(lang, parser_so, store_path, iterative)) as executor:
+        pending = deque()
+        for idx, line, offset in items:
+            pending.append((executor.submit(obfus_line, idx, line), idx, offset))
+            if len(pending) >= max_inflight:
+                future, i, off = pending.popleft()
+                yield (*_result_or_error(future, i), off)
+        while pending:
+            future, i, off = pending.popleft()
+            yield (*_result_or_error(future, i), off)
 
 
 def main(args):
@@ -234,56 +380,72 @@ def main(args):
     SAMPLE = args.sample
     SSIZE = args.sample_size
     RESULT_DIR = args.result_dir
-    
-    #
-    # source code in Java format
-    #
+    WORKERS = max(1, args.workers)
+    MAX_INFLIGHT = args.max_inflight or 4 * WORKERS
+
+    json_src = args.json_src
+    json_dest = args.json_dest
+    ckpt_path = json_dest + ".ckpt"
+    meta_path = json_dest + ".meta.jsonl"
     # 创建文件夹（如果已存在，则不会报错）
-    # local
-    # json_src = "/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/testResult/4bit_gru_srcmarker_42_csn_java_test.jsonl"
-    # json_dest = "/home/zrz/Projects/GitRepo/Repo/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/obfusResult/4bit_gru_srcmarker_42_csn_java_obfus_ALL.jsonl"
-    # server
-    json_src = "/home/zrz/projects/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/testResult/4bit_gru_codemark_42_github_java_funcs_test.jsonl"
-    json_dest = "/home/zrz/projects/Python_Projects/VSCode/Python/CodeWM_AutoTest/2_Robustness/project/srcMarker/obfusResult/4bit_gru_codemark_42_github_java_funcs_obfus_AL2.jsonl"
     os.makedirs(RESULT_DIR, exist_ok=True)
-    #读取log计数文件中已经执行到的位置
-    if os.path.exists(json_dest):
-        cur_idx = count_lines_in_jsonl(json_dest)
-    else:
-        cur_idx = 0
-    print(cur_idx)
+    os.makedirs(os.path.dirname(os.path.abspath(json_dest)), exist_ok=True)
 
-    raw_lines = []
-    with open(json_src, "r", encoding="utf-8") as f:
-        for line in f:
-            raw_lines.append(line)
+    # 读取 checkpoint，丢弃上次中断时未被 checkpoint 覆盖的输出
+    ckpt = load_checkpoint(ckpt_path, json_dest)
+    _truncate(json_dest, ckpt["dest_offset"])
+    _truncate(meta_path, ckpt["meta_offset"])
+    cur_idx = ckpt["next_idx"]
+    print(cur_idx)
 
-    
     if SAMPLE:
-        #若进行采样，则选取采样数据后进行混淆
+        #若进行采样，则选取采样数据后进行混淆（需要读入全部行排序）
+        with open(json_src, "r", encoding="utf-8") as f:
+            raw_lines = f.readlines()
         json_lines = sorted(
             (line for line in raw_lines if len(json.loads(line).get("after_watermark", "")) <= MXLEN),
             key=lambda x: len(json.loads(x).get("after_watermark", "")),
             reverse=True
         )
         json_lines = json_lines[:SSIZE]
+        items = ((idx, line, 0) for idx, line in enumerate(json_lines) if idx >= cur_idx)
+        pbar = tqdm(total=len(json_lines), initial=cur_idx, desc="Processing lines", unit="line")
     else:
-        json_lines = raw_lines
-    
-    for idx, line in tqdm(enumerate(json_lines),
-                          total=len(json_lines),
-                          desc="Processing lines", 
-                          unit="line"):
-        if idx < cur_idx:
-            continue
-        json_data = obfus(line, lang="java")
-        if json_data:
-            with open(json_dest, "a", encoding="utf-8") as f:           
-                f.write(json_data + '\n')
-        # time.sleep(random.randint(1, 3))
+        items = iter_src_lines(json_src, cur_idx, ckpt["src_offset"])
+        pbar = tqdm(total=os.path.getsize(json_src), initial=ckpt["src_offset"] or 0,
+                    desc="Processing lines", unit="B", unit_scale=True)
+
+    n_since_ckpt = 0
+    last_offset = ckpt["src_offset"] or 0
+    with open(json_dest, "ab", buffering=1 << 20) as out, open(meta_path, "ab", buffering=1 << 20) as meta_out:
+        for json_data, meta, offset in run_ordered(items, args.lang, args.parser_so, WORKERS, MAX_INFLIGHT, args.transform_store,
+                                                     args.iterative):
+            if json_data:
+                out.write((json_data + "\n").encode("utf-8"))
+            meta_out.write((json.dumps(meta, ensure_ascii=False) + "\n").encode("utf-8"))
+
+            pbar.update(1 if SAMPLE else offset - last_offset)
+            last_offset = offset
+            ckpt["next_idx"] = meta["idx"] + 1
+            ckpt["src_offset"] = offset
+            n_since_ckpt += 1
+            if n_since_ckpt >= args.ckpt_every:
+                out.flush()
+                meta_out.flush()
+                ckpt["dest_offset"] = out.tell()
+                ckpt["meta_offset"] = meta_out.tell()
+                save_checkpoint(ckpt_path, ckpt)
+                n_since_ckpt = 0
+
+        out.flush()
+        meta_out.flush()
+        ckpt["dest_offset"] = out.tell()
+        ckpt["meta_offset"] = meta_out.tell()
+        save_checkpoint(ckpt_path, ckpt)
+    pbar.close()
 
 
 
 if __name__ == "__main__":
     args = parse_args()
-    main(args)
\ No newline at end of file
+    main(args)
@@ -29,6 +29,7 @@ from code_tokenizer import tokens_to_strings
 from eval_utils import JitAdversarialTransformProvider, compute_msg_acc
 from code_transform_provider import CodeTransformProvider
 from runtime_data_manager import InMemoryJitRuntimeDataManager
+from transform_store import open_transform_store
 from data_processing import JsonlWMDatasetProcessor_obfus, DynamicWMCollator
 from logger_setup import setup_evaluation_logger
 import mutable_tree.transformers as ast_transformers
@@ -68,6 +69,7 @@ def parse_args_for_evaluation():
     parser.add_argument("--output_dir", type=str, default="./results_obfus")
     
     parser.add_argument("--output_filename", type=str)
+    parser.add_argument("--transform_store", type=str, default=None)
     return parser.parse_args()
 
 def write_to_file(file: str, filtered_data: list):
@@ -148,7 +150,10 @@ def main(args):
     print(f"  valid size: {len(vmask) - sum(vmask)}")
 
     transform_manager = InMemoryJitRuntimeDataManager(
-        transform_computer, test_instances, LANG
+        transform_computer,
+        test_instances,
+        LANG,
+        transform_store=open_transform_store(args.transform_store, transform_computer),
     )
     transform_manager.register_vocab(vocab)
     transform_manager.load_transform_mask(
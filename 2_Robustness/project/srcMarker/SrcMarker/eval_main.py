@@ -27,7 +27,12 @@ from metrics.syntax_match import check_tree_validity
 from code_tokenizer import tokens_to_strings
 from eval_utils import JitAdversarialTransformProvider, compute_msg_acc
 from code_transform_provider import CodeTransformProvider
-from runtime_data_manager import InMemoryJitRuntimeDataManager
+from runtime_data_manager import (
+    InMemoryJitRuntimeDataManager,
+    DEFAULT_JIT_CACHE_SIZE,
+    parse_cache_size,
+)
+from transform_store import open_transform_store
 from data_processing import JsonlWMDatasetProcessor, DynamicWMCollator
 from logger_setup import setup_evaluation_logger
 import mutable_tree.transformers as ast_transformers
@@ -63,6 +68,11 @@ def parse_args_for_evaluation():
     parser.add_argument(
         "--var_transform_mode", choices=["replace", "append"], default="replace"
     )
+    parser.add_argument("--jit_workers", type=int, default=0)
+    parser.add_argument(
+        "--jit_cache_size", type=parse_cache_size, default=DEFAULT_JIT_CACHE_SIZE
+    )  # "none": unbounded
+    parser.add_argument("--transform_store", type=str, default=None)
 
     parser.add_argument("--write_output", action="store_true")
 
@@ -137,7 +147,12 @@ def main(args):
     print(f"  valid size: {len(vmask) - sum(vmask)}")
 
     transform_manager = InMemoryJitRuntimeDataManager(
-        transform_computer, test_instances, LANG
+        transform_computer,
+        test_instances,
+        LANG,
+        num_workers=args.jit_workers,
+        cache_size=args.jit_cache_size,
+        transform_store=open_transform_store(args.transform_store, transform_computer),
     )
     transform_manager.register_vocab(vocab)
     transform_manager.load_transform_mask(
@@ -570,6 +585,9 @@ def main(args):
         avg_total_time = tot_embed_time / n_samples + tot_extract_time / n_samples
         logger.info(f"Average Total Time: {avg_total_time:.4f}")
 
+    logger.info(f"JIT transform cache: {transform_manager.get_cache_stats()}")
+    transform_manager.close()
+
     assert len(test_instances) == len(new_test_objs)
     ckpt_name = os.path.basename(os.path.dirname(args.checkpoint_path))
     if not os.path.exists("./results"):
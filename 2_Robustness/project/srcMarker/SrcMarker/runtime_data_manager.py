@@ -1,7 +1,11 @@
 import json
 import random
+import multiprocessing
 from transformers import RobertaTokenizer
 from copy import deepcopy
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Tuple, Dict, Optional
 
 from code_tokenizer import CodeTokenizer
@@ -13,6 +17,128 @@ from data_processing import (
     CodeVocab,
 )
 from ropgen_transform.py.var_name_style import normalize_name
+from transform_store import TransformStore
+
+
+def _transform_and_tokenize(
+    transform_computer: CodeTransformProvider,
+    code_tokenizer: CodeTokenizer,
+    code: str,
+    keys: Tuple,
+    store: Optional[TransformStore] = None,
+):
+    # failures are returned rather than raised so that the caller decides
+    # whether to fall back to the original code
+    if store is not None:
+        value = store.get(code, keys)
+        # entries with an error come from older stores and are recomputed
+        if value is not None and "tokens" in value and value["error"] is None:
+            return value["code"], value["source_tokens"], value["tokens"], None
+
+    error = None
+    try:
+        transformed_code = transform_computer.code_transform(code, keys)
+    except Exception as e:
+        error = e
+        transformed_code = code
+    code_tokens, word_tokens = code_tokenizer.get_tokens(transformed_code)
+
+    # failures are not persisted: they may come from a transient condition
+    if store is not None and error is None:
+        store.put(
+            code,
+            keys,
+            {
+                "code": transformed_code,
+                "source_tokens": code_tokens,
+                "tokens": word_tokens,
+                "error": None,
+            },
+        )
+    return transformed_code, code_tokens, word_tokens, error
+
+
+_worker_state = None
+
+# default bound of the in-memory cache of transformed instances; every
+# (instance, transform) pair seen in an epoch would otherwise stay resident
+DEFAULT_JIT_CACHE_SIZE = 100_000
+
+
+def parse_cache_size(value: str) -> Optional[int]:
+    """argparse type for --jit_cache_size: a non-negative int, or "none" for unbounded"""
+    if value.lower() == "none":
+        return None
+    size = int(value)
+    if size < 0:
+        raise ValueError(f"cache size must be >= 0 or none, got {value}")
+    return size
+
+
+def _init_jit_worker(
+    transform_computer: CodeTransformProvider,
+    code_tokenizer: CodeTokenizer,
+    store: Optional[TransformStore],
+):
+    # workers are forked, so the parser and transformers are inherited
+    # instead of being pickled
+    global _worker_state
+    _worker_state = (transform_computer, code_tokenizer, store)
+
+
+def _jit_worker(code: str, keys: Tuple):
+    transform_computer, code_tokenizer, store = _worker_state
+    return _transform_and_tokenize(
+        transform_computer, code_tokenizer, code, keys, store
+    )
+
+
+class TransformCache:
+    """LRU cache of transformed instances keyed by (instance_id, transform_id)"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple[str, int]):
+        return key in self._entries
+
+    def get(self, key: Tuple[str, int]) -> Optional[DataInstance]:
+        instance = self._entries.get(key)
+        if instance is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return instance
+
+    def put(self, key: Tuple[str, int], instance: DataInstance):
+        self._entries[key] = instance
+        self._entries.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
 
 
 class InMemoryJitRuntimeDataManager:
@@ -21,6 +147,10 @@ class InMemoryJitRuntimeDataManager:
         transform_computer: CodeTransformProvider,
         original_instances: List[DataInstance],
         lang: str = "c",
+        num_workers: int = 0,
+        cache_size: Optional[int] = DEFAULT_JIT_CACHE_SIZE,
+        max_pending: int = 4096,
+        transform_store: Optional[TransformStore] = None,
     ):
         self.original_instances = {
             instance.id: instance for instance in original_instances
@@ -40,7 +170,20 @@ class InMemoryJitRuntimeDataManager:
             k: i for i, k in enumerate(self.all_transform_keys)
         }
 
-        self.transformed_instances = dict()
+        # LRU-bounded; cache_size=None keeps every transformed instance
+        self.transformed_instances = TransformCache(cache_size)
+        # persistent results shared across runs, consulted before transforming
+        self.transform_store = transform_store
+
+        # background transforms, keyed by (instance_id, transform_id); the
+        # submitted source is kept to make sure a prefetched result is only
+        # used for the code it was computed from
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[Tuple[str, int], Tuple[str, Future]] = dict()
+        self.prefetch_submitted = 0
+        self.prefetch_hits = 0
 
         self.tokenizer: RobertaTokenizer = None
 
@@ -75,19 +218,70 @@ class InMemoryJitRuntimeDataManager:
     def get_original_instances(self, instance_ids: List[str]) -> List[DataInstance]:
         return [self.get_original_instance(instance_id) for instance_id in instance_ids]
 
-    def _jit_transform(self, instance: DataInstance, key_id: int):
-        keys = self.all_transform_keys[key_id]
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.num_workers <= 0:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_jit_worker,
+                initargs=(
+                    self.transform_computer,
+                    self.code_tokenizer,
+                    self.transform_store,
+                ),
+            )
+        return self._pool
 
-        code = instance.source
-        try:
-            transformed_code = self.transform_computer.code_transform(code, keys)
-        except Exception as e:
+    def _submit(self, code: str, key_id: int) -> Future:
+        keys = self.all_transform_keys[key_id]
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                return pool.submit(_jit_worker, code, keys)
+            except BrokenProcessPool:
+                # a worker died earlier; its futures fail on their own, later
+                # transforms go to a fresh pool
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                return self._get_pool().submit(_jit_worker, code, keys)
+
+        future = Future()
+        future.set_result(
+            _transform_and_tokenize(
+                self.transform_computer,
+                self.code_tokenizer,
+                code,
+                keys,
+                self.transform_store,
+            )
+        )
+        return future
+
+    def _take_pending(self, instance: DataInstance, key_id: int) -> Optional[Future]:
+        pending = self._pending.pop((instance.id, key_id), None)
+        if pending is None:
+            return None
+        source, future = pending
+        if source != instance.source:
+            future.cancel()
+            return None
+        self.prefetch_hits += 1
+        return future
+
+    def _build_transformed_instance(
+        self, instance: DataInstance, key_id: int, result: Tuple, fallback: bool
+    ) -> DataInstance:
+        keys = self.all_transform_keys[key_id]
+        transformed_code, code_tokens, word_tokens, error = result
+        if error is not None:
+            if not fallback:
+                raise error
             print(f"JIT Code Transformation Failed")
-            print(f"Error: {e}")
-            print(f"Code: {code}")
+            print(f"Error: {error}")
+            print(f"Code: {instance.source}")
             print(f"Keys: {keys}")
-            transformed_code = code
-        code_tokens, word_tokens = self.code_tokenizer.get_tokens(transformed_code)
         return DataInstance(
             id=instance.id,
             source=transformed_code,
@@ -97,22 +291,91 @@ class InMemoryJitRuntimeDataManager:
             task_label=instance.task_label,
         )
 
+    def _jit_transform_batch(
+        self,
+        instances: List[DataInstance],
+        selected_transforms: List[int],
+        fallback: bool = True,
+        lost: Optional[List[int]] = None,
+    ) -> List[DataInstance]:
+        # lost, if given, collects the positions whose worker crashed or whose
+        # future was cancelled: their fallback must not be cached
+        # submit everything first so that the whole batch is transformed
+        # concurrently when a worker pool is available
+        futures = []
+        for instance, tid in zip(instances, selected_transforms):
+            future = self._take_pending(instance, tid)
+            if future is None:
+                future = self._submit(instance.source, tid)
+            futures.append(future)
+
+        results = []
+        for i, (instance, tid, future) in enumerate(
+            zip(instances, selected_transforms, futures)
+        ):
+            # a crashed worker or a cancelled future is treated like a failed
+            # transform, so that fallback keeps the original code
+            try:
+                result = future.result()
+            except Exception as e:
+                code_tokens, word_tokens = self.code_tokenizer.get_tokens(
+                    instance.source
+                )
+                result = (instance.source, code_tokens, word_tokens, e)
+                if lost is not None:
+                    lost.append(i)
+            results.append(
+                self._build_transformed_instance(instance, tid, result, fallback)
+            )
+        return results
+
+    def _jit_transform(self, instance: DataInstance, key_id: int):
+        return self._jit_transform_batch([instance], [key_id])[0]
+
     def _jit_transform_by_instance_id(self, instance_id: str, key_id: int):
-        keys = self.all_transform_keys[key_id]
         original_instance = self.get_original_instance(instance_id)
         assert original_instance.id == instance_id
+        return self._jit_transform_batch([original_instance], [key_id], False)[0]
 
-        code = original_instance.source
-        transformed_code = self.transform_computer.code_transform(code, keys)
-        code_tokens, word_tokens = self.code_tokenizer.get_tokens(transformed_code)
-        return DataInstance(
-            id=instance_id,
-            source=transformed_code,
-            source_tokens=code_tokens,
-            tokens=word_tokens,
-            transform_keys=keys,
-            task_label=original_instance.task_label,
-        )
+    def prefetch(self, instances: List[DataInstance], selected_transforms: List[int]):
+        """Start transforming upcoming instances in the background.
+
+        Results are picked up by the next ``transform_on_instances`` or
+        ``get_transformed_codes_by_pred`` call that asks for the same
+        (instance, transform) pair. This is a no-op without a worker pool.
+        """
+        if self._get_pool() is None:
+            return
+
+        for instance, tid in zip(instances, selected_transforms):
+            key = (instance.id, tid)
+            if key in self._pending or key in self.transformed_instances:
+                continue
+            self._pending[key] = (instance.source, self._submit(instance.source, tid))
+            self.prefetch_submitted += 1
+
+        # drop the oldest prefetches that were never asked for
+        while len(self._pending) > self.max_pending:
+            _, future = self._pending.pop(next(iter(self._pending)))
+            future.cancel()
+
+    def get_cache_stats(self) -> Dict:
+        stats = self.transformed_instances.stats()
+        stats["prefetch_submitted"] = self.prefetch_submitted
+        stats["prefetch_hits"] = self.prefetch_hits
+        stats["prefetch_pending"] = len(self._pending)
+        if self.transform_store is not None:
+            # lookups made in worker processes are not counted here
+            stats["store"] = self.transform_store.stats()
+        return stats
+
+    def close(self):
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
 
     def register_transformed_codes(self, instances: List[DataInstance]):
         for instance in instances:
@@ -122,41 +385,48 @@ class InMemoryJitRuntimeDataManager:
             transform_keys = instance.transform_keys
             assert transform_keys is not None
             transform_id = self.transform_key_to_idx[tuple(transform_keys)]
+            self.transformed_instances.put((instance_id, transform_id), instance)
 
-            if instance_id not in self.transformed_instances:
-                self.transformed_instances[instance_id] = dict()
-            instance_dict = self.transformed_instances[instance_id]
-
-            assert transform_id not in instance_dict
-            instance_dict[transform_id] = instance
+    def _get_cached_transforms(
+        self,
+        instances: List[DataInstance],
+        selected_transforms: List[int],
+        fallback: bool,
+    ) -> List[DataInstance]:
+        results = []
+        missing = []
+        for i, (instance, tid) in enumerate(zip(instances, selected_transforms)):
+            cached = self.transformed_instances.get((instance.id, tid))
+            results.append(cached)
+            if cached is None:
+                missing.append(i)
+
+        # a batch may ask for the same pair more than once
+        to_jit = dict()
+        for i in missing:
+            to_jit.setdefault((instances[i].id, selected_transforms[i]), i)
+        lost = []
+        transformed = self._jit_transform_batch(
+            [instances[i] for i in to_jit.values()],
+            [selected_transforms[i] for i in to_jit.values()],
+            fallback,
+            lost,
+        )
+        lost = set(lost)
+        self.register_transformed_codes(
+            [inst for i, inst in enumerate(transformed) if i not in lost]
+        )
 
-    def _get_cached_transformed_instances(
-        self, instance_id: str, selected_transform: int
-    ) -> DataInstance:
-        instances = self.transformed_instances[instance_id]
-        return instances[selected_transform]
+        by_key = dict(zip(to_jit.keys(), transformed))
+        for i in missing:
+            results[i] = by_key[(instances[i].id, selected_transforms[i])]
+        return results
 
     def transform_code_by_pred(
         self, instances: List[DataInstance], selected_transforms: List[int]
     ) -> List[DataInstance]:
         # jit code transform
-        new_instances = []
-        for instance, tid in zip(instances, selected_transforms):
-            keys = self.all_transform_keys[tid]
-            code = instance.source
-            transformed_code = self.transform_computer.code_transform(code, keys)
-            code_tokens, word_tokens = self.code_tokenizer.get_tokens(transformed_code)
-            new_instances.append(
-                DataInstance(
-                    id=instance.id,
-                    source=transformed_code,
-                    source_tokens=code_tokens,
-                    tokens=word_tokens,
-                    transform_keys=keys,
-                    task_label=instance.task_label,
-                )
-            )
-        return new_instances
+        return self._jit_transform_batch(instances, selected_transforms, False)
 
     def transform_on_instances(
         self,
@@ -165,55 +435,16 @@ class InMemoryJitRuntimeDataManager:
         allow_cache: bool = False,
     ) -> List[DataInstance]:
         if allow_cache:
-            instance_ids = [instance.id for instance in instances]
-            instances_to_jit = []
-            for instance, tid in zip(instances, selected_transforms):
-                if (
-                    instance.id not in self.transformed_instances
-                    or tid not in self.transformed_instances[instance.id]
-                ):
-                    instances_to_jit.append((instance, tid))
-
-            transformed_instances = []
-            for instance, tid in instances_to_jit:
-                transformed_instances.append(self._jit_transform(instance, tid))
-            self.register_transformed_codes(transformed_instances)
-
-            # collect results
-            instances = []
-            for iid, tid in zip(instance_ids, selected_transforms):
-                instances.append(self._get_cached_transformed_instances(iid, tid))
-
-            return instances
+            return self._get_cached_transforms(instances, selected_transforms, True)
         else:
-            transformed_instances = []
-            for instance, tid in zip(instances, selected_transforms):
-                transformed_instances.append(self._jit_transform(instance, tid))
-            return transformed_instances
+            return self._jit_transform_batch(instances, selected_transforms)
 
     def get_transformed_codes_by_pred(
         self, instance_ids: List[str], selected_transforms: List[int]
     ) -> List[DataInstance]:
         # jit code transform
-        instances_to_jit = []
-        for iid, tid in zip(instance_ids, selected_transforms):
-            if (
-                iid not in self.transformed_instances
-                or tid not in self.transformed_instances[iid]
-            ):
-                instances_to_jit.append((iid, tid))
-
-        transformed_instances = []
-        for iid, tid in instances_to_jit:
-            transformed_instances.append(self._jit_transform_by_instance_id(iid, tid))
-        self.register_transformed_codes(transformed_instances)
-
-        # collect results
-        instances = []
-        for iid, tid in zip(instance_ids, selected_transforms):
-            instances.append(self._get_cached_transformed_instances(iid, tid))
-
-        return instances
+        instances = self.get_original_instances(instance_ids)
+        return self._get_cached_transforms(instances, selected_transforms, False)
 
     def _jit_varname_substitution(
         self,
@@ -22,7 +22,12 @@ from models import (
 )
 
 from code_transform_provider import CodeTransformProvider
-from runtime_data_manager import InMemoryJitRuntimeDataManager
+from runtime_data_manager import (
+    InMemoryJitRuntimeDataManager,
+    DEFAULT_JIT_CACHE_SIZE,
+    parse_cache_size,
+)
+from transform_store import open_transform_store
 from trainers import UltimateWMTrainer, UltimateVarWMTrainer, UltimateTransformTrainer
 from data_processing import JsonlWMDatasetProcessor, DynamicWMCollator
 import mutable_tree.transformers as ast_transformers
@@ -56,6 +61,11 @@ def parse_args():
     parser.add_argument(
         "--var_transform_mode", choices=["replace", "append"], default="replace"
     )
+    parser.add_argument("--jit_workers", type=int, default=0)
+    parser.add_argument(
+        "--jit_cache_size", type=parse_cache_size, default=DEFAULT_JIT_CACHE_SIZE
+    )  # "none": unbounded
+    parser.add_argument("--transform_store", type=str, default=None)
 
     return parser.parse_args()
 
@@ -119,7 +129,12 @@ def main():
     ]
     transform_computer = CodeTransformProvider(LANG, parser, code_transformers)
     transform_manager = InMemoryJitRuntimeDataManager(
-        transform_computer, all_instances, lang=LANG
+        transform_computer,
+        all_instances,
+        lang=LANG,
+        num_workers=args.jit_workers,
+        cache_size=args.jit_cache_size,
+        transform_store=open_transform_store(args.transform_store, transform_computer),
     )
     transform_manager.register_vocab(vocab)
     transform_manager.load_transform_mask(f"datasets/feasible_transform_{DATASET}.json")
@@ -337,6 +352,8 @@ def main():
         logger.info(f"var mask enabled: {not args.var_nomask}")
 
     trainer.do_train(N_EPOCHS)
+    logger.info(f"JIT transform cache: {transform_manager.get_cache_stats()}")
+    transform_manager.close()
 
 
 if __name__ == "__main__":
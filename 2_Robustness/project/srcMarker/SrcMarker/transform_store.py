@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Sequence
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transforms (
+    version TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    combo TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (version, source_hash, combo)
+) WITHOUT ROWID
+"""
+
+
+def source_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def combo_key(keys: Sequence[str]) -> str:
+    return json.dumps(list(keys), ensure_ascii=False)
+
+
+@lru_cache(maxsize=None)
+def _package_digest(module_name: str) -> str:
+    # hash every source file of the mutable_tree package a transformer lives in,
+    # so that editing transformers, adaptors or stringifiers invalidates entries
+    parts = module_name.split(".")
+    if "mutable_tree" in parts:
+        module_name = ".".join(parts[: parts.index("mutable_tree") + 1])
+    module = sys.modules.get(module_name)
+    if module is None:
+        return ""
+
+    h = hashlib.sha1()
+    if hasattr(module, "__path__"):
+        root = list(module.__path__)[0]
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for fname in sorted(filenames):
+                if not fname.endswith(".py"):
+                    continue
+                fpath = os.path.join(dirpath, fname)
+                h.update(os.path.relpath(fpath, root).encode("utf-8"))
+                with open(fpath, "rb") as f:
+                    h.update(f.read())
+    elif getattr(module, "__file__", None):
+        with open(module.__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def transformer_set_version(provider, salt: str = "") -> str:
+    """
+    version tag of a CodeTransformProvider: language, transformer classes,
+    their available keys and the source of the package they come from
+    """
+    h = hashlib.sha1()
+    h.update(provider.lang.encode("utf-8"))
+    pipeline = getattr(provider, "pipeline", None)
+    if pipeline is not None:
+        for name in pipeline.get_transformer_names():
+            transformer = pipeline.get_transformer(name)
+            cls = type(transformer)
+            desc = f"{cls.__module__}.{cls.__qualname__}:{name}:"
+            desc += combo_key(transformer.get_available_transforms())
+            h.update(desc.encode("utf-8"))
+            h.update(_package_digest(cls.__module__).encode("utf-8"))
+    else:
+        h.update(json.dumps(provider.get_transform_keys()).encode("utf-8"))
+    h.update(salt.encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class TransformStore:
+    """
+    content-addressed on-disk cache of transform results shared across runs,
+    keyed by (transformer-set version, source hash, transform combo).
+
+    backed by SQLite in WAL mode, so any number of processes can read while
+    one of them writes. values are JSON objects chosen by the caller.
+    """
+
+    def __init__(self, path: str, version: str):
+        self.path = path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._local = threading.local()
+
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        self._conn().execute(_SCHEMA)
+
+    def __getstate__(self):
+        # connections cannot be pickled; workers open their own
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not be shared across threads or forks
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, code: str, keys: Sequence[str]) -> Optional[Dict]:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT value FROM transforms "
+                "WHERE version = ? AND source_hash = ? AND combo = ?",
+                (self.version, source_hash(code), combo_key(keys)),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, code: str, keys: Sequence[str], value: Dict):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO transforms VALUES (?, ?, ?, ?)",
+            (
+                self.version,
+                source_hash(code),
+                combo_key(keys),
+                json.dumps(value, ensure_ascii=False),
+            ),
+        )
+        self.writes += 1
+
+    def __len__(self):
+        row = (
+            self._conn()
+            .execute("SELECT COUNT(*) FROM transforms WHERE version = ?", (self.version,))
+            .fetchone()
+        )
+        return row[0]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+
+
+def is_deterministic(provider) -> bool:
+    """
+    whether every transformer of a provider gives the same output for the same
+    (code, combo); transformers mark themselves with deterministic = False when
+    they draw from an unseeded RNG, those without the attribute are rule-based
+    """
+    pipeline = getattr(provider, "pipeline", None)
+    if pipeline is None:
+        return True
+    return all(
+        getattr(pipeline.get_transformer(name), "deterministic", True)
+        for name in pipeline.get_transformer_names()
+    )
+
+
+def open_transform_store(
+    path: Optional[str], provider, salt: str = ""
+) -> Optional[TransformStore]:
+    """
+    a provider with nondeterministic transformers gets no store: a cached result
+    would just freeze a single random draw. keying by a run seed is not enough,
+    those transformers draw from their own random.Random instances and even a
+    global random.seed would make each result depend on the order of calls
+    """
+    if not path:
+        return None
+    if not is_deterministic(provider):
+        print(f"transform store {path} disabled: nondeterministic transformers")
+        return None
+    return TransformStore(path, transformer_set_version(provider, salt))
+
+
+def cached_code_transform(
+    store: Optional[TransformStore], provider, code: str, keys: Sequence[str]
+) -> str:
+    """provider.code_transform, consulting the store first; failures are not cached"""
+    if store is None:
+        return provider.code_transform(code, keys)
+
+    value = store.get(code, keys)
+    # entries with an error come from older stores and are recomputed
+    if value is not None and value.get("error") is None:
+        return value["code"]
+
+    transformed_code = provider.code_transform(code, keys)
+    store.put(code, keys, {"code": transformed_code, "error": None})
+    return transformed_code
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+预热 transform store：提前把（源码, 变换组合）的结果写入磁盘缓存，
+之后的训练 / 评估 / 混淆运行直接命中缓存，跳过变换。
+
+  # 训练 / 评估用的 JIT 变换（按 feasible_transform_*.json 中的全部可行组合）
+  python warm_transform_store.py jit --lang java --dataset csn_java \\
+      --dataset_dir ./datasets/csn_java --transform_store ./cache/transforms.db
+
+  # 1_obfus.py 使用的可行性枚举与混淆结果
+  python warm_transform_store.py obfus --lang java --json_src <file.jsonl> \\
+      --transform_store ./cache/transforms.db
+"""
+import os
+import time
+import importlib
+from tqdm import tqdm
+from argparse import ArgumentParser
+
+
+def parse_args():
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    jit = subparsers.add_parser("jit")
+    jit.add_argument("--lang", choices=["cpp", "java", "javascript"], default="c")
+    jit.add_argument(
+        "--dataset",
+        choices=["github_c_funcs", "github_java_funcs", "csn_java", "csn_js"],
+        default="github_c_funcs",
+    )
+    jit.add_argument("--dataset_dir", type=str, default="./datasets/github_c_funcs")
+    jit.add_argument(
+        "--splits", nargs="+", default=["train", "valid", "test"], help="数据集划分"
+    )
+    jit.add_argument("--parser_so", type=str, default="./parser/languages.so")
+    jit.add_argument("--transform_store", type=str, required=True)
+    jit.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    jit.add_argument("--chunk_size", type=int, default=256)
+
+    obfus = subparsers.add_parser("obfus")
+    obfus.add_argument("--lang", choices=["cpp", "java", "javascript"], default="java")
+    obfus.add_argument("--json_src", type=str, required=True)
+    obfus.add_argument("--parser_so", type=str, default=None)
+    obfus.add_argument("--transform_store", type=str, required=True)
+    obfus.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    obfus.add_argument("--max_inflight", type=int, default=None)
+    # 须与 1_obfus.py 的 --iterative 一致，两者使用不同的缓存版本
+    obfus.add_argument("--iterative", action="store_true")
+
+    return parser.parse_args()
+
+
+def warm_jit(args):
+    import tree_sitter
+    import mutable_tree.transformers as ast_transformers
+    from code_transform_provider import CodeTransformProvider
+    from data_processing import JsonlWMDatasetProcessor
+    from runtime_data_manager import InMemoryJitRuntimeDataManager
+    from transform_store import open_transform_store
+
+    dataset_processor = JsonlWMDatasetProcessor(lang=args.lang)
+    instance_dict = dataset_processor.load_jsonls(args.dataset_dir)
+    instances = []
+    for split in args.splits:
+        instances.extend(instance_dict[split])
+
+    # 与 train_main.py / eval_main.py 保持一致；
+    # 变换器集合不同会得到不同的版本号，只会导致缓存未命中而不会串用结果
+    parser = tree_sitter.Parser()
+    parser.set_language(tree_sitter.Language(args.parser_so, args.lang))
+    code_transformers = [
+        ast_transformers.IfBlockSwapTransformer(),
+        ast_transformers.CompoundIfTransformer(),
+        ast_transformers.ConditionTransformer(),
+        ast_transformers.LoopTransformer(),
+        ast_transformers.InfiniteLoopTransformer(),
+        ast_transformers.UpdateTransformer(),
+        ast_transformers.SameTypeDeclarationTransformer(),
+        ast_transformers.VarDeclLocationTransformer(),
+        ast_transformers.VarInitTransformer(),
+        ast_transformers.VarNameStyleTransformer(),
+    ]
+    transform_computer = CodeTransformProvider(args.lang, parser, code_transformers)
+    store = open_transform_store(args.transform_store, transform_computer)
+    if store is None:
+        # 变换器集合不允许缓存时预热没有意义
+        print("Nothing to warm: transform store refused for this transformer set")
+        return
+    transform_manager = InMemoryJitRuntimeDataManager(
+        transform_computer,
+        instances,
+        args.lang,
+        num_workers=args.workers if args.workers > 1 else 0,
+        cache_size=0,
+        transform_store=store,
+    )
+    transform_manager.load_transform_mask(
+        f"./datasets/feasible_transform_{args.dataset}.json"
+    )
+
+    pairs = []
+    for instance in instances:
+        for tid in transform_manager.get_feasible_transform_ids([instance.id])[0]:
+            pairs.append((instance, tid))
+    print(f"Instances: {len(instances)}, (instance, transform) pairs: {len(pairs)}")
+
+    start = time.time()
+    chunks = [
+        pairs[i : i + args.chunk_size] for i in range(0, len(pairs), args.chunk_size)
+    ]
+    for i, chunk in enumerate(tqdm(chunks, desc="Warming")):
+        # 下一块先交给进程池，主进程收取当前块结果时 worker 不空闲
+        if i + 1 < len(chunks):
+            transform_manager.prefetch(
+                [instance for instance, _ in chunks[i + 1]],
+                [tid for _, tid in chunks[i + 1]],
+            )
+        transform_manager.transform_on_instances(
+            [instance for instance, _ in chunk], [tid for _, tid in chunk]
+        )
+    transform_manager.close()
+    print(f"Done in {time.time() - start:.1f}s, store size: {len(store)}")
+
+
+def warm_obfus(args):
+    # 1_obfus.py 的文件名不能直接 import
+    obfus = importlib.import_module("1_obfus")
+    parser_so = args.parser_so or obfus.PARSER_SO
+    workers = max(1, args.workers)
+    max_inflight = args.max_inflight or 4 * workers
+
+    items = obfus.iter_src_lines(args.json_src, 0, 0)
+    status = {}
+    start = time.time()
+    pbar = tqdm(total=os.path.getsize(args.json_src), unit="B", unit_scale=True)
+    last_offset = 0
+    for _, meta, offset in obfus.run_ordered(
+        items, args.lang, parser_so, workers, max_inflight, args.transform_store,
+        args.iterative,
+    ):
+        status[meta["status"]] = status.get(meta["status"], 0) + 1
+        pbar.update(offset - last_offset)
+        last_offset = offset
+    pbar.close()
+    print(f"Done in {time.time() - start:.1f}s, status: {status}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.mode == "jit":
+        warm_jit(args)
+    else:
+        warm_obfus(args)